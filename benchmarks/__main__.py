@@ -0,0 +1,92 @@
+"""Hot-path microbenchmarks, gated against a committed baseline.
+
+    python -m benchmarks                  # run all, compare, exit 1 on regression
+    python -m benchmarks -k viterbi       # only cases whose name contains it
+    python -m benchmarks --update         # re-record the baseline on this machine
+
+Every case runs offline (stub clients, a virtual clock, synthetic audio, seeded
+stand-in graphs).  Times are per call, in microseconds; p50 and p99 are gated
+against ``benchmarks/baseline.json`` with the tolerance band it records.  The
+baseline is only meaningful on the machine that recorded it: re-record it
+before a comparison on any other.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks import harness  # noqa: E402
+from benchmarks.cases import CASES  # noqa: E402
+
+
+def run(cases, out=print) -> tuple:
+    results, skipped = {}, {}
+    for case in cases:
+        try:
+            times = harness.measure(case)
+        except harness.Unavailable as reason:
+            skipped[case.name] = str(reason)
+            out(f'{case.name:40s} skipped: {reason}')
+            continue
+        row = harness.summarise(times)
+        results[case.name] = row
+        out(f'{case.name:40s} p50 {row["p50_us"]:10.1f}  p90 {row["p90_us"]:10.1f}  '
+            f'p99 {row["p99_us"]:10.1f}  max {row["max_us"]:10.1f} us '
+            f'per {case.unit}')
+    return results, skipped
+
+
+def main(argv: list | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('-k', dest='only', default=None,
+                    help='run only the cases whose name contains this')
+    ap.add_argument('--baseline', default=str(harness.BASELINE_FILE))
+    ap.add_argument('--update', action='store_true',
+                    help='write this run into the baseline instead of gating on it')
+    ap.add_argument('--out', default=None, help='also write the results as JSON')
+    args = ap.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    cases = [case for case in CASES if args.only is None or args.only in case.name]
+    if not cases:
+        print(f'[bench] no case matches {args.only!r}')
+        return 2
+    results, skipped = run(cases)
+    baseline = harness.load_baseline(args.baseline)
+    if args.out:
+        Path(args.out).write_text(json.dumps(
+            {'machine': harness.machine(), 'cases': results, 'skipped': skipped},
+            indent=2) + '\n')
+
+    if args.update:
+        harness.write_baseline(results, args.baseline, previous=baseline)
+        print(f'[bench] baseline written → {args.baseline}')
+        return 0
+
+    if baseline.get('machine') and baseline['machine'] != harness.machine():
+        print(f'[bench] warning: the baseline was recorded on '
+              f'{baseline["machine"]}, not this machine -- the bands assume '
+              f'the same hardware')
+    verdicts = harness.compare(results, baseline)
+    regressed = [row for row in verdicts if row['verdict'] == 'regressed']
+    print()
+    for row in verdicts:
+        if row['verdict'] == 'regressed':
+            print(f'REGRESSED {row["case"]}: {"; ".join(row["over"])}')
+        elif row['verdict'] == 'new':
+            print(f'new       {row["case"]}: no baseline (record it with --update)')
+    within = sum(row['verdict'] == 'ok' for row in verdicts)
+    print(f'[bench] {within} within band, {len(regressed)} regressed, '
+          f'{len(verdicts) - within - len(regressed)} new, {len(skipped)} skipped')
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
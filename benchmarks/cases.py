@@ -0,0 +1,409 @@
+"""The hot paths, each set up offline: stub clients, a virtual clock, synthetic
+audio and seeded stand-in graphs, so a run needs no corpus, device or network.
+
+A setup returns the step to time; the step takes the call index.  A setup that
+needs something this machine lacks raises ``Unavailable`` and the case is
+reported as skipped rather than failed.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.harness import Case, Unavailable
+from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SEED = 20261019
+
+_TEMPO_BPM = 126.0
+_TRACK_SEC = 30.0
+
+# The stand-in section head: shipped-sized ports, not the trained graph. It
+# times the model's own bookkeeping and one fixed-cost ONNX call per cell.
+_HEAD_WINDOW_CELLS = 33
+_HEAD_FUTURE_CELLS = 16
+_HEAD_RNN_HIDDEN = 128
+_CELL_SEC = 0.25
+_ENCODER_LAYERS = 2
+_ENCODER_DIM = 1024
+_ENCODER_FPS = 75
+_STREAM_BUFFER_SEC = 30.0
+_STREAM_HOP_SEC = 1.0
+
+_INFER_TRACK_SEC = 60.0
+
+_scratch = tempfile.TemporaryDirectory(prefix="benchmarks-")
+
+
+def _training_on_path() -> None:
+    training = str(REPO_ROOT / "training")
+    if training not in sys.path:
+        sys.path.insert(0, training)
+
+
+def click_track(seconds: float = _TRACK_SEC) -> np.ndarray:
+    """A four-on-the-floor kick over noise: enough onsets to keep madmom busy."""
+    rng = np.random.default_rng(SEED)
+    audio = (0.02 * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+    kick = np.sin(2 * np.pi * 55.0 * np.arange(2048) / SAMPLE_RATE)
+    kick *= np.exp(-np.arange(2048) / 400.0)
+    step = int(SAMPLE_RATE * 60.0 / _TEMPO_BPM)
+    for start in range(0, len(audio) - len(kick), step):
+        audio[start:start + len(kick)] += 0.6 * kick.astype(np.float32)
+    return audio
+
+
+def _buffers(audio: np.ndarray) -> list:
+    return [audio[start:start + BUFFER_SIZE]
+            for start in range(0, len(audio) - BUFFER_SIZE + 1, BUFFER_SIZE)]
+
+
+def _madmom_rhythm():
+    try:
+        from lib.analyser.madmom_rhythm import MadmomRhythm
+        rhythm = MadmomRhythm(SAMPLE_RATE)
+    except ImportError as error:
+        raise Unavailable(f"madmom is not installed ({error})") from error
+    buffers = _buffers(click_track())
+
+    def step(index):
+        rhythm.process(buffers[index % len(buffers)])
+    return step
+
+
+def _beat_features():
+    from lib.analyser.beat_features import HOP_SIZE, BeatFeatures
+
+    features = BeatFeatures()
+    audio = click_track()
+    hops = [audio[start:start + HOP_SIZE]
+            for start in range(0, len(audio) - HOP_SIZE + 1, HOP_SIZE)]
+
+    def step(index):
+        features.push(hops[index % len(hops)])
+    return step
+
+
+def _beat_dbn(beam=None):
+    def setup():
+        from lib.analyser.beat_dbn import OnlineBeatDBN
+
+        dbn = OnlineBeatDBN(beam=beam)
+        frames = np.random.default_rng(SEED).normal(0.05, 0.03, 3000)
+        frames[::int(6000 / _TEMPO_BPM)] = 0.85
+        frames = np.clip(frames, 0.001, 0.999)
+
+        def step(index):
+            dbn.process(frames[index % len(frames):index % len(frames) + 1])
+        return step
+    return setup
+
+
+def _music_analyser():
+    from types import SimpleNamespace
+
+    from lib.clock import VirtualClock
+    from simulate.runner import build_simulation
+
+    clock = VirtualClock()
+    # The beat path alone: the section chain has its own cases below.
+    no_section = SimpleNamespace(stream=None, decoder=None)
+    try:
+        components, _queue = build_simulation(None, clock=clock, section=no_section)
+    except ImportError as error:
+        raise Unavailable(f"a runtime dependency is missing ({error})") from error
+    analyser = components["music_analyser"]
+    buffers = _buffers(click_track())
+    period = BUFFER_SIZE / SAMPLE_RATE
+
+    async def step(index):
+        clock.advance(period)
+        await analyser.analyse(buffers[index % len(buffers)].copy())
+    return step
+
+
+def stand_in_head(directory, *, classes: int, input_dim: int) -> Path:
+    """An online-step graph with the shipped ports, written with its sidecar."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    from lib.analyser import section_model as S
+
+    rng = np.random.default_rng(SEED)
+    hidden = _HEAD_RNN_HIDDEN
+
+    def weight(name, rows, cols):
+        value = (rng.standard_normal((rows, cols)) / np.sqrt(rows)).astype(np.float32)
+        return numpy_helper.from_array(value, name)
+
+    axes = numpy_helper.from_array(np.array([0], dtype=np.int64), "axis0")
+    nodes = [
+        helper.make_node("ReduceMean", [S.FRAMES_INPUT], ["pooled"], axes=[1],
+                         keepdims=0),
+        helper.make_node("MatMul", ["pooled", "w_in"], ["drive"]),
+        helper.make_node("Squeeze", [S.STATE_INPUT, "axis0"], ["previous"]),
+        helper.make_node("MatMul", ["previous", "w_state"], ["carried"]),
+        helper.make_node("Add", ["drive", "carried"], ["summed"]),
+        helper.make_node("Tanh", ["summed"], ["hidden"]),
+        helper.make_node("Unsqueeze", ["hidden", "axis0"], [S.STATE_OUTPUT]),
+        helper.make_node("MatMul", ["hidden", "w_label"], [S.LABEL_OUTPUT]),
+        helper.make_node("MatMul", ["hidden", "w_boundary"], [S.BOUNDARY_OUTPUT]),
+    ]
+    graph = helper.make_graph(
+        nodes, "stand_in_online_step",
+        [helper.make_tensor_value_info(S.FRAMES_INPUT, TensorProto.FLOAT,
+                                       ["batch", _HEAD_WINDOW_CELLS, input_dim]),
+         helper.make_tensor_value_info(S.STATE_INPUT, TensorProto.FLOAT,
+                                       [1, "batch", hidden])],
+        [helper.make_tensor_value_info(S.LABEL_OUTPUT, TensorProto.FLOAT,
+                                       ["batch", classes]),
+         helper.make_tensor_value_info(S.BOUNDARY_OUTPUT, TensorProto.FLOAT,
+                                       ["batch", 1]),
+         helper.make_tensor_value_info(S.STATE_OUTPUT, TensorProto.FLOAT,
+                                       [1, "batch", hidden])],
+        [weight("w_in", input_dim, hidden), weight("w_state", hidden, hidden),
+         weight("w_label", hidden, classes), weight("w_boundary", hidden, 1), axes])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)],
+                              ir_version=8)
+    path = Path(directory) / "stand_in_step.onnx"
+    onnx.save(model, str(path))
+    Path(str(path) + ".json").write_text(json.dumps({
+        "sha256": S.sha256_file(path), "window_cells": _HEAD_WINDOW_CELLS,
+        "input_dim": input_dim, "rnn_hidden": hidden,
+        "future_cells": _HEAD_FUTURE_CELLS,
+        "future_sec": _HEAD_FUTURE_CELLS * _CELL_SEC,
+        "label_frame_sec": _CELL_SEC}), encoding="utf-8")
+    return path
+
+
+def _section_model():
+    from lib.analyser.section_model import SectionModel
+    from lib.label_space import NUM_SECTION_CLASSES
+
+    dim = _ENCODER_LAYERS * _ENCODER_DIM
+    try:
+        path = stand_in_head(_scratch.name, classes=NUM_SECTION_CLASSES, input_dim=dim)
+    except ImportError as error:
+        raise Unavailable(f"onnx is not installed ({error})") from error
+    model = SectionModel(path, mean=np.zeros(dim, dtype=np.float32))
+    cells = np.random.default_rng(SEED).standard_normal((256, dim)).astype(np.float32)
+
+    def step(index):
+        model.push(cells[index % len(cells)], index)
+    return step
+
+
+def toy_priors():
+    _training_on_path()
+    from nn.priors import Priors, legal_mask, section_classes
+
+    classes = section_classes()
+    transition = legal_mask(classes).astype(np.float64)
+    rows = transition.sum(axis=1, keepdims=True)
+    transition = np.divide(transition, rows, out=np.zeros_like(transition),
+                           where=rows > 0)
+    count = len(classes)
+    return Priors(classes=tuple(classes), initial=np.full(count, 1.0 / count),
+                  transition=transition,
+                  floor_bars=np.full(count, 4, dtype=np.int64),
+                  hazard=np.full(count, 0.25), class_prior=np.full(count, 1.0 / count),
+                  corpus={})
+
+
+def _fixed_lag_viterbi():
+    _training_on_path()
+    from nn.decoder import FixedLagViterbi
+
+    priors = toy_priors()
+    decoder = FixedLagViterbi(priors)
+    rng = np.random.default_rng(SEED)
+    posteriors = rng.dirichlet(np.ones(len(priors.classes)), size=512)
+    boundaries = rng.uniform(size=512)
+
+    def step(index):
+        decoder.push(posteriors[index % 512], float(boundaries[index % 512]))
+    return step
+
+
+def _command_queue():
+    from lib.clock import VirtualClock
+    from lib.engine.delayed_command_queue import DelayedCommandQueue
+    from simulate.runner import PLAYBACK_DELAY_SEC
+
+    clock = VirtualClock()
+    queue = DelayedCommandQueue(PLAYBACK_DELAY_SEC, clock=clock)
+    labels = ("beat", "effect", "intent", "overlay")
+    period = BUFFER_SIZE / SAMPLE_RATE
+
+    async def command():
+        return None
+
+    async def step(index):
+        # One command a buffer: the queue sits at its steady-state depth of
+        # a whole playback delay of commands once warmed up.
+        clock.advance(period)
+        queue.schedule(labels[index % len(labels)], command)
+        await queue.drain()
+    return step
+
+
+def _delayed_monitor():
+    from lib.clock import VirtualClock
+    from lib.delayed_monitor import DelayedMonitor
+    from simulate.runner import PLAYBACK_DELAY_SEC
+
+    clock = VirtualClock()
+    monitor = DelayedMonitor(PLAYBACK_DELAY_SEC, lambda audio: None, clock=clock)
+    audio = np.random.default_rng(SEED).normal(0, 0.1, BUFFER_SIZE).astype(np.float32)
+    period = BUFFER_SIZE / SAMPLE_RATE
+    # Steady state: a whole delay held, one buffer in and one out per call.
+    while not monitor.started:
+        clock.advance(period)
+        monitor.feed(audio)
+
+    def step(index):
+        clock.advance(period)
+        monitor.feed(audio)
+    return step
+
+
+def _event_buffer():
+    from lib.clock import VirtualClock
+    from lib.engine.event_buffer import EventBuffer
+    from simulate.runner import PLAYBACK_DELAY_SEC
+
+    clock = VirtualClock()
+    buffer = EventBuffer(clock=clock, look_ahead_sec=PLAYBACK_DELAY_SEC)
+    buffer.start()
+    buffer.set_playing(True)
+    beat_sec = 60.0 / _TEMPO_BPM
+    for beat in range(int(600.0 / beat_sec)):           # ten minutes of show
+        clock.advance(beat_sec)
+        buffer.add_beat(_TEMPO_BPM, change=beat % 64 == 0, rms=0.1)
+        if beat % 16 == 0:
+            buffer.add_effect("autoloop", f"loop_{beat % 5}")
+        if beat % 128 == 0:
+            buffer.set_intent(("intro", "buildup", "drop")[beat % 3])
+    buffer.set_timing_log([
+        {"label": ("beat", "effect", "intent")[n % 3], "enqueue_time": float(n),
+         "target_fire_time": n + PLAYBACK_DELAY_SEC,
+         "target_delta_sec": PLAYBACK_DELAY_SEC,
+         "actual_fire_time": n + PLAYBACK_DELAY_SEC + 0.001,
+         "actual_delta_sec": PLAYBACK_DELAY_SEC + 0.001}
+        for n in range(2000)])
+
+    def step(index):
+        buffer.snapshot()
+    return step
+
+
+class _NullSocket:
+    def sendto(self, message, address):
+        return len(message)
+
+
+def _overlay_client():
+    from lib.clients.overlay_client import OverlayClient
+
+    client = OverlayClient()
+    client.socket.close()
+    client.socket = _NullSocket()
+    client.start()
+    effects = list(client.effects_to_overlay_index)
+
+    def step(index):
+        client.toggle_overlay(effects[index % len(effects)])
+        client.flush_messages()
+    return step
+
+
+def _cell_accumulator():
+    from lib.analyser.mert_stream import CellAccumulator
+
+    accumulator = CellAccumulator(_ENCODER_LAYERS, _ENCODER_DIM, _CELL_SEC)
+    frames = int(_STREAM_BUFFER_SEC * _ENCODER_FPS)
+    stacked = np.random.default_rng(SEED).standard_normal(
+        (frames, _ENCODER_LAYERS, _ENCODER_DIM)).astype(np.float32)
+
+    def step(index):
+        # Each pass hands over a whole buffer of frames and keeps one hop.
+        end = _STREAM_BUFFER_SEC + index * _STREAM_HOP_SEC
+        times = end - _STREAM_BUFFER_SEC + np.arange(frames) / _ENCODER_FPS
+        accumulator.add(stacked, times, end - _STREAM_HOP_SEC, end)
+        accumulator.drain(end)
+    return step
+
+
+def _flight_recorder():
+    from lib.flight_recorder import FlightRecorder
+
+    recorder = FlightRecorder(Path(_scratch.name) / "flight.f32", SAMPLE_RATE,
+                              BUFFER_SIZE)
+    buffers = _buffers(click_track())
+
+    def step(index):
+        recorder.write(buffers[index % len(buffers)], index % 4)
+    return step
+
+
+def _infer_track():
+    _training_on_path()
+    try:
+        from nn.dataset import FRAME_SEC
+        from nn.export_onnx import export_model, session
+        from nn.infer import infer_track
+        from nn.model import SectionCRNN
+    except ImportError as error:
+        raise Unavailable(f"the training extra is not synced ({error})") from error
+    import torch
+
+    torch.manual_seed(SEED)
+    model = SectionCRNN().eval()
+    path = Path(_scratch.name) / "seeded_section_crnn.onnx"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")         # the exporter's GRU batch-size note
+        export_model(model, path)
+    sess = session(path)
+    mel = np.random.default_rng(SEED).uniform(
+        size=(int(_INFER_TRACK_SEC / FRAME_SEC), model.n_mels)).astype(np.float32)
+
+    def step(index):
+        infer_track(sess, mel)
+    return step
+
+
+CASES = (
+    Case("madmom_rhythm.process", _madmom_rhythm, calls=3000, warmup=300,
+         unit="256-sample buffer"),
+    Case("beat_features.push", _beat_features, calls=3000, warmup=300,
+         unit="441-sample hop"),
+    Case("beat_dbn.process", _beat_dbn(), calls=3000, warmup=300, unit="frame"),
+    Case("beat_dbn.process[beam=1e-4]", _beat_dbn(1e-4), calls=3000, warmup=300,
+         unit="frame"),
+    Case("music_analyser.analyse", _music_analyser, calls=3000, warmup=300,
+         unit="256-sample buffer"),
+    Case("section_model.push", _section_model, calls=2000, warmup=100,
+         unit="cell"),
+    Case("fixed_lag_viterbi.push", _fixed_lag_viterbi, calls=5000, warmup=500,
+         unit="bar"),
+    Case("delayed_command_queue.schedule_drain", _command_queue, calls=10000,
+         warmup=3000, unit="buffer"),
+    Case("delayed_monitor.feed", _delayed_monitor, calls=10000, warmup=1000,
+         unit="256-sample buffer"),
+    Case("event_buffer.snapshot", _event_buffer, calls=500, warmup=20,
+         unit="snapshot"),
+    Case("overlay_client.flush_messages", _overlay_client, calls=2000,
+         warmup=100, unit="flush"),
+    Case("cell_accumulator.add", _cell_accumulator, calls=300, warmup=20,
+         unit="pass"),
+    Case("flight_recorder.write", _flight_recorder, calls=20000, warmup=1000,
+         unit="256-sample buffer"),
+    Case("infer_track", _infer_track, calls=3, warmup=1, rounds=1,
+         unit=f"{_INFER_TRACK_SEC:.0f} s track"),
+)
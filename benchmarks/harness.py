@@ -0,0 +1,146 @@
+"""Timing, percentiles and the baseline comparison behind ``python -m benchmarks``."""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import platform
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baseline.json"
+
+# A case may grow this much past its baseline before it counts as a regression:
+# the tail moves more run to run than the median, and a few microseconds of
+# scheduler noise would otherwise fail every sub-10 us case.
+DEFAULT_TOLERANCE = {"p50": 0.50, "p99": 1.00, "floor_us": 5.0}
+GATED = ("p50", "p99")
+
+
+class Unavailable(RuntimeError):
+    """The case cannot run on this machine (a missing optional dependency)."""
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    setup: Callable
+    calls: int
+    warmup: int = 0
+    unit: str = "call"
+    rounds: int = 3
+
+
+def _clock_loop(step, first: int, calls: int) -> np.ndarray:
+    times = np.empty(calls, dtype=np.float64)
+    clock = time.perf_counter_ns
+    for offset in range(calls):
+        start = clock()
+        step(first + offset)
+        times[offset] = clock() - start
+    return times
+
+
+async def _clock_loop_async(step, first: int, calls: int) -> np.ndarray:
+    times = np.empty(calls, dtype=np.float64)
+    clock = time.perf_counter_ns
+    for offset in range(calls):
+        start = clock()
+        await step(first + offset)
+        times[offset] = clock() - start
+    return times
+
+
+def measure(case: Case) -> list:
+    """Per-call wall time in microseconds, one array per round.
+
+    The call index runs on across the warm-up and every round: a step that
+    walks a timeline never sees time go backwards.
+    """
+    step = case.setup()
+    firsts = [case.warmup + round_ * case.calls for round_ in range(case.rounds)]
+    if inspect.iscoroutinefunction(step):
+        async def run():
+            await _clock_loop_async(step, 0, case.warmup)
+            return [await _clock_loop_async(step, first, case.calls)
+                    for first in firsts]
+        rounds = asyncio.run(run())
+    else:
+        _clock_loop(step, 0, case.warmup)
+        rounds = [_clock_loop(step, first, case.calls) for first in firsts]
+    return [times / 1000.0 for times in rounds]
+
+
+def summarise(rounds: list) -> dict:
+    """Each statistic from the round where it was lowest.
+
+    Another process can only ever add time to a round, so the quietest round
+    is the closest to the code's own cost -- the same reasoning as timeit's
+    min-of-repeats, applied per percentile.
+    """
+    def best(statistic) -> float:
+        return round(min(float(statistic(times)) for times in rounds), 3)
+
+    return {
+        "calls": int(sum(times.size for times in rounds)),
+        "mean_us": best(np.mean),
+        "p50_us": best(lambda times: np.percentile(times, 50)),
+        "p90_us": best(lambda times: np.percentile(times, 90)),
+        "p99_us": best(lambda times: np.percentile(times, 99)),
+        "max_us": best(np.max),
+    }
+
+
+def machine() -> dict:
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count()}
+
+
+def load_baseline(path=BASELINE_FILE) -> dict:
+    path = Path(path)
+    if not path.exists():
+        return {"tolerance": dict(DEFAULT_TOLERANCE), "cases": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write_baseline(results: dict, path=BASELINE_FILE, previous: dict | None = None) -> None:
+    previous = previous or {}
+    cases = dict(previous.get("cases", {}))
+    for name, row in results.items():
+        kept = {key: value for key, value in cases.get(name, {}).items()
+                if key == "tolerance"}
+        cases[name] = {**row, **kept}
+    document = {"machine": machine(),
+                "tolerance": previous.get("tolerance", dict(DEFAULT_TOLERANCE)),
+                "cases": dict(sorted(cases.items()))}
+    Path(path).write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+
+def limit(baseline_us: float, stat: str, tolerance: dict) -> float:
+    return baseline_us * (1.0 + float(tolerance[stat])) + float(tolerance["floor_us"])
+
+
+def compare(results: dict, baseline: dict) -> list:
+    """One verdict row per measured case: ``ok``, ``regressed`` or ``new``."""
+    default = {**DEFAULT_TOLERANCE, **baseline.get("tolerance", {})}
+    rows = []
+    for name, row in results.items():
+        stored = baseline.get("cases", {}).get(name)
+        if stored is None:
+            rows.append({"case": name, "verdict": "new", "over": []})
+            continue
+        tolerance = {**default, **stored.get("tolerance", {})}
+        over = [f"{stat} {row[f'{stat}_us']:.1f} us > "
+                f"{limit(stored[f'{stat}_us'], stat, tolerance):.1f} us "
+                f"(baseline {stored[f'{stat}_us']:.1f})"
+                for stat in GATED
+                if row[f"{stat}_us"] > limit(stored[f"{stat}_us"], stat, tolerance)]
+        rows.append({"case": name, "verdict": "regressed" if over else "ok",
+                     "over": over})
+    return rows
@@ -0,0 +1,194 @@
+"""madmom's online beat DBN, as a CSR forward step over precomputed indices.
+
+The model is ``DBNBeatTrackingProcessor(online=True)``'s.  Each of 60
+log-spaced beat intervals (55-215 BPM at 100 fps) gets one state per frame
+of the beat.  Inside a beat the phase advances one state per frame.  From the
+last state of a beat, the tempo may move to the first state of any interval,
+weighted by ``exp(-lambda * |ratio - 1|)``.  States in the first
+``1 / observation_lambda`` of a beat are fed the activation, the rest
+``(1 - activation) / (lambda - 1)``.  Each frame, the forward variable's
+argmax is the decoded state, and landing in a beat state is a beat.  A beat
+is only reported when it comes at least one fastest-tempo interval after the
+last one reported.
+
+The transitions are stored as a CSR matrix over destination states.  The
+forward step gathers the previous forward variable at every transition's
+source, scales it by the transition probabilities, and sums each
+destination's run with one ``np.add.reduceat``.
+
+**Beam.**  With ``beam`` set, any tempo whose share of the forward mass falls
+below ``beam`` times the best tempo's share is zeroed.  Its states then drop
+out of the step.  Only the first states of every tempo stay in, so a tempo
+the music moves to can come back in.  ``beam=None`` is madmom's exact decode.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+FPS = 100
+MIN_BPM = 55.0
+MAX_BPM = 215.0
+NUM_TEMPI = 60
+TRANSITION_LAMBDA = 100.0
+OBSERVATION_LAMBDA = 16.0
+
+
+def beat_intervals(min_interval: float, max_interval: float,
+                   num_intervals: int | None = NUM_TEMPI) -> np.ndarray:
+    """madmom's ``BeatStateSpace`` intervals: log spaced, integer, unique."""
+    intervals = np.arange(np.round(min_interval), np.round(max_interval) + 1)
+    if num_intervals is not None and num_intervals < len(intervals):
+        # Rounding merges neighbours, so ask for more until there are enough.
+        wanted, intervals = num_intervals, []
+        while len(intervals) < num_intervals:
+            intervals = np.unique(np.round(np.logspace(
+                np.log2(min_interval), np.log2(max_interval), wanted, base=2)))
+            wanted += 1
+    return np.ascontiguousarray(intervals, dtype=np.int64)
+
+
+def tempo_transitions(intervals: np.ndarray,
+                      transition_lambda: float = TRANSITION_LAMBDA) -> np.ndarray:
+    """``[from, to]`` probabilities of moving between beat intervals."""
+    ratio = intervals.astype(np.float64) / intervals.astype(np.float64)[:, None]
+    prob = np.exp(-transition_lambda * np.abs(ratio - 1.0))
+    prob[prob <= np.spacing(1)] = 0.0
+    return prob / prob.sum(axis=1, keepdims=True)
+
+
+class OnlineBeatDBN:
+    """Beat activations in, beat times out; state carries over between calls."""
+
+    def __init__(self, fps: float = FPS, min_bpm: float = MIN_BPM,
+                 max_bpm: float = MAX_BPM, num_tempi: int | None = NUM_TEMPI,
+                 transition_lambda: float = TRANSITION_LAMBDA,
+                 observation_lambda: float = OBSERVATION_LAMBDA,
+                 beam: float | None = None) -> None:
+        if beam is not None and not 0.0 < beam < 1.0:
+            raise ValueError(f'beam is a share of the best tempo, in (0, 1); '
+                             f'got {beam}')
+        self.fps = float(fps)
+        self.max_bpm = float(max_bpm)
+        self.beam = beam
+        self.observation_lambda = float(observation_lambda)
+        self.intervals = beat_intervals(60.0 * fps / max_bpm, 60.0 * fps / min_bpm,
+                                        num_tempi)
+        self.num_states = int(self.intervals.sum())
+        self.first_states = np.concatenate([[0], np.cumsum(self.intervals)[:-1]])
+        self.last_states = np.cumsum(self.intervals) - 1
+        self.state_positions = np.concatenate(
+            [np.linspace(0, 1, interval, endpoint=False) for interval in self.intervals])
+        self.state_intervals = np.repeat(np.arange(len(self.intervals)), self.intervals)
+        # 1 where a state reads the activation, 0 where it reads its complement.
+        self.observation = (self.state_positions < 1.0 / observation_lambda
+                            ).astype(np.intp)
+        self._build_transitions(tempo_transitions(self.intervals, transition_lambda))
+        self._forward = np.empty(self.num_states)
+        self._gathered = np.empty(len(self.prev_states))
+        self._densities = np.empty(2)
+        self._density = np.empty(self.num_states)
+        self._plan_for = None
+        self.reset()
+
+    def _build_transitions(self, tempo: np.ndarray) -> None:
+        # Destination-major, each row's sources ascending: madmom's CSR layout.
+        within = np.setdiff1d(np.arange(self.num_states), self.first_states)
+        moves_from, moves_to = np.nonzero(tempo)
+        states = np.concatenate([within, self.first_states[moves_to]])
+        prev = np.concatenate([within - 1, self.last_states[moves_from]])
+        probabilities = np.concatenate([np.ones(len(within)),
+                                        tempo[moves_from, moves_to]])
+        order = np.lexsort((prev, states))
+        self.prev_states = prev[order]
+        self.probabilities = probabilities[order]
+        counts = np.bincount(states, minlength=self.num_states)
+        if not counts.all():
+            raise ValueError('a state no transition reaches')
+        self.pointers = np.concatenate([[0], np.cumsum(counts)])
+        self._destinations = np.repeat(np.arange(self.num_states), counts)
+
+    def reset(self) -> None:
+        self._forward.fill(1.0 / self.num_states)
+        self._active = np.ones(len(self.intervals), dtype=bool)
+        self._rows = np.arange(self.num_states)
+        self.counter = 0
+        self.last_beat = 0.0
+        self.beats_reported = 0
+
+    @property
+    def tempo_posterior(self) -> np.ndarray:
+        """The forward mass on each beat interval (``intervals``), summing to 1."""
+        return np.add.reduceat(self._forward, self.first_states)
+
+    @property
+    def bpm(self) -> float:
+        """The most probable tempo, once a beat has been reported; else 0."""
+        if not self.beats_reported:
+            return 0.0
+        return 60.0 * self.fps / float(self.intervals[self.tempo_posterior.argmax()])
+
+    @property
+    def active_tempi(self) -> int:
+        return int(self._active.sum())
+
+    def process(self, activations) -> np.ndarray:
+        """Beat times, in seconds from the last reset, decoded from these frames."""
+        beats = []
+        for activation in np.atleast_1d(np.asarray(activations, dtype=np.float64)):
+            if self.beam is None:
+                self._step(activation)
+            else:
+                self._step_pruned(activation)
+            state = int(self._forward.argmax())
+            frame, self.counter = self.counter, self.counter + 1
+            if not self.observation[state]:
+                continue
+            now = frame / self.fps
+            if now >= self.last_beat + 60.0 / self.max_bpm:
+                self.last_beat = now
+                self.beats_reported += 1
+                beats.append(now)
+        return np.array(beats)
+
+    def _observe(self, activation: float) -> None:
+        self._densities[0] = (1.0 - activation) / (self.observation_lambda - 1.0)
+        self._densities[1] = activation
+
+    def _step(self, activation: float) -> None:
+        forward = self._forward
+        np.take(forward, self.prev_states, out=self._gathered)
+        self._gathered *= self.probabilities
+        np.add.reduceat(self._gathered, self.pointers[:-1], out=forward)
+        self._observe(activation)
+        np.take(self._densities, self.observation, out=self._density)
+        forward *= self._density
+        forward *= 1.0 / forward.sum()
+
+    def _step_pruned(self, activation: float) -> None:
+        rows, sources, probabilities, starts, observation, tempi = self._plan()
+        values = np.add.reduceat(self._forward[sources] * probabilities, starts)
+        self._observe(activation)
+        values *= self._densities[observation]
+        mass = np.bincount(tempi, weights=values, minlength=len(self.intervals))
+        self._active = mass >= self.beam * mass.max()
+        values[~self._active[tempi]] = 0.0
+        values *= 1.0 / values.sum()
+        self._forward[self._rows] = 0.0
+        self._forward[rows] = values
+        self._rows = rows
+
+    def _plan(self) -> tuple:
+        """The rows, transitions and observations the active tempi need."""
+        key = self._active.tobytes()
+        if self._plan_for != key:
+            wanted = self._active[self.state_intervals]
+            wanted[self.first_states] = True
+            rows = np.flatnonzero(wanted)
+            transitions = np.flatnonzero(wanted[self._destinations])
+            counts = np.diff(self.pointers)[rows]
+            self._plan_for = key
+            self._plan_cache = (rows, self.prev_states[transitions],
+                                self.probabilities[transitions],
+                                np.concatenate([[0], np.cumsum(counts)[:-1]]),
+                                self.observation[rows], self.state_intervals[rows])
+        return self._plan_cache
@@ -0,0 +1,168 @@
+"""madmom's online beat features, streamed one hop at a time.
+
+``RNNBeatProcessor(online=True)`` turns each hop into network input through a
+chain of madmom processors.  Per resolution it frames the window, takes a
+Hann-windowed FFT, sums the magnitudes into log-spaced triangular bands, takes
+``log10(1 + x)`` and appends the positive difference against the frame
+``diff_frames`` hops back.  Every hop, each of those steps builds fresh arrays,
+and the window and filterbank are rebuilt too.  ``BeatFeatures`` computes
+the same row.  The windows and filterbanks are built once, each resolution
+does one real FFT per hop, and the rest of the work writes into buffers
+allocated at construction.
+
+madmom's online network reads one resolution: 2048-sample frames at 12 bands
+per octave.  The offline network reads three.  ``resolutions`` takes either
+geometry.  The parity test in ``tests/test_beat_features.py`` checks these rows
+and the activations they produce against madmom's own chain.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+HOP_SIZE = 441
+# (frame size, bands per octave): what RNNBeatProcessor(online=True) reads.
+ONLINE_RESOLUTIONS = ((2048, 12),)
+F_MIN = 30.0
+F_MAX = 17000.0
+F_REF = 440.0
+DIFF_RATIO = 0.5
+
+
+def log_frequencies(bands_per_octave: int, fmin: float = F_MIN,
+                    fmax: float = F_MAX, fref: float = F_REF) -> np.ndarray:
+    """Band centres ``bands_per_octave`` to the octave, aligned to ``fref``."""
+    left = np.floor(np.log2(fmin / fref) * bands_per_octave)
+    right = np.ceil(np.log2(fmax / fref) * bands_per_octave)
+    frequencies = fref * 2.0 ** (np.arange(left, right) / float(bands_per_octave))
+    frequencies = frequencies[np.searchsorted(frequencies, fmin):]
+    return frequencies[:np.searchsorted(frequencies, fmax, "right")]
+
+
+def _nearest_bins(frequencies: np.ndarray, bin_frequencies: np.ndarray) -> np.ndarray:
+    indices = np.clip(bin_frequencies.searchsorted(frequencies), 1,
+                      len(bin_frequencies) - 1)
+    left, right = bin_frequencies[indices - 1], bin_frequencies[indices]
+    indices -= frequencies - left < right - frequencies
+    return np.unique(indices)
+
+
+def log_filterbank(frame_size: int, bands_per_octave: int,
+                   sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """``[frame_size // 2, bands]`` float32: madmom's ``LogarithmicFilterbank``.
+
+    Overlapping triangles between neighbouring unique FFT bins, each normalised
+    to unit area.  A band too narrow for a triangle keeps a single bin.
+    """
+    num_bins = frame_size // 2
+    bin_frequencies = np.fft.fftfreq(frame_size, 1.0 / sample_rate)[:num_bins]
+    bins = _nearest_bins(log_frequencies(bands_per_octave), bin_frequencies)
+    if len(bins) < 3:
+        raise ValueError(f"{frame_size}-sample frames at {bands_per_octave} bands "
+                         f"per octave leave fewer than 3 distinct bins")
+    bank = np.zeros((num_bins, len(bins) - 2), dtype=np.float32)
+    for band, (start, centre, stop) in enumerate(zip(bins[:-2], bins[1:-1],
+                                                     bins[2:])):
+        if stop - start < 2:
+            centre, stop = start, start + 1
+        rise, fall = centre - start, stop - centre
+        triangle = np.concatenate([
+            np.linspace(0, 1, rise, endpoint=False, dtype=np.float32),
+            np.linspace(1, 0, fall, endpoint=False, dtype=np.float32)])
+        triangle /= triangle.sum()
+        stop = min(stop, num_bins)
+        bank[start:stop, band] = triangle[:stop - start]
+    return bank
+
+
+def diff_frames(frame_size: int, hop_size: int = HOP_SIZE,
+                diff_ratio: float = DIFF_RATIO) -> int:
+    """How many hops back the spectral difference looks, at least one.
+
+    It looks back as many hops as it takes the window to rise from
+    ``diff_ratio`` of its peak to the peak.
+    """
+    window = np.hanning(frame_size)
+    sample = int(np.argmax(window > diff_ratio * window.max()))
+    return int(max(1, round((frame_size / 2 - sample) / hop_size)))
+
+
+class _Resolution:
+    def __init__(self, frame_size: int, bands_per_octave: int, sample_rate: int,
+                 hop_size: int, out: np.ndarray) -> None:
+        self.frame_size = int(frame_size)
+        # Symmetric, as madmom's STFT uses np.hanning, and float64 like the
+        # product madmom feeds its FFT.
+        self._window = np.hanning(self.frame_size)
+        self._bank = log_filterbank(self.frame_size, bands_per_octave, sample_rate)
+        self._windowed = np.empty(self.frame_size, dtype=np.float64)
+        self._magnitude = np.empty(self.frame_size // 2, dtype=np.float32)
+        bands = self._bank.shape[1]
+        self.bands, self.diff = out[:bands], out[bands:]
+        self._history = np.zeros((diff_frames(self.frame_size, hop_size), bands),
+                                 dtype=np.float32)
+        self._cursor = 0
+        self._seen = 0
+
+    def reset(self) -> None:
+        self._cursor = self._seen = 0
+
+    def __call__(self, ring: np.ndarray) -> None:
+        np.multiply(ring[-self.frame_size:], self._window, out=self._windowed)
+        spectrum = np.fft.rfft(self._windowed)
+        np.abs(spectrum[:len(self._magnitude)], out=self._magnitude)
+        np.dot(self._magnitude, self._bank, out=self.bands)
+        self.bands += 1.0
+        np.log10(self.bands, out=self.bands)
+        previous = self._history[self._cursor]
+        if self._seen < len(self._history):
+            # madmom pads the first frames with inf, so their difference is 0.
+            self.diff.fill(0.0)
+            self._seen += 1
+        else:
+            np.subtract(self.bands, previous, out=self.diff)
+            np.maximum(self.diff, 0.0, out=self.diff)
+        previous[:] = self.bands
+        self._cursor = (self._cursor + 1) % len(self._history)
+
+
+class BeatFeatures:
+    """Hops in, one row of beat-network input out, per hop.
+
+    The row is ``[log bands, positive diff]`` for each resolution in turn.
+    It is a buffer the next ``push`` overwrites, so copy it to keep it.
+    """
+
+    def __init__(self, resolutions=ONLINE_RESOLUTIONS,
+                 sample_rate: int = SAMPLE_RATE, hop_size: int = HOP_SIZE) -> None:
+        self.hop_size = int(hop_size)
+        self.frame_sizes = [int(size) for size, _ in resolutions]
+        widths = [2 * log_filterbank(size, bands, sample_rate).shape[1]
+                  for size, bands in resolutions]
+        self.row = np.zeros(sum(widths), dtype=np.float32)
+        edges = np.cumsum([0] + widths)
+        self._resolutions = [
+            _Resolution(size, bands, sample_rate, self.hop_size,
+                        self.row[lo:hi])
+            for (size, bands), lo, hi in zip(resolutions, edges[:-1], edges[1:])]
+        self._ring = np.zeros(max(self.frame_sizes), dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return len(self.row)
+
+    def reset(self) -> None:
+        """Silence in the window and no previous frame to difference against."""
+        self._ring.fill(0.0)
+        for resolution in self._resolutions:
+            resolution.reset()
+
+    def push(self, hop: np.ndarray) -> np.ndarray:
+        if len(hop) != self.hop_size:
+            raise ValueError(f"expected a {self.hop_size}-sample hop, got {len(hop)}")
+        ring = self._ring
+        ring[:-self.hop_size] = ring[self.hop_size:]
+        ring[-self.hop_size:] = hop
+        for resolution in self._resolutions:
+            resolution(ring)
+        return self.row
@@ -0,0 +1,182 @@
+"""madmom's online beat networks, run as one stacked NumPy ensemble.
+
+``RNNBeatProcessor(online=True)`` averages eight small unidirectional LSTM
+networks.  madmom runs each through its own layer objects, gate by gate and
+frame by frame, so every hop makes some two hundred small ``np.dot`` calls.
+``BeatRNN`` takes the weights out of those networks once.  It stacks the
+members along a leading axis and fuses each layer's four gates into one
+matrix, so a layer step is one batched matmul for all eight members.
+
+The recurrence is sequential, but the input side is not.  A block of hops
+runs layer by layer: every hop's input projection comes from one matmul, and
+only the recurrent step loops over time.  ``MadmomRhythm`` hands over
+whatever whole hops its buffer completed.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+DTYPE = np.float32
+# Fused gate order along the last axis of every stacked LSTM matrix.
+_GATES = ('input_gate', 'forget_gate', 'cell', 'output_gate')
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # madmom's form, in place: 0.5 * (1 + tanh(x / 2)).
+    x *= 0.5
+    np.tanh(x, out=x)
+    x += 1.0
+    x *= 0.5
+    return x
+
+
+def _name(fn) -> str:
+    return getattr(fn, '__name__', type(fn).__name__)
+
+
+class _LSTM:
+    def __init__(self, layers: list) -> None:
+        def stack(get):
+            return np.stack([get(layer) for layer in layers]).astype(DTYPE)
+
+        for layer in layers:
+            functions = [_name(layer.activation_fn), _name(layer.cell.activation_fn)]
+            functions += [_name(getattr(layer, gate).activation_fn)
+                          for gate in ('input_gate', 'forget_gate', 'output_gate')]
+            if functions != ['tanh', 'tanh', 'sigmoid', 'sigmoid', 'sigmoid']:
+                raise ValueError(f'an LSTM layer with activations {functions} '
+                                 f'is not the beat networks\' layer')
+        # Sigmoid gates are pre-halved, so sigmoid(x) = 0.5 * (1 + tanh(x / 2))
+        # becomes one tanh over the input, forget and cell columns together.
+        scale = np.repeat(np.array([0.5, 0.5, 1.0, 0.5], dtype=DTYPE),
+                          np.asarray(layers[0].cell.bias).size)
+        self.weights = stack(lambda layer: np.concatenate(
+            [getattr(layer, gate).weights for gate in _GATES], axis=1)) * scale
+        self.recurrent = stack(lambda layer: np.concatenate(
+            [getattr(layer, gate).recurrent_weights for gate in _GATES], axis=1)) * scale
+        self.bias = stack(lambda layer: np.concatenate(
+            [getattr(layer, gate).bias for gate in _GATES])) * scale
+        members, self.units = self.bias.shape[0], self.bias.shape[1] // 4
+        self._flat = np.ascontiguousarray(
+            self.weights.transpose(1, 0, 2).reshape(self.weights.shape[1], -1))
+        self._peep_gates = 0.5 * np.stack(
+            [stack(lambda layer, gate=gate: _peephole(layer, gate))
+             for gate in ('input_gate', 'forget_gate')], axis=1)
+        self._peep_out = 0.5 * stack(lambda layer: _peephole(layer, 'output_gate'))
+        self._init = stack(lambda layer: _initial(layer, 'init', self.units))
+        self._cell_init = stack(lambda layer: _initial(layer, 'cell_init', self.units))
+        self._out = self._init.copy()
+        self._state = self._cell_init.copy()
+        self._z = np.empty((members, 1, 4 * self.units), dtype=DTYPE)
+        self._peeked = np.empty((members, 2, self.units), dtype=DTYPE)
+        self._scratch = np.empty((members, self.units), dtype=DTYPE)
+
+    def reset(self) -> None:
+        self._out[:] = self._init
+        self._state[:] = self._cell_init
+
+    def project(self, inputs: np.ndarray) -> np.ndarray:
+        """``[hops, members, in]`` (or ``[hops, in]``, shared) -> gate inputs."""
+        if inputs.ndim == 2:
+            return (inputs @ self._flat).reshape(len(inputs), *self.bias.shape) \
+                + self.bias
+        return np.matmul(inputs.transpose(1, 0, 2), self.weights).transpose(1, 0, 2) \
+            + self.bias
+
+    def run(self, projected: np.ndarray) -> np.ndarray:
+        units, z = self.units, self._z[:, 0]
+        gates = z[:, :2 * units]
+        in_gate, forget = z[:, :units], z[:, units:2 * units]
+        cell, out_gate = z[:, 2 * units:3 * units], z[:, 3 * units:]
+        squashed, peeked = z[:, :3 * units], self._peeked
+        out, state, scratch = self._out, self._state, self._scratch
+        outputs = np.empty((len(projected), *out.shape), dtype=DTYPE)
+        for step, inputs in enumerate(projected):
+            np.matmul(out[:, None, :], self.recurrent, out=self._z)
+            z += inputs
+            # The input and forget gates peek at the previous state.
+            np.multiply(state[:, None, :], self._peep_gates, out=peeked)
+            gates += peeked.reshape(len(z), -1)
+            np.tanh(squashed, out=squashed)
+            gates += 1.0
+            gates *= 0.5
+            state *= forget
+            np.multiply(cell, in_gate, out=scratch)
+            state += scratch
+            # The output gate peeks at the new one.
+            np.multiply(state, self._peep_out, out=scratch)
+            out_gate += scratch
+            np.tanh(out_gate, out=out_gate)
+            out_gate += 1.0
+            out_gate *= 0.5
+            np.tanh(state, out=out)
+            out *= out_gate
+            outputs[step] = out
+        return outputs
+
+
+def _peephole(layer, gate: str) -> np.ndarray:
+    weights = getattr(getattr(layer, gate), 'peephole_weights', None)
+    units = np.asarray(layer.cell.bias).size
+    return np.zeros(units) if weights is None else np.asarray(weights)
+
+
+def _initial(layer, name: str, units: int) -> np.ndarray:
+    value = getattr(layer, name, None)
+    return np.zeros(units) if value is None else np.asarray(value).reshape(units)
+
+
+class BeatRNN:
+    """Feature rows in, averaged beat activations out, one per row.
+
+    Built from madmom ``NeuralNetwork`` objects that share one architecture:
+    LSTM layers under a sigmoid feed-forward output.  Called the way madmom's
+    ensemble is, ``rnn(rows, reset=...)``, so either can sit in ``_BeatStage``.
+    """
+
+    def __init__(self, networks: list) -> None:
+        if not networks:
+            raise ValueError('no networks to run')
+        depths = {len(network.layers) for network in networks}
+        if len(depths) != 1:
+            raise ValueError(f'the networks differ in depth: {sorted(depths)}')
+        *hidden, output = zip(*(network.layers for network in networks))
+        for layers in hidden:
+            kinds = {type(layer).__name__ for layer in layers}
+            if kinds != {'LSTMLayer'}:
+                raise ValueError(f'only unidirectional LSTM layers are ported, '
+                                 f'not {sorted(kinds)}')
+        kinds = {type(layer).__name__ for layer in output}
+        functions = {_name(layer.activation_fn) for layer in output}
+        if kinds != {'FeedForwardLayer'} or functions != {'sigmoid'}:
+            raise ValueError(f'expected a sigmoid FeedForwardLayer output, got '
+                             f'{sorted(kinds)} / {sorted(functions)}')
+        self._layers = [_LSTM(list(layers)) for layers in hidden]
+        self._weights = np.stack([layer.weights for layer in output]).astype(DTYPE)
+        self._bias = np.stack([np.ravel(layer.bias) for layer in output]).astype(DTYPE)
+        if self._weights.shape[-1] != 1:
+            raise ValueError(f'expected one output unit, got {self._weights.shape[-1]}')
+        self.members = len(networks)
+        self.input_dim = self._layers[0].weights.shape[1]
+
+    @classmethod
+    def from_madmom(cls, nn_files=None) -> 'BeatRNN':
+        """The ensemble ``RNNBeatProcessor(online=True)`` loads."""
+        from madmom.ml.nn import NeuralNetwork
+        from madmom.models import BEATS_LSTM
+
+        return cls([NeuralNetwork.load(path) for path in (nn_files or BEATS_LSTM)])
+
+    def reset(self) -> None:
+        for layer in self._layers:
+            layer.reset()
+
+    def __call__(self, rows: np.ndarray, reset: bool = False) -> np.ndarray:
+        if reset:
+            self.reset()
+        data = np.asarray(rows, dtype=DTYPE).reshape(-1, self.input_dim)
+        for layer in self._layers:
+            data = layer.run(layer.project(data))
+        # [hops, members, units] @ [members, units, 1] -> [hops, members]
+        out = np.einsum('tmu,mu->tm', data, self._weights[..., 0]) + self._bias[:, 0]
+        return _sigmoid(out).mean(axis=1)
@@ -10,9 +10,6 @@ from enum import IntEnum
 from lib.clock import SYSTEM_CLOCK, Clock
 
 _WINDOW_SEC = 5.0
-_ENTER_SEC = 0.15
-# Positive: a hardware-paced input hands over one buffer per period, so drift never goes negative.
-_EXIT_SEC = 0.05
 
 _LOG_INTERVAL_SEC = 30.0
 SHED_RATE_WINDOW_SEC = 60.0
@@ -20,7 +17,21 @@ SHED_RATE_WINDOW_SEC = 60.0
 
 class ShedLevel(IntEnum):
     NONE = 0
-    NN_SHED = 1
+    HOP_X2 = 1
+    HOP_X4 = 2
+    NN_SHED = 3
+
+
+# Drift (s) over the window that enters each level, and the drift it must stay
+# under for a whole window before the level is left.  Exits are positive: a
+# hardware-paced input hands over one buffer per period, so drift never goes
+# negative.  The partial levels sit under the full shed, so a loop that is
+# merely slipping stretches the GPU's hop before it drops section decisions.
+_HYSTERESIS = {
+    ShedLevel.HOP_X2: (0.06, 0.02),
+    ShedLevel.HOP_X4: (0.10, 0.035),
+    ShedLevel.NN_SHED: (0.15, 0.05),
+}
 
 
 class DriftWatchdog:
@@ -37,7 +48,7 @@ class DriftWatchdog:
         self._stream_sec = 0.0
         self._level = ShedLevel.NONE
         self._drift_sec = 0.0
-        self._drift_shed = False
+        self._drift_level = ShedLevel.NONE
         self._fault: str | None = None
         self.peak_drift_sec = 0.0
         self.total_drift_sec = 0.0
@@ -47,6 +58,8 @@ class DriftWatchdog:
         self._calm_since: float | None = None
         self._said: dict = {}
         self._suppressed: dict = {}
+        self._residency = dict.fromkeys(ShedLevel, 0.0)
+        self._level_since: float | None = None
 
     @property
     def level(self) -> ShedLevel:
@@ -69,6 +82,14 @@ class DriftWatchdog:
     def drift_sec(self) -> float:
         return self._drift_sec
 
+    @property
+    def residency_sec(self) -> dict:
+        with self._settling:
+            held = dict(self._residency)
+            if self._level_since is not None:
+                held[self._level] += self._clock.monotonic() - self._level_since
+        return {level.name: held[level] for level in ShedLevel}
+
     @property
     def sheds_per_min(self) -> int:
         cutoff = self._clock.monotonic() - SHED_RATE_WINDOW_SEC
@@ -94,6 +115,8 @@ class DriftWatchdog:
 
         if self._first_wall is None:
             self._first_wall = wall
+        if self._level_since is None:
+            self._level_since = wall
         self.total_drift_sec = (wall - self._first_wall) - (self._stream_sec - self._buffer_sec)
 
         self._samples.append((wall, self._stream_sec))
@@ -111,35 +134,43 @@ class DriftWatchdog:
         return self._level
 
     def _update_drift(self, wall: float) -> None:
-        if self._drift_sec > _ENTER_SEC:
+        entered = max((level for level, (enter, _) in _HYSTERESIS.items()
+                       if self._drift_sec > enter), default=ShedLevel.NONE)
+        if entered > self._drift_level:
             self._calm_since = None
-            if not self._drift_shed:
-                self._drift_shed = True
-                self._settle(f'drift {self._drift_sec:+.3f}s over a '
-                             f'{self._window_sec:.0f}s window, peak '
-                             f'{self.peak_drift_sec:.3f}s')
-        elif self._drift_shed:
-            if self._drift_sec >= _EXIT_SEC:
+            self._drift_level = entered
+            self._settle(f'drift {self._drift_sec:+.3f}s over a '
+                         f'{self._window_sec:.0f}s window, peak '
+                         f'{self.peak_drift_sec:.3f}s')
+        elif self._drift_level is not ShedLevel.NONE:
+            if self._drift_sec >= _HYSTERESIS[self._drift_level][1]:
                 self._calm_since = None
             elif self._calm_since is None:
                 self._calm_since = wall
             elif wall - self._calm_since >= self._window_sec:
-                self._drift_shed = False
+                # Straight down to the level the drift still holds, not one
+                # step at a time: each step would owe another calm window.
+                self._drift_level = max(
+                    (level for level, (_, leave) in _HYSTERESIS.items()
+                     if level < self._drift_level and self._drift_sec >= leave),
+                    default=ShedLevel.NONE)
                 self._calm_since = None
                 self._settle(f'pacing recovered ({self._drift_sec:+.3f}s)')
 
     def _settle(self, reason: str) -> None:
         with self._settling:
-            target = (ShedLevel.NN_SHED if self._drift_shed or self._fault
-                      else ShedLevel.NONE)
+            target = ShedLevel.NN_SHED if self._fault else self._drift_level
             if target is self._level:
                 return
             direction = 'degrading' if target > self._level else 'recovering'
             message = (f'[drift] {direction}: {self._level.name} -> '
                        f'{target.name} ({reason})')
-            self._level = target
             now = self._clock.monotonic()
-            if target is not ShedLevel.NONE:
+            if self._level_since is not None:
+                self._residency[self._level] += now - self._level_since
+            self._level_since = now
+            self._level = target
+            if target is ShedLevel.NN_SHED:
                 self.sheds += 1
                 self._shed_at.append(now)
                 while self._shed_at[0] < now - SHED_RATE_WINDOW_SEC:
@@ -12,6 +12,7 @@ from lib.analyser.drift_watchdog import ShedLevel
 from lib.analyser.mert_stream import RingOverrun
 from lib.analyser.section_model import Drained
 from lib.clock import SYSTEM_CLOCK, Clock
+from lib.profiler import mark
 
 _QUEUE_PASSES = 4
 _IDLE_WAIT_SEC = 0.05
@@ -26,6 +27,10 @@ _HEALTHY_PASSES = 10
 _PASS_SAMPLES = 64
 _STOP_JOIN_SEC = 2.0
 
+# The partial sheds keep every cell and cut passes: one forward per 2 or 4
+# hops.  Only NN_SHED drops the queue and the decoder.
+_PASS_STRIDE = {ShedLevel.NONE: 1, ShedLevel.HOP_X2: 2, ShedLevel.HOP_X4: 4}
+
 
 def reserved_bytes():
     torch = sys.modules.get("torch")
@@ -59,6 +64,8 @@ class GpuStage:
         self._reset_requested = False
         self._pass_started_at: float | None = None
         self._shed = False
+        self._stride = 1
+        self._asked = 1
         self._attempts = 0
         self._clean = 0
         self._retry_at: float | None = None
@@ -114,6 +121,10 @@ class GpuStage:
     def shed(self) -> bool:
         return self._shed
 
+    @property
+    def stride(self) -> int:
+        return self._stride
+
     @property
     def idle(self) -> bool:
         return self._pass_started_at is None and not self.posteriors.due()
@@ -129,7 +140,7 @@ class GpuStage:
     def _drain(self) -> Drained:
         with self._lock:
             gap, self._gap = self._gap, False
-            if self._reset_requested or self._watchdog.level is not ShedLevel.NONE:
+            if self._reset_requested or self._watchdog.level is ShedLevel.NN_SHED:
                 return Drained(gap, [])
             out = [item for group in self._queue for item in group]
             self._queue.clear()
@@ -154,7 +165,8 @@ class GpuStage:
         if self._reset_requested:
             self._take_reset()
             return
-        shed = self._watchdog.level is not ShedLevel.NONE
+        level = self._watchdog.level
+        shed = level is ShedLevel.NN_SHED
         if shed != self._shed:
             self._enter_shed() if shed else self._leave_shed()
             return
@@ -162,12 +174,15 @@ class GpuStage:
             self._retry()
             self._sleep()
             return
+        if _PASS_STRIDE[level] != self._asked:
+            self._pace(level)
         if not self.posteriors.due():
             self._sleep()
             return
         self._one_pass()
 
     def _sleep(self) -> None:
+        mark('idle')
         self._wake.wait(_IDLE_WAIT_SEC)
         self._wake.clear()
 
@@ -202,7 +217,19 @@ class GpuStage:
                               f'{record.first_cell_index}')
         self._shed = False
 
+    def _pace(self, level: ShedLevel) -> None:
+        # The stream may cap the stride below what the level asks for; the
+        # ask is what a later level is compared against, or a capped stride
+        # would be re-paced on every tick.
+        was = self._stride
+        self._asked = _PASS_STRIDE[level]
+        self._stride = self.posteriors.set_stride(self._asked)
+        self._say('pace', f'[gpu] {level.name}: one pass every {self._stride} '
+                          f'hop(s), was {was} — cells arrive later, none are '
+                          f'dropped')
+
     def _one_pass(self) -> None:
+        mark('pass')
         self._pass_started_at = self._clock.monotonic()
         try:
             produced = self.posteriors.run_pass()
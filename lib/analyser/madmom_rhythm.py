@@ -6,6 +6,10 @@ from dataclasses import dataclass, field
 
 import numpy as np
 
+from lib.analyser.beat_dbn import OnlineBeatDBN
+from lib.analyser.beat_features import BeatFeatures
+from lib.analyser.beat_rnn import BeatRNN
+
 # madmom's online models are trained at 100 fps; changing it invalidates the
 # networks' learned time constants.
 FPS = 100
@@ -21,28 +25,33 @@ class RhythmEvents:
 
 
 class _BeatStage:
-    def __init__(self):
-        from madmom.features.beats import (DBNBeatTrackingProcessor,
-                                           RNNBeatProcessor)
-        from madmom.processors import BufferProcessor
-        self._rnn = RNNBeatProcessor(online=True, origin='stream',
-                                     num_frames=1, fps=FPS)
-        self._dbn = DBNBeatTrackingProcessor(fps=FPS, online=True)
-        self._buffer = BufferProcessor(buffer_size=FRAME_SIZE)
+    def __init__(self, rnn=None, dbn=None):
+        # The networks RNNBeatProcessor(online=True) loads, run stacked in
+        # NumPy and fed by our own front end instead of its processor chain,
+        # then decoded by our port of its online DBN.
+        self._features = BeatFeatures(sample_rate=SAMPLE_RATE, hop_size=HOP_SIZE)
+        self._rnn = rnn if rnn is not None else BeatRNN.from_madmom()
+        self._dbn = dbn if dbn is not None else OnlineBeatDBN(fps=FPS)
         self.reset()
 
+    @property
+    def tempo_bpm(self) -> float:
+        return self._dbn.bpm
+
     def reset(self) -> None:
         self._dbn.reset()
-        self._buffer(np.zeros(FRAME_SIZE, dtype=np.float32))
+        self._features.reset()
         self._primed = False
-        self.last_activation = 0.0
+        self.activations = np.zeros(0, dtype=np.float32)
 
-    def __call__(self, hop: np.ndarray) -> np.ndarray:
-        frame = self._buffer(hop)
-        activation = np.atleast_1d(self._rnn(frame, reset=not self._primed)).flatten()[-1:]
+    def __call__(self, hops: np.ndarray) -> list:
+        """``[n, HOP_SIZE]`` in; each hop's beats (usually none) out, in order."""
+        rows = np.stack([self._features.push(hop).copy() for hop in hops])
+        self.activations = np.atleast_1d(
+            self._rnn(rows, reset=not self._primed)).flatten()
         self._primed = True
-        self.last_activation = float(activation[0])
-        return self._dbn.process_online(activation, reset=False)
+        return [self._dbn.process(self.activations[index:index + 1])
+                for index in range(len(self.activations))]
 
 
 class MadmomRhythm:
@@ -62,6 +71,11 @@ class MadmomRhythm:
         """Audio held back waiting for a whole hop. Bounded by one hop."""
         return len(self._pending) / SAMPLE_RATE
 
+    @property
+    def tempo_bpm(self) -> float:
+        """The decoder's most probable tempo; 0 until it has reported a beat."""
+        return getattr(self._beats, 'tempo_bpm', 0.0)
+
     def reset(self) -> None:
         """Return to the constructed state without rebuilding the models."""
         self._beats.reset()
@@ -70,20 +84,25 @@ class MadmomRhythm:
 
     def process(self, audio_buffer: np.ndarray) -> RhythmEvents:
         """Feed one audio buffer; return whatever fired inside it."""
-        from madmom.audio.signal import Signal
-
         self._pending = (audio_buffer.astype(np.float32) if len(self._pending) == 0
                          else np.concatenate((self._pending, audio_buffer)))
         events = RhythmEvents()
-        while len(self._pending) >= HOP_SIZE:
-            hop, self._pending = self._pending[:HOP_SIZE], self._pending[HOP_SIZE:]
-            hop = Signal(hop, sample_rate=SAMPLE_RATE, num_channels=1)
-            # Our own hop clock, never madmom's: the decoder times events from an
-            # internal frame counter that only advances for frames it is handed,
-            # so a reset re-bases it and the two streams stop agreeing.
-            now = self._hops / FPS
-            self._hops += 1
-            if len(np.atleast_1d(self._beats(hop))):
-                events.beats.append(now)
-                events.beat_activation = getattr(self._beats, 'last_activation', 0.0)
+        whole = len(self._pending) // HOP_SIZE * HOP_SIZE
+        if not whole:
+            return events
+        hops, self._pending = (self._pending[:whole].reshape(-1, HOP_SIZE),
+                               self._pending[whole:])
+        activations = None
+        for offset, beats in enumerate(self._beats(hops)):
+            if len(np.atleast_1d(beats)):
+                # Our own hop clock, never madmom's: the decoder times events
+                # from an internal frame counter that only advances for frames
+                # it is handed, so a reset re-bases it and the two streams stop
+                # agreeing.
+                events.beats.append((self._hops + offset) / FPS)
+                if activations is None:
+                    activations = getattr(self._beats, 'activations', None)
+                events.beat_activation = (0.0 if activations is None
+                                          else float(activations[offset]))
+        self._hops += len(hops)
         return events
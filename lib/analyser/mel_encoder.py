@@ -0,0 +1,145 @@
+"""A CPU stand-in for MERT: a small conv net on log-mels, distilled to its cells.
+
+``MelEncoder`` speaks the ``MertStream`` encoder contract -- 24 kHz segments in,
+``[frames, layers, dim]`` rows and their times out -- so the stream's ring,
+schedule and ``CellAccumulator`` pool it exactly as they pool MERT.  The graph
+regresses the standardised cells and carries the ``input_affine_F3.npz`` it was
+trained against back out, so the section head reads the same raw feature space
+either way; the sidecar pins that affine by hash.
+
+The front end is plain numpy on purpose: training computes its mels with these
+same functions, so there is no second implementation to drift from.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from lib.analyser.mert_stream import ENCODER_SAMPLE_RATE
+
+N_FFT = 1024
+HOP = 480
+N_MELS = 64
+F_MIN = 30.0
+F_MAX = ENCODER_SAMPLE_RATE / 2.0
+
+INPUT_NAME = "mel"
+OUTPUT_NAME = "cells"
+
+
+def front_end() -> dict:
+    return {"sample_rate": ENCODER_SAMPLE_RATE, "n_fft": N_FFT, "hop": HOP,
+            "n_mels": N_MELS, "f_min": F_MIN, "f_max": F_MAX}
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + np.asarray(hz, dtype=np.float64) / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel, dtype=np.float64) / 2595.0) - 1.0)
+
+
+def mel_filterbank(sample_rate: int = ENCODER_SAMPLE_RATE, n_fft: int = N_FFT,
+                   n_mels: int = N_MELS, f_min: float = F_MIN,
+                   f_max: float = F_MAX) -> np.ndarray:
+    """``[n_mels, n_fft // 2 + 1]`` HTK triangles, unnormalised."""
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    edges = _mel_to_hz(np.linspace(_hz_to_mel(f_min), _hz_to_mel(f_max),
+                                   n_mels + 2))
+    lower, centre, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins[None] - lower) / (centre - lower)
+    falling = (upper - bins[None]) / (upper - centre)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+_BANK = mel_filterbank()
+_WINDOW = np.hanning(N_FFT + 1)[:-1].astype(np.float32)
+
+
+def mel_frames(n_samples: int) -> int:
+    if int(n_samples) < N_FFT:
+        return 0
+    return 1 + (int(n_samples) - N_FFT) // HOP
+
+
+def mel_frame_times(n_frames: int, *, offset_samples: int,
+                    sample_rate: int = ENCODER_SAMPLE_RATE) -> np.ndarray:
+    starts = np.arange(int(n_frames), dtype=np.float64) * HOP
+    return (offset_samples + starts + N_FFT / 2.0) / float(sample_rate)
+
+
+def log_mel(segment) -> np.ndarray:
+    """``[frames, N_MELS]`` float32 log power, frames uncentred from sample 0."""
+    segment = np.asarray(segment, dtype=np.float32)
+    n_frames = mel_frames(len(segment))
+    if not n_frames:
+        return np.zeros((0, N_MELS), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(segment, N_FFT)[::HOP]
+    spectrum = np.fft.rfft(frames[:n_frames] * _WINDOW, axis=1)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+    return np.log(1e-6 + power @ _BANK.T).astype(np.float32)
+
+
+class MelEncoder:
+    def __init__(self, session, layers, dim: int, model_sha: str) -> None:
+        self._session = session
+        self.layers = tuple(int(layer) for layer in layers)
+        self.dim = int(dim)
+        self.model_sha = model_sha
+        self.sample_rate = ENCODER_SAMPLE_RATE
+        self.do_normalize = False
+        self.device = "cpu"
+
+    @property
+    def n_layers(self) -> int:
+        return len(self.layers)
+
+    def encode(self, segment, *, offset_samples: int, lo_sec: float,
+               hi_sec: float):
+        mel = log_mel(segment)
+        times = mel_frame_times(len(mel), offset_samples=offset_samples,
+                                sample_rate=self.sample_rate)
+        keep = np.flatnonzero((times >= lo_sec) & (times < hi_sec))
+        if not len(keep):
+            return (np.zeros((0, self.n_layers, self.dim), dtype=np.float32),
+                    times[keep])
+        rows = self._session.run([OUTPUT_NAME], {INPUT_NAME: mel[None]})[0][0]
+        if rows.shape != (len(mel), self.n_layers * self.dim):
+            raise RuntimeError(f"the graph produced {rows.shape} for {len(mel)} "
+                               f"mel frames, not ({len(mel)}, "
+                               f"{self.n_layers * self.dim})")
+        stacked = np.asarray(rows[keep], dtype=np.float32)
+        return stacked.reshape(len(keep), self.n_layers, self.dim), times[keep]
+
+
+def load_mel_encoder(onnx_path, *, layers, affine_path,
+                     session_factory=None) -> MelEncoder:
+    """The exported encoder, refused unless it was distilled for this chain.
+
+    Its sidecar must name the front end above, the geometry's layers and the
+    very affine file the section head standardises with.
+    """
+    from lib.analyser.section_model import session, sha256_file
+
+    meta_path = Path(f"{onnx_path}.json")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta.get("front_end") != front_end():
+        raise ValueError(f"{meta_path} was trained on the front end "
+                         f"{meta.get('front_end')}, not {front_end()}")
+    if tuple(meta.get("layers") or ()) != tuple(int(layer) for layer in layers):
+        raise ValueError(f"{meta_path} regresses layers {meta.get('layers')}, "
+                         f"the geometry reads {list(layers)}")
+    affine_sha = sha256_file(affine_path)
+    if meta.get("affine_sha256") != affine_sha:
+        raise RuntimeError(f"{onnx_path} was distilled against the affine "
+                           f"{meta.get('affine_sha256')}, not the {affine_sha} "
+                           f"at {affine_path}")
+    model_sha = sha256_file(onnx_path)
+    if meta.get("model_sha") != model_sha:
+        raise RuntimeError(f"the graph at {onnx_path} hashes to {model_sha}, "
+                           f"not the {meta.get('model_sha')} it is recorded as")
+    return MelEncoder((session_factory or session)(onnx_path), layers,
+                      int(meta["dim"]), model_sha)
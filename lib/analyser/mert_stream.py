@@ -4,12 +4,13 @@ from __future__ import annotations
 import hashlib
 import json
 import math
+import warnings
 from dataclasses import dataclass
 from pathlib import Path
 from typing import NamedTuple
 
 import numpy as np
-from scipy.signal import resample_poly
+from scipy.signal import firwin
 
 from lib.audio_config import SAMPLE_RATE as SOURCE_SAMPLE_RATE
 
@@ -43,7 +44,10 @@ def frame_selection(n_frames: int, *, offset_samples: int, lo_sec: float,
     return times[keep], keep
 
 
-# `resample_poly`'s FIR spans 37 input samples at 80/147; one down-block covers it.
+# `resample_poly`'s FIR spans 37 input samples at 80/147; one down-block covers
+# it. The filter no longer needs the overlap, but the emit cadence is what the
+# cell cache's trigger bookkeeping reproduces (training/f3_mertcells.py), so the
+# resampler still holds back `_CONTEXT_BLOCKS` and emits in `_WORK_BLOCKS`.
 _CONTEXT_BLOCKS = 2
 _WORK_BLOCKS = 20
 
@@ -52,6 +56,23 @@ class Flushed(RuntimeError):
     ...
 
 
+# `resample_poly`'s default FIR split into `up` phases, oldest tap first: row `t`
+# weights the inputs ending at `x[(y * down) // up]` for each output `y` with
+# `(y * down) % up == t`, and the trim is the leading outputs it drops.
+def polyphase_bank(up: int, down: int):
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = firwin(2 * half_len + 1, 1.0 / max_rate,
+                  window=("kaiser", 5.0)).astype(np.float32)
+    taps *= up
+    pre_pad = down - half_len % down
+    padded = np.zeros(pre_pad + len(taps) + (-(pre_pad + len(taps)) % up),
+                      dtype=np.float32)
+    padded[pre_pad:pre_pad + len(taps)] = taps
+    bank = padded.reshape(-1, up).T[:, ::-1]
+    return np.ascontiguousarray(bank), (half_len + pre_pad) // down
+
+
 class StreamingResampler:
     def __init__(self, source_rate: int = SOURCE_SAMPLE_RATE,
                  target_rate: int = ENCODER_SAMPLE_RATE) -> None:
@@ -60,10 +81,19 @@ class StreamingResampler:
         self.down = int(source_rate) // divisor
         self._context = self.down * _CONTEXT_BLOCKS
         self._work = self.down * _WORK_BLOCKS
+        if not self.identity:
+            bank, self._trim = polyphase_bank(self.up, self.down)
+            self._taps = bank.shape[1]
+            self._bank = np.ascontiguousarray(bank.T)
+            self._layouts: dict = {}
         self.reset()
 
     def reset(self) -> None:
-        self._pending = np.zeros(self._context, dtype=np.float32)
+        taps = getattr(self, "_taps", 1)
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._base = 1 - taps
+        self._fed = 0
+        self._emitted = 0
         self._flushed = False
 
     @property
@@ -77,34 +107,65 @@ class StreamingResampler:
         if self.identity:
             return np.ascontiguousarray(block)
         if len(block):
-            self._pending = np.concatenate([self._pending, block])
-        return self._emit(self._work)
+            self._history = np.concatenate([self._history, block])
+            self._fed += len(block)
+        held = self._fed - self._context
+        if held < self._work:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit((held // self._work) * self._work * self.up // self.down)
 
     def flush(self) -> np.ndarray:
         if self._flushed or self.identity:
             self._flushed = True
             return np.zeros(0, dtype=np.float32)
-        remaining = len(self._pending) - self._context
-        take = int(math.ceil(remaining / self.down)) * self.down
-        pad = take - remaining + self._context
-        self._pending = np.concatenate(
-            [self._pending, np.zeros(max(pad, 0), dtype=np.float32)])
-        out = self._emit(self.down, exact=remaining)
+        total = -(-self._fed * self.up // self.down)
+        needed = self._newest(total - 1) + 1 - self._base
+        if needed > len(self._history):
+            self._history = np.concatenate(
+                [self._history,
+                 np.zeros(needed - len(self._history), dtype=np.float32)])
+        out = self._emit(total)
         self._flushed = True
         return out
 
-    def _emit(self, block: int, exact: int | None = None) -> np.ndarray:
-        usable = len(self._pending) - 2 * self._context
-        take = (usable // block) * block
-        if take <= 0:
+    def _newest(self, output: int) -> int:
+        return (output + self._trim) * self.down // self.up
+
+    def _emit(self, total: int) -> np.ndarray:
+        if total <= self._emitted:
             return np.zeros(0, dtype=np.float32)
-        window = self._pending[:take + 2 * self._context]
-        filtered = resample_poly(window, self.up, self.down)
-        head = self._context * self.up // self.down
-        count = (take * self.up // self.down if exact is None
-                 else int(math.ceil(exact * self.up / self.down)))
-        self._pending = self._pending[take:]
-        return np.ascontiguousarray(filtered[head:head + count], dtype=np.float32)
+        offsets, weights = self._layout(self._emitted % self.up,
+                                        total - self._emitted)
+        first = self._newest(self._emitted) - (self._taps - 1) - self._base
+        windows = self._history[first + offsets]
+        # Oldest tap first, one rounding per product and per sum: upfirdn's
+        # order, which is what keeps the stream equal to a whole-array resample.
+        np.multiply(windows, weights, out=windows)
+        out = np.zeros(windows.shape[1], dtype=np.float32)
+        for row in windows:
+            out += row
+        self._emitted = total
+        keep = self._newest(total) - (self._taps - 1) - self._base
+        self._history = self._history[keep:]
+        self._base += keep
+        return out
+
+    def _layout(self, phase: int, count: int):
+        key = (phase, count)
+        layout = self._layouts.get(key)
+        if layout is None:
+            positions = (np.arange(count, dtype=np.int64) + phase
+                         + self._trim) * self.down
+            starts = positions // self.up
+            offsets = (starts - starts[0])[None, :] \
+                + np.arange(self._taps)[:, None]
+            layout = (offsets, np.ascontiguousarray(
+                self._bank[:, positions % self.up]))
+            # Pushes emit whole work blocks, so the cache holds one entry in a
+            # show; the ragged tails of flushes are not worth keeping.
+            if len(self._layouts) < 4:
+                self._layouts[key] = layout
+        return layout
 
 
 class RingOverrun(RuntimeError):
@@ -112,8 +173,18 @@ class RingOverrun(RuntimeError):
 
 
 class SampleRing:
+    """A float32 ring addressed by absolute sample index.
+
+    Every sample is stored twice, at ``i`` and ``i + capacity``, so any span
+    the ring still holds is one contiguous slice and ``view`` never copies.
+    A write reserves its span before touching the buffer; a reader checks the
+    reservation before and after it reads (``verify``), seqlock style, and a
+    span a writer lapped in between is refused rather than returned torn.
+    """
+
     def __init__(self, capacity: int) -> None:
-        self._buffer = np.zeros(int(capacity), dtype=np.float32)
+        self._capacity = int(capacity)
+        self._buffer = np.zeros(2 * self._capacity, dtype=np.float32)
         self._written = 0
         self._reserved = 0
 
@@ -123,7 +194,7 @@ class SampleRing:
 
     @property
     def capacity(self) -> int:
-        return len(self._buffer)
+        return self._capacity
 
     def reset(self) -> None:
         self._reserved = 0
@@ -144,34 +215,38 @@ class SampleRing:
         head = (self._written + dropped) % capacity
         end = head + count
         self._reserved = self._written + dropped + count
+        self._buffer[head:end] = block
         if end <= capacity:
-            self._buffer[head:end] = block
+            self._buffer[head + capacity:end + capacity] = block
         else:
             split = capacity - head
-            self._buffer[head:] = block[:split]
+            self._buffer[head + capacity:] = block[:split]
             self._buffer[:end - capacity] = block[split:]
         self._written = self._reserved
 
-    def snapshot(self, start: int, end: int) -> np.ndarray:
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Samples ``[start, end)`` as a read-only view into the ring.
+
+        The view stays valid only until the writer laps it: call
+        ``verify(start)`` once done reading it.
+        """
         if end > self._written:
             raise ValueError(f"samples [{start}, {end}) are not written yet "
                              f"({self._written} so far)")
         if start < 0 or end < start:
             raise ValueError(f"bad span [{start}, {end})")
-        self._still_held(start)
-        capacity = self.capacity
-        head = start % capacity
-        count = end - start
-        if head + count <= capacity:
-            out = np.array(self._buffer[head:head + count], dtype=np.float32)
-        else:
-            split = capacity - head
-            out = np.concatenate([self._buffer[head:],
-                                  self._buffer[:count - split]]).astype(np.float32)
-        self._still_held(start)
+        self.verify(start)
+        head = start % self.capacity
+        out = self._buffer[head:head + end - start]
+        out.flags.writeable = False
         return out
 
-    def _still_held(self, start: int) -> None:
+    def snapshot(self, start: int, end: int) -> np.ndarray:
+        out = np.array(self.view(start, end))
+        self.verify(start)
+        return out
+
+    def verify(self, start: int) -> None:
         if self._reserved - start > self.capacity:
             raise RingOverrun(f"samples from {start} have been overwritten; the "
                               f"ring holds {self.capacity} and is at "
@@ -367,9 +442,60 @@ def state_dict_sha(model) -> str:
     return digest.hexdigest()[:16]
 
 
+def truncate_encoder(model, layers):
+    """Drop the transformer blocks past the deepest of ``layers``.
+
+    A hidden state depends only on the blocks below it, so what is kept
+    computes exactly what the full stack did for those layers.  One block
+    always stays: layer 0 is read off its input.
+    """
+    blocks = model.encoder.layers
+    depth = max(1, max(int(layer) for layer in layers))
+    if depth > len(blocks):
+        raise ValueError(f"layer {depth} is past the encoder's "
+                         f"{len(blocks)} blocks")
+    model.encoder.layers = blocks[:depth]
+    return model
+
+
+def _host_tensor(segment: np.ndarray):
+    """``segment`` as a CPU tensor sharing its memory.
+
+    A ring view is read-only and torch warns that it cannot mark the tensor
+    so; the encoder only ever reads its input.
+    """
+    import torch
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        return torch.from_numpy(segment)
+
+
+def _block_output(output):
+    return output[0] if isinstance(output, tuple) else output
+
+
+def _frames_are_local(model, do_normalize: bool) -> bool:
+    """Whether a conv frame depends on its receptive field alone.
+
+    Group norm over time and whole-segment input normalisation both make
+    every frame a function of the window it was cut from.
+    """
+    return (hasattr(model, "feature_extractor") and not do_normalize
+            and getattr(model.config, "feat_extract_norm", None) == "layer")
+
+
+# Reused conv frames can differ from recomputed ones by a few ulps, so the
+# cell cache records this with the encoder it keys on. Off, keeping the cells
+# bit-identical, until training/conv_frame_parity.py --write has a report on
+# the real model committed.
+REUSE_FRAMES = False
+
+
 class MertEncoder:
     def __init__(self, model, extractor, model_sha: str, layers, *,
-                 device: str, fp16: bool) -> None:
+                 device: str, fp16: bool, weights_sha: str | None = None,
+                 reuse_frames: bool = REUSE_FRAMES) -> None:
         import torch
 
         self._model = model
@@ -377,9 +503,88 @@ class MertEncoder:
         self.do_normalize = bool(getattr(extractor, "do_normalize", False))
         self.layers = tuple(int(layer) for layer in layers)
         self.model_sha = model_sha
+        self.weights_sha = weights_sha or model_sha
         self.device = device
         self._dtype = torch.float16 if fp16 else torch.float32
         self.dim = int(model.config.hidden_size)
+        blocks = model.encoder.layers
+        self.depth = len(blocks)
+        # The full stack's last hidden state is post its closing norm in the
+        # stable-layer-norm variant, so that layer comes from the model output;
+        # every other one is a block's input or output, caught as it passes.
+        self._final = int(model.config.num_hidden_layers)
+        self._hidden: dict = {}
+        for layer in set(self.layers) - {self._final}:
+            if layer == 0:
+                blocks[0].register_forward_pre_hook(self._catch_input,
+                                                    with_kwargs=True)
+            else:
+                blocks[layer - 1].register_forward_hook(
+                    lambda _module, _args, output, layer=layer:
+                    self._hidden.__setitem__(layer, _block_output(output)))
+        self.reuses_frames = bool(reuse_frames) and _frames_are_local(
+            model, self.do_normalize)
+        self.frames_reused = 0
+        self.frames_computed = 0
+        self.forget_frames()
+        if self.reuses_frames:
+            model.feature_extractor.register_forward_pre_hook(self._reuse_frames)
+            model.feature_extractor.register_forward_hook(self._keep_frames)
+
+    def _catch_input(self, _module, args, kwargs):
+        self._hidden[0] = args[0] if args else kwargs["hidden_states"]
+
+    def forget_frames(self) -> None:
+        self._frames = None
+        self._frames_audio = None
+        self._frames_offset = 0
+        self._offset = 0
+        self._audio = None
+        self._head = None
+
+    # Consecutive passes overlap by buffer - hop.  The conv frames of the last
+    # pass are kept with the audio they were computed from; a frame is reused
+    # when it starts on the same absolute sample and every input sample it
+    # reads is unchanged, and the conv stack runs over the rest only.
+    def _reuse_frames(self, _module, args):
+        import torch
+
+        audio = args[0]
+        self._audio = audio
+        self._head = None
+        if self._frames is None:
+            return None
+        shift, misaligned = divmod(self._offset - self._frames_offset,
+                                   ENCODER_SAMPLES_PER_FRAME)
+        if misaligned or shift < 0:
+            return None
+        reusable = min(int(self._frames.shape[-1]) - shift,
+                       encoder_frames(audio.shape[-1]) - 1)
+        if reusable <= 0:
+            return None
+        read = (reusable - 1) * ENCODER_SAMPLES_PER_FRAME + ENCODER_RECEPTIVE_FIELD
+        start = shift * ENCODER_SAMPLES_PER_FRAME
+        if not torch.equal(self._frames_audio[..., start:start + read],
+                           audio[..., :read]):
+            return None
+        self._head = self._frames[..., shift:shift + reusable]
+        return (audio[..., reusable * ENCODER_SAMPLES_PER_FRAME:],)
+
+    def _keep_frames(self, _module, _args, output):
+        import torch
+
+        if self._head is not None:
+            self.frames_reused += int(self._head.shape[-1])
+            self.frames_computed += int(output.shape[-1])
+            output = torch.cat([self._head, output], dim=-1)
+        else:
+            self.frames_computed += int(output.shape[-1])
+        self._frames = output
+        # from_numpy shares the caller's buffer when no cast was needed
+        self._frames_audio = self._audio.clone()
+        self._frames_offset = self._offset
+        self._head = self._audio = None
+        return output
 
     @property
     def n_layers(self) -> int:
@@ -392,28 +597,42 @@ class MertEncoder:
         segment = np.ascontiguousarray(segment, dtype=np.float32)
         if self.do_normalize:
             segment = (segment - segment.mean()) / (segment.std() + 1e-7)
-        with torch.no_grad():
-            x = torch.from_numpy(segment).to(self._dtype).to(self.device)[None]
-            hidden = self._model(x, output_hidden_states=True).hidden_states
-            n_frames = int(hidden[self.layers[0]].shape[1])
-            if n_frames != encoder_frames(len(segment)):
-                raise RuntimeError(
-                    f"the encoder produced {n_frames} frames for "
-                    f"{len(segment)} samples, not the "
-                    f"{encoder_frames(len(segment))} its conv stack implies")
-            times, keep = frame_selection(
-                n_frames, offset_samples=offset_samples, lo_sec=lo_sec,
-                hi_sec=hi_sec, sample_rate=self.sample_rate)
-            index = torch.from_numpy(keep).to(self.device)
-            stacked = torch.stack(
-                [hidden[layer][0].index_select(0, index)
-                 for layer in self.layers], dim=1).float().cpu().numpy()
-            del hidden, x
+        hidden = self._hidden
+        self._offset = int(offset_samples)
+        try:
+            with torch.no_grad():
+                x = _host_tensor(segment).to(self._dtype).to(self.device)[None]
+                output = self._model(x)
+                if self._final in self.layers:
+                    hidden[self._final] = output[0]
+                del output
+                n_frames = int(hidden[self.layers[0]].shape[1])
+                if n_frames != encoder_frames(len(segment)):
+                    raise RuntimeError(
+                        f"the encoder produced {n_frames} frames for "
+                        f"{len(segment)} samples, not the "
+                        f"{encoder_frames(len(segment))} its conv stack implies")
+                times, keep = frame_selection(
+                    n_frames, offset_samples=offset_samples, lo_sec=lo_sec,
+                    hi_sec=hi_sec, sample_rate=self.sample_rate)
+                index = torch.from_numpy(keep).to(self.device)
+                stacked = torch.stack(
+                    [hidden[layer][0].index_select(0, index)
+                     for layer in self.layers], dim=1).float().cpu().numpy()
+                del x
+        finally:
+            hidden.clear()
         return stacked, times
 
 
 def load_encoder(geometry: StreamGeometry, *, device: str, fp16: bool = True,
-                 expected_sha: str | None = None) -> MertEncoder:
+                 expected_sha: str | None = None,
+                 reuse_frames: bool = REUSE_FRAMES) -> MertEncoder:
+    """The pinned encoder, cut down to the blocks ``geometry.layers`` reads.
+
+    ``model_sha`` is checked on the weights as fetched; ``weights_sha`` is the
+    same hash over what is left after the cut, the weights that actually run.
+    """
     from transformers import AutoModel, Wav2Vec2FeatureExtractor
 
     model = AutoModel.from_pretrained(geometry.model_id,
@@ -424,10 +643,13 @@ def load_encoder(geometry: StreamGeometry, *, device: str, fp16: bool = True,
     model.eval()
     model_sha = state_dict_sha(model)
     check_encoder_sha(model_sha, expected_sha or geometry.encoder_sha)
+    model = truncate_encoder(model, geometry.layers)
+    weights_sha = state_dict_sha(model)
     if fp16:
         model = model.half()
     return MertEncoder(model.to(device), extractor, model_sha, geometry.layers,
-                       device=device, fp16=fp16)
+                       device=device, fp16=fp16, weights_sha=weights_sha,
+                       reuse_frames=reuse_frames)
 
 
 def _checked_encoder(encoder):
@@ -466,8 +688,10 @@ class MertStream:
         self._cells = CellAccumulator(encoder.n_layers, encoder.dim,
                                       geometry.label_frame_sec)
         self._passes = 0
+        self._hops = 0
         self._lo = 0
         self._flushed = False
+        self._stride = 1
 
     def set_encoder(self, encoder) -> None:
         encoder = _checked_encoder(encoder)
@@ -479,19 +703,47 @@ class MertStream:
                              f"the accumulator and the student were built for")
         self._encoder = encoder
 
+    def set_stride(self, hops: int) -> int:
+        """Run one pass every ``hops`` hops; the spans between them widen.
+
+        Every frame is still encoded once, by the pass whose span covers it,
+        so nothing is lost -- cells arrive up to ``hops - 1`` hops later, from
+        a window with that much less left context.  Capped where the widened
+        span would start before the buffer the pass encodes.
+        """
+        geometry = self.geometry
+        widest = max(1, (geometry.buffer_samples - geometry.margin_samples)
+                     // geometry.hop_samples)
+        self._stride = max(1, min(int(hops), widest))
+        return self._stride
+
+    @property
+    def stride(self) -> int:
+        return self._stride
+
     @property
     def samples_seen(self) -> int:
         return self._ring.written
 
     @property
     def passes(self) -> int:
+        """Passes actually run, whatever the stride."""
         return self._passes
 
+    @property
+    def hops(self) -> int:
+        """Hops the passes so far have covered, counting resynced ones."""
+        return self._hops
+
     def reset(self) -> None:
         self._resampler.reset()
         self._ring.reset()
         self._cells.reset()
+        forget_frames = getattr(self._encoder, "forget_frames", None)
+        if forget_frames is not None:
+            forget_frames()
         self._passes = 0
+        self._hops = 0
         self._lo = 0
         self._flushed = False
 
@@ -511,6 +763,7 @@ class MertStream:
             return []
         cells = self._encode_span(end, end - self.geometry.margin_samples)
         self._passes += 1
+        self._hops += self._stride
         return cells
 
     def resync(self) -> Resync:
@@ -518,14 +771,14 @@ class MertStream:
             raise Flushed("the stage was flushed; there is no live edge to "
                           "rejoin until it is reset")
         hop = self.geometry.hop_samples
-        passes = max(0, self._ring.written // hop - 1)
-        end = (passes + 1) * hop
+        hops = max(0, self._ring.written // hop - 1)
+        end = (hops + 1) * hop
         rate = float(self._encoder.sample_rate)
         lo = max(self._lo, end - self.geometry.margin_samples - hop, 0)
         lost = lo - self._lo
         skipped = self._cells.skip_to(
             math.ceil(lo / rate / self.geometry.label_frame_sec))
-        self._passes = passes
+        self._hops = hops
         self._lo = lo
         return Resync(lost, lost / rate, self._cells.next_index, skipped)
 
@@ -538,7 +791,7 @@ class MertStream:
         return self._encode_span(end, end, final=True)
 
     def _next_end(self) -> int:
-        return (self._passes + 1) * self.geometry.hop_samples
+        return (self._hops + self._stride) * self.geometry.hop_samples
 
     def _encode_span(self, end: int, hi: int, *, final: bool = False) -> list:
         if hi <= self._lo and not final:
@@ -546,10 +799,11 @@ class MertStream:
         rate = float(self._encoder.sample_rate)
         start = max(0, end - self.geometry.buffer_samples)
         if hi > self._lo:
-            segment = self._ring.snapshot(start, end)
+            segment = self._ring.view(start, end)
             stacked, times = self._encoder.encode(
                 segment, offset_samples=start, lo_sec=self._lo / rate,
                 hi_sec=hi / rate)
+            self._ring.verify(start)
             self._cells.add(stacked, times, self._lo / rate, hi / rate)
             self._lo = hi
         return [self._cell(index, row, end / rate)
@@ -90,6 +90,12 @@ class MusicAnalyser:
     def _measured_bpm(self) -> float:
         if len(self._beat_stream_times) < 3:
             return 0.0
+        # The decoder's tempo posterior once it has reported a beat: it sits on
+        # the same interval grid as the beats, but follows a tempo change as
+        # soon as the mass moves instead of after half the median window.
+        tempo = getattr(self._rhythm, 'tempo_bpm', 0.0)
+        if tempo > 0:
+            return tempo
         interval = float(np.median(np.diff(np.array(self._beat_stream_times))))
         return 60.0 / interval if interval > 0 else 0.0
 
@@ -1,6 +1,7 @@
 """The online student, one cell at a time -- the deployed decision."""
 from __future__ import annotations
 
+import dataclasses
 import hashlib
 import json
 from collections import deque
@@ -20,6 +21,13 @@ STATE_OUTPUT = "next_state"
 _GEOMETRY_FIELDS = ("window_cells", "input_dim", "rnn_hidden", "future_cells",
                     "future_sec", "label_frame_sec", "sha256")
 
+# The exported graph and its offline builds: ORT's optimised plan saved to
+# disk, and that plan over int8 dynamically quantised weights.
+FP32_HEAD = "fp32"
+OPTIMISED_HEAD = "optimised"
+INT8_HEAD = "int8"
+HEAD_VARIANTS = (FP32_HEAD, OPTIMISED_HEAD, INT8_HEAD)
+
 
 def sha256_file(path) -> str:
     digest = hashlib.sha256()
@@ -39,6 +47,7 @@ class HeadGeometry:
     label_frame_sec: float
     sha256: str
     backward_cells: int | None = None
+    variant: str = FP32_HEAD
 
     @property
     def conv_reach_cells(self) -> int:
@@ -60,7 +69,57 @@ def load_head_geometry(onnx_path) -> HeadGeometry:
                         label_frame_sec=float(record["label_frame_sec"]),
                         sha256=str(record["sha256"]),
                         backward_cells=None if backward is None
-                        else int(backward))
+                        else int(backward),
+                        variant=str(record.get("variant", FP32_HEAD)))
+
+
+def head_variant_path(onnx_path, variant: str) -> Path:
+    """``online_step.onnx`` -> ``online_step.<variant>.onnx``, fp32 being itself."""
+    if variant not in HEAD_VARIANTS:
+        raise ValueError(f"no {variant!r} head; the variants are "
+                         f"{', '.join(HEAD_VARIANTS)}")
+    path = Path(onnx_path)
+    if variant == FP32_HEAD:
+        return path
+    return path.with_name(f"{path.stem}.{variant}{path.suffix}")
+
+
+def load_head_variant(onnx_path, variant: str, geometry: HeadGeometry, *,
+                      gated: bool = True) -> tuple:
+    """``(path, geometry)`` of a build of the graph ``geometry`` describes.
+
+    Refused unless its sidecar names that very graph as its source, records the
+    same geometry and the onnxruntime it was optimised under -- the saved plan
+    holds fused kernels of that release -- and, when ``gated``, a passing
+    verdict from ``training/nn/optimise_head.py --gate``.
+    """
+    path = head_variant_path(onnx_path, variant)
+    if variant == FP32_HEAD:
+        return path, geometry
+    if not path.exists():
+        raise FileNotFoundError(f"no {variant} head at {path} -- build it with "
+                                f"training/nn/optimise_head.py")
+    found = load_head_geometry(path)
+    record = json.loads(Path(f"{path}.json").read_text(encoding="utf-8"))
+    if record.get("source_sha256") != geometry.sha256:
+        raise RuntimeError(f"{path} was built from the graph "
+                           f"{record.get('source_sha256')}, not the "
+                           f"{geometry.sha256} at {onnx_path}")
+    if found.variant != variant:
+        raise ValueError(f"{path} records itself as the {found.variant} head")
+    retyped = dataclasses.replace(found, sha256=geometry.sha256,
+                                  variant=geometry.variant)
+    if retyped != geometry:
+        raise ValueError(f"{path} records a geometry other than its source's")
+    if record.get("onnxruntime") != ort.__version__:
+        raise RuntimeError(f"{path} was optimised under onnxruntime "
+                           f"{record.get('onnxruntime')}, this is "
+                           f"{ort.__version__} -- rebuild it")
+    if gated and not (record.get("gate") or {}).get("passed"):
+        raise RuntimeError(f"{path} has not passed the decision gate -- run "
+                           f"training/nn/optimise_head.py --gate before the "
+                           f"show runs on it")
+    return path, found
 
 
 def check_head_geometry(geometry: HeadGeometry) -> None:
@@ -121,17 +180,20 @@ def _axis(shape: list, axis: int, wanted: int, field: str) -> None:
                          f"its sidecar records")
 
 
-def session_options() -> ort.SessionOptions:
+def session_options(*, optimised: bool = False) -> ort.SessionOptions:
     # Single-threaded is a determinism contract: float addition is not associative.
     options = ort.SessionOptions()
     options.intra_op_num_threads = 1
     options.inter_op_num_threads = 1
     options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if optimised:
+        # The plan was optimised when the file was written; do not pay for it again.
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
     return options
 
 
-def session(path) -> ort.InferenceSession:
-    return ort.InferenceSession(str(path), session_options(),
+def session(path, *, optimised: bool = False) -> ort.InferenceSession:
+    return ort.InferenceSession(str(path), session_options(optimised=optimised),
                                 providers=["CPUExecutionProvider"])
 
 
@@ -161,7 +223,11 @@ class SectionModel:
             raise ValueError(f"the affine is {len(mean)}-dim, the graph's "
                              f"input_dim is {self.geometry.input_dim}")
         self._mean = mean
-        self._session = (session_factory or session)(onnx_path)
+        if session_factory is None:
+            self._session = session(onnx_path,
+                                    optimised=self.geometry.variant != FP32_HEAD)
+        else:
+            self._session = session_factory(onnx_path)
         check_graph_geometry(self._session, self.geometry)
         self.num_classes = label_class_count(self._session)
         self.reset()
@@ -181,7 +247,17 @@ class SectionModel:
                           "before pushing the next song's cells")
         return self._push(features, index)
 
+    def admit(self, features, index: int | None = None) -> int | None:
+        if self._flushed:
+            raise Flushed("the model was flushed at a song boundary; reset it "
+                          "before pushing the next song's cells")
+        return self._admit(features, index)
+
     def _push(self, features, index: int | None = None) -> Posterior | None:
+        due = self._admit(features, index)
+        return None if due is None else self._step(due)
+
+    def _admit(self, features, index: int | None = None) -> int | None:
         row = np.asarray(features, dtype=np.float32).reshape(-1)
         if len(row) != self.geometry.input_dim:
             raise ValueError(f"a cell is {len(row)}-dim, the graph's input_dim "
@@ -194,7 +270,7 @@ class SectionModel:
         self._window.append(self._last_index)
         if len(self._window) <= self.geometry.future_cells:
             return None
-        return self._step(self._window.popleft())
+        return self._window.popleft()
 
     def flush(self) -> list:
         if self._flushed:
@@ -204,13 +280,33 @@ class SectionModel:
         return [item for item in out if item is not None]
 
     def _step(self, index: int) -> Posterior:
-        frames = np.ascontiguousarray(self._ring[None], dtype=np.float32)
-        label, boundary, self._state = self._session.run(
-            [LABEL_OUTPUT, BOUNDARY_OUTPUT, STATE_OUTPUT],
-            {FRAMES_INPUT: frames, STATE_INPUT: self._state})
-        return Posterior(index, (index + 1) * self.geometry.label_frame_sec,
-                         _softmax(label[0]),
-                         _sigmoid(boundary.reshape(-1)[0]))
+        return step_together(self._session, [(self, index)])[0]
+
+
+def step_together(session, due: list) -> list:
+    """One graph call for several models that each admitted a due cell.
+
+    ``due`` pairs each model with the index it owes; every model keeps its own
+    window and GRU state, stacked on the batch axis for the call and handed
+    back row by row. A lone model is the batch of one the live chain runs.
+    """
+    if not due:
+        return []
+    frames = np.ascontiguousarray(
+        np.stack([model._ring for model, _ in due]), dtype=np.float32)
+    state = np.concatenate([model._state for model, _ in due], axis=1)
+    label, boundary, state = session.run(
+        [LABEL_OUTPUT, BOUNDARY_OUTPUT, STATE_OUTPUT],
+        {FRAMES_INPUT: frames, STATE_INPUT: state})
+    boundary = boundary.reshape(len(due), -1)
+    out = []
+    for row, (model, index) in enumerate(due):
+        model._state = state[:, row:row + 1]
+        out.append(Posterior(index,
+                             (index + 1) * model.geometry.label_frame_sec,
+                             _softmax(label[row]),
+                             _sigmoid(boundary[row, 0])))
+    return out
 
 
 class Drained(NamedTuple):
@@ -249,6 +345,9 @@ class PosteriorStream:
     def set_encoder(self, encoder) -> None:
         self.stream.set_encoder(encoder)
 
+    def set_stride(self, hops: int) -> int:
+        return self.stream.set_stride(hops)
+
     def reset(self) -> None:
         self.stream.reset()
         self.model.reset()
@@ -0,0 +1,83 @@
+"""Lock-free hand-off between PortAudio's callback thread and the show loop.
+
+One side of each ring runs on the PortAudio thread and must never block; the
+other runs on the asyncio loop.  Both sit on ``SampleRing``, whose absolute
+sample index lets the reader tell "not arrived yet" from "already overwritten"
+without a lock, so every lost sample is counted rather than silently dropped.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from lib.analyser.mert_stream import RingOverrun, SampleRing
+
+
+class CaptureRing:
+    def __init__(self, block: int, capacity: int) -> None:
+        if capacity < 2 * block:
+            raise ValueError(f"a capture ring of {capacity} samples cannot hold "
+                             f"two {block}-sample blocks")
+        self.block = int(block)
+        self._ring = SampleRing(capacity)
+        self._read = 0
+        self.input_overflows = 0
+        self.dropped_samples = 0
+
+    @property
+    def available(self) -> int:
+        return self._ring.written - self._read
+
+    def push(self, samples: np.ndarray, overflowed: bool = False) -> None:
+        if overflowed:
+            self.input_overflows += 1
+        self._ring.write(samples)
+
+    def pop(self) -> np.ndarray | None:
+        while self.available >= self.block:
+            start = max(self._read, self._ring.written - self._ring.capacity)
+            if start > self._read:
+                self._skip(start)
+            try:
+                block = self._ring.snapshot(start, start + self.block)
+            except RingOverrun:
+                continue                # the callback lapped this span mid-copy
+            self._read = start + self.block
+            return block
+        return None
+
+    def _skip(self, start: int) -> None:
+        # The loop fell a whole ring behind: resume at the oldest span still
+        # held, and count what was lost so the drop is visible.
+        self.dropped_samples += start - self._read
+        self._read = start
+
+
+class PlaybackRing:
+    def __init__(self, capacity: int) -> None:
+        self._ring = SampleRing(capacity)
+        self._played = 0
+        self.underflow_samples = 0
+        self.dropped_samples = 0
+
+    @property
+    def queued(self) -> int:
+        return self._ring.written - self._played
+
+    def push(self, samples: np.ndarray) -> None:
+        self._ring.write(samples)
+
+    def pull(self, out: np.ndarray) -> np.ndarray:
+        count = len(out)
+        written = self._ring.written
+        start = max(self._played, written - self._ring.capacity)
+        take = min(count, written - start)
+        try:
+            out[:take] = self._ring.snapshot(start, start + take)
+        except RingOverrun:
+            start, take = self._ring.written, 0
+        out[take:] = 0.0
+        self.dropped_samples += start - self._played
+        if written:                     # silence before the first push is not a gap
+            self.underflow_samples += count - take
+        self._played = start + take
+        return out
@@ -74,7 +74,7 @@ class Os2lClient:
 
     def start(self):
         # zeroconf blocks and cannot run on the asyncio loop: run it on a thread and join before returning.
-        thread = Thread(target=self._find_services)
+        thread = Thread(target=self._find_services, name='os2l-discovery')
         thread.start()
         thread.join()
 
@@ -15,7 +15,7 @@ class Os2lSender:
         self.dest_ipv4_address: str = None
         self.dest_port: int = None
         self.os2l_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.sending_thread = Thread(target=self._run_sending_thread)
+        self.sending_thread = Thread(target=self._run_sending_thread, name='os2l')
         self.message_queue: Queue = Queue()
         self.is_running: bool = False
         self.logon_complete: bool = False
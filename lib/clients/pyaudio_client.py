@@ -1,6 +1,17 @@
+import asyncio
 import pyaudio
 import numpy as np
 import logging
+import threading
+import time
+
+from lib.clients.audio_ring import CaptureRing, PlaybackRing
+
+# Capture backlog the loop may fall behind before audio is dropped; playback
+# queue that may build up ahead of the device.  Both are counted when exceeded.
+_CAPTURE_RING_SEC = 2.0
+_PLAYBACK_RING_SEC = 2.0
+_DROP_LOG_INTERVAL_SEC = 10.0
 
 
 class PyAudioClient:
@@ -16,6 +27,17 @@ class PyAudioClient:
         self.py_audio: pyaudio.PyAudio = pyaudio.PyAudio()
         self.stream_in: pyaudio.Stream = None
         self.stream_out: pyaudio.Stream = None
+        self._capture = CaptureRing(buffer_size, int(_CAPTURE_RING_SEC * sample_rate))
+        self._playback = PlaybackRing(int(_PLAYBACK_RING_SEC * sample_rate))
+        self._out = np.zeros(buffer_size, dtype=np.float32)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._arrived = asyncio.Event()
+        self._reported = (0, 0, 0)
+        self._reported_at = float('-inf')
+        # Called once per PortAudio callback thread, from that thread, with its
+        # native id: those threads never appear in threading.enumerate().
+        self.on_callback_thread = None
+        self._callback_tids: dict = {}
 
     def list_devices(self):
         # PortAudio repeats each device once per host API; only default-host-API indices work with open().
@@ -36,6 +58,18 @@ class PyAudioClient:
     def exhausted(self) -> bool:
         return False
 
+    @property
+    def input_overflows(self) -> int:
+        return self._capture.input_overflows
+
+    @property
+    def dropped_samples(self) -> int:
+        return self._capture.dropped_samples
+
+    @property
+    def underflow_samples(self) -> int:
+        return self._playback.underflow_samples
+
     def start_streams(self, start_stream_out: bool = False,
                       start_stream_in: bool = True) -> None:
         if start_stream_in:
@@ -57,7 +91,8 @@ class PyAudioClient:
                                             rate=self.sample_rate,
                                             input_device_index=self.input_device_index,
                                             input=True,
-                                            frames_per_buffer=self.buffer_size)
+                                            frames_per_buffer=self.buffer_size,
+                                            stream_callback=self._on_input)
         self.stream_in.start_stream()
 
     def _start_stream_out(self) -> None:
@@ -73,20 +108,68 @@ class PyAudioClient:
                                              output_device_index=self.output_device_index,
                                              rate=self.sample_rate,
                                              output=True,
-                                             frames_per_buffer=self.buffer_size)
+                                             frames_per_buffer=self.buffer_size,
+                                             stream_callback=self._on_output)
         self.stream_out.start_stream()
 
-    def read(self) -> np.ndarray:
+    # PortAudio thread: copy into the ring and wake the loop, never block.
+    def _on_input(self, in_data, frame_count, time_info, status_flags):
+        if 'capture' not in self._callback_tids:
+            self._announce('capture')
+        self._capture.push(np.frombuffer(in_data, dtype=np.float32),
+                           overflowed=bool(status_flags & pyaudio.paInputOverflow))
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._arrived.set)
+        return None, pyaudio.paContinue
+
+    def _on_output(self, in_data, frame_count, time_info, status_flags):
+        if 'playback' not in self._callback_tids:
+            self._announce('playback')
+        out = self._out if frame_count == len(self._out) else np.zeros(frame_count, dtype=np.float32)
+        return self._playback.pull(out).tobytes(), pyaudio.paContinue
+
+    def _announce(self, kind: str) -> None:
+        tid = self._callback_tids[kind] = threading.get_native_id()
+        hook = self.on_callback_thread
+        if hook is None:
+            return
+        try:
+            hook(tid, f'the PortAudio {kind} thread')
+        except Exception as error:
+            logging.warning(f'[pyaudio] configuring the {kind} thread failed ({error!r})')
+
+    async def read(self) -> np.ndarray:
         assert self.stream_in is not None, "stream_in was None"
-        audio_buffer = self.stream_in.read(self.buffer_size, exception_on_overflow=False)
-        return np.fromstring(audio_buffer, dtype=np.float32)
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        while (block := self._capture.pop()) is None:
+            self._arrived.clear()
+            if (block := self._capture.pop()) is not None:
+                break
+            await self._arrived.wait()
+        self._report_drops()
+        return block
 
     def play(self, audio_buffer: np.ndarray) -> None:
         assert self.stream_out is not None, "stream_out was None"
-        self.stream_out.write(audio_buffer.tobytes())
+        self._playback.push(audio_buffer)
+
+    def _report_drops(self) -> None:
+        now = time.monotonic()
+        counts = (self.input_overflows, self.dropped_samples, self.underflow_samples)
+        if counts == self._reported or now - self._reported_at < _DROP_LOG_INTERVAL_SEC:
+            return
+        overflows, dropped, underflow = (count - seen for count, seen in zip(counts, self._reported))
+        self._reported, self._reported_at = counts, now
+        logging.warning(f'[pyaudio] audio lost: {overflows} input overflow(s), '
+                        f'{dropped / self.sample_rate:.2f}s dropped behind a slow loop, '
+                        f'{underflow / self.sample_rate:.2f}s of playback underflow')
 
     def close(self) -> None:
-        logging.info(f'[pyaudio] closing pyaudio')
+        logging.info(f'[pyaudio] closing pyaudio ({self.input_overflows} input overflow(s), '
+                     f'{self.dropped_samples} samples dropped, '
+                     f'{self.underflow_samples} samples of playback underflow)')
         if self.stream_in is not None:
             self.stream_in.stop_stream()
             self.stream_in.close()
@@ -1,19 +1,37 @@
-"""The monitored output, held one look-ahead behind the analysis it came from."""
+"""The monitored output, held one look-ahead behind the analysis it came from.
+
+The held audio sits in one preallocated float32 ``SampleRing`` sized from the
+delay, not in a queue of per-buffer arrays.  ``feed`` copies a buffer in, and
+``play`` is handed a read-only view of the ring that stays valid for the call
+only.  A stop just moves the read index up to the write index.
+"""
 
 import logging
-from collections import deque
 
+import numpy as np
+
+from lib.analyser.mert_stream import SampleRing
+from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
 from lib.clock import SYSTEM_CLOCK, Clock
 
+# Room above the delay itself for a loop that catches up in a burst.
+_HEADROOM_SEC = 1.0
+
 
 class DelayedMonitor:
-    def __init__(self, delay_sec: float, play, clock: Clock = SYSTEM_CLOCK):
+    def __init__(self, delay_sec: float, play, clock: Clock = SYSTEM_CLOCK,
+                 sample_rate: int = SAMPLE_RATE, block: int = BUFFER_SIZE):
         self._delay_sec = delay_sec
         self._play = play
         self._clock = clock
-        self._buffered: deque = deque()
+        self._sample_rate = sample_rate
+        self._block = int(block)
+        self._ring = SampleRing(int(np.ceil((delay_sec + _HEADROOM_SEC) * sample_rate)))
+        self._read: int = 0
         self._ready_at: float = 0.0
         self._started: bool = False
+        self.overruns: int = 0
+        self.underruns: int = 0
         self.arm()
 
     @property
@@ -22,26 +40,53 @@ class DelayedMonitor:
 
     @property
     def buffered(self) -> int:
-        return len(self._buffered)
+        """Buffers still to play, counting a partial one as whole."""
+        return -(-(self._ring.written - self._read) // self._block)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'started': self._started,
+            'buffered_sec': round((self._ring.written - self._read)
+                                  / self._sample_rate, 3),
+            'overruns': self.overruns,
+            'underruns': self.underruns,
+        }
 
     def arm(self) -> None:
         self._ready_at = self._clock.monotonic() + self._delay_sec
         self._started = False
 
     def silence(self) -> None:
-        self._buffered.clear()
+        self._read = self._ring.written
         self.arm()
 
     def drain(self) -> None:
-        if self._buffered:
-            self._play(self._buffered.popleft())
+        if self._ring.written > self._read:
+            self._play_next(self._block)
+        elif self._started:
+            self.underruns += 1
 
     def feed(self, audio) -> None:
-        self._buffered.append(audio)
+        samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+        room = self._ring.capacity - (self._ring.written - self._read)
+        if len(samples) > room:
+            # Never expected in real time: drop the oldest rather than lap it.
+            self.overruns += 1
+            self._read += min(len(samples) - room, self._ring.written - self._read)
+        self._ring.write(samples)
         if self._clock.monotonic() < self._ready_at:
             return
         if not self._started:
             self._started = True
             logging.info(f'[monitor] {self._delay_sec:.1f}s buffered — the '
                          f'headphones join the room')
-        self._play(self._buffered.popleft())
+        self._play_next(len(samples))
+
+    def _play_next(self, count: int) -> None:
+        start = max(self._read, self._ring.written - self._ring.capacity)
+        end = min(start + count, self._ring.written)
+        if end - start < count:
+            self.underruns += 1
+        self._read = end
+        self._play(self._ring.view(start, end))
@@ -19,10 +19,12 @@ APPLY_COLOR_OVERRIDE_INTERVAL_SEC = 60 * 5
 
 class EffectController:
     def __init__(self, midi_client: MidiClient, event_buffer: EventBuffer | None = None,
-                 clock: Clock = SYSTEM_CLOCK):
+                 clock: Clock = SYSTEM_CLOCK, rng: random.Random | None = None):
         self.midi_client: MidiClient = midi_client
         self.event_buffer: EventBuffer | None = event_buffer
         self._clock: Clock = clock
+        # Batched simulations interleave tracks, so each takes its own stream.
+        self._random = rng if rng is not None else random
         self.last_effect: Effect = Effect(type=EffectType.AUTOLOOP, source=EffectSource.MIDI, midi_channel=MidiChannel.AUTOLOOP_BANK_1A)
         self.last_special_effect: Effect = Effect(type=EffectType.SPECIAL_EFFECT, source=EffectSource.MIDI, midi_channel=MidiChannel.SPECIAL_EFFECT_STROBE)
         self.last_color_override: Effect = Effect(type=EffectType.AUTOLOOP, source=EffectSource.MIDI, midi_channel=MidiChannel.COLOR_OVERRIDE_1)
@@ -87,7 +89,7 @@ class EffectController:
 
     def _select_new_random_effect(self, effects: list[Effect], previous_effect: Effect) -> Effect:
         assert len(effects) > 1, f'effect pool must have >1 entries to avoid an infinite loop (got {len(effects)})'
-        i: int = random.randrange(0, len(effects), 1)
+        i: int = self._random.randrange(0, len(effects), 1)
         while effects[i] == previous_effect:
-            i = random.randrange(0, len(effects), 1)
+            i = self._random.randrange(0, len(effects), 1)
         return effects[i]
@@ -36,6 +36,7 @@ class EventBuffer:
         self._sound_events: list[dict] = []
         self._decoder_state: dict = {}
         self._shed_state: dict = {}
+        self._monitor_state: dict = {}
 
     def start(self) -> None:
         with self._lock:
@@ -114,6 +115,10 @@ class EventBuffer:
         with self._lock:
             self._shed_state = dict(state)
 
+    def set_monitor_state(self, **state) -> None:
+        with self._lock:
+            self._monitor_state = dict(state)
+
     @staticmethod
     def _delivery(log: list[dict]) -> dict:
         errors_ms = [abs(e['actual_delta_sec'] - e['target_delta_sec']) * 1000 for e in log]
@@ -173,6 +178,7 @@ class EventBuffer:
                 'timing_stats': timing_stats,
                 'decoder': dict(self._decoder_state),
                 'shed': dict(self._shed_state),
+                'monitor': dict(self._monitor_state),
             }
 
     def to_report(self, timing_log: list[dict] | None = None) -> dict:
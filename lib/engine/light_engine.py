@@ -23,6 +23,9 @@ _BEAT_ABSENCE_SEC = 2.5
 
 _LATENCY_LOG_STEP_SEC = 0.25
 _SHED_PUBLISH_SEC = 1.0
+# An unchanged decoder state is only re-sent to keep its grid on the buffer's
+# clock; anything the UI would draw differently goes out at once.
+_DECODER_REPUBLISH_SEC = 1.0
 _BYPASSED_ON_STOP = ('sound', 'intent', 'refresh', 'overlay')
 COLD_START_FLOOR_MARGIN_SEC = 4.0
 
@@ -72,6 +75,9 @@ class LightEngine(IMusicAnalyserHandler):
         self._floor_armed: bool = True
         self._bypass_due_at: float | None = None
         self._shed_published_at: float = float('-inf')
+        self._decoder_published_at: float = float('-inf')
+        self._decoder_published: tuple | None = None
+        self._decoder_publications_suppressed: int = 0
         self._last_refresh_sec: float = float('-inf')
         self._committed = None
         self._log_chain_latency()
@@ -96,6 +102,10 @@ class LightEngine(IMusicAnalyserHandler):
     def intent_commits(self) -> int:
         return self._intent_commits
 
+    @property
+    def decoder_publications_suppressed(self) -> int:
+        return self._decoder_publications_suppressed
+
     def on_sound_start(self):
         logging.info('[engine] sound start')
         self._bypass_due_at = None
@@ -204,7 +214,9 @@ class LightEngine(IMusicAnalyserHandler):
             fault=self._watchdog.fault,
             sheds=self._watchdog.sheds,
             sheds_per_min=self._watchdog.sheds_per_min,
-            drift_sec=round(self._watchdog.drift_sec, 4))
+            drift_sec=round(self._watchdog.drift_sec, 4),
+            residency_sec={name: round(sec, 1) for name, sec
+                           in self._watchdog.residency_sec.items()})
 
     async def on_audio(self, audio_signal) -> None:
         self._bypass_if_the_silence_held()
@@ -278,6 +290,14 @@ class LightEngine(IMusicAnalyserHandler):
         observed = decoder.recent_observations[-1] \
             if decoder.recent_observations else None
         committed = self._committed
+        now = self._clock.monotonic()
+        grid = (decoder.first_bar, decoder.grid_revision)
+        if (self._decoder_unchanged(observed, committed, grid)
+                and now - self._decoder_published_at < _DECODER_REPUBLISH_SEC):
+            self._decoder_publications_suppressed += 1
+            return
+        self._decoder_published = (observed, committed, grid)
+        self._decoder_published_at = now
         self.event_buffer.set_decoder_state(
             classes=list(decoder.classes),
             posterior=(None if observed is None or observed.posterior is None
@@ -292,8 +312,18 @@ class LightEngine(IMusicAnalyserHandler):
             bar_sec=round(decoder.bar_sec, 4),
             first_bar=decoder.first_bar,
             bar_edges=self._edges_on_the_buffers_clock(decoder.bar_edges),
+            publications_suppressed=self._decoder_publications_suppressed,
         )
 
+    def _decoder_unchanged(self, observed, committed, grid: tuple) -> bool:
+        # Observations and decisions by identity: a new one is a new object,
+        # and a posterior array has no cheap equality.
+        if self._decoder_published is None:
+            return False
+        was_observed, was_committed, was_grid = self._decoder_published
+        return (observed is was_observed and committed is was_committed
+                and grid == was_grid)
+
     def _edges_on_the_buffers_clock(self, edges: list) -> list:
         detected_now = self.event_buffer.elapsed()
         return [round(detected_now - (self._audio_sec - edge), 4)
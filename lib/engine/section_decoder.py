@@ -14,6 +14,7 @@ from __future__ import annotations
 
 import logging
 import sys
+from bisect import bisect_left, insort
 from collections import deque
 from pathlib import Path
 from typing import NamedTuple
@@ -71,6 +72,30 @@ class BarObservation(NamedTuple):
     boundary: float
 
 
+class _RollingMedian:
+    # The last ``size`` values kept twice: in arrival order to know which one
+    # leaves, and sorted so a push is a bisect and the median an index.
+    def __init__(self, size: int) -> None:
+        self._window: deque = deque(maxlen=size)
+        self._sorted: list = []
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def push(self, value: float) -> None:
+        if len(self._window) == self._window.maxlen:
+            del self._sorted[bisect_left(self._sorted, self._window[0])]
+        self._window.append(value)
+        insort(self._sorted, value)
+
+    @property
+    def median(self) -> float:
+        middle = len(self._sorted) // 2
+        if len(self._sorted) % 2:
+            return self._sorted[middle]
+        return (self._sorted[middle - 1] + self._sorted[middle]) / 2.0
+
+
 class SectionDecoder:
     def __init__(self, priors: Priors, params: DecodeParams | None = None, *,
                  feature_latency_sec: float = 0.0) -> None:
@@ -91,16 +116,20 @@ class SectionDecoder:
             boundary_ref=self.params.boundary_ref,
             floor_scale=self.params.floor_scale,
             floor_bars=self.params.floor_bars,
-            outro_escape=self.params.outro_escape)
+            outro_escape=self.params.outro_escape,
+            early_commit=self.params.early_commit)
         self._n_classes = len(priors.classes)
         self.recent_observations: deque = deque(
             maxlen=self.params.lag_bars + 2)
+        self._grid_revision: int = 0
         self.reset()
 
     def reset(self, *, cold_start: bool = True) -> None:
         self._edges: deque = deque(maxlen=max(_EDGE_RETAIN_BARS,
                                               self.params.lag_bars + 4))
         self._edge_base: int = 0
+        self._bar_lengths = _RollingMedian(_BAR_MEDIAN_BARS - 1)
+        self._grid_revision += 1
         if cold_start:
             self._bar_position: int = _FIRST_BEAT_BAR_POSITION
             self._last_beat_sec: float | None = None
@@ -117,6 +146,10 @@ class SectionDecoder:
     def first_bar(self) -> int:
         return self._edge_base
 
+    @property
+    def grid_revision(self) -> int:
+        return self._grid_revision
+
     def _edge(self, bar: int) -> float:
         if not self._have_edge(bar):
             raise KeyError(f"bar {bar}'s line is no longer held; the grid keeps "
@@ -129,7 +162,10 @@ class SectionDecoder:
     def _append_edge(self, at_sec: float) -> None:
         if len(self._edges) == self._edges.maxlen:
             self._edge_base += 1
+        if self._edges:
+            self._bar_lengths.push(float(at_sec) - self._edges[-1])
         self._edges.append(float(at_sec))
+        self._grid_revision += 1
 
     @property
     def classes(self) -> tuple:
@@ -149,10 +185,9 @@ class SectionDecoder:
 
     @property
     def bar_sec(self) -> float:
-        if len(self._edges) < 2:
+        if not self._bar_lengths:
             return NOMINAL_BAR_SEC
-        recent = list(self._edges)[-_BAR_MEDIAN_BARS:]
-        return float(np.median(np.diff(np.asarray(recent))))
+        return float(self._bar_lengths.median)
 
     @property
     def chain_latency_sec(self) -> float:
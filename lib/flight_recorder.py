@@ -0,0 +1,199 @@
+"""The last minutes of input audio, kept on disk for a post-mortem.
+
+Two fixed-size memory-mapped files: ``<path>`` holds a float32 ring of whole
+buffers and ``<path>.index`` one record per buffer slot (a sequence number,
+wall and monotonic time, the shed level it was captured under).  A write is
+two slice assignments into pages the OS already has mapped -- no allocation,
+no syscall -- and the page cache keeps whatever was written if the process
+dies, so the ring survives the crash it exists to explain.
+
+A slot's sequence number is cleared before its audio is overwritten and set
+after, so a reader never pairs a stale index record with new audio.
+
+Restarting on an existing recording of the same shape resumes it after its
+highest sequence number rather than truncating it: the restart after a crash
+is when the ring matters most.  The restart shows as a jump in the monotonic
+clock, not in the sequence.  A recording of another shape is moved aside.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+DEFAULT_MINUTES = 20.0
+_INDEX_DTYPE = np.dtype([("seq", "<i8"), ("wall", "<f8"), ("mono", "<f8"),
+                         ("shed", "<i1")])
+_EMPTY = -1
+
+
+def _index_path(path) -> Path:
+    return Path(f"{path}.index")
+
+
+def _meta_path(path) -> Path:
+    return Path(f"{path}.json")
+
+
+class FlightRecorder:
+    def __init__(self, path, sample_rate: int, buffer_size: int,
+                 minutes: float = DEFAULT_MINUTES) -> None:
+        slots = int(minutes * 60.0 * sample_rate // buffer_size)
+        if slots < 2:
+            raise ValueError(f"{minutes} minutes holds fewer than two "
+                             f"{buffer_size}-sample buffers")
+        self.path = Path(path)
+        self.sample_rate = int(sample_rate)
+        self.buffer_size = int(buffer_size)
+        self.slots = slots
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"sample_rate": self.sample_rate, "buffer_size": self.buffer_size,
+                "slots": slots}
+        resume = self._resumable(meta)
+        mode = "r+" if resume else "w+"
+        if not resume:
+            _meta_path(path).write_text(json.dumps(meta), encoding="utf-8")
+        self._audio = np.memmap(self.path, dtype=np.float32, mode=mode,
+                                shape=(slots, self.buffer_size))
+        self._index = np.memmap(_index_path(path), dtype=_INDEX_DTYPE,
+                                mode=mode, shape=(slots,))
+        self._seq = self._index["seq"]
+        self._wall = self._index["wall"]
+        self._mono = self._index["mono"]
+        self._shed = self._index["shed"]
+        if resume:
+            self.written = int(self._seq.max()) + 1
+            logging.info(f'[recorder] resuming {self.path} after buffer '
+                         f'{self.written - 1}; the last {minutes:g} min of '
+                         f'input are kept')
+        else:
+            self._seq[:] = _EMPTY
+            self.written = 0
+            logging.info(f'[recorder] keeping the last {minutes:g} min of input '
+                         f'in {self.path}')
+
+    def _resumable(self, meta: dict) -> bool:
+        files = (self.path, _index_path(self.path), _meta_path(self.path))
+        if not any(file.exists() for file in files):
+            return False
+        try:
+            found = json.loads(_meta_path(self.path).read_text(encoding="utf-8"))
+            if (found == meta
+                    and self.path.stat().st_size == meta["slots"] * meta["buffer_size"]
+                    * np.dtype(np.float32).itemsize
+                    and _index_path(self.path).stat().st_size
+                    == meta["slots"] * _INDEX_DTYPE.itemsize):
+                return True
+        except (OSError, ValueError):
+            pass
+        aside = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        for file in files:
+            if file.exists():
+                file.rename(f"{aside}{str(file)[len(str(self.path)):]}")
+        logging.warning(f'[recorder] {self.path} holds a recording of another '
+                        f'shape — moved it to {aside}')
+        return False
+
+    def write(self, samples: np.ndarray, shed_level: int = 0) -> None:
+        slot = self.written % self.slots
+        self._seq[slot] = _EMPTY
+        count = min(len(samples), self.buffer_size)
+        self._audio[slot, :count] = samples[:count]
+        if count < self.buffer_size:
+            self._audio[slot, count:] = 0.0
+        self._wall[slot] = time.time()
+        self._mono[slot] = time.monotonic()
+        self._shed[slot] = shed_level
+        self._seq[slot] = self.written
+        self.written += 1
+
+    def close(self) -> None:
+        self._audio.flush()
+        self._index.flush()
+
+
+class Recording(NamedTuple):
+    sample_rate: int
+    buffer_size: int
+    seq: np.ndarray
+    wall: np.ndarray
+    mono: np.ndarray
+    shed: np.ndarray
+    audio: np.ndarray
+
+    @property
+    def gaps(self) -> list:
+        """``(after_seq, missing_buffers)`` wherever the sequence jumps."""
+        jumps = np.flatnonzero(np.diff(self.seq) != 1)
+        return [(int(self.seq[at]), int(self.seq[at + 1] - self.seq[at] - 1))
+                for at in jumps]
+
+    def shed_events(self) -> list:
+        changes = np.flatnonzero(np.diff(self.shed)) + 1
+        return [{"wall": float(self.wall[at]),
+                 "offset_sec": float(self.mono[at] - self.mono[0]),
+                 "level": int(self.shed[at])} for at in changes]
+
+    def _buffers(self, seconds: float) -> int:
+        return int(np.ceil(seconds * self.sample_rate / self.buffer_size))
+
+    def _slice(self, start: int, stop: int) -> "Recording":
+        return Recording(self.sample_rate, self.buffer_size,
+                         *(field[start:stop] for field in (self.seq, self.wall,
+                                                           self.mono, self.shed,
+                                                           self.audio)))
+
+    def window(self, start_wall: float | None = None,
+               seconds: float | None = None) -> "Recording":
+        """From the first buffer captured at or after ``start_wall``, for
+        ``seconds`` of recorded audio (not of wall time, which a stalled loop
+        stretches)."""
+        start = 0 if start_wall is None else int(
+            np.searchsorted(self.wall, start_wall, side="left"))
+        stop = None if seconds is None else start + self._buffers(seconds)
+        return self._slice(start, stop)
+
+    def last(self, seconds: float) -> "Recording":
+        return self._slice(max(0, len(self.seq) - self._buffers(seconds)), None)
+
+
+def read_recording(path) -> Recording:
+    meta = json.loads(_meta_path(path).read_text(encoding="utf-8"))
+    slots, buffer_size = int(meta["slots"]), int(meta["buffer_size"])
+    audio = np.memmap(path, dtype=np.float32, mode="r",
+                      shape=(slots, buffer_size))
+    index = np.memmap(_index_path(path), dtype=_INDEX_DTYPE, mode="r",
+                      shape=(slots,))
+    held = np.flatnonzero(index["seq"] != _EMPTY)
+    order = held[np.argsort(index["seq"][held], kind="stable")]
+    return Recording(int(meta["sample_rate"]), buffer_size,
+                     np.array(index["seq"][order]), np.array(index["wall"][order]),
+                     np.array(index["mono"][order]), np.array(index["shed"][order]),
+                     np.array(audio[order]))
+
+
+def export_wav(recording: Recording, out_path) -> dict:
+    """Write ``recording`` as a float WAV ``FileAudioClient`` replays bit for bit,
+    with a ``.json`` beside it saying where it came from."""
+    from scipy.io import wavfile
+
+    if not len(recording.seq):
+        raise ValueError("the window holds no recorded audio")
+    wavfile.write(str(out_path), recording.sample_rate,
+                  np.ascontiguousarray(recording.audio.reshape(-1), dtype=np.float32))
+    summary = {
+        "first_seq": int(recording.seq[0]), "last_seq": int(recording.seq[-1]),
+        "start_wall": float(recording.wall[0]),
+        "start_mono": float(recording.mono[0]),
+        "seconds": len(recording.seq) * recording.buffer_size / recording.sample_rate,
+        "gaps": recording.gaps,
+        "shed_level_at_start": int(recording.shed[0]),
+        "shed_events": recording.shed_events(),
+    }
+    Path(f"{out_path}.json").write_text(json.dumps(summary, indent=2) + "\n",
+                                        encoding="utf-8")
+    return summary
@@ -9,6 +9,11 @@ import datetime
 import time
 
 from lib.audio_config import SAMPLE_RATE, BUFFER_SIZE
+from lib.profiler import add_profile_arguments, mark, profiling
+from lib.analyser.section_model import FP32_HEAD, HEAD_VARIANTS
+from lib.section_chain import FEATURES, MERT_FEATURES
+from lib.scheduling import (Scheduling, SchedulingPlan, add_scheduling_arguments,
+                            plan_from_args)
 # Must match playback_delay_seconds in dmx-enttec-node and simulate/runner.py's copy.
 PLAYBACK_DELAY_SEC = 14.0
 _UI_ONLY_WINDOW_SEC = 60.0
@@ -25,7 +30,12 @@ class SoundSwitchAutoPilot:
                  disable_os2l: bool = False,
                  enable_ui: bool = False,
                  ui_port: int = 8050,
-                 report_path: str | None = None):
+                 report_path: str | None = None,
+                 record_path: str | None = None,
+                 record_minutes: float = 20.0,
+                 features: str = MERT_FEATURES,
+                 head: str = FP32_HEAD,
+                 scheduling: SchedulingPlan = SchedulingPlan()):
         from lib.clients.pyaudio_client import PyAudioClient
         from lib.clients.midi_client import MidiClient
         from lib.clients.os2l_client import Os2lClient
@@ -52,6 +62,13 @@ class SoundSwitchAutoPilot:
         self.midi_client: MidiClient = MidiClient(midi_port_index)
         self.os2l_client: Os2lClient = Os2lClient()
         self.overlay_client: OverlayClient = OverlayClient()
+        self._scheduling = Scheduling(scheduling)
+        self.audio_client.on_callback_thread = self._scheduling.adopt
+        self._recorder = None
+        if record_path:
+            from lib.flight_recorder import FlightRecorder
+            self._recorder = FlightRecorder(record_path, SAMPLE_RATE, BUFFER_SIZE,
+                                            minutes=record_minutes)
 
         from lib.engine.event_buffer import EventBuffer
         self.event_buffer: EventBuffer | None = (
@@ -65,7 +82,9 @@ class SoundSwitchAutoPilot:
         from lib.analyser.drift_watchdog import DriftWatchdog
 
         self.drift_watchdog: DriftWatchdog = DriftWatchdog(BUFFER_SIZE / SAMPLE_RATE)
-        self.section = (section_chain.build_section_chain(watchdog=self.drift_watchdog)
+        self.section = (section_chain.build_section_chain(watchdog=self.drift_watchdog,
+                                                          features=features,
+                                                          head=head)
                         if section_chain.artifacts_present() else None)
         if self.section is None:
             logging.warning('[main] no NN artifacts on this machine — the show '
@@ -119,6 +138,7 @@ class SoundSwitchAutoPilot:
             from lib import ui_bridge
             self._ui = ui_bridge.start(self.event_buffer, self._ui_port)
         self.is_running = True
+        self._scheduling.apply()
 
         logging.info("[main] auto pilot is ready, starting")
 
@@ -129,13 +149,20 @@ class SoundSwitchAutoPilot:
 
         while self.is_running:
             now = datetime.datetime.now()
-            audio_signal = self.audio_client.read()
+            mark('read')
+            audio_signal = await self.audio_client.read()
+            if self._recorder is not None:
+                self._recorder.write(audio_signal, self.drift_watchdog.level)
+            mark('light_engine')
             await self.light_engine.on_audio(audio_signal)
+            mark('analyse')
             new_audio_signal = await self.music_analyser.analyse(audio_signal)
+            mark('drain')
             await self.command_queue.drain()
 
             if self.audio_client.support_output():
                 self._monitor.feed(new_audio_signal)
+            mark('callbacks')
 
             if now - last_100ms_callback_execution > datetime.timedelta(milliseconds=100):
                 last_100ms_callback_execution = now
@@ -159,13 +186,16 @@ class SoundSwitchAutoPilot:
                             ('os2l', self.os2l_client.stop),
                             ('overlay', self.overlay_client.stop),
                             ('overlay flush', self.overlay_client.flush_messages),
-                            ('midi', self.midi_client.stop)):
+                            ('midi', self.midi_client.stop),
+                            ('flight recorder',
+                             None if self._recorder is None else self._recorder.close)):
             if close is None:
                 continue
             try:
                 close()
             except Exception as error:
                 logging.exception(f'[main] {what} did not close cleanly ({error!r})')
+        self._scheduling.log_summary(self.drift_watchdog.peak_drift_sec)
         logging.info("[main] auto pilot stopped, clean shutdown")
 
     def stop(self):
@@ -178,6 +208,9 @@ class SoundSwitchAutoPilot:
 
     async def _do_1s_callback(self):
         await self.light_engine.on_1sec_callback()
+        self._scheduling.observe(self.drift_watchdog.drift_sec)
+        if self.event_buffer is not None:
+            self.event_buffer.set_monitor_state(**self._monitor.stats)
 
     async def _do_10s_callback(self):
         await self.light_engine.on_10sec_callback()
@@ -201,9 +234,15 @@ async def run_cmd(args: argparse.Namespace):
                                       disable_os2l=args.no_os2l,
                                       enable_ui=args.ui,
                                       ui_port=args.ui_port,
-                                      report_path=args.report)
+                                      report_path=args.report,
+                                      record_path=args.record,
+                                      record_minutes=args.record_minutes,
+                                      features=args.features,
+                                      head=args.head,
+                                      scheduling=plan_from_args(args))
 
-    await global_app.run()
+    with profiling(args.profile, args.profile_hz):
+        await global_app.run()
 
     if args.report and global_app.event_buffer is not None:
         import json
@@ -215,6 +254,24 @@ async def run_cmd(args: argparse.Namespace):
         print_evaluation(evaluate(report))
 
 
+async def dump_recording_cmd(args: argparse.Namespace):
+    from lib.flight_recorder import export_wav, read_recording
+
+    recording = read_recording(args.recording)
+    if args.last is not None:
+        recording = recording.last(args.last)
+    else:
+        start = (datetime.datetime.fromisoformat(args.start).timestamp()
+                 if args.start else None)
+        recording = recording.window(start_wall=start, seconds=args.seconds)
+    summary = export_wav(recording, args.out)
+    started = datetime.datetime.fromtimestamp(summary['start_wall'])
+    print(f'[dump] {summary["seconds"]:.1f}s from {started:%Y-%m-%d %H:%M:%S} '
+          f'→ {args.out} ({len(summary["gaps"])} gap(s), '
+          f'{len(summary["shed_events"])} shed change(s)); replay it with '
+          f'`auto_pilot simulate file {args.out}`')
+
+
 async def list_cmd(args: argparse.Namespace):
     from lib.clients.pyaudio_client import PyAudioClient
     from lib.clients.midi_client import MidiClient
@@ -275,8 +332,22 @@ def build_parser() -> argparse.ArgumentParser:
     subparser.add_argument('--ui', help='Launch real-time lighting visualizer (requires dash extra)', required=False, action='store_true')
     subparser.add_argument('--ui-port', type=int, default=8050, help='Visualizer Dash server port (default: 8050)', required=False, dest='ui_port')
     subparser.add_argument('--report', default=None, help='Write a JSON session report on exit (e.g. report.json); implies event tracking', required=False)
+    subparser.add_argument('--record', default=None, metavar='PATH', help='Keep the last --record-minutes of input audio in a memory-mapped ring at PATH for post-mortems (export with dump-recording)', required=False)
+    subparser.add_argument('--record-minutes', type=float, default=20.0, help='Length of the --record ring (default: 20)', required=False, dest='record_minutes')
+    subparser.add_argument('--features', choices=FEATURES, default=MERT_FEATURES, help='Section features: mert (GPU) or mel, the distilled CPU encoder beside the model artifacts (default: mert)', required=False)
+    subparser.add_argument('--head', choices=HEAD_VARIANTS, default=FP32_HEAD, help='Section-head build: the exported graph, or an offline-optimised or int8 build that has passed training/nn/optimise_head.py --gate (default: fp32)', required=False)
+    add_profile_arguments(subparser)
+    add_scheduling_arguments(subparser)
     subparser.set_defaults(func=run_cmd)
 
+    subparser = subparsers.add_parser('dump-recording', help='Export a window of a --record ring as a WAV that `simulate file` replays')
+    subparser.add_argument('recording', help='The ring written by `run --record`')
+    subparser.add_argument('out', help='WAV to write (a .json beside it records timestamps, gaps and shed changes)')
+    subparser.add_argument('--start', default=None, help='Local wall-clock start of the window, ISO 8601 (e.g. 2026-10-19T23:41:00); default: the oldest audio held', required=False)
+    subparser.add_argument('--seconds', type=float, default=None, help='Length of the window (default: to the newest audio)', required=False)
+    subparser.add_argument('--last', type=float, default=None, help='Export the newest LAST seconds instead of --start/--seconds', required=False)
+    subparser.set_defaults(func=dump_recording_cmd)
+
     subparser = subparsers.add_parser('label', help='Hand-label a song into sections in the browser (requires dash extra)')
     subparser.add_argument('audio', help='Path to the audio file to label')
     subparser.add_argument('--port', type=int, default=8070, help='Labeler Dash server port (default: 8070)')
@@ -0,0 +1,126 @@
+"""A statistical profiler cheap enough to leave on for a whole set.
+
+A background thread wakes ``hz`` times a second, reads every thread's current
+frame from ``sys._current_frames()`` and counts the stack.  Nothing is traced
+between samples, so the 5.8 ms loop runs at its real speed.  The counts are
+written as collapsed stacks (``thread;stage;outer;...;inner count``), the format
+flamegraph.pl, speedscope and inferno read.
+
+Threads mark the stage they are in with ``mark``; a sample is tagged with the
+last stage its thread marked.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+DEFAULT_HZ = 97                         # off the 100 ms / 1 s callback cadence
+_THREAD_NAME = 'profiler'
+
+_stages: dict[int, str] = {}
+
+
+def mark(stage: str) -> None:
+    _stages[threading.get_ident()] = stage
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f'{module}.{code.co_qualname}'.replace(';', ':')
+
+
+def _stack(frame) -> list:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    def __init__(self, hz: float = DEFAULT_HZ) -> None:
+        if hz <= 0:
+            raise ValueError(f'a sampling rate of {hz} Hz takes no samples')
+        self.interval_sec = 1.0 / hz
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._running = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._work, name=_THREAD_NAME,
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            thread = names.get(ident, f'thread-{ident}').replace(';', ':')
+            stage = _stages.get(ident, '-')
+            key = ';'.join([thread, f'[{stage}]'] + _stack(frame))
+            self._stacks[key] += 1
+        self.samples += 1
+
+    def folded(self) -> list:
+        return [f'{stack} {count}' for stack, count in sorted(self._stacks.items())]
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as out:
+            out.writelines(f'{line}\n' for line in self.folded())
+
+    def _work(self) -> None:
+        deadline = time.monotonic()
+        while self._running:
+            self.sample()
+            deadline += self.interval_sec
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            else:
+                deadline = time.monotonic()     # fell behind: don't burst
+
+
+def add_profile_arguments(parser) -> None:
+    parser.add_argument('--profile', default=None, metavar='OUT.folded',
+                        help="Sample every thread's stack while running and "
+                             'write collapsed stacks (flamegraph.pl, '
+                             'speedscope) to this path on exit')
+    parser.add_argument('--profile-hz', type=float, default=DEFAULT_HZ,
+                        dest='profile_hz',
+                        help=f'Samples per second for --profile (default: '
+                             f'{DEFAULT_HZ})')
+
+
+@contextlib.contextmanager
+def profiling(path: str | None, hz: float = DEFAULT_HZ):
+    if path is None:
+        yield None
+        return
+    profiler = SamplingProfiler(hz)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.write(path)
+        logging.info(f'[profile] {profiler.samples} samples at {hz:g} Hz '
+                     f'→ {path}')
@@ -0,0 +1,278 @@
+"""Where the show's threads run: cores, priority, and a heap the collector skips.
+
+The audio loop is the main thread and ``GpuStage`` runs ``mert-gpu`` beside it;
+by default both go wherever the scheduler puts them, next to the OS2L sender,
+the snapshot server and everything else on the laptop.  ``Scheduling`` pins
+the loop and the GPU thread to the cores they are given and moves the
+process's other Python threads onto the rest.  It can ask for ``SCHED_FIFO``
+or a nice level for the loop.  PortAudio's callback threads are native, so
+they never show up in ``threading.enumerate()``; the audio client hands each
+one over from its first callback and it gets the loop's cores and priority.  After warm-up it collects once, freezes what
+survived and raises the gen-0 threshold, so collections stop re-walking the
+models loaded at startup.
+
+Every knob is best effort: a request the OS refuses is logged and the show
+runs on without it.  The drift the watchdog reports is sampled once a second
+and logged against the configuration's label, so configurations can be
+compared by their drift tail and peak.  The percentiles cover the last
+summary interval; the maximum covers the whole show.
+"""
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import threading
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from lib.clock import SYSTEM_CLOCK, Clock
+
+GPU_THREAD = 'mert-gpu'                 # the name GpuStage gives its thread
+WARMUP_SEC = 30.0
+# Gen-0 collections are what land inside a buffer; the loop allocates a few
+# thousand objects per second, so this is one young collection every few seconds.
+GC_THRESHOLD = (50_000, 20, 100)
+_SUMMARY_INTERVAL_SEC = 300.0
+# Drift is sampled once a second: one summary interval of it.
+_DRIFT_WINDOW = int(_SUMMARY_INTERVAL_SEC)
+
+
+class SchedulingPlan(NamedTuple):
+    audio_cpus: frozenset | None = None
+    gpu_cpus: frozenset | None = None
+    rt_priority: int | None = None
+    nice: int | None = None
+    gc_freeze: bool = False
+
+    @property
+    def label(self) -> str:
+        parts = []
+        if self.audio_cpus is not None:
+            parts.append(f'affinity={_cpu_list(self.audio_cpus)}')
+        if self.gpu_cpus is not None:
+            parts.append(f'gpu={_cpu_list(self.gpu_cpus)}')
+        if self.rt_priority is not None:
+            parts.append(f'fifo={self.rt_priority}')
+        if self.nice is not None:
+            parts.append(f'nice={self.nice}')
+        if self.gc_freeze:
+            parts.append('gc=frozen')
+        return ' '.join(parts) or 'default'
+
+
+def parse_cpus(text: str) -> frozenset:
+    """``"2"``, ``"2,3"`` or ``"0-1,4"`` -> the cores named."""
+    cpus = set()
+    for part in text.split(','):
+        part = part.strip()
+        first, _, last = part.partition('-')
+        try:
+            lo, hi = int(first), int(last or first)
+        except ValueError:
+            raise ValueError(f'{text!r} is not a core list like 2,3 or 0-1') from None
+        if lo < 0 or hi < lo:
+            raise ValueError(f'{part!r} in {text!r} names no cores')
+        cpus.update(range(lo, hi + 1))
+    return frozenset(cpus)
+
+
+def _cpu_list(cpus) -> str:
+    return ','.join(str(cpu) for cpu in sorted(cpus))
+
+
+def add_scheduling_arguments(parser) -> None:
+    parser.add_argument('--affinity', type=parse_cpus, default=None, metavar='CPUS',
+                        help='Pin the audio loop to these cores (e.g. 2 or 2,3); '
+                             'the other Python threads move off them')
+    parser.add_argument('--gpu-affinity', type=parse_cpus, default=None,
+                        metavar='CPUS', dest='gpu_affinity',
+                        help=f'Pin the {GPU_THREAD} thread to these cores')
+    parser.add_argument('--rt-priority', type=int, default=None, metavar='N',
+                        dest='rt_priority',
+                        help='Run the audio loop SCHED_FIFO at priority N (1-99; '
+                             'needs CAP_SYS_NICE or an rtprio limit)')
+    parser.add_argument('--nice', type=int, default=None, metavar='N',
+                        help='Nice level for the audio loop when SCHED_FIFO is '
+                             'not asked for or is refused (negative needs '
+                             'CAP_SYS_NICE)')
+    parser.add_argument('--gc-freeze', action='store_true', dest='gc_freeze',
+                        help=f'After {WARMUP_SEC:g}s of audio, freeze the heap '
+                             f'and raise the gen-0 GC threshold to '
+                             f'{GC_THRESHOLD[0]}')
+
+
+def plan_from_args(args) -> SchedulingPlan:
+    return SchedulingPlan(audio_cpus=args.affinity, gpu_cpus=args.gpu_affinity,
+                          rt_priority=args.rt_priority, nice=args.nice,
+                          gc_freeze=args.gc_freeze)
+
+
+def _refused(what: str, error: Exception) -> bool:
+    logging.warning(f'[sched] {what} refused ({error!r}) — running without it')
+    return False
+
+
+def pin(tid: int, cpus, what: str) -> bool:
+    try:
+        os.sched_setaffinity(tid, cpus)
+    except (AttributeError, OSError) as error:
+        return _refused(f'pinning {what} to {_cpu_list(cpus)}', error)
+    return True
+
+
+def prioritise(tid: int, rt_priority: int | None, nice: int | None) -> str | None:
+    """The priority the loop got: ``fifo=N``, ``nice=N`` or None."""
+    if rt_priority is not None:
+        try:
+            os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(rt_priority))
+            return f'fifo={rt_priority}'
+        except (AttributeError, OSError) as error:
+            _refused(f'SCHED_FIFO {rt_priority}', error)
+    if nice is not None:
+        try:
+            # Per thread on Linux: the "process" a tid names is that one task.
+            os.setpriority(os.PRIO_PROCESS, tid, nice)
+            return f'nice={nice}'
+        except (AttributeError, OSError) as error:
+            _refused(f'nice {nice}', error)
+    return None
+
+
+def _allowed_cpus() -> frozenset:
+    try:
+        return frozenset(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return frozenset()
+
+
+def freeze_heap(threshold: tuple = GC_THRESHOLD) -> int:
+    gc.collect()
+    gc.freeze()
+    gc.set_threshold(*threshold)
+    return gc.get_freeze_count()
+
+
+class Scheduling:
+    def __init__(self, plan: SchedulingPlan, clock: Clock = SYSTEM_CLOCK,
+                 warmup_sec: float = WARMUP_SEC) -> None:
+        self.plan = plan
+        self._clock = clock
+        self._warmup_sec = float(warmup_sec)
+        self._applied_at: float | None = None
+        self._summarised_at: float | None = None
+        self._drift: deque = deque(maxlen=_DRIFT_WINDOW)
+        self._drift_samples = 0
+        self._drift_max = float('-inf')
+        self._lock = threading.Lock()
+        self._adopted: list = []
+        self.applied: list = []
+        self.frozen_objects: int | None = None
+
+    def apply(self) -> None:
+        """From the audio loop's thread, once every other thread has started."""
+        plan = self.plan
+        loop = threading.get_native_id()
+        gpu = next((thread for thread in threading.enumerate()
+                    if thread.name == GPU_THREAD), None)
+        allowed = _allowed_cpus()
+        if plan.audio_cpus is not None and pin(loop, plan.audio_cpus, 'the audio loop'):
+            self.applied.append(f'affinity={_cpu_list(plan.audio_cpus)}')
+            self._move_the_rest_off(allowed - plan.audio_cpus, loop, gpu)
+        if plan.gpu_cpus is not None:
+            if gpu is None or gpu.native_id is None:
+                logging.warning(f'[sched] no {GPU_THREAD} thread to pin — the '
+                                f'section chain is not threaded this run')
+            elif pin(gpu.native_id, plan.gpu_cpus, f'the {GPU_THREAD} thread'):
+                self.applied.append(f'gpu={_cpu_list(plan.gpu_cpus)}')
+        # SCHED_OTHER for the GPU thread on purpose: a FIFO thread inside a
+        # long pass would starve whatever shares its core.
+        priority = prioritise(loop, plan.rt_priority, plan.nice)
+        if priority is not None:
+            self.applied.append(priority)
+        gpu_tid = None if gpu is None else gpu.native_id
+        logging.info(f'[sched] {plan.label}: '
+                     f'{" ".join(self.applied) or "nothing applied"} '
+                     f'(loop tid {loop}, {GPU_THREAD} tid {gpu_tid})')
+        with self._lock:
+            self._applied_at = self._summarised_at = self._clock.monotonic()
+            adopted, self._adopted = self._adopted, []
+        for tid, what in adopted:
+            self._configure(tid, what)
+
+    def adopt(self, tid: int, what: str) -> None:
+        """A native thread the loop waits on, e.g. PortAudio's callback.
+
+        Callable from that thread itself; one adopted before ``apply`` is
+        configured when the plan is.
+        """
+        with self._lock:
+            if self._applied_at is None:
+                self._adopted.append((tid, what))
+                return
+        self._configure(tid, what)
+
+    def _configure(self, tid: int, what: str) -> None:
+        plan = self.plan
+        done = []
+        if plan.audio_cpus is not None and pin(tid, plan.audio_cpus, what):
+            done.append(f'affinity={_cpu_list(plan.audio_cpus)}')
+        priority = prioritise(tid, plan.rt_priority, plan.nice)
+        if priority is not None:
+            done.append(priority)
+        logging.info(f'[sched] {what} (tid {tid}): '
+                     f'{" ".join(done) or "nothing applied"}')
+
+    def _move_the_rest_off(self, rest: frozenset, loop: int, gpu) -> None:
+        if not rest:
+            return
+        with self._lock:
+            adopted = {tid for tid, _what in self._adopted}
+        for thread in threading.enumerate():
+            tid = thread.native_id
+            if tid is None or tid == loop or thread is gpu or tid in adopted:
+                continue
+            pin(tid, rest, f'the {thread.name} thread')
+
+    def observe(self, drift_sec: float) -> None:
+        """Once a second from the loop: a drift sample, and the freeze when due."""
+        if self._applied_at is None:
+            return
+        now = self._clock.monotonic()
+        if (self.plan.gc_freeze and self.frozen_objects is None
+                and now - self._applied_at >= self._warmup_sec):
+            self.frozen_objects = freeze_heap()
+            self.applied.append('gc=frozen')
+            logging.info(f'[sched] froze {self.frozen_objects} objects after '
+                         f'{now - self._applied_at:.0f}s; gen-0 threshold '
+                         f'{GC_THRESHOLD[0]}')
+        self._drift.append(float(drift_sec))
+        self._drift_samples += 1
+        self._drift_max = max(self._drift_max, float(drift_sec))
+        if now - self._summarised_at >= _SUMMARY_INTERVAL_SEC:
+            self._summarised_at = now
+            self.log_summary()
+
+    def summary(self, peak_drift_sec: float | None = None) -> dict:
+        drift = np.asarray(self._drift, dtype=np.float64)
+        return {
+            'config': self.plan.label,
+            'applied': list(self.applied),
+            'samples': self._drift_samples,
+            'drift_p50_sec': float(np.percentile(drift, 50)) if len(drift) else 0.0,
+            'drift_p99_sec': float(np.percentile(drift, 99)) if len(drift) else 0.0,
+            'drift_max_sec': self._drift_max if len(drift) else 0.0,
+            'peak_drift_sec': peak_drift_sec,
+        }
+
+    def log_summary(self, peak_drift_sec: float | None = None) -> None:
+        stats = self.summary(peak_drift_sec)
+        peak = ('' if peak_drift_sec is None
+                else f', watchdog peak {peak_drift_sec:.4f}s')
+        logging.info(f'[sched] {stats["config"]} | drift p50 '
+                     f'{stats["drift_p50_sec"]:+.4f}s p99 '
+                     f'{stats["drift_p99_sec"]:+.4f}s max '
+                     f'{stats["drift_max_sec"]:+.4f}s over {stats["samples"]} '
+                     f's{peak}')
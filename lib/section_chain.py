@@ -5,11 +5,18 @@ import logging
 from pathlib import Path
 from typing import NamedTuple
 
+from lib.analyser.section_model import FP32_HEAD
+
 MODEL_VERSION = "l9_w128_s1234"
 _GENERATION = "l9"
 _AFFINE = "input_affine_F3.npz"
 _GRAPH = "online_step.onnx"
 _PRIORS = "priors.json"
+_MEL_ENCODER = "mel_encoder.onnx"
+
+MERT_FEATURES = "mert"
+MEL_FEATURES = "mel"
+FEATURES = (MERT_FEATURES, MEL_FEATURES)
 
 
 class Artifacts(NamedTuple):
@@ -51,6 +58,11 @@ def artifacts(data_dir=None) -> Artifacts:
                      priors=generation / _PRIORS)
 
 
+def mel_encoder_path(data_dir=None) -> Path:
+    """The CPU encoder distilled against this generation's affine, if exported."""
+    return artifacts(data_dir).affine.with_name(_MEL_ENCODER)
+
+
 def artifacts_present(data_dir=None) -> bool:
     try:
         return not artifacts(data_dir).missing()
@@ -127,33 +139,55 @@ def _check_class_space(priors, model_classes, config_classes) -> None:
 
 def build_section_chain(data_dir=None, *, device: str | None = None,
                         fp16: bool = True, watchdog=None,
-                        extractor=None) -> SectionChain:
+                        extractor=None, session_factory=None,
+                        features: str = MERT_FEATURES, head: str = FP32_HEAD,
+                        gated: bool = True) -> SectionChain:
     from lib.analyser import mert_stream as M
-    from lib.analyser.section_model import PosteriorStream, SectionModel
+    from lib.analyser.section_model import (PosteriorStream, SectionModel,
+                                            load_head_variant)
     from lib.engine.section_decoder import (SHIPPING_DECODER_CONFIG, Priors,
                                             SectionDecoder,
                                             decoder_config_classes,
                                             load_decoder_config)
 
     found = artifacts(data_dir)
-    geometry, head, mean = read_geometry(data_dir)
+    geometry, head_geometry, mean = read_geometry(data_dir)
 
     # The space gate fires before the encoder loads: a chain whose layers
     # disagree about the class axis must refuse construction, not the first bar.
-    model = SectionModel(found.graph, mean=mean, geometry=head)
+    graph, step = load_head_variant(found.graph, head, geometry=head_geometry,
+                                    gated=gated)
+    model = SectionModel(graph, mean=mean, geometry=step,
+                         session_factory=session_factory)
     priors = Priors.load(found.priors)
     params = load_decoder_config(SHIPPING_DECODER_CONFIG)
     _check_class_space(priors, model.num_classes,
                        decoder_config_classes(SHIPPING_DECODER_CONFIG))
 
+    if features not in FEATURES:
+        raise ValueError(f"no {features!r} feature extractor; the chain knows "
+                         f"{', '.join(FEATURES)}")
     stage = None if extractor is None else extractor(geometry)
     build_encoder = None
-    if stage is None:
+    if stage is None and features == MEL_FEATURES:
+        from lib.analyser.mel_encoder import load_mel_encoder
+
+        mel_path = mel_encoder_path(data_dir)
+        if not mel_path.exists():
+            raise FileNotFoundError(
+                f"no CPU feature encoder at {mel_path} -- distil and export one "
+                f"with training/nn/mel_encoder_train.py")
+
+        def build_encoder():
+            return load_mel_encoder(mel_path, layers=geometry.layers,
+                                    affine_path=found.affine)
+    elif stage is None:
         backend = resolve_backend(device, fp16)
 
         def build_encoder():
             return M.load_encoder(geometry, device=backend["device"], fp16=fp16)
 
+    if stage is None:
         stage = M.MertStream(build_encoder(), geometry=geometry)
 
     stream = PosteriorStream(stage, model)
@@ -164,16 +198,35 @@ def build_section_chain(data_dir=None, *, device: str | None = None,
         stream.start()
 
     feature_latency_sec = (geometry.margin_sec + geometry.hop_sec
-                           + head.future_sec)
+                           + head_geometry.future_sec)
     decoder = SectionDecoder(priors, params,
                              feature_latency_sec=feature_latency_sec)
-    logging.info(f'[chain] {MODEL_VERSION} on {_where(stage)} | '
-                 f'feature latency {feature_latency_sec:.4f}s '
+    logging.info(f'[chain] {MODEL_VERSION} ({step.variant} head) on '
+                 f'{_where(stage)} | feature latency {feature_latency_sec:.4f}s '
                  f'(F {geometry.margin_sec:g} + hop {geometry.hop_sec:g} + '
-                 f'head {head.future_sec:g})')
+                 f'head {head_geometry.future_sec:g})')
     return SectionChain(stream, decoder, feature_latency_sec)
 
 
-def _where(stage) -> str:
+def encoder_identity(stage) -> dict | None:
+    """The weights a stage actually runs, or None when it replays cells.
+
+    ``weights_sha`` hashes what is left after the encoder is cut down to the
+    blocks the geometry reads, ``depth`` counts those blocks.
+    """
     encoder = getattr(stage, "_encoder", None)
-    return "replayed cells" if encoder is None else encoder.device
+    if encoder is None:
+        return None
+    return {"device": encoder.device,
+            "model_sha": encoder.model_sha,
+            "weights_sha": getattr(encoder, "weights_sha", encoder.model_sha),
+            "depth": getattr(encoder, "depth", None)}
+
+
+def _where(stage) -> str:
+    identity = encoder_identity(stage)
+    if identity is None:
+        return "replayed cells"
+    depth = identity["depth"]
+    blocks = "" if depth is None else f", {depth} blocks"
+    return f'{identity["device"]} (weights {identity["weights_sha"]}{blocks})'
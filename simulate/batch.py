@@ -0,0 +1,169 @@
+"""Several fast simulations in lockstep, their section heads run as one batch."""
+from __future__ import annotations
+
+import logging
+import random
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+from lib.analyser.section_model import (BOUNDARY_OUTPUT, FRAMES_INPUT,
+                                        LABEL_OUTPUT, STATE_INPUT,
+                                        STATE_OUTPUT, Drained,
+                                        PosteriorStream, step_together)
+from lib.clock import VirtualClock
+from simulate import cell_cache, runner
+
+log = logging.getLogger(__name__)
+
+_INVARIANCE_PROBE_ROWS = 3
+
+
+class NotReplayable(RuntimeError):
+    ...
+
+
+class LockstepStream(PosteriorStream):
+    def __init__(self, stream, model) -> None:
+        super().__init__(stream, model)
+        self._cells: list = []
+        self._ready: list | None = None
+
+    def gather(self, samples) -> None:
+        self.feed(samples)
+        while self.due():
+            self._cells.extend(self.stream.run_pass())
+
+    def take_cells(self) -> list:
+        cells, self._cells = self._cells, []
+        return cells
+
+    def hand_over(self, posteriors: list) -> None:
+        self._ready = posteriors
+
+    def push_audio(self, samples) -> Drained:
+        if self._ready is None:
+            raise RuntimeError("the lockstep driver has not gathered this "
+                               "buffer's cells; the stream cannot run alone")
+        ready, self._ready = self._ready, None
+        return Drained(False, ready)
+
+
+def step_heads(session, streams: list) -> None:
+    queues = [(stream, deque(stream.take_cells()), []) for stream in streams]
+    # One cell per track per round: each track's cells still reach its model in
+    # order, and every round's due windows go to the graph as one call.
+    while any(cells for _stream, cells, _out in queues):
+        due, owners = [], []
+        for stream, cells, out in queues:
+            if not cells:
+                continue
+            cell = cells.popleft()
+            index = stream.model.admit(cell.features, cell.index)
+            if index is not None:
+                due.append((stream.model, index))
+                owners.append(out)
+        for out, posterior in zip(owners, step_together(session, due)):
+            out.append(posterior)
+    for stream, _cells, out in queues:
+        stream.hand_over(out)
+
+
+def check_batch_invariance(session, geometry) -> None:
+    rng = np.random.default_rng(0)
+    rows = _INVARIANCE_PROBE_ROWS
+    frames = rng.normal(size=(rows, geometry.window_cells,
+                              geometry.input_dim)).astype(np.float32)
+    state = rng.normal(size=(1, rows, geometry.rnn_hidden)).astype(np.float32)
+    names = [LABEL_OUTPUT, BOUNDARY_OUTPUT, STATE_OUTPUT]
+    together = session.run(names, {FRAMES_INPUT: frames, STATE_INPUT: state})
+    for row in range(rows):
+        alone = session.run(names, {FRAMES_INPUT: frames[row:row + 1],
+                                    STATE_INPUT: state[:, row:row + 1]})
+        if not (np.array_equal(alone[0][0], together[0][row])
+                and np.array_equal(alone[1].reshape(-1),
+                                   together[1].reshape(rows, -1)[row])
+                and np.array_equal(alone[2][:, 0], together[2][:, row])):
+            raise RuntimeError(
+                "the section head does not return the same bits for a row "
+                "batched as it does alone on this machine -- a batched "
+                "re-score would not be the solo run it stands in for")
+
+
+class _Track(NamedTuple):
+    components: dict
+    command_queue: object
+    loop: runner.SimulationLoop
+    stream: LockstepStream
+
+
+def _replayed_chain(audio_client, session_factory):
+    from lib import section_chain
+
+    plan = runner._cell_cache_plan(audio_client)
+    if plan is None:
+        raise NotReplayable(f"{getattr(audio_client, 'path', audio_client)}: "
+                            f"no cell cache applies (no file, or no model)")
+    replay, reason = cell_cache.open_replay(
+        *plan, expected_samples=runner._expected_samples(audio_client))
+    if replay is None:
+        raise NotReplayable(f"{audio_client.path}: {reason} -- run it solo "
+                            f"once to record its cells")
+    chain = section_chain.build_section_chain(extractor=lambda _: replay,
+                                              session_factory=session_factory)
+    return chain._replace(stream=LockstepStream(chain.stream.stream,
+                                                chain.stream.model))
+
+
+def replayable(audio_client) -> str | None:
+    plan = runner._cell_cache_plan(audio_client)
+    if plan is None:
+        return "no cell cache applies"
+    _replay, reason = cell_cache.open_replay(
+        *plan, expected_samples=runner._expected_samples(audio_client))
+    return None if reason == "hit" else reason
+
+
+async def run_fast_simulation_batch(audio_clients: list,
+                                    duration_sec: float = float('inf'),
+                                    seed: int = runner.FAST_SIM_RANDOM_SEED) -> list:
+    from lib import section_chain
+    from lib.analyser.section_model import session
+    from lib.engine.event_buffer import EventBuffer
+
+    shared = session(section_chain.artifacts().graph)
+    check_batch_invariance(shared, section_chain.read_geometry().head)
+
+    tracks = []
+    for audio_client in audio_clients:
+        clock = VirtualClock()
+        event_buffer = EventBuffer(window_sec=float('inf'), clock=clock,
+                                   look_ahead_sec=runner.PLAYBACK_DELAY_SEC)
+        chain = _replayed_chain(audio_client, lambda _path: shared)
+        components, command_queue = runner.build_simulation(
+            audio_client, event_buffer, clock=clock, section=chain,
+            rng=random.Random(seed))
+        event_buffer.start()
+        loop = runner.SimulationLoop(components, duration_sec, clock=clock)
+        tracks.append(_Track(components, command_queue, loop, chain.stream))
+
+    for track in tracks:
+        track.loop.start()
+    active = [track for track in tracks if track.loop.running]
+    steps = 0
+    while active:
+        buffers = [await track.loop.read() for track in active]
+        for track, audio_signal in zip(active, buffers):
+            track.stream.gather(audio_signal)
+        step_heads(shared, [track.stream for track in active])
+        for track, audio_signal in zip(active, buffers):
+            await track.loop.process(audio_signal)
+        active = [track for track in active if track.loop.running]
+        steps += 1
+    for track in tracks:
+        await track.loop.finish()
+    log.info(f'[batch] {len(tracks)} tracks in {steps} lockstep buffers')
+
+    return [(track.components['audio_client'], track.components['event_buffer'],
+             track.command_queue) for track in tracks]
@@ -12,7 +12,7 @@ from pathlib import Path
 
 import numpy as np
 
-from lib.analyser.mert_stream import Cell
+from lib.analyser.mert_stream import REUSE_FRAMES, Cell
 from lib.analyser.section_model import PosteriorStream
 
 SCHEMA = "mert-cells/1"
@@ -56,7 +56,8 @@ def sidecar_path(audio_path, decode_path: str) -> Path:
 
 
 def cache_key(geometry, *, source_rate: int, audio_path, decode_path: str,
-              backend: dict | None = None) -> dict:
+              backend: dict | None = None,
+              reuse_frames: bool = REUSE_FRAMES) -> dict:
     from lib import section_chain
 
     stat = Path(audio_path).stat()
@@ -69,6 +70,7 @@ def cache_key(geometry, *, source_rate: int, audio_path, decode_path: str,
             "revision": geometry.revision,
             "layers": [int(layer) for layer in geometry.layers],
             "encoder_sha": geometry.encoder_sha,
+            "reuse_frames": bool(reuse_frames),
         },
         "framing": {
             "margin_sec": float(geometry.margin_sec),
@@ -105,7 +107,11 @@ def open_replay(path, key: dict, expected_samples: int | None = None):
             if reason is not None:
                 return None, reason
             total = int(archive["total_pushed"])
-            if expected_samples is not None and total < int(expected_samples):
+            if expected_samples is None:
+                log.info(f'[cells] {path.name}: the audio length is not known '
+                         f'yet, so truncation is not checked up front -- a short '
+                         f'recording raises once the run outgrows it')
+            elif total < int(expected_samples):
                 return None, "miss_truncated"
             if not _internally_consistent(archive):
                 return None, "miss_schema"
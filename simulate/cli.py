@@ -53,14 +53,15 @@ def paced(args) -> bool:
 
 
 async def _run_file_fast(args):
-    from simulate.fake_audio_client import FileAudioClient
+    from simulate.fake_audio_client import DECODE_PATHS
     from simulate.runner import run_fast_simulation
 
     logging.getLogger().setLevel(logging.WARNING)
 
     wall_start = time.monotonic()
     audio_client, event_buffer, command_queue = await run_fast_simulation(
-        FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, args.audio)
+        DECODE_PATHS[args.decode](SAMPLE_RATE, BUFFER_SIZE, args.audio),
+        features=args.features,
     )
     wall_elapsed = time.monotonic() - wall_start
 
@@ -111,10 +112,10 @@ def _open_monitor(output_device_index: int, delay_sec: float):
 
 
 async def _run_file_paced(args):
-    from simulate.fake_audio_client import FileAudioClient
+    from simulate.fake_audio_client import DECODE_PATHS
     from simulate.runner import build_simulation, PLAYBACK_DELAY_SEC
 
-    audio_client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, args.audio)
+    audio_client = DECODE_PATHS[args.decode](SAMPLE_RATE, BUFFER_SIZE, args.audio)
     event_buffer = _session_buffer(PLAYBACK_DELAY_SEC)
     speaker = monitor = None
     if args.output_device_index is not None:
@@ -122,7 +123,8 @@ async def _run_file_paced(args):
                                          PLAYBACK_DELAY_SEC)
     components, command_queue = build_simulation(
         audio_client, event_buffer, threaded=True,
-        silence_monitor=None if monitor is None else monitor.silence)
+        silence_monitor=None if monitor is None else monitor.silence,
+        features=args.features)
 
     try:
         import librosa
@@ -156,7 +158,8 @@ async def run_realtime(args):
     )
     event_buffer = EventBuffer(look_ahead_sec=PLAYBACK_DELAY_SEC)
     components, command_queue = build_simulation(audio_client, event_buffer,
-                                                 threaded=True)
+                                                 threaded=True,
+                                                 features=args.features)
     event_buffer.start()
 
     await _with_viewer(event_buffer, args.port,
@@ -164,7 +167,18 @@ async def run_realtime(args):
                                              event_buffer, command_queue, False))
 
 
+def _add_features_argument(parser):
+    from lib.section_chain import FEATURES, MERT_FEATURES
+
+    parser.add_argument('--features', choices=FEATURES, default=MERT_FEATURES,
+                        help='Section features: mert (GPU) or mel, the '
+                             'distilled CPU encoder beside the model artifacts '
+                             '(default: mert)')
+
+
 def add_simulate_subparser(subparsers):
+    from lib.profiler import add_profile_arguments
+
     sim = subparsers.add_parser(
         'simulate',
         help='Run the pipeline against a file (fast, headless) or microphone (live UI)',
@@ -186,17 +200,31 @@ def add_simulate_subparser(subparsers):
                          'passing it without --ui paces the run without a '
                          'viewer. Device indices come from `auto_pilot list`.')
     fp.add_argument('--port', type=int, default=8050, help='Dash server port (--ui only)')
+    add_profile_arguments(fp)
+    fp.add_argument('--decode', choices=('librosa', 'ffmpeg-stream'),
+                    default='librosa',
+                    help='How the track is decoded (default: librosa, the '
+                         'whole file before the run starts). ffmpeg-stream '
+                         'starts the run while ffmpeg is still decoding; its '
+                         'decode and cell caches are kept apart from '
+                         "librosa's.")
+    _add_features_argument(fp)
 
     rp = sub.add_parser('realtime', help='Simulate from microphone in real time')
     rp.add_argument('--device-index', type=int, default=None,
                     help='PyAudio input device index (default: system default)')
     rp.add_argument('--port', type=int, default=8050, help='Dash server port')
+    _add_features_argument(rp)
+    add_profile_arguments(rp)
 
     sim.set_defaults(func=simulate_cmd)
 
 
 async def simulate_cmd(args):
-    if args.sim_mode == 'file':
-        await run_file(args)
-    elif args.sim_mode == 'realtime':
-        await run_realtime(args)
+    from lib.profiler import profiling
+
+    with profiling(args.profile, args.profile_hz):
+        if args.sim_mode == 'file':
+            await run_file(args)
+        elif args.sim_mode == 'realtime':
+            await run_realtime(args)
@@ -1,5 +1,10 @@
 import os
 import logging
+import queue
+import subprocess
+import tempfile
+import threading
+
 import numpy as np
 
 log = logging.getLogger(__name__)
@@ -63,3 +68,200 @@ class FileAudioClient:
     @property
     def total_samples(self) -> int | None:
         return None if self._audio is None else len(self._audio)
+
+
+_PIPE_CHUNK_SAMPLES = 1 << 16
+_PIPE_QUEUE_CHUNKS = 32
+
+
+class _FfmpegPipe:
+    """ffmpeg's f32le stdout in fixed-size chunks through a bounded queue.
+
+    The pump thread tees every chunk into ``cache_path`` as it goes and only
+    renames it into place once ffmpeg exits cleanly, so a killed or failed
+    decode never leaves a short cache behind.
+    """
+
+    def __init__(self, path: str, sample_rate: int, cache_path: str):
+        command = ['ffmpeg', '-nostdin', '-v', 'error', '-i', path,
+                   '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1',
+                   '-ar', str(sample_rate), '-']
+        # stderr goes to a file: a pipe nobody reads until stdout ends fills
+        # up on a chatty decode and stalls ffmpeg, and the pump with it.
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                             stderr=self._stderr)
+        except FileNotFoundError as e:
+            self._stderr.close()
+            raise RuntimeError("decode_path 'ffmpeg-stream' needs ffmpeg on "
+                               "PATH") from e
+        self.path = path
+        self.cache_path = cache_path
+        self.samples = 0
+        self.finished = False
+        self._stopped = threading.Event()
+        self._chunks = queue.Queue(maxsize=_PIPE_QUEUE_CHUNKS)
+        self._thread = threading.Thread(target=self._pump, daemon=True,
+                                        name='ffmpeg-decode')
+        self._thread.start()
+
+    def next_chunk(self) -> np.ndarray | None:
+        chunk = self._chunks.get()
+        if isinstance(chunk, Exception):
+            raise chunk
+        if chunk is None:
+            self.finished = True
+        return chunk
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+    def stop(self):
+        self._stopped.set()
+        if self._process.poll() is None:
+            self._process.kill()
+        while self._thread.is_alive():
+            self._drain()
+            self._thread.join(timeout=0.05)
+
+    def _drain(self):
+        try:
+            while True:
+                self._chunks.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _put(self, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _pump(self):
+        partial = f'{self.cache_path}.partial'
+        outcome = None
+        try:
+            with open(partial, 'wb') as tee:
+                carry = b''
+                while block := self._process.stdout.read(_PIPE_CHUNK_SAMPLES * 4):
+                    block = carry + block
+                    whole = len(block) - len(block) % 4
+                    block, carry = block[:whole], block[whole:]
+                    tee.write(block)
+                    self.samples += whole // 4
+                    if not self._put(np.frombuffer(block, dtype=np.float32)):
+                        break
+            error = self._process.wait()
+            if self._stopped.is_set():
+                os.remove(partial)
+            elif error:
+                os.remove(partial)
+                self._stderr.seek(0)
+                detail = self._stderr.read().decode(errors='replace').strip()
+                outcome = RuntimeError(f'ffmpeg could not decode {self.path} '
+                                       f'(exit {error}): {detail}')
+            else:
+                os.replace(partial, self.cache_path)
+                log.info(f'[fake_audio] decode cache written → {self.cache_path}')
+        except Exception as e:
+            outcome = e
+        finally:
+            self._stderr.close()
+            self._put(outcome)
+
+
+class StreamingFileAudioClient(FileAudioClient):
+    """A FileAudioClient that plays while ffmpeg is still decoding.
+
+    ``read`` only waits for the next buffer rather than the whole track, and
+    the decoded stream lands in its own cache next to the librosa one: the two
+    decoders do not produce the same samples, so neither may stand in for the
+    other (``cell_cache.cache_key`` keys on ``decode_path`` for the same
+    reason).
+    """
+    decode_path = 'ffmpeg-stream'
+
+    def __init__(self, sample_rate: int, buffer_size: int, path: str):
+        super().__init__(sample_rate, buffer_size, path)
+        self._pipe: _FfmpegPipe | None = None
+        self._chunk = np.zeros(0, dtype=np.float32)
+        self._offset = 0
+
+    @property
+    def cache_path(self) -> str:
+        return f'{self.path}.{self.sample_rate}.{self.decode_path}.f32'
+
+    def start_streams(self, start_stream_out: bool = False):
+        if self._pipe is not None and self._pos == 0:
+            return                      # opened and not yet read from
+        self.close()
+        self._pipe = None
+        self._pos = 0
+        if self._audio is None and self._cache_fresh():
+            log.info(f'[fake_audio] loading decode cache {self.cache_path}')
+            self._audio = np.fromfile(self.cache_path, dtype=np.float32)
+        if self._audio is not None:
+            return
+        log.info(f'[fake_audio] streaming {self.path} through ffmpeg ...')
+        self._pipe = _FfmpegPipe(self.path, self.sample_rate, self.cache_path)
+        self._chunk, self._offset = np.zeros(0, dtype=np.float32), 0
+
+    def close(self):
+        if self._pipe is not None:
+            self._pipe.stop()
+
+    def _cache_fresh(self) -> bool:
+        return (os.path.exists(self.cache_path)
+                and os.path.getmtime(self.cache_path) > os.path.getmtime(self.path))
+
+    def _pending(self) -> bool:
+        # Blocks on the decoder only when the current chunk is used up.
+        while self._offset >= len(self._chunk):
+            if self._pipe.finished or self._pipe.stopped:
+                return False
+            chunk = self._pipe.next_chunk()
+            if chunk is None:
+                return False
+            self._chunk, self._offset = chunk, 0
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        if self._pipe is None:
+            return super().exhausted
+        return not self._pending()
+
+    def read(self) -> np.ndarray:
+        if self._pipe is None:
+            return super().read()
+        buf = np.zeros(self.buffer_size, dtype=np.float32)
+        filled = 0
+        while filled < self.buffer_size and self._pending():
+            take = min(self.buffer_size - filled, len(self._chunk) - self._offset)
+            buf[filled:filled + take] = self._chunk[self._offset:self._offset + take]
+            self._offset += take
+            filled += take
+        self._pos += filled
+        return buf
+
+    @property
+    def duration_sec(self) -> float:
+        if self._pipe is None:
+            return super().duration_sec
+        return self._pipe.samples / self.sample_rate
+
+    @property
+    def total_samples(self) -> int | None:
+        # Unknown until the decoder reaches the end of the file.
+        if self._pipe is None:
+            return super().total_samples
+        return self._pipe.samples if self._pipe.finished else None
+
+
+DECODE_PATHS = {client.decode_path: client
+                for client in (FileAudioClient, StreamingFileAudioClient)}
@@ -1,11 +1,13 @@
 import asyncio
 import datetime
+import inspect
 import logging
 import random
 import time
 
 from lib.audio_config import SAMPLE_RATE, BUFFER_SIZE
 from lib.clock import Clock, SYSTEM_CLOCK, VirtualClock
+from lib.profiler import mark
 from simulate import cell_cache
 
 TIMING_TOLERANCE_SEC = 0.050
@@ -16,7 +18,8 @@ FAST_SIM_RANDOM_SEED = 1337
 
 def build_simulation(audio_client, event_buffer=None, clock: Clock = SYSTEM_CLOCK,
                      section: object | None = None, threaded: bool = False,
-                     silence_monitor=None):
+                     silence_monitor=None, rng: random.Random | None = None,
+                     features: str | None = None, head: str | None = None):
     from simulate.stub_clients import StubMidiClient, StubOs2lClient, StubOverlayClient
     from lib.analyser.drift_watchdog import DriftWatchdog
     from lib.engine.delayed_command_queue import DelayedCommandQueue
@@ -33,9 +36,11 @@ def build_simulation(audio_client, event_buffer=None, clock: Clock = SYSTEM_CLOC
     if threaded:
         watchdog = DriftWatchdog(BUFFER_SIZE / SAMPLE_RATE, clock=clock)
     if section is None:
-        section = load_section_chain(watchdog=watchdog, audio_client=audio_client)
+        section = load_section_chain(watchdog=watchdog, audio_client=audio_client,
+                                     features=features, head=head)
 
-    effect_controller = EffectController(midi_client, event_buffer=event_buffer, clock=clock)
+    effect_controller = EffectController(midi_client, event_buffer=event_buffer, clock=clock,
+                                         rng=rng)
     light_engine = LightEngine(
         midi_client, os2l_client, overlay_client,
         effect_controller, command_queue,
@@ -65,14 +70,24 @@ def build_simulation(audio_client, event_buffer=None, clock: Clock = SYSTEM_CLOC
     }, command_queue
 
 
-def load_section_chain(watchdog=None, audio_client=None):
+def load_section_chain(watchdog=None, audio_client=None, features=None,
+                       head=None):
     global _SECTION_CHAIN
     from lib import section_chain
+    from lib.analyser.section_model import FP32_HEAD
 
+    features = features or section_chain.MERT_FEATURES
+    head = head or FP32_HEAD
     if watchdog is not None:
         if not _artifacts_or_degrade():
             return None
-        return section_chain.build_section_chain(watchdog=watchdog)
+        return section_chain.build_section_chain(watchdog=watchdog,
+                                                 features=features, head=head,
+                                                 gated=False)
+
+    if features != section_chain.MERT_FEATURES:
+        # The cell cache records MERT's cells; another extractor runs live.
+        return _reset(_other_chain(features, head))
 
     plan = _cell_cache_plan(audio_client)
     if plan is not None:
@@ -80,19 +95,42 @@ def load_section_chain(watchdog=None, audio_client=None):
             *plan, expected_samples=_expected_samples(audio_client))
         if replay is not None:
             logging.info(f'[sim] replaying cached extractor cells ← {plan[0].name}')
-            return section_chain.build_section_chain(extractor=lambda _: replay)
+            return section_chain.build_section_chain(
+                extractor=lambda _: replay, head=head, gated=False)
         logging.info(f'[sim] extractor cells: {reason} — this run needs the GPU')
 
-    if _SECTION_CHAIN is _UNBUILT:
-        _SECTION_CHAIN = (section_chain.build_section_chain()
-                          if _artifacts_or_degrade() else None)
-    if _SECTION_CHAIN is None:
+    if head != FP32_HEAD:
+        # Cells are the extractor's alone, so any head may record them.
+        chain = _other_chain(features, head)
+    else:
+        if _SECTION_CHAIN is _UNBUILT:
+            _SECTION_CHAIN = (section_chain.build_section_chain()
+                              if _artifacts_or_degrade() else None)
+        chain = _SECTION_CHAIN
+    if _reset(chain) is None:
         return None
-    _SECTION_CHAIN.stream.reset()
-    _SECTION_CHAIN.decoder.reset()
     if plan is None:
-        return _SECTION_CHAIN
-    return cell_cache.recording_chain(_SECTION_CHAIN, *plan)
+        return chain
+    return cell_cache.recording_chain(chain, *plan)
+
+
+def _other_chain(features: str, head: str):
+    from lib import section_chain
+
+    # The simulator is where a head variant is gated, so it may run ungated ones.
+    if (features, head) not in _OTHER_CHAINS:
+        _OTHER_CHAINS[features, head] = (
+            section_chain.build_section_chain(features=features, head=head,
+                                              gated=False)
+            if _artifacts_or_degrade() else None)
+    return _OTHER_CHAINS[features, head]
+
+
+def _reset(chain):
+    if chain is not None:
+        chain.stream.reset()
+        chain.decoder.reset()
+    return chain
 
 
 def _artifacts_or_degrade() -> bool:
@@ -127,104 +165,149 @@ def _cell_cache_plan(audio_client):
 
 _UNBUILT = object()
 _SECTION_CHAIN = _UNBUILT
+_OTHER_CHAINS: dict = {}
 
 
 async def run_fast_simulation_components(audio_client, duration_sec: float = float('inf'),
-                                         seed: int = FAST_SIM_RANDOM_SEED):
+                                         seed: int = FAST_SIM_RANDOM_SEED,
+                                         features: str | None = None,
+                                         head: str | None = None):
     from lib.engine.event_buffer import EventBuffer
 
     random.seed(seed)
     clock = VirtualClock()
     event_buffer = EventBuffer(window_sec=float('inf'), clock=clock,
                                look_ahead_sec=PLAYBACK_DELAY_SEC)
-    components, command_queue = build_simulation(audio_client, event_buffer, clock=clock)
+    components, command_queue = build_simulation(audio_client, event_buffer, clock=clock,
+                                                 features=features, head=head)
     event_buffer.start()
     await run_simulation(components, duration_sec, clock=clock)
     return components, command_queue
 
 
 async def run_fast_simulation(audio_client, duration_sec: float = float('inf'),
-                              seed: int = FAST_SIM_RANDOM_SEED):
+                              seed: int = FAST_SIM_RANDOM_SEED,
+                              features: str | None = None,
+                              head: str | None = None):
     components, command_queue = await run_fast_simulation_components(
-        audio_client, duration_sec, seed)
+        audio_client, duration_sec, seed, features=features, head=head)
     return components['audio_client'], components['event_buffer'], command_queue
 
 
-async def run_simulation(components: dict, duration_sec: float,
-                         clock: Clock = SYSTEM_CLOCK,
-                         pace_real_time: bool = False, monitor=None):
-    audio_client = components['audio_client']
-    music_analyser = components['music_analyser']
-    command_queue = components['command_queue']
-
-    is_virtual = isinstance(clock, VirtualClock)
-    buffer_sec = BUFFER_SIZE / SAMPLE_RATE
-
-    audio_client.start_streams()
-    start_mono = clock.monotonic()
-    wall_start = time.monotonic()
-    buffers_fed = 0
-
-    last_100ms = clock.now()
-    last_1s = clock.now()
-    last_10s = clock.now()
-
-    logging.info(f'[sim] starting simulation loop for {duration_sec:.1f}s '
-                 f'({"virtual" if is_virtual else "wall"} time)')
-    if monitor is not None:
-        monitor.arm()
-    while clock.monotonic() - start_mono < duration_sec and not audio_client.exhausted:
-        audio_signal = audio_client.read()
-        buffers_fed += 1
-        if is_virtual:
-            clock.advance(buffer_sec)
-        if pace_real_time:
-            deadline = wall_start + buffers_fed * buffer_sec
+class SimulationLoop:
+    """One track's buffer loop, split so a driver can interleave several."""
+
+    def __init__(self, components: dict, duration_sec: float,
+                 clock: Clock = SYSTEM_CLOCK, pace_real_time: bool = False,
+                 monitor=None):
+        self.components = components
+        self.duration_sec = duration_sec
+        self.clock = clock
+        self.pace_real_time = pace_real_time
+        self.monitor = monitor
+        self.is_virtual = isinstance(clock, VirtualClock)
+        self.buffer_sec = BUFFER_SIZE / SAMPLE_RATE
+        self.buffers_fed = 0
+
+    def start(self) -> None:
+        self.components['audio_client'].start_streams()
+        self._start_mono = self.clock.monotonic()
+        self._wall_start = time.monotonic()
+        self._last_100ms = self.clock.now()
+        self._last_1s = self.clock.now()
+        self._last_10s = self.clock.now()
+
+        logging.info(f'[sim] starting simulation loop for {self.duration_sec:.1f}s '
+                     f'({"virtual" if self.is_virtual else "wall"} time)')
+        if self.monitor is not None:
+            self.monitor.arm()
+
+    @property
+    def running(self) -> bool:
+        return (self.clock.monotonic() - self._start_mono < self.duration_sec
+                and not self.components['audio_client'].exhausted)
+
+    async def read(self):
+        mark('read')
+        audio_signal = self.components['audio_client'].read()
+        if inspect.isawaitable(audio_signal):
+            audio_signal = await audio_signal       # a live device: wait, don't block
+        self.buffers_fed += 1
+        if self.is_virtual:
+            self.clock.advance(self.buffer_sec)
+        if self.pace_real_time:
+            deadline = self._wall_start + self.buffers_fed * self.buffer_sec
             sleep_sec = deadline - time.monotonic()
             if sleep_sec > 0:
                 await asyncio.sleep(sleep_sec)
+        return audio_signal
 
+    async def process(self, audio_signal) -> None:
+        components = self.components
+        command_queue = components['command_queue']
+        mark('light_engine')
         await components['light_engine'].on_audio(audio_signal)
-        monitored = await music_analyser.analyse(audio_signal)
+        mark('analyse')
+        monitored = await components['music_analyser'].analyse(audio_signal)
+        mark('drain')
         await command_queue.drain()
-        if monitor is not None:
-            monitor.feed(monitored)
+        if self.monitor is not None:
+            self.monitor.feed(monitored)
+        mark('callbacks')
 
-        now = clock.now()
-        if now - last_100ms > datetime.timedelta(milliseconds=100):
-            last_100ms = now
+        now = self.clock.now()
+        if now - self._last_100ms > datetime.timedelta(milliseconds=100):
+            self._last_100ms = now
             await components['light_engine'].on_100ms_callback()
             await components['midi_client'].on_100ms_callback()
 
-        if now - last_1s > datetime.timedelta(seconds=1):
-            last_1s = now
+        if now - self._last_1s > datetime.timedelta(seconds=1):
+            self._last_1s = now
             await components['light_engine'].on_1sec_callback()
+            event_buffer = components.get('event_buffer')
+            if self.monitor is not None and event_buffer is not None:
+                event_buffer.set_monitor_state(**self.monitor.stats)
 
-        if now - last_10s > datetime.timedelta(seconds=10):
-            last_10s = now
+        if now - self._last_10s > datetime.timedelta(seconds=10):
+            self._last_10s = now
             await components['light_engine'].on_10sec_callback()
 
-    event_buffer = components.get('event_buffer')
-    if event_buffer is not None:
-        event_buffer.mark_end()
-
-    if is_virtual:
-        flush_until = clock.monotonic() + command_queue.delay_sec
-        while clock.monotonic() < flush_until:
-            clock.advance(buffer_sec)
-            await command_queue.drain()
-    elif pace_real_time:
-        while command_queue.pending or (monitor is not None and monitor.buffered):
-            await asyncio.sleep(buffer_sec)
-            await command_queue.drain()
-            if monitor is not None:
-                monitor.drain()
-
-    audio_client.close()
-    section = components.get('section')
-    if section is not None:
-        section.stop()
-    logging.info('[sim] simulation complete')
+    async def finish(self) -> None:
+        components = self.components
+        command_queue = components['command_queue']
+        monitor = self.monitor
+        event_buffer = components.get('event_buffer')
+        if event_buffer is not None:
+            event_buffer.mark_end()
+
+        if self.is_virtual:
+            flush_until = self.clock.monotonic() + command_queue.delay_sec
+            while self.clock.monotonic() < flush_until:
+                self.clock.advance(self.buffer_sec)
+                await command_queue.drain()
+        elif self.pace_real_time:
+            while command_queue.pending or (monitor is not None and monitor.buffered):
+                await asyncio.sleep(self.buffer_sec)
+                await command_queue.drain()
+                if monitor is not None:
+                    monitor.drain()
+
+        components['audio_client'].close()
+        section = components.get('section')
+        if section is not None:
+            section.stop()
+        logging.info('[sim] simulation complete')
+
+
+async def run_simulation(components: dict, duration_sec: float,
+                         clock: Clock = SYSTEM_CLOCK,
+                         pace_real_time: bool = False, monitor=None):
+    loop = SimulationLoop(components, duration_sec, clock=clock,
+                          pace_real_time=pace_real_time, monitor=monitor)
+    loop.start()
+    while loop.running:
+        await loop.process(await loop.read())
+    await loop.finish()
 
 
 def print_timing_report(command_queue, tolerance_sec: float = TIMING_TOLERANCE_SEC):
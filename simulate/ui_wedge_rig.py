@@ -1,8 +1,11 @@
 import argparse
+import json
 import statistics
 import threading
 import time
 
+from plotly.utils import PlotlyJSONEncoder
+
 from lib.clock import VirtualClock
 from lib.engine.event_buffer import EventBuffer
 from lib.ui_bridge import SnapshotServer, snapshot_port
@@ -16,6 +19,7 @@ INTENT_SEC = 40.0
 TRACK_SEC = 300.0
 GAP_SEC = 6.0
 SEED_STEP_SEC = BEAT_SEC / 4
+REFRESH_SEC = 0.25
 
 
 class RiggedShow:
@@ -101,18 +105,28 @@ def profile(show: RiggedShow, ticks: int) -> None:
         print(f'  {name:<16} median {statistics.median(samples):7.2f} ms   '
               f'max {max(samples):7.2f} ms')
 
+    # The show moves a poll between calls and each callback is handed back the
+    # state its page would echo, so the steady state is what gets timed: the
+    # timeline as patches, the panels only when they change.
     callbacks = _server_callbacks(app)
     samples = {key: [] for key, _ in callbacks}
+    sizes = {key: [] for key, _ in callbacks}
+    echoed = {}
     for tick in range(ticks):
+        show._advance_to(show.clock.monotonic() + REFRESH_SEC)
         for key, wrapped in callbacks:
             at = time.perf_counter()
-            wrapped(tick)
+            answer = wrapped(tick, echoed.get(key))
             samples[key].append((time.perf_counter() - at) * 1000)
+            echoed[key] = answer[-1]
+            sizes[key].append(len(json.dumps(answer, cls=PlotlyJSONEncoder)))
     for key, taken in samples.items():
         print(f'callback {key}')
         print(f'  median {statistics.median(taken):7.2f} ms   '
               f'mean {statistics.fmean(taken):7.2f} ms   '
-              f'max {max(taken):7.2f} ms')
+              f'max {max(taken):7.2f} ms   '
+              f'answer median {statistics.median(sizes[key]) / 1024:6.1f} KiB   '
+              f'max {max(sizes[key]) / 1024:6.1f} KiB')
 
 
 def serve(show: RiggedShow, port: int, latency_ms: float) -> None:
@@ -1,12 +1,15 @@
 import argparse
 import http.client
+import itertools
 import json
 import logging
 import threading
+import zlib
+from collections import OrderedDict
 from statistics import median
 
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
 import plotly.graph_objects as go
 
 from lib.engine.event_buffer import STOP_PERSISTENCE_SEC
@@ -52,6 +55,9 @@ BEAT_TICK_COLOR = 'rgba(88,166,255,0.22)'
 
 REFRESH_MS = 250
 VIEW_EVERY_TICKS = 2
+# Past this many edits a whole figure is the smaller answer.
+PATCH_MAX_EDITS = 48
+DRAWN_VERSIONS_KEPT = 8
 STALL_RELEASE_MS = 4000
 STALE_REFRESHES = 12
 
@@ -259,30 +265,32 @@ def _bar_grid(snapshot: dict, origin: float) -> tuple:
     for index, start in enumerate(edges[:-1]):
         at = start + delay - origin
         span = spans[index]
-        shapes.append(dict(
+        bar = first_bar + index
+        shapes.append((('bar', bar), dict(
             type='line', xref='x', yref='paper',
             x0=at, x1=at, y0=0.0, y1=0.5,
             line=dict(color=DOWNBEAT_COLOR, width=1.4),
-        ))
+        )))
         if span <= bar_sec * BAR_SPAN_TOLERANCE:
             for beat in range(1, BEATS_PER_BAR):
                 tick = at + span * beat / BEATS_PER_BAR
-                shapes.append(dict(
+                shapes.append((('tick', bar, beat), dict(
                     type='line', xref='x', yref='paper',
                     x0=tick, x1=tick, y0=0.06, y1=0.20,
                     line=dict(color=BEAT_TICK_COLOR, width=0.8),
-                ))
-        bar = first_bar + index
+                )))
         if bar % BAR_LABEL_EVERY == 0:
-            annotations.append(dict(
+            annotations.append((('bar', bar), dict(
                 x=at, y=0.50, xref='x', yref='paper',
                 text=str(bar), showarrow=False, xanchor='left', yanchor='bottom',
                 font=dict(color=DOWNBEAT_COLOR, size=9, family='monospace'),
-            ))
+            )))
     return shapes, annotations
 
 
-def _build_timeline(snapshot: dict) -> go.Figure:
+def _timeline_layers(snapshot: dict) -> dict:
+    """Every shape and annotation on the timeline, each under a key that names
+    the thing it draws, so two polls can be diffed instead of redrawn."""
     origin = _song_origin(snapshot)
     now    = _display_now(snapshot, origin)
     x0     = now - TIMELINE_WINDOW_SEC
@@ -305,17 +313,18 @@ def _build_timeline(snapshot: dict) -> go.Figure:
             continue
         cfg   = _intent_config(entry['intent'])
         color = cfg['primary']
-        shapes.append(dict(
+        key   = ('intent', entry['t'])
+        shapes.append((key, dict(
             type='rect', xref='x', yref='paper',
             x0=t_start, x1=t_end, y0=0.52, y1=0.96,
             fillcolor=color, opacity=0.80, line_width=0,
-        ))
+        )))
         if t_end - t_start > 1.5:
-            annotations.append(dict(
+            annotations.append((key, dict(
                 x=(t_start + t_end) / 2, y=0.74, xref='x', yref='paper',
                 text=cfg['label'], showarrow=False,
                 font=dict(color='rgba(255,255,255,0.85)', size=10, family='monospace'),
-            ))
+            )))
 
     if origin is not None:
         for ev in _room_sound_events(snapshot):
@@ -325,26 +334,33 @@ def _build_timeline(snapshot: dict) -> go.Figure:
             is_start = ev['playing']
             color    = '#3fb950' if is_start else '#f85149'
             label    = '▶ START' if is_start else '■ STOP'
-            shapes.append(dict(
+            key      = ('sound', ev['t'], is_start)
+            shapes.append((key, dict(
                 type='line', xref='x', yref='paper',
                 x0=t, x1=t, y0=0, y1=1,
                 line=dict(color=color, width=1.5, dash='dash'),
-            ))
-            annotations.append(dict(
+            )))
+            annotations.append((key, dict(
                 x=t, y=0.04, xref='x', yref='paper',
                 text=label, showarrow=False,
                 font=dict(color=color, size=9, family='monospace'),
                 xanchor='left',
-            ))
+            )))
+
+    return {'origin': origin, 'range': [x0, x1],
+            'shapes': shapes, 'annotations': annotations}
+
 
+def _timeline_figure(layers: dict) -> go.Figure:
     # Beats are deliberately NOT drawn here: a figure push arrives most of a
     # second after the beat it carries, so the browser owns the markers (see
     # ANIMATION_JS) and this figure carries everything that is known ahead.
     fig = go.Figure()
     fig.update_layout(
-        shapes=shapes, annotations=annotations,
+        shapes=[shape for _, shape in layers['shapes']],
+        annotations=[note for _, note in layers['annotations']],
         xaxis=dict(
-            range=[x0, x1],
+            range=layers['range'],
             dtick=5.0,
             tickformat='.0f',
             ticksuffix='s',
@@ -363,6 +379,88 @@ def _build_timeline(snapshot: dict) -> go.Figure:
     return fig
 
 
+def _build_timeline(snapshot: dict) -> go.Figure:
+    return _timeline_figure(_timeline_layers(snapshot))
+
+
+def _patch_keyed(target, old: list, new: list) -> int | None:
+    """Record on ``target`` (a Patch list) the edits that turn ``old`` into
+    ``new`` and return how many there were, or None if the two order their
+    shared keys differently and only a rebuild can reconcile them."""
+    new_keys = {key for key, _ in new}
+    old_items = dict(old)
+    if len(new_keys) != len(new) or ([key for key, _ in old if key in new_keys]
+            != [key for key, _ in new if key in old_items]):
+        return None
+    edits = 0
+    for index in range(len(old) - 1, -1, -1):
+        if old[index][0] not in new_keys:
+            del target[index]
+            edits += 1
+    for index, (key, item) in enumerate(new):
+        was = old_items.get(key)
+        if was is None:
+            target.insert(index, item)
+            edits += 1
+        elif was.keys() != item.keys():
+            target[index] = item
+            edits += 1
+        else:
+            for field, value in item.items():
+                if was[field] != value:
+                    target[index][field] = value
+                    edits += 1
+    return edits
+
+
+def _patch_timeline(drawn: dict, layers: dict):
+    """The figure the browser holds, moved to ``layers`` as a Patch, or None
+    when a rebuild is the smaller message (a new song re-bases every x)."""
+    if drawn['origin'] != layers['origin']:
+        return None
+    patch = dash.Patch()
+    edits = 0
+    for name in ('shapes', 'annotations'):
+        moved = _patch_keyed(patch['layout'][name], drawn[name], layers[name])
+        if moved is None:
+            return None
+        edits += moved
+    if edits > PATCH_MAX_EDITS:
+        return None
+    return patch if edits else dash.no_update
+
+
+class _DrawnTimelines:
+    """The layers behind the last few figures sent, by version.
+
+    The browser echoes the version it holds, so each page is patched from
+    what it actually has: a new tab, a server restart or a dropped answer
+    misses here and gets a whole figure instead.
+    """
+
+    def __init__(self, keep: int = DRAWN_VERSIONS_KEPT):
+        self._keep = keep
+        self._versions = itertools.count(1)
+        self._drawn: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, snapshot: dict, held: int | None) -> tuple:
+        with self._lock:
+            drawn = self._drawn.get(held)
+        if drawn is not None and drawn['snapshot'] is snapshot:
+            return dash.no_update, held
+        layers = _timeline_layers(snapshot)
+        figure = None if drawn is None else _patch_timeline(drawn, layers)
+        if figure is None:
+            figure = _timeline_figure(layers)
+        version = next(self._versions)
+        with self._lock:
+            self._drawn[version] = dict(layers, snapshot=snapshot)
+            while len(self._drawn) > self._keep:
+                self._drawn.popitem(last=False)
+        return figure, version
+
+
 def _build_stage(snapshot: dict) -> list:
     cfg     = _intent_config(snapshot.get('intent'))
     active  = sorted(cfg['slots'])
@@ -509,6 +607,47 @@ def _build_metrics(snapshot: dict) -> list:
     ]
 
 
+def _metrics_inputs(snapshot: dict) -> tuple:
+    # The clocks' values are left out: the browser ticks them between polls,
+    # so only whether each one is blank needs a re-render.
+    song, room = _song_and_room(snapshot)
+    return (f'{_room_bpm(snapshot):.0f}', _room_beat_count(snapshot),
+            song is None, room is None, snapshot.get('intent'),
+            _room_is_playing(snapshot),
+            snapshot.get('timing_stats', {}).get('by_label'),
+            snapshot.get('shed'))
+
+
+def _decoder_inputs(snapshot: dict) -> tuple:
+    state = snapshot.get('decoder') or {}
+    return tuple(state.get(name) for name in (
+        'classes', 'posterior', 'observed_bar', 'committed_bar',
+        'committed_label', 'lag_bars', 'chain_latency_sec'))
+
+
+PANELS = {
+    'metrics': (_metrics_inputs, _build_metrics),
+    'stage':   (lambda snapshot: snapshot.get('intent'), _build_stage),
+    'decoder': (_decoder_inputs, _build_decoder),
+}
+
+
+def _refresh_panels(snapshot: dict, shown: dict | None) -> tuple:
+    """Each panel rebuilt only when what it reads has changed since the page
+    last took it; ``shown`` is the page's record of that, echoed back.  A
+    CRC, not ``hash()``: the browser's numbers hold 53 bits."""
+    shown = dict(shown or {})
+    panels = []
+    for name, (inputs, build) in PANELS.items():
+        key = zlib.crc32(repr(inputs(snapshot)).encode())
+        if shown.get(name) == key:
+            panels.append(dash.no_update)
+        else:
+            shown[name] = key
+            panels.append(build(snapshot))
+    return (*panels, shown)
+
+
 def _metric_row(items: list, **overrides) -> html.Div:
     style = {'display': 'flex', 'alignItems': 'baseline', 'flexWrap': 'wrap',
              'columnGap': '22px', 'rowGap': '4px', 'marginBottom': '7px',
@@ -520,7 +659,10 @@ def _metric_row(items: list, **overrides) -> html.Div:
 def _shed_pill(shed: dict) -> tuple:
     if not shed:
         return 'health: —', MUTED
-    if shed.get('level', 'NONE') != 'NONE':
+    level = shed.get('level', 'NONE')
+    if level in ('HOP_X2', 'HOP_X4'):
+        return f'health: ◇ PACED — one section pass per {level[-1]} hops', WARN_COLOR
+    if level != 'NONE':
         fault = shed.get('fault')
         return (f'health: ◆ DEGRADED — holding intent'
                 f'{f" ({fault})" if fault else ""}'), WARN_COLOR
@@ -925,6 +1067,7 @@ def build_app(snapshot_source) -> dash.Dash:
         dcc.Store(id='sync'),
         dcc.Store(id='anim'),
         dcc.Store(id='drawn'),
+        dcc.Store(id='shown'),
         dcc.Store(id='taken'),
     ], style={'background': DARK_BG, 'minHeight': '100vh'})
 
@@ -939,26 +1082,28 @@ def build_app(snapshot_source) -> dash.Dash:
         [Output('sync', 'data'),
          Output('metrics', 'children'),
          Output('stage', 'children'),
-         Output('decoder', 'children')],
+         Output('decoder', 'children'),
+         Output('shown', 'data')],
         Input('gate', 'data'),
+        State('shown', 'data'),
         prevent_initial_call=True,
     )
-    def refresh(_):
+    def refresh(_, shown=None):
         snap = latest['snapshot'] = snapshot_source.snapshot()
-        return (_anchor(snap), _build_metrics(snap),
-                _build_stage(snap), _build_decoder(snap))
+        return (_anchor(snap), *_refresh_panels(snap, shown))
+
+    timelines = _DrawnTimelines()
 
     @app.callback(
         [Output('timeline', 'figure'), Output('drawn', 'data')],
         Input('view-gate', 'data'),
+        State('drawn', 'data'),
         prevent_initial_call=True,
     )
-    def refresh_view(tick):
+    def refresh_view(tick, drawn=None):
         snap = latest.get('snapshot') or snapshot_source.snapshot()
-        if snap is latest.get('drawn'):
-            return dash.no_update, tick
-        latest['drawn'] = snap
-        return _build_timeline(snap), tick
+        figure, version = timelines.update(snap, (drawn or {}).get('version'))
+        return figure, {'tick': tick, 'version': version}
 
     app.clientside_callback(ANIMATION_JS, Output('anim', 'data'),
                             Input('sync', 'data'))
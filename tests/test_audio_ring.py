@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+
+from lib.clients.audio_ring import CaptureRing, PlaybackRing
+
+
+def _ramp(start, count):
+    return np.arange(start, start + count, dtype=np.float32)
+
+
+def test_captured_audio_comes_out_in_whole_blocks_in_order():
+    ring = CaptureRing(block=4, capacity=32)
+    ring.push(_ramp(0, 6))
+    assert np.array_equal(ring.pop(), _ramp(0, 4))
+    assert ring.pop() is None, 'a partial block was handed out'
+    ring.push(_ramp(6, 6))
+    assert np.array_equal(ring.pop(), _ramp(4, 4))
+    assert np.array_equal(ring.pop(), _ramp(8, 4))
+    assert (ring.dropped_samples, ring.input_overflows) == (0, 0)
+
+
+def test_a_loop_that_falls_a_ring_behind_resumes_at_the_oldest_held_audio():
+    ring = CaptureRing(block=4, capacity=16)
+    for start in range(0, 40, 4):
+        ring.push(_ramp(start, 4))
+    block = ring.pop()
+    assert np.array_equal(block, _ramp(24, 4))
+    assert ring.dropped_samples == 24, 'the lost audio was not counted'
+    assert ring.available == 12
+
+
+def test_a_device_overflow_is_counted_not_swallowed():
+    ring = CaptureRing(block=4, capacity=16)
+    ring.push(_ramp(0, 4), overflowed=True)
+    ring.push(_ramp(4, 4))
+    assert ring.input_overflows == 1
+
+
+def test_a_capture_ring_must_hold_two_blocks():
+    with pytest.raises(ValueError, match="two"):
+        CaptureRing(block=8, capacity=12)
+
+
+def test_playback_pads_a_short_queue_with_silence_and_counts_it():
+    ring = PlaybackRing(capacity=32)
+    out = np.full(4, 9.0, dtype=np.float32)
+    ring.pull(out)
+    assert ring.underflow_samples == 0, 'silence before the first play is not a gap'
+    assert not out.any()
+
+    ring.push(_ramp(1, 6))
+    assert np.array_equal(ring.pull(out), _ramp(1, 4))
+    assert np.array_equal(ring.pull(out), [5.0, 6.0, 0.0, 0.0])
+    assert ring.underflow_samples == 2
+    assert ring.queued == 0
+
+
+def test_playback_lapped_by_its_writer_drops_the_oldest_and_counts_it():
+    ring = PlaybackRing(capacity=8)
+    ring.push(_ramp(0, 12))
+    out = np.zeros(4, dtype=np.float32)
+    assert np.array_equal(ring.pull(out), _ramp(4, 4))
+    assert ring.dropped_samples == 4
+
+
+class _FakeStream:
+    def __init__(self, stream_callback, **_kwargs):
+        self.callback = stream_callback
+
+    def start_stream(self):
+        pass
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class _FakePyAudio:
+    def get_default_input_device_info(self):
+        return {'index': 0, 'name': 'fake input'}
+
+    def open(self, **kwargs):
+        self.stream = _FakeStream(**kwargs)
+        return self.stream
+
+
+@pytest.fixture
+def capture(monkeypatch):
+    pyaudio = pytest.importorskip('pyaudio')
+    from lib.clients.pyaudio_client import PyAudioClient
+
+    monkeypatch.setattr(pyaudio, 'PyAudio', _FakePyAudio)
+    client = PyAudioClient(sample_rate=100, buffer_size=4)
+    client.start_streams()
+    return client, client.py_audio.stream.callback, pyaudio
+
+
+async def test_a_read_waits_for_the_callback_and_wakes_when_it_fires(capture):
+    import asyncio
+    import threading
+
+    client, callback, pyaudio = capture
+    announced = []
+    client.on_callback_thread = lambda tid, what: announced.append((tid, what))
+    reading = asyncio.ensure_future(client.read())
+    await asyncio.sleep(0.01)
+    assert not reading.done(), 'a read returned before any audio arrived'
+
+    def device():
+        assert callback(_ramp(0, 4).tobytes(), 4, {}, 0) == (None, pyaudio.paContinue)
+        callback(_ramp(4, 4).tobytes(), 4, {}, 0)
+
+    thread = threading.Thread(target=device)
+    thread.start()
+    thread.join()
+    block = await asyncio.wait_for(reading, timeout=2.0)
+    assert np.array_equal(block, _ramp(0, 4))
+    assert announced == [(thread.native_id, 'the PortAudio capture thread')]
+
+
+async def test_the_callback_counts_overflows_and_a_loop_left_behind(capture):
+    client, callback, pyaudio = capture
+    callback(_ramp(0, 4).tobytes(), 4, {}, pyaudio.paInputOverflow)
+    for start in range(4, 400, 4):
+        callback(_ramp(start, 4).tobytes(), 4, {}, 0)
+
+    block = await client.read()
+    assert client.input_overflows == 1
+    assert client.dropped_samples == 200, 'audio lapped by the callback was not counted'
+    assert np.array_equal(block, _ramp(200, 4))
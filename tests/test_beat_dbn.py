@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+
+from lib.analyser.beat_dbn import OnlineBeatDBN, beat_intervals
+
+
+def _activations(frames=2000, period=47, seed=0):
+    rng = np.random.default_rng(seed)
+    activations = np.clip(rng.normal(0.05, 0.03, frames), 0.001, 0.999)
+    activations[::period] = 0.85
+    return activations
+
+
+def _dense_forward(dbn, activations):
+    """madmom's HMM forward, with the transitions as one dense matrix."""
+    matrix = np.zeros((dbn.num_states, dbn.num_states))
+    for state in range(dbn.num_states):
+        lo, hi = dbn.pointers[state], dbn.pointers[state + 1]
+        matrix[state, dbn.prev_states[lo:hi]] = dbn.probabilities[lo:hi]
+    forward = np.full(dbn.num_states, 1.0 / dbn.num_states)
+    states = []
+    for activation in activations:
+        density = np.where(dbn.observation == 1, activation,
+                           (1.0 - activation) / (dbn.observation_lambda - 1.0))
+        forward = matrix @ forward * density
+        forward /= forward.sum()
+        states.append(int(forward.argmax()))
+    return forward, np.array(states)
+
+
+def test_the_state_space_is_madmoms_online_one():
+    dbn = OnlineBeatDBN()
+    assert len(dbn.intervals) == 60
+    assert dbn.intervals[0] == 28 and dbn.intervals[-1] == 109
+    assert np.array_equal(dbn.intervals, beat_intervals(6000 / 215, 6000 / 55))
+    assert dbn.num_states == dbn.intervals.sum()
+    leaving = np.bincount(dbn.prev_states, weights=dbn.probabilities,
+                          minlength=dbn.num_states)
+    assert np.allclose(leaving, 1.0)
+
+
+def test_the_sparse_step_is_the_dense_forward():
+    dbn = OnlineBeatDBN()
+    activations = _activations(300)
+    dbn.process(activations)
+    forward, _ = _dense_forward(dbn, activations)
+    assert np.allclose(dbn._forward, forward, rtol=1e-9, atol=1e-15)
+
+
+def test_a_steady_pulse_is_tracked_and_its_tempo_read_off_the_posterior():
+    dbn = OnlineBeatDBN()
+    assert dbn.bpm == 0.0
+    beats = dbn.process(_activations(period=50))
+    assert np.allclose(np.diff(beats[-10:]), 0.5, atol=0.02)
+    assert dbn.bpm == pytest.approx(120.0, rel=0.025)      # one interval either side
+    assert dbn.tempo_posterior.sum() == pytest.approx(1.0)
+
+
+def test_beats_keep_their_time_across_calls_and_reset_rebases_it():
+    activations = _activations(600)
+    whole = OnlineBeatDBN().process(activations)
+    dbn = OnlineBeatDBN()
+    pieces = np.concatenate([dbn.process(activations[start:start + 7])
+                             for start in range(0, len(activations), 7)])
+    assert np.array_equal(pieces, whole)
+    dbn.reset()
+    assert np.array_equal(dbn.process(activations), whole)
+
+
+@pytest.mark.parametrize('beam', [1e-6, 1e-4])
+def test_a_beam_drops_unlikely_tempi_and_keeps_the_beats(beam):
+    activations = _activations(3000)
+    exact = OnlineBeatDBN().process(activations)
+    pruned = OnlineBeatDBN(beam=beam)
+    assert np.array_equal(pruned.process(activations), exact)
+    assert pruned.active_tempi < 60
+
+
+def test_a_beam_outside_the_unit_interval_is_refused():
+    with pytest.raises(ValueError, match='beam'):
+        OnlineBeatDBN(beam=1.5)
+
+
+def _madmom_beats(audio, **kwargs):
+    """Our beat instants and madmom's, from the same activations."""
+    pytest.importorskip('madmom')
+    from madmom.features.beats import DBNBeatTrackingProcessor
+
+    from lib.analyser.beat_features import HOP_SIZE, BeatFeatures
+    from lib.analyser.beat_rnn import BeatRNN
+
+    features = BeatFeatures()
+    rows = np.stack([features.push(audio[start:start + HOP_SIZE]).copy()
+                     for start in range(0, len(audio) - HOP_SIZE + 1, HOP_SIZE)])
+    activations = BeatRNN.from_madmom()(rows, reset=True)
+
+    theirs = DBNBeatTrackingProcessor(fps=100, online=True)
+    theirs.reset()
+    want = np.concatenate([theirs.process_online(activations[i:i + 1], reset=False)
+                           for i in range(len(activations))])
+    ours = OnlineBeatDBN(**kwargs)
+    got = np.concatenate([ours.process(activations[i:i + 1])
+                          for i in range(len(activations))])
+    return got, want
+
+
+@pytest.mark.integration
+def test_beat_instants_match_madmoms_online_dbn(anchor_mp3):
+    from lib.analyser.beat_features import SAMPLE_RATE
+    from lib.audio_config import BUFFER_SIZE
+    from simulate.fake_audio_client import FileAudioClient
+
+    client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, anchor_mp3)
+    client.start_streams()
+    audio = np.concatenate([client.read()
+                            for _ in range(SAMPLE_RATE * 30 // BUFFER_SIZE)])
+    got, want = _madmom_beats(audio)
+
+    assert len(want) > 20
+    assert np.array_equal(got, want)
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize('beam', [None, 1e-4])
+def test_beat_instants_match_madmoms_online_dbn_on_a_click_track(beam):
+    from benchmarks.cases import click_track
+
+    got, want = _madmom_beats(click_track(20.0), beam=beam)
+
+    assert len(want) > 20
+    assert np.array_equal(got, want)
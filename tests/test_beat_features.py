@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from lib.analyser import beat_features as B
+
+SR = B.SAMPLE_RATE
+HOP = B.HOP_SIZE
+
+
+def _noise(hops, seed=0):
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, hops * HOP).astype(np.float32)
+
+
+def _stream(features, audio):
+    return np.array([features.push(audio[i:i + HOP]).copy()
+                     for i in range(0, len(audio) - HOP + 1, HOP)])
+
+
+def _batch(audio, resolutions):
+    """The same rows from whole-signal framing and a complex FFT."""
+    padded = np.concatenate([np.zeros(max(s for s, _ in resolutions), np.float32),
+                             audio])
+    hops = len(audio) // HOP
+    columns = []
+    for size, bands in resolutions:
+        ends = len(padded) - len(audio) + HOP * np.arange(1, hops + 1)
+        frames = np.stack([padded[end - size:end] for end in ends])
+        magnitude = np.abs(np.fft.fft(frames * np.hanning(size), axis=1)[:, :size // 2])
+        spec = np.log10(magnitude @ B.log_filterbank(size, bands) + 1.0)
+        lag = B.diff_frames(size)
+        diff = np.zeros_like(spec)
+        diff[lag:] = np.maximum(spec[lag:] - spec[:-lag], 0.0)
+        columns += [spec, diff]
+    return np.hstack(columns)
+
+
+def test_the_online_filterbank_is_unit_area_log_spaced_triangles():
+    bank = B.log_filterbank(2048, 12)
+    assert bank.shape == (1024, 81) and bank.dtype == np.float32
+    assert np.allclose(bank.sum(axis=0), 1.0)
+    peaks = bank.argmax(axis=0)
+    assert np.all(np.diff(peaks) > 0)
+    assert peaks[0] * SR / 2048 >= B.F_MIN and peaks[-1] * SR / 2048 <= B.F_MAX
+
+
+def test_the_difference_looks_back_as_far_as_the_window_rises():
+    assert [B.diff_frames(size) for size in (1024, 2048, 4096)] == [1, 1, 2]
+
+
+def test_a_tone_lands_in_the_band_around_its_bin():
+    features = B.BeatFeatures()
+    t = np.arange(5 * HOP) / SR
+    tone = (0.5 * np.sin(2 * np.pi * 1000.0 * t)).astype(np.float32)
+    row = _stream(features, tone)[-1]
+    bands = row[:features.dim // 2]
+    tone_bin = round(1000.0 * 2048 / SR)
+    assert bands.argmax() == B.log_filterbank(2048, 12)[tone_bin].argmax()
+
+
+def test_streamed_rows_match_the_whole_signal_computed_at_once():
+    resolutions = ((1024, 3), (2048, 6), (4096, 12))
+    audio = _noise(40)
+    streamed = _stream(B.BeatFeatures(resolutions), audio)
+    assert streamed.shape == (40, B.BeatFeatures(resolutions).dim)
+    assert np.allclose(streamed, _batch(audio, resolutions), atol=1e-5)
+
+
+def test_only_onsets_count_and_the_first_frame_has_nothing_to_compare():
+    features = B.BeatFeatures()
+    half = features.dim // 2
+    audio = np.concatenate([np.zeros(10 * HOP, np.float32), _noise(10)])
+    rows = _stream(features, audio)
+    assert rows[:10, half:].max() == 0.0
+    assert rows[10, half:].max() > 0.0
+    assert rows[:, half:].min() >= 0.0
+
+
+def test_reset_forgets_the_window_and_the_previous_frame():
+    features = B.BeatFeatures()
+    audio = _noise(20, seed=3)
+    first = _stream(features, audio)
+    features.reset()
+    assert np.array_equal(_stream(features, audio), first)
+    assert not first[0, features.dim // 2:].any()
+
+
+def test_a_short_hop_is_refused():
+    with pytest.raises(ValueError, match='441-sample hop'):
+        B.BeatFeatures().push(np.zeros(HOP - 1, np.float32))
+
+
+def _madmom_deltas(audio):
+    """Per hop, how far our rows and activations sit from madmom's online chain."""
+    pytest.importorskip('madmom')
+    from madmom.features.beats import RNNBeatProcessor
+    from madmom.processors import BufferProcessor
+
+    from lib.analyser.madmom_rhythm import FPS, FRAME_SIZE, _BeatStage
+
+    theirs = RNNBeatProcessor(online=True, origin='stream', num_frames=1, fps=FPS)
+    their_rows, their_networks = theirs.processors
+    buffer = BufferProcessor(buffer_size=FRAME_SIZE)
+    buffer(np.zeros(FRAME_SIZE, dtype=np.float32))
+    ours = _BeatStage()
+
+    rows, activations = [], []
+    for index, start in enumerate(range(0, len(audio) - HOP + 1, HOP)):
+        hop = audio[start:start + HOP].astype(np.float32)
+        frame = buffer(hop)
+        want_row = their_rows(frame, reset=index == 0)
+        want = float(np.atleast_1d(
+            their_networks(want_row, reset=index == 0)).flatten()[-1])
+        ours(hop[np.newaxis])
+        rows.append(np.abs(ours._features.row - np.ravel(want_row)).max())
+        activations.append(abs(ours.activations[-1] - want))
+    return rows, activations
+
+
+@pytest.mark.integration
+def test_rows_and_activations_match_madmoms_online_chain(anchor_mp3):
+    from lib.audio_config import BUFFER_SIZE
+    from simulate.fake_audio_client import FileAudioClient
+
+    client = FileAudioClient(SR, BUFFER_SIZE, anchor_mp3)
+    client.start_streams()
+    audio = np.concatenate([client.read() for _ in range(SR * 20 // BUFFER_SIZE)])
+    rows, activations = _madmom_deltas(audio)
+
+    assert max(rows) < 1e-4
+    assert max(activations) < 1e-4
+
+
+@pytest.mark.integration
+def test_rows_and_activations_match_madmoms_online_chain_on_a_click_track():
+    from benchmarks.cases import click_track
+
+    rows, activations = _madmom_deltas(click_track(20.0))
+
+    assert max(rows) < 1e-4
+    assert max(activations) < 1e-4
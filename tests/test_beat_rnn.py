@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from lib.analyser.beat_rnn import BeatRNN
+
+IN, UNITS, LAYERS, MEMBERS = 12, 5, 3, 4
+
+
+def sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+# Named like madmom's layer classes: the port reads their attributes only.
+class LSTMLayer(SimpleNamespace):
+    pass
+
+
+class FeedForwardLayer(SimpleNamespace):
+    pass
+
+
+class BidirectionalLayer(SimpleNamespace):
+    pass
+
+
+def _gate(rng, n_in, fn=sigmoid, peephole=True):
+    return SimpleNamespace(
+        weights=rng.normal(0, 0.4, (n_in, UNITS)).astype(np.float32),
+        recurrent_weights=rng.normal(0, 0.4, (UNITS, UNITS)).astype(np.float32),
+        bias=rng.normal(0, 0.2, UNITS).astype(np.float32),
+        peephole_weights=(rng.normal(0, 0.4, UNITS).astype(np.float32)
+                          if peephole else None),
+        activation_fn=fn)
+
+
+def _network(seed):
+    rng = np.random.default_rng(seed)
+    layers = []
+    for depth in range(LAYERS):
+        n_in = IN if depth == 0 else UNITS
+        layers.append(LSTMLayer(
+            input_gate=_gate(rng, n_in), forget_gate=_gate(rng, n_in),
+            cell=_gate(rng, n_in, np.tanh, peephole=False),
+            output_gate=_gate(rng, n_in), activation_fn=np.tanh))
+    layers.append(FeedForwardLayer(
+        weights=rng.normal(0, 0.5, (UNITS, 1)).astype(np.float32),
+        bias=rng.normal(0, 0.1, 1).astype(np.float32), activation_fn=sigmoid))
+    return SimpleNamespace(layers=layers)
+
+
+def _reference(networks, rows):
+    """madmom's LSTMLayer.activate, member by member and frame by frame."""
+    def gate(g, x, prev, state=None):
+        out = x @ g.weights + g.bias
+        if state is not None and g.peephole_weights is not None:
+            out = out + state * g.peephole_weights
+        return g.activation_fn(out + prev @ g.recurrent_weights)
+
+    predictions = []
+    for network in networks:
+        data = rows
+        for layer in network.layers[:-1]:
+            prev, state = np.zeros(UNITS), np.zeros(UNITS)
+            out = np.zeros((len(data), UNITS))
+            for t, x in enumerate(data):
+                ig = gate(layer.input_gate, x, prev, state)
+                fg = gate(layer.forget_gate, x, prev, state)
+                cell = gate(layer.cell, x, prev)
+                state = cell * ig + state * fg
+                og = gate(layer.output_gate, x, prev, state)
+                out[t] = prev = np.tanh(state) * og
+            data = out
+        dense = network.layers[-1]
+        predictions.append(sigmoid(data @ dense.weights + dense.bias).ravel())
+    return np.mean(predictions, axis=0)
+
+
+def _rows(n, seed=9):
+    return np.random.default_rng(seed).uniform(0, 2, (n, IN)).astype(np.float32)
+
+
+def test_the_stacked_ensemble_is_madmoms_ensemble():
+    networks = [_network(seed) for seed in range(MEMBERS)]
+    rows = _rows(30)
+    rnn = BeatRNN(networks)
+    assert rnn.members == MEMBERS and rnn.input_dim == IN
+    assert np.allclose(rnn(rows, reset=True), _reference(networks, rows), atol=1e-5)
+
+
+def test_a_block_of_hops_is_the_same_as_one_hop_at_a_time():
+    rnn = BeatRNN([_network(seed) for seed in range(MEMBERS)])
+    rows = _rows(25)
+    block = rnn(rows, reset=True)
+    one_by_one = np.concatenate([rnn(row[None], reset=index == 0)
+                                 for index, row in enumerate(rows)])
+    assert np.allclose(block, one_by_one, atol=1e-6)
+
+
+def test_reset_returns_the_recurrence_to_its_initial_state():
+    rnn = BeatRNN([_network(seed) for seed in range(2)])
+    first = rnn(_rows(10), reset=True)
+    rnn(_rows(7, seed=1))
+    assert np.array_equal(rnn(_rows(10), reset=True), first)
+    assert not np.array_equal(rnn(_rows(10)), first)
+
+
+def test_only_the_online_architecture_is_ported():
+    network = _network(0)
+    network.layers[0] = BidirectionalLayer(fwd=None, bwd=None)
+    with pytest.raises(ValueError, match='unidirectional LSTM'):
+        BeatRNN([network])
+    with pytest.raises(ValueError, match='differ in depth'):
+        shallow = _network(1)
+        shallow.layers = shallow.layers[1:]
+        BeatRNN([_network(0), shallow])
+
+
+def _madmom_delta(audio) -> float:
+    """How far the blocked ensemble sits from madmom's, frame by frame."""
+    pytest.importorskip('madmom')
+    from madmom.ml.nn import NeuralNetworkEnsemble, average_predictions
+    from madmom.models import BEATS_LSTM
+
+    from lib.analyser.beat_features import HOP_SIZE, BeatFeatures
+
+    features = BeatFeatures()
+    rows = np.stack([features.push(audio[start:start + HOP_SIZE]).copy()
+                     for start in range(0, len(audio) - HOP_SIZE + 1, HOP_SIZE)])
+
+    theirs = NeuralNetworkEnsemble.load(BEATS_LSTM, ensemble_fn=average_predictions)
+    want = np.concatenate([np.ravel(theirs(row[None], reset=index == 0))
+                           for index, row in enumerate(rows)])
+    ours = BeatRNN.from_madmom()
+    block = np.concatenate([ours(chunk, reset=index == 0)
+                            for index, chunk in enumerate(np.array_split(rows, 97))])
+    return float(np.abs(block - want).max())
+
+
+@pytest.mark.integration
+def test_activations_match_madmoms_ensemble_on_the_anchor_track(anchor_mp3):
+    from lib.analyser.beat_features import SAMPLE_RATE
+    from lib.audio_config import BUFFER_SIZE
+    from simulate.fake_audio_client import FileAudioClient
+
+    client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, anchor_mp3)
+    client.start_streams()
+    audio = np.concatenate([client.read()
+                            for _ in range(SAMPLE_RATE * 20 // BUFFER_SIZE)])
+
+    assert _madmom_delta(audio) < 1e-4
+
+
+@pytest.mark.integration
+def test_activations_match_madmoms_ensemble_on_a_click_track():
+    from benchmarks.cases import click_track
+
+    assert _madmom_delta(click_track(20.0)) < 1e-4
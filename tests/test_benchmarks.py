@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+
+from benchmarks import harness
+from benchmarks.__main__ import main
+
+
+def _row(p50, p99):
+    return {"calls": 10, "mean_us": p50, "p50_us": p50, "p90_us": p99,
+            "p99_us": p99, "max_us": p99}
+
+
+def _baseline(**cases):
+    return {"tolerance": {"p50": 0.5, "p99": 1.0, "floor_us": 5.0},
+            "cases": cases}
+
+
+def test_a_case_past_its_band_regresses_and_one_inside_does_not():
+    baseline = _baseline(fast=_row(100.0, 200.0), slow=_row(100.0, 200.0))
+    verdicts = harness.compare({"fast": _row(150.0, 400.0),
+                                "slow": _row(160.0, 200.0)}, baseline)
+    assert [row["verdict"] for row in verdicts] == ["ok", "regressed"]
+    assert verdicts[1]["over"][0].startswith("p50 160.0 us > 155.0 us")
+
+
+def test_a_case_may_carry_its_own_band_and_an_unrecorded_one_is_new():
+    baseline = _baseline(noisy={**_row(100.0, 200.0),
+                                "tolerance": {"p99": 4.0}})
+    verdicts = harness.compare({"noisy": _row(100.0, 900.0),
+                                "fresh": _row(1.0, 1.0)}, baseline)
+    assert [row["verdict"] for row in verdicts] == ["ok", "new"]
+
+
+def test_every_round_continues_the_call_index_and_the_quietest_round_counts():
+    seen = []
+    case = harness.Case("walk", lambda: seen.append, calls=4, warmup=2, rounds=3)
+    rounds = harness.measure(case)
+    assert seen == list(range(14))
+    assert len(rounds) == 3
+
+    summary = harness.summarise([np.array([5.0, 5.0]), np.array([1.0, 9.0])])
+    assert (summary["p50_us"], summary["max_us"]) == (5.0, 5.0)
+
+
+def test_update_keeps_a_hand_set_band_and_a_regression_exits_non_zero(
+        tmp_path, monkeypatch):
+    import benchmarks.__main__ as cli
+
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(_baseline(
+        sleepy={**_row(0.001, 0.001), "tolerance": {"floor_us": 0.0,
+                                                   "p50": 0.0, "p99": 0.0}})))
+    slow = harness.Case("sleepy", lambda: lambda _index: sum(range(2000)),
+                        calls=20, rounds=1)
+    monkeypatch.setattr(cli, "CASES", (slow,))
+    assert main(["--baseline", str(path)]) == 1
+
+    assert main(["--baseline", str(path), "--update"]) == 0
+    stored = json.loads(path.read_text())["cases"]["sleepy"]
+    assert stored["tolerance"]["p50"] == 0.0
+    assert stored["p50_us"] > 0.001
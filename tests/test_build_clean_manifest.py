@@ -16,6 +16,7 @@ from build_clean_manifest import (  # noqa: E402
     _run,
     ABS_TOLERANCE_SEC,
     CLEAN_MANIFEST_HEADER,
+    CheckCache,
     MIN_AGE_SEC,
     REL_TOLERANCE,
     STATUS_CORRUPT,
@@ -333,6 +334,136 @@ def test_run_checks_of_nothing_is_empty():
     assert run_checks([], workers=8) == []
 
 
+def _counting_measure(monkeypatch) -> list:
+    measured = []
+
+    def measure(path):
+        measured.append(Path(path).name)
+        return "", 6.0, 6.0, True
+
+    monkeypatch.setattr("build_clean_manifest.measure", measure)
+    return measured
+
+
+def test_a_second_run_reuses_the_cached_decode_of_unchanged_files(tmp_path, monkeypatch):
+    measured = _counting_measure(monkeypatch)
+    jobs = []
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.mp3").write_bytes(b"bytes")
+        jobs.append(TrackJob(f"0001.{name}", name, str(tmp_path / f"{name}.mp3"), 6.0))
+
+    cache = CheckCache(tmp_path / "cache.json")
+    first = run_checks(jobs, workers=1, cache=cache)
+    cache.save()
+    again = CheckCache(tmp_path / "cache.json")
+    assert run_checks(jobs, workers=1, cache=again) == first
+    assert measured == ["a.mp3", "b.mp3"]
+    assert again.summary()["decode"] == {"hits": 2, "misses": 0}
+
+
+def test_a_rewritten_file_is_decoded_again(tmp_path, monkeypatch):
+    measured = _counting_measure(monkeypatch)
+    song = tmp_path / "a.mp3"
+    song.write_bytes(b"bytes")
+    job = TrackJob("0001.a", "a", str(song), 6.0)
+    cache = CheckCache(tmp_path / "cache.json")
+    run_checks([job], workers=1, cache=cache)
+    cache.save()
+
+    song.write_bytes(b"other bytes")
+    run_checks([job], workers=1, cache=CheckCache(tmp_path / "cache.json"))
+    assert measured == ["a.mp3", "a.mp3"]
+
+
+def test_a_cached_measurement_is_still_judged_against_the_annotation(tmp_path, monkeypatch):
+    _counting_measure(monkeypatch)
+    song = tmp_path / "a.mp3"
+    song.write_bytes(b"bytes")
+    cache = CheckCache(tmp_path / "cache.json")
+    run_checks([TrackJob("0001.a", "a", str(song), 6.0)], workers=1, cache=cache)
+
+    [result] = run_checks([TrackJob("0001.a", "a", str(song), 60.0)], workers=1,
+                          cache=cache)
+    assert result.status == STATUS_MISMATCH
+    assert cache.hits["decode"] == 1
+
+
+@pytest.mark.parametrize("failure", [
+    subprocess.TimeoutExpired(["ffmpeg"], 300),
+    OSError("Too many open files"),
+])
+def test_a_tool_that_timed_out_or_never_ran_is_not_cached(tmp_path, monkeypatch, failure):
+    def run(command):
+        raise failure
+
+    monkeypatch.setattr("build_clean_manifest._run", run)
+    song = tmp_path / "a.mp3"
+    song.write_bytes(b"bytes")
+    cache = CheckCache(tmp_path / "cache.json")
+    [result] = run_checks([TrackJob("0001.a", "a", str(song), 6.0)], workers=1,
+                          cache=cache)
+    assert result.status == STATUS_CORRUPT
+    assert cache.get(song, "decode") is None, "a machine problem was cached as a file fact"
+
+
+def test_ffmpegs_own_complaint_about_the_file_is_cached(tmp_path, monkeypatch):
+    def run(command):
+        return subprocess.CompletedProcess(command, 1, "", "Invalid data found\n")
+
+    monkeypatch.setattr("build_clean_manifest._run", run)
+    song = tmp_path / "a.mp3"
+    song.write_bytes(b"bytes")
+    cache = CheckCache(tmp_path / "cache.json")
+    run_checks([TrackJob("0001.a", "a", str(song), 6.0)], workers=1, cache=cache)
+    assert cache.get(song, "decode") == ["Invalid data found", None, None]
+
+
+def test_an_interrupted_run_keeps_the_results_it_had_saved(tmp_path, monkeypatch):
+    import build_clean_manifest
+
+    monkeypatch.setattr(build_clean_manifest, "CHECK_CACHE_SAVE_EVERY", 2)
+    measured = []
+
+    def measure(path):
+        if len(measured) == 3:
+            raise KeyboardInterrupt
+        measured.append(Path(path).name)
+        return "", 6.0, 6.0, True
+
+    monkeypatch.setattr(build_clean_manifest, "measure", measure)
+    jobs = []
+    for name in ("a", "b", "c", "d"):
+        (tmp_path / f"{name}.mp3").write_bytes(name.encode())
+        jobs.append(TrackJob(f"0001.{name}", name, str(tmp_path / f"{name}.mp3"), 6.0))
+
+    with pytest.raises(KeyboardInterrupt):
+        run_checks(jobs, workers=1, cache=CheckCache(tmp_path / "cache.json"))
+    again = CheckCache(tmp_path / "cache.json")
+    assert [again.get(job.mp3_path, "decode") is not None for job in jobs] \
+        == [True, True, False, False]
+
+
+def test_digests_go_to_the_index_the_labelling_tool_reads(tmp_path):
+    from audio_digests import DIGEST_INDEX_FILE, DigestIndex
+
+    song = tmp_path / "a.mp3"
+    song.write_bytes(b"bytes")
+    cache = CheckCache(tmp_path / "cache.json")
+    digest = cache.sha256(song)
+    cache.save()
+
+    assert DigestIndex(tmp_path / DIGEST_INDEX_FILE).known(song) == digest
+    again = CheckCache(tmp_path / "cache.json")
+    assert again.sha256(song) == digest
+    assert again.summary()["sha256"] == {"hits": 1, "misses": 0}
+
+
+def test_an_unreadable_cache_is_an_empty_one(tmp_path):
+    (tmp_path / "cache.json").write_text("{not json", encoding="utf-8")
+    (tmp_path / "a.mp3").write_bytes(b"bytes")
+    assert CheckCache(tmp_path / "cache.json").get(tmp_path / "a.mp3", "decode") is None
+
+
 def _write_manifest(data_dir: Path, rows: list) -> None:
     data_dir.mkdir(parents=True, exist_ok=True)
     with open(data_dir / "manifest.csv", "w", encoding="utf-8", newline="") as handle:
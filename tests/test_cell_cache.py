@@ -170,6 +170,7 @@ def test_a_moved_top_level_field_is_its_own_named_miss(audio, key, field, value,
     ("encoder", "encoder_sha", "0000000000000000", "miss_encoder"),
     ("encoder", "layers", [4, 8], "miss_encoder"),
     ("encoder", "revision", "deadbeef", "miss_encoder"),
+    ("encoder", "reuse_frames", True, "miss_encoder"),
     ("framing", "margin_sec", 5.0, "miss_framing"),
     ("framing", "hop_sec", 2.0, "miss_framing"),
     ("framing", "buffer_sec", 20.0, "miss_framing"),
@@ -203,6 +204,7 @@ def test_an_unreadable_sidecar_is_a_miss_and_not_an_error(audio, key):
 def test_the_key_carries_the_geometry_the_features_were_framed_under(key):
     assert key["encoder"]["encoder_sha"] == GEOMETRY.encoder_sha
     assert key["encoder"]["layers"] == list(GEOMETRY.layers)
+    assert key["encoder"]["reuse_frames"] is False
     assert key["framing"] == {"margin_sec": 3.0, "hop_sec": 1.0,
                               "buffer_sec": 30.0, "label_frame_sec": 0.5}
 
@@ -310,6 +312,15 @@ def test_a_recording_shorter_than_this_run_is_a_named_miss(audio, key):
     assert replay is None and reason == "miss_truncated"
 
 
+def test_a_replay_of_unknown_length_says_the_up_front_check_was_skipped(
+        audio, key, caplog):
+    path = record(audio, key)
+    with caplog.at_level("INFO"):
+        replay, reason = cell_cache.open_replay(path, key, expected_samples=None)
+    assert replay is not None and reason == "hit"
+    assert any("truncation is not checked" in m for m in caplog.messages)
+
+
 def test_a_replay_pushed_past_its_recording_refuses_instead_of_going_quiet(
         audio, key):
     path = record(audio, key)
@@ -1,5 +1,6 @@
 import asyncio
 
+import numpy as np
 import pytest
 
 from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
@@ -8,17 +9,24 @@ from lib.delayed_monitor import DelayedMonitor
 from simulate.runner import run_simulation
 
 
+def _buffer(value):
+    return np.full(BUFFER_SIZE, value, dtype=np.float32)
+
+
 def _monitor(delay_sec=14.0):
+    """The monitor, and the value each played buffer was filled with."""
     clock = VirtualClock()
     played = []
-    return DelayedMonitor(delay_sec, played.append, clock=clock), clock, played
+    monitor = DelayedMonitor(delay_sec, lambda audio: played.append(float(audio[0])),
+                             clock=clock)
+    return monitor, clock, played
 
 
 def test_nothing_reaches_the_headphones_until_the_delay_has_elapsed():
     monitor, clock, played = _monitor()
     for index in range(20):
         clock.advance(0.5)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played == []
     assert monitor.buffered == 20
     assert not monitor.started
@@ -28,7 +36,7 @@ def test_the_first_buffer_out_is_the_first_buffer_in_a_delay_ago():
     monitor, clock, played = _monitor()
     for index in range(30):
         clock.advance(1.0)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played[0] == 0
     assert played == list(range(len(played)))
 
@@ -40,7 +48,7 @@ def test_the_monitor_runs_one_delay_behind_the_analysis():
     for _ in range(40):
         clock.advance(period)
         before = len(played)
-        monitor.feed(clock.monotonic())
+        monitor.feed(_buffer(clock.monotonic()))
         if len(played) > before:
             lags.append(clock.monotonic() - played[-1])
 
@@ -52,7 +60,7 @@ def test_a_stop_drops_the_tail_instead_of_playing_it_out():
     monitor, clock, played = _monitor()
     for index in range(20):
         clock.advance(1.0)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played
 
     monitor.silence()
@@ -62,7 +70,7 @@ def test_a_stop_drops_the_tail_instead_of_playing_it_out():
     before = list(played)
     for index in range(100, 110):
         clock.advance(1.0)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played == before, 'the dropped tail played anyway'
 
 
@@ -70,17 +78,17 @@ def test_a_stop_re_arms_the_delay_rather_than_collapsing_it():
     monitor, clock, played = _monitor()
     for index in range(30):
         clock.advance(1.0)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     monitor.silence()
     from_the_old_song = list(played)
 
     for index in range(200, 213):
         clock.advance(1.0)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played == from_the_old_song, 'the delay collapsed after the stop'
 
     clock.advance(1.0)
-    monitor.feed(213)
+    monitor.feed(_buffer(213))
     assert played[-1] == 200, 'the next song did not start a fresh delay'
 
 
@@ -89,11 +97,61 @@ def test_arming_twice_does_not_shorten_the_wait():
     clock.advance(13.0)
     monitor.arm()
     clock.advance(13.0)
-    monitor.feed('early')
+    monitor.feed(_buffer(1.0))
     assert played == []
     clock.advance(1.1)
-    monitor.feed('late')
-    assert played == ['early']
+    monitor.feed(_buffer(2.0))
+    assert played == [1.0]
+
+
+def test_the_monitored_output_is_the_analysed_audio_bit_for_bit():
+    clock = VirtualClock()
+    played = []
+    monitor = DelayedMonitor(14.0, lambda audio: played.append(audio.copy()),
+                             clock=clock)
+    fed = np.random.default_rng(0).normal(0, 0.3, (3000, BUFFER_SIZE)).astype(np.float32)
+    for audio in fed:
+        clock.advance(BUFFER_SIZE / SAMPLE_RATE)
+        monitor.feed(audio)
+    while monitor.buffered:
+        monitor.drain()
+
+    assert all(len(audio) == BUFFER_SIZE for audio in played)
+    assert np.concatenate(played).tobytes() == fed.tobytes()
+    assert monitor.overruns == monitor.underruns == 0
+
+
+def test_a_stop_is_an_index_reset_that_leaves_the_ring_in_place():
+    monitor, clock, played = _monitor()
+    ring = monitor._ring
+    for index in range(20):
+        monitor.feed(_buffer(index))
+    monitor.silence()
+    assert monitor._ring is ring and monitor.buffered == 0
+    assert monitor.stats['buffered_sec'] == 0.0
+
+
+def test_a_burst_past_the_ring_drops_the_oldest_and_counts_an_overrun():
+    monitor, clock, played = _monitor(delay_sec=1.0)
+    for index in range(3 * SAMPLE_RATE // BUFFER_SIZE):
+        monitor.feed(_buffer(index))            # no time passes: never starts
+    assert monitor.overruns > 0
+    assert monitor.stats['buffered_sec'] == 2.0, 'the delay and its headroom'
+
+    clock.advance(1.0)
+    monitor.feed(_buffer(-1))
+    assert played[0] > 0, 'the oldest buffers were kept over the newest'
+
+
+def test_draining_an_empty_started_monitor_counts_an_underrun():
+    monitor, clock, played = _monitor(delay_sec=1.0)
+    monitor.drain()
+    assert monitor.underruns == 0, 'waiting out the delay is not an underrun'
+    clock.advance(1.0)
+    monitor.feed(_buffer(0))
+    monitor.drain()
+    assert monitor.stats == {'started': True, 'buffered_sec': 0.0,
+                             'overruns': 0, 'underruns': 1}
 
 
 class _FiniteAudio:
@@ -111,7 +169,7 @@ class _FiniteAudio:
     def read(self):
         self._left -= 1
         self._served += 1
-        return self._served - 1
+        return _buffer(self._served - 1)
 
     def close(self):
         pass
@@ -165,7 +223,7 @@ def test_the_headphones_join_one_full_delay_after_the_first_buffer():
     clock = VirtualClock()
     heard = []
     monitor = DelayedMonitor(
-        14.0, lambda buf: heard.append((clock.monotonic(), buf)), clock=clock)
+        14.0, lambda buf: heard.append((clock.monotonic(), float(buf[0]))), clock=clock)
     clock.advance(30.0)
     start = clock.monotonic()
 
@@ -182,7 +240,7 @@ def test_the_tail_the_room_has_not_heard_plays_out_when_the_file_ends():
     monitor, clock, played = _monitor()
     for index in range(20):
         clock.advance(0.5)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     assert played == [], 'the fixture should still be inside the delay'
 
     asyncio.run(run_simulation(_components(0), 60.0, pace_real_time=True,
@@ -195,7 +253,7 @@ def test_a_persistent_stop_cuts_the_tail_rather_than_playing_it_out_at_the_end()
     monitor, clock, played = _monitor()
     for index in range(20):
         clock.advance(0.5)
-        monitor.feed(index)
+        monitor.feed(_buffer(index))
     monitor.silence()
 
     asyncio.run(run_simulation(_components(0), 60.0, pace_real_time=True,
@@ -250,3 +308,20 @@ def test_the_monitor_delay_is_the_one_the_lights_are_aligned_to():
     from lib.main import PLAYBACK_DELAY_SEC as LIVE_DELAY_SEC
 
     assert PLAYBACK_DELAY_SEC == LIVE_DELAY_SEC
+
+
+def test_a_file_run_takes_the_section_features_and_hands_them_to_the_chain(
+        monkeypatch):
+    from simulate import cli, runner
+
+    assert _file_args().features == 'mert'
+    asked = []
+
+    async def fake_run(audio_client, **kwargs):
+        asked.append(kwargs['features'])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(runner, 'run_fast_simulation', fake_run)
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(cli._run_file_fast(_file_args(**{'--features': 'mel'})))
+    assert asked == ['mel']
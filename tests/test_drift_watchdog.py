@@ -55,6 +55,28 @@ def test_the_worst_shortfall_there_is_still_never_sheds_beats():
     assert level is max(ShedLevel), 'beat tracking must never be shed'
 
 
+@pytest.mark.parametrize("pace,level", [(1.015, ShedLevel.HOP_X2),
+                                        (1.025, ShedLevel.HOP_X4)])
+def test_a_slight_shortfall_stretches_the_hop_instead_of_shedding(pace, level):
+    clock = FakeClock()
+    dog = DriftWatchdog(BUF, clock=clock)
+    assert _feed(dog, clock, 2000, BUF * pace) is level
+    assert dog.sheds == 0, 'a partial level is not a shed'
+
+
+def test_residency_is_accounted_per_level():
+    clock = FakeClock()
+    dog = DriftWatchdog(BUF, clock=clock)
+    _feed(dog, clock, 1000, BUF)
+    _feed(dog, clock, 2000, BUF * 1.015)
+    assert dog.level is ShedLevel.HOP_X2
+    held = dog.residency_sec
+    assert set(held) == {level.name for level in ShedLevel}
+    assert held['NONE'] > 5.0 and held['HOP_X2'] > 1.0
+    assert held['NN_SHED'] == 0.0
+    assert sum(held.values()) == pytest.approx(clock.t - BUF)
+
+
 def test_a_single_stall_does_not_latch_the_watchdog_forever():
     clock = FakeClock()
     dog = DriftWatchdog(BUF, clock=clock)
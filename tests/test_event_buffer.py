@@ -340,3 +340,11 @@ def test_a_run_with_nothing_sheddable_ships_an_empty_shed_block():
     buf = EventBuffer(window_sec=float('inf'), clock=VirtualClock())
     buf.start()
     assert buf.snapshot()['shed'] == {}
+
+
+def test_the_monitor_counters_reach_the_payload():
+    buf = EventBuffer(window_sec=float('inf'), clock=VirtualClock())
+    buf.start()
+    assert buf.snapshot()['monitor'] == {}
+    buf.set_monitor_state(started=True, buffered_sec=14.0, overruns=0, underruns=2)
+    assert buf.snapshot()['monitor']['underruns'] == 2
@@ -4,7 +4,7 @@ import numpy as np
 import pytest
 
 from lib.audio_config import SAMPLE_RATE, BUFFER_SIZE
-from simulate.fake_audio_client import FileAudioClient
+from simulate.fake_audio_client import FileAudioClient, StreamingFileAudioClient
 
 
 @pytest.fixture
@@ -59,3 +59,101 @@ def test_file_client_stale_cache_is_refreshed(wav_file, tmp_path):
 def test_pyaudio_client_satisfies_exhausted_interface():
     from lib.clients.pyaudio_client import PyAudioClient
     assert isinstance(getattr(PyAudioClient, 'exhausted', None), property)
+
+
+_FAKE_FFMPEG = """#!{python}
+import sys, time
+import numpy as np
+sys.stderr.write('x' * {chatter})
+if {fail}:
+    sys.stderr.write('Invalid data found when processing input')
+    sys.exit(1)
+ramp = np.arange({count}, dtype=np.float32)
+for start in range(0, {count}, 1000):
+    sys.stdout.buffer.write(ramp[start:start + 1000].tobytes())
+    sys.stdout.buffer.flush()
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    import os
+    import sys
+
+    def install(count=5000, fail=False, chatter=0):
+        script = tmp_path / 'bin' / 'ffmpeg'
+        script.parent.mkdir(exist_ok=True)
+        script.write_text(_FAKE_FFMPEG.format(python=sys.executable,
+                                              count=count, fail=fail,
+                                              chatter=chatter))
+        script.chmod(0o755)
+        monkeypatch.setenv('PATH', f'{script.parent}{os.pathsep}{os.environ["PATH"]}')
+        return script
+    return install
+
+
+def _drain(client):
+    out = []
+    while not client.exhausted:
+        out.append(client.read())
+    return np.concatenate(out)
+
+
+def test_streaming_client_plays_the_pipe_and_tees_it_to_its_own_cache(
+        tmp_path, fake_ffmpeg):
+    import os
+    track = tmp_path / 'track.mp3'
+    track.write_bytes(b'not decoded by the fake')
+    script = fake_ffmpeg(count=5000)
+    client = StreamingFileAudioClient(SAMPLE_RATE, 1024, str(track))
+    client.start_streams()
+    assert client.total_samples is None, 'the length is not known mid-decode'
+    audio = _drain(client)
+    assert len(audio) == 5 * 1024
+    assert np.array_equal(audio[:5000], np.arange(5000, dtype=np.float32))
+    assert not audio[5000:].any()
+    assert client.total_samples == 5000
+    client.close()
+    assert client.duration_sec == pytest.approx(5000 / SAMPLE_RATE)
+
+    assert client.cache_path != f'{track}.{SAMPLE_RATE}.npy'
+    assert np.array_equal(np.fromfile(client.cache_path, dtype=np.float32),
+                          np.arange(5000, dtype=np.float32))
+    os.remove(script)
+    again = StreamingFileAudioClient(SAMPLE_RATE, 1024, str(track))
+    again.start_streams()
+    assert np.array_equal(_drain(again), audio)
+
+
+def test_a_decode_that_floods_stderr_does_not_stall_the_pipe(tmp_path,
+                                                             fake_ffmpeg):
+    track = tmp_path / 'chatty.mp3'
+    track.write_bytes(b'not decoded by the fake')
+    fake_ffmpeg(count=3000, chatter=1 << 20)
+    client = StreamingFileAudioClient(SAMPLE_RATE, 1024, str(track))
+    client.start_streams()
+    audio = _drain(client)
+    assert np.array_equal(audio[:3000], np.arange(3000, dtype=np.float32))
+    assert client.total_samples == 3000
+    client.close()
+
+
+def test_streaming_client_surfaces_a_failed_decode_and_caches_nothing(
+        tmp_path, fake_ffmpeg):
+    import os
+    track = tmp_path / 'broken.mp3'
+    track.write_bytes(b'')
+    fake_ffmpeg(fail=True)
+    client = StreamingFileAudioClient(SAMPLE_RATE, 1024, str(track))
+    client.start_streams()
+    with pytest.raises(RuntimeError, match='Invalid data'):
+        client.read()
+    assert not os.path.exists(client.cache_path)
+    assert not os.path.exists(f'{client.cache_path}.partial')
+
+
+def test_the_two_decode_paths_keep_separate_cell_caches():
+    from simulate.cell_cache import sidecar_path
+    assert FileAudioClient.decode_path != StreamingFileAudioClient.decode_path
+    assert (sidecar_path('a.mp3', FileAudioClient.decode_path)
+            != sidecar_path('a.mp3', StreamingFileAudioClient.decode_path))
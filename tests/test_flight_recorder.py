@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pytest
+
+from lib.flight_recorder import FlightRecorder, export_wav, read_recording
+
+RATE, BLOCK = 1000, 10
+
+
+def _recorder(tmp_path, seconds=0.1):
+    return FlightRecorder(tmp_path / "flight.f32", RATE, BLOCK,
+                          minutes=seconds / 60.0)
+
+
+def _block(n):
+    return np.full(BLOCK, n, dtype=np.float32)
+
+
+def test_the_ring_keeps_the_newest_buffers_in_order(tmp_path):
+    recorder = _recorder(tmp_path)                      # ten slots
+    for n in range(23):
+        recorder.write(_block(n))
+    recorder.close()
+
+    recording = read_recording(tmp_path / "flight.f32")
+    assert recording.seq.tolist() == list(range(13, 23))
+    assert recording.audio[:, 0].tolist() == list(range(13, 23))
+    assert recording.gaps == []
+    assert np.all(np.diff(recording.mono) >= 0)
+
+
+def test_a_slot_caught_mid_write_is_left_out(tmp_path):
+    recorder = _recorder(tmp_path)
+    for n in range(5):
+        recorder.write(_block(n))
+    recorder._seq[2] = -1                               # torn by a crash
+    recording = read_recording(tmp_path / "flight.f32")
+    assert recording.seq.tolist() == [0, 1, 3, 4]
+    assert recording.gaps == [(1, 1)]
+
+
+def test_shed_changes_are_indexed_with_the_audio(tmp_path):
+    recorder = _recorder(tmp_path)
+    for n, level in enumerate([0, 0, 1, 1, 3, 0]):
+        recorder.write(_block(n), level)
+    events = read_recording(tmp_path / "flight.f32").shed_events()
+    assert [event["level"] for event in events] == [1, 3, 0]
+
+
+def test_an_exported_window_replays_bit_for_bit_through_the_file_client(tmp_path):
+    from simulate.fake_audio_client import FileAudioClient
+
+    recorder = _recorder(tmp_path)
+    rng = np.random.default_rng(3)
+    written = [rng.uniform(-1, 1, BLOCK).astype(np.float32) for _ in range(8)]
+    for block in written:
+        recorder.write(block)
+    recording = read_recording(tmp_path / "flight.f32")
+    window = recording.window(start_wall=float(recording.wall[3]))
+    out = tmp_path / "window.wav"
+    summary = export_wav(window, out)
+
+    assert summary["first_seq"] == 3
+    assert recording.last(2 * BLOCK / RATE).seq.tolist() == [6, 7]
+    assert recording.window(start_wall=float(recording.wall[1]),
+                            seconds=3 * BLOCK / RATE).seq.tolist() == [1, 2, 3]
+    assert json.loads((tmp_path / "window.wav.json").read_text())["last_seq"] == 7
+    client = FileAudioClient(RATE, BLOCK, str(out))
+    client.start_streams()
+    assert np.array_equal(client._audio, np.concatenate(written[3:]))
+
+
+def test_an_empty_window_is_refused(tmp_path):
+    recorder = _recorder(tmp_path)
+    recorder.write(_block(0))
+    recording = read_recording(tmp_path / "flight.f32")
+    with pytest.raises(ValueError, match="no recorded audio"):
+        export_wav(recording.window(start_wall=recording.wall[0] + 60.0),
+                   tmp_path / "none.wav")
+
+
+def test_a_restart_resumes_the_recording_instead_of_truncating_it(tmp_path):
+    recorder = _recorder(tmp_path)
+    for n in range(4):
+        recorder.write(_block(n))
+    recorder.close()
+    del recorder                                        # the crash
+
+    restarted = _recorder(tmp_path)
+    assert restarted.written == 4
+    for n in range(4, 7):
+        restarted.write(_block(n))
+    recording = read_recording(tmp_path / "flight.f32")
+    assert recording.seq.tolist() == list(range(7))
+    assert recording.audio[:, 0].tolist() == list(range(7))
+
+
+def test_a_recording_of_another_shape_is_moved_aside_not_overwritten(tmp_path):
+    recorder = _recorder(tmp_path)
+    recorder.write(_block(9))
+    recorder.close()
+    del recorder
+
+    resized = _recorder(tmp_path, seconds=0.2)
+    assert resized.written == 0
+    aside = [path for path in tmp_path.iterdir()
+             if path.name.startswith("flight.f32.") and path.suffix == ".index"
+             and path.name != "flight.f32.index"]
+    assert len(aside) == 1
+    kept = read_recording(str(aside[0])[:-len(".index")])
+    assert kept.audio[:, 0].tolist() == [9]
@@ -67,6 +67,32 @@ def pump(worker, seconds, seed=0, sink=None):
     return sink
 
 
+def keep_up(worker, absorb, timeout=10.0):
+    """Hold the producer until the pass thread has caught up with it.
+
+    An unpaced producer can lap the ring while the pass thread waits for a
+    core, which is an overrun rather than what the test is about.
+    """
+    deadline = time.monotonic() + timeout
+    while not worker.idle:
+        if time.monotonic() > deadline:
+            pytest.fail('the stage never caught up')
+        absorb(worker.push_audio(EMPTY))
+        time.sleep(0.001)
+
+
+def pump_paced(worker, seconds, seed=0, sink=None):
+    sink = [] if sink is None else sink
+
+    def absorb(drained):
+        sink.extend(drained.posteriors)
+
+    for block in buffers(noise(seconds, seed)):
+        absorb(worker.push_audio(block))
+        keep_up(worker, absorb)
+    return sink
+
+
 def quiesce(worker, sink=None, timeout=10.0):
     sink = [] if sink is None else sink
     deadline = time.monotonic() + timeout
@@ -184,7 +210,7 @@ def test_the_threaded_stage_decides_exactly_what_the_synchronous_one_decides(
     blocks = buffers(noise(14.0, seed=3))
     beat_every = 32
 
-    def run(stream, quiesce_after=None):
+    def run(stream, paced=False):
         decoder = SectionDecoder(toy_priors(floor=2),
                                  DecodeParams(lag_bars=1, min_coverage=1))
         decisions, cells = [], []
@@ -198,13 +224,11 @@ def test_the_threaded_stage_decides_exactly_what_the_synchronous_one_decides(
 
         for n, block in enumerate(blocks):
             absorb(stream.push_audio(block))
+            if paced:
+                keep_up(stream, absorb)
             if n % beat_every == 0:
                 decisions.extend(decoder.push_beat(n * BUFFER_SEC))
-        if quiesce_after is not None:
-            deadline = time.monotonic() + 10.0
-            while not stream.idle and time.monotonic() < deadline:
-                absorb(stream.push_audio(EMPTY))
-                time.sleep(0.002)
+        if paced:
             absorb(stream.push_audio(EMPTY))
         return decisions, cells
 
@@ -214,7 +238,7 @@ def test_the_threaded_stage_decides_exactly_what_the_synchronous_one_decides(
                         DriftWatchdog(BUFFER_SEC))
     threaded.start()
     try:
-        found = run(threaded, quiesce_after=True)
+        found = run(threaded, paced=True)
     finally:
         threaded.stop()
 
@@ -262,6 +286,38 @@ def test_a_shed_keeps_feeding_the_ring_because_the_index_is_song_time(stage):
     assert worker.passes == ran, 'a pass ran during a shed'
 
 
+def test_a_partial_level_stretches_the_hop_and_keeps_delivering(stage):
+    pacing = Pacing()
+    worker = stage(watchdog=pacing.watchdog, buffer=20.0)
+    for _ in range(2000):
+        pacing.clock.advance(BUFFER_SEC * 1.025)
+        pacing.watchdog.observe()
+    assert pacing.watchdog.level is ShedLevel.HOP_X4
+    sink = pump(worker, 6.0)
+    settle(lambda: worker.stride == 4, why='the stage never stretched its hop')
+    quiesce(worker, sink)
+    assert not worker.shed
+    assert worker.posteriors.stream.stride == 4
+    assert [p.index for p in sink] == list(range(len(sink))) and sink
+
+
+def test_a_capped_stride_is_paced_once_not_on_every_tick(stage):
+    pacing = Pacing()
+    worker = stage(watchdog=pacing.watchdog, margin=1.0, hop=0.5, buffer=2.0)
+    asked = []
+    set_stride = worker.posteriors.set_stride
+    worker.posteriors.set_stride = lambda hops: asked.append(hops) or set_stride(hops)
+    for _ in range(2000):
+        pacing.clock.advance(BUFFER_SEC * 1.025)
+        pacing.watchdog.observe()
+    assert pacing.watchdog.level is ShedLevel.HOP_X4
+    sink = pump_paced(worker, 8.0)
+    settle(lambda: worker.stride == 2, why='the stage never stretched its hop')
+    quiesce(worker, sink)
+    assert asked == [4], 'the capped stride was re-paced'
+    assert [p.index for p in sink] == list(range(len(sink))) and sink
+
+
 def test_nothing_reaches_the_consumer_while_shed(stage):
     pacing = Pacing()
     worker = stage(watchdog=pacing.watchdog, buffer=20.0)
@@ -296,7 +352,7 @@ def _gap_seen(worker, timeout=5.0):
 def test_restoring_rejoins_the_live_edge_rather_than_replaying_the_gap(stage):
     pacing = Pacing()
     worker = stage(watchdog=pacing.watchdog)
-    pump(worker, 4.0)
+    pump_paced(worker, 4.0)
     settle(lambda: worker.passes > 1, why='no pass ran')
 
     pacing.stall()
@@ -305,7 +361,7 @@ def test_restoring_rejoins_the_live_edge_rather_than_replaying_the_gap(stage):
     pacing.calm()
     settle(lambda: not worker.shed, why='never restored')
 
-    seen = quiesce(worker, pump(worker, 6.0, seed=4))
+    seen = quiesce(worker, pump_paced(worker, 6.0, seed=4))
     edge = worker.posteriors.stream.samples_seen / M.ENCODER_SAMPLE_RATE
     assert seen, 'nothing decoded after the restore'
     assert seen[0].time_sec > 20.0, 'the stream replayed the gap'
@@ -13,8 +13,10 @@ synthetic timelines where the right answer is obvious by inspection:
 
 No corpus, no audio, no simulation.
 """
+import dataclasses
 import gzip
 import math
+import random
 import sys
 from pathlib import Path
 
@@ -51,6 +53,7 @@ from evaluate_against_labels import (  # noqa: E402
     match_events,
     prf,
     render_report,
+    score_columns,
     score_track,
     typed_predictions,
 )
@@ -586,6 +589,75 @@ def test_events_never_match_across_track_boundaries():
     assert corpus.boundary["intent"][2.0]["overall"]["matched"] == 1
 
 
+def _random_corpus(seed, tracks=12):
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(tracks):
+        t, times, labels, intents = rng.uniform(0.0, 2.0), [], [], []
+        label, intent = rng.choice(SECTION_LABELS), rng.choice(INTENT_ORDER)
+        lead = rng.choice([0, 2, 9])
+        for beat in range(rng.choice([0, 1, 2, 60, 240])):
+            times.append(round(t, rng.choice([2, 6])))
+            t += rng.choice([0.468, 0.5, 0.0, 3.0]) if rng.random() < 0.2 else 0.47
+            if rng.random() < 0.04:
+                label = rng.choice(SECTION_LABELS)
+            if rng.random() < 0.06:
+                intent = rng.choice(INTENT_ORDER)
+            labels.append(label)
+            intents.append("" if beat < lead or rng.random() < 0.01 else intent)
+        corpus.append(track(times, intents, labels, track_id=f"r{index}"))
+    return corpus
+
+
+@pytest.mark.parametrize("space", [RAW9, LEGACY_V1])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_the_columnar_scorer_is_the_per_event_definitions(space, seed):
+    """The scorer runs every stream x tolerance x label as one grouped search;
+    each cell must still be exactly what the helpers above define it to be."""
+    for beats in _random_corpus(seed):
+        score = score_track(beats, space)
+        labels = beats.labels[space]
+        weights, _ = beat_weights(beats.times)
+        confusion = {intent: dict.fromkeys(SPACES[space].labels, 0.0)
+                     for intent in INTENT_ORDER}
+        for intent, label, weight in zip(beats.intents, labels, weights):
+            if intent:
+                confusion[intent][label] += weight
+        assert score.confusion == confusion
+
+        truth = label_boundaries(beats.times, labels)
+        truth_times = [t for t, _ in truth]
+        by_label = {label: [t for t, new in truth if new == label]
+                    for label in SPACES[space].labels}
+        streams = {
+            "intent": [(t, INTENT_TO_LABELS[intent][space]) for t, intent
+                       in intent_changes(beats.times, beats.intents)],
+            "class": class_changes(beats.times, beats.intents, space),
+        }
+        for stream, changes in streams.items():
+            instants = [t for t, _ in changes]
+            buckets = typed_predictions(changes, by_label)
+            for tol in TOLERANCES_SEC:
+                cell = score.boundary[stream][tol]
+                assert cell["overall"] == {
+                    "n_truth": len(truth_times), "n_pred": len(instants),
+                    "matched": match_events(truth_times, instants, tol)}
+                for label in SPACES[space].labels:
+                    assert cell["by_type"][label] == {
+                        "n_truth": len(by_label[label]),
+                        "n_pred": len(buckets[label]),
+                        "matched": match_events(by_label[label], buckets[label],
+                                                tol)}, (stream, tol, label)
+                assert score.flicker[stream][tol] == len(
+                    flicker_instants(instants, truth_times, tol))
+
+
+def test_the_stacked_corpus_total_is_aggregate_to_the_last_bit():
+    columns = score_columns(_random_corpus(3, tracks=30), RAW9)
+    songs = [columns.score(index) for index in range(30)]
+    assert dataclasses.asdict(columns.total()) == dataclasses.asdict(aggregate(songs))
+
+
 # --------------------------------------------------------------------------- #
 # typed (per-boundary-type) breakdown
 # --------------------------------------------------------------------------- #
@@ -17,7 +17,9 @@ TRAINING_DIR = Path(__file__).resolve().parents[1] / "training"
 if str(TRAINING_DIR) not in sys.path:
     sys.path.insert(0, str(TRAINING_DIR))
 
+import audio_digests  # noqa: E402
 import label_tool  # noqa: E402
+from audio_digests import audio_digest  # noqa: E402
 from label_tool import (  # noqa: E402
     DEFAULT_STRENGTH,
     LABEL_COLORS,
@@ -26,7 +28,6 @@ from label_tool import (  # noqa: E402
     _YOUTUBE_ID,
     add_boundary,
     apply_edit,
-    audio_digest,
     beat_grid,
     commit_labels,
     default_title,
@@ -59,6 +60,11 @@ def scratch(tmp_path, monkeypatch):
     """No test may write into the real corpus's working-label workspace."""
     workspace = tmp_path / 'scratch_corpus' / label_tool.TMP_LABELS_DIR_NAME
     monkeypatch.setattr(label_tool, 'tmp_labels_dir', lambda: workspace)
+    monkeypatch.setattr(label_tool, 'digest_index_path',
+                        lambda: workspace.parent / label_tool.DIGEST_INDEX_FILE)
+    monkeypatch.setattr(label_tool, 'analysis_dir',
+                        lambda: workspace.parent / label_tool.ANALYSIS_DIR_NAME)
+    monkeypatch.setattr(audio_digests, '_digests', {})
     return workspace
 
 
@@ -525,6 +531,55 @@ def test_audio_of_the_same_size_but_different_bytes_is_not_the_same_track(
     assert native is None
 
 
+def _counting_digests(monkeypatch) -> list:
+    hashed = []
+    real = audio_digests.audio_digest
+
+    def counted(path):
+        hashed.append(Path(path).name)
+        return real(path)
+
+    monkeypatch.setattr(audio_digests, 'audio_digest', counted)
+    return hashed
+
+
+def test_a_relaunch_finds_the_track_in_the_index_without_hashing_the_corpus(
+        song, corpus, monkeypatch):
+    published = _publish(corpus, 'kUP_iJuoq9g', song.read_bytes(),
+                         record_checksum=False)
+    hashed = _counting_digests(monkeypatch)
+    assert resolve_identity(str(song)) == ('kUP_iJuoq9g', published)
+    assert sorted(hashed) == sorted([song.name, published.name])
+
+    monkeypatch.setattr(audio_digests, '_digests', {})    # a fresh process
+    hashed.clear()
+    assert resolve_identity(str(song)) == ('kUP_iJuoq9g', published)
+    assert beat_grid(str(song)) == []
+    assert hashed == []
+
+
+def test_a_file_rewritten_in_place_is_hashed_again_rather_than_believed(
+        song, corpus, monkeypatch):
+    index = label_tool.DigestIndex(label_tool.digest_index_path())
+    before = index.digest(song)
+    index.save()
+    song.write_bytes(b'a different recording, same name')
+    os.utime(song, ns=(1, 1))
+
+    monkeypatch.setattr(audio_digests, '_digests', {})
+    index = label_tool.DigestIndex(label_tool.digest_index_path())
+    assert index.digest(song) != before
+    assert index.digest(song) == audio_digest(str(song))
+
+
+def test_an_unreadable_index_is_an_empty_one(song, corpus):
+    label_tool.digest_index_path().parent.mkdir(parents=True, exist_ok=True)
+    label_tool.digest_index_path().write_text('{not json', encoding='utf-8')
+    assert resolve_identity(str(song))[0].startswith('hand-')
+    record = json.loads(label_tool.digest_index_path().read_text(encoding='utf-8'))
+    assert list(record['files']) == [str(song.resolve())]
+
+
 def test_the_digest_is_the_whole_file():
     assert len(audio_digest(__file__)) == 64
 
@@ -731,9 +786,75 @@ def test_a_generated_beat_grid_is_read_when_present(song, corpus, song_id):
 
 
 def _track(duration: float = 214.842):
+    times = np.linspace(0.0, duration, 32)
     return types.SimpleNamespace(
-        duration=duration, times=np.linspace(0.0, duration, 32),
-        envelope=np.zeros(32), flux=np.zeros(32))
+        duration=duration, times=times, envelope=np.zeros(32), flux=np.zeros(32),
+        levels=label_tool.pyramid(times, np.zeros(32), np.zeros(32)))
+
+
+def _decoded(monkeypatch, seconds: float = 30.0) -> list:
+    decodes = []
+    samples = np.random.default_rng(5).standard_normal(
+        int(seconds * label_tool.DECODE_RATE)).astype(np.float32)
+
+    def decode(path, rate=label_tool.DECODE_RATE):
+        decodes.append(path)
+        return samples
+
+    monkeypatch.setattr(label_tool, 'decode_mono', decode)
+    return decodes
+
+
+def test_a_reopened_track_reads_its_analysis_back_instead_of_decoding(
+        song, monkeypatch):
+    decodes = _decoded(monkeypatch)
+    first = label_tool.Track(str(song))
+    again = label_tool.Track(str(song))
+
+    assert len(decodes) == 1
+    assert (first.cached, again.cached) == (False, True)
+    assert again.duration == first.duration
+    assert np.array_equal(again.envelope, first.envelope)
+    assert np.array_equal(again.flux, first.flux)
+    sidecar = label_tool.analysis_path(str(song))
+    assert sidecar.name.startswith(audio_digest(str(song)))
+
+
+def test_an_unreadable_sidecar_is_decoded_over(song, monkeypatch):
+    decodes = _decoded(monkeypatch)
+    label_tool.Track(str(song))
+    label_tool.analysis_path(str(song)).write_bytes(b'truncated')
+    assert label_tool.Track(str(song)).cached is False
+    assert len(decodes) == 2
+    assert label_tool.Track(str(song)).cached is True
+
+
+def test_the_envelope_is_each_windows_peak():
+    samples = np.random.default_rng(2).standard_normal(50_000).astype(np.float32)
+    windows = np.lib.stride_tricks.sliding_window_view(
+        samples, label_tool.FRAME)[::label_tool.HOP]
+    assert np.array_equal(label_tool._envelope(samples, len(windows)),
+                          np.abs(windows).max(axis=1))
+
+
+def test_the_whole_track_ships_a_coarse_level_and_a_zoom_ships_a_fine_one(
+        song, monkeypatch):
+    _decoded(monkeypatch, seconds=600.0)
+    track = label_tool.Track(str(song))
+    assert len(track.times) > 4 * label_tool.VIEW_POINTS
+
+    times, envelope, flux = label_tool.trace_points(track)
+    assert len(times) <= label_tool.VIEW_POINTS
+    assert envelope.max() == track.envelope.max(), 'peaks survive the pooling'
+
+    times, _, _ = label_tool.trace_points(track, 100.0, 110.0)
+    assert times[1] - times[0] == pytest.approx(track.times[1] - track.times[0])
+    assert times[0] <= 90.0 and times[-1] >= 120.0
+    assert len(times) < 4 * label_tool.VIEW_POINTS
+
+    operations = label_tool.zoom_patch(track, [100.0, 110.0]).to_plotly_json()
+    assert {tuple(op['location']) for op in operations['operations']} == {
+        ('data', index, axis) for index in range(3) for axis in 'xy'}
 
 
 def _find(component, target: str):
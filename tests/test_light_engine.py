@@ -74,6 +74,10 @@ class FakeDecoder:
     def first_bar(self):
         return self._first_bar
 
+    @property
+    def grid_revision(self):
+        return len(self._edges)
+
     class params:
         lag_bars = 2
 
@@ -1237,6 +1241,48 @@ async def test_the_grid_is_published_on_the_clock_the_beats_are_stamped_on():
                          pytest.approx(beat_at - 2.0, abs=0.05)]
 
 
+async def test_an_unchanged_decoder_state_is_not_republished_per_cell():
+    from lib.analyser.section_model import Posterior
+
+    decoder, chain = FakeDecoder(), FakeChain()
+    light, _, clock, _ = engine(decoder=decoder, chain=chain, events=True)
+    decoder.recent_observations.append(
+        BarObservation(7, 13.2, 15.1, np.array([0.2] * 5), 0.1))
+    await elapse(light, clock, 20.0)
+    await commit(light, decoder, clock, 'drop', bar=5)
+    published = light.event_buffer.snapshot()['decoder']
+    assert published['publications_suppressed'] == 0
+
+    chain.pending = [Posterior(n, 19.0 + n * 0.25, np.zeros(5), 0.0)
+                     for n in range(4)]
+    await light.on_audio(np.zeros(256, dtype=np.float32))
+    assert light.decoder_publications_suppressed == 4
+    assert light.event_buffer.snapshot()['decoder'] == published
+
+    decoder.recent_observations.append(
+        BarObservation(8, 15.1, 17.0, np.array([0.1] * 5), 0.3))
+    chain.pending = [Posterior(4, 20.0, np.zeros(5), 0.0)]
+    await light.on_audio(np.zeros(256, dtype=np.float32))
+    state = light.event_buffer.snapshot()['decoder']
+    assert state['observed_bar'] == 8
+    assert state['publications_suppressed'] == 4
+    assert light.decoder_publications_suppressed == 4
+
+
+async def test_an_unchanged_decoder_state_is_still_refreshed_once_a_second():
+    from lib.analyser.section_model import Posterior
+
+    decoder, chain = FakeDecoder(), FakeChain()
+    light, _, clock, _ = engine(decoder=decoder, chain=chain, events=True)
+    await elapse(light, clock, 20.0)
+    await commit(light, decoder, clock, 'drop', bar=5)
+
+    clock.advance(1.0)
+    chain.pending = [Posterior(0, 19.0, np.zeros(5), 0.0)]
+    await light.on_audio(np.zeros(256, dtype=np.float32))
+    assert light.decoder_publications_suppressed == 0
+
+
 async def test_the_grid_travels_with_the_bar_numbers_that_name_it():
     decoder = FakeDecoder()
     light, _, clock, _ = engine(decoder=decoder, events=True)
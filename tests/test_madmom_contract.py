@@ -37,10 +37,14 @@ def _frame_sizes(processor) -> list[int]:
     return [n.frame_size for n in walk(processor) if hasattr(n, 'frame_size')]
 
 
-def test_the_beat_network_we_build_contains_no_bidirectional_layer():
-    kinds = _layer_kinds(_beat_stage()._rnn)
+def test_the_beat_networks_we_port_contain_no_bidirectional_layer():
+    from madmom.ml.nn import NeuralNetworkEnsemble
+    from madmom.models import BEATS_LSTM
+
+    kinds = _layer_kinds(NeuralNetworkEnsemble.load(BEATS_LSTM))
     assert 'BidirectionalLayer' not in kinds
     assert 'LSTMLayer' in kinds, f'expected unidirectional LSTMs, got {kinds}'
+    assert _beat_stage()._rnn.members == len(BEATS_LSTM)
 
 
 def test_the_offline_variant_really_is_bidirectional():
@@ -51,8 +55,12 @@ def test_the_offline_variant_really_is_bidirectional():
 def test_the_frame_geometry_is_the_online_one():
     from lib.analyser.madmom_rhythm import FRAME_SIZE
 
-    beat = _frame_sizes(_beat_stage()._rnn)
+    from madmom.features.beats import RNNBeatProcessor
+
+    beat = _frame_sizes(RNNBeatProcessor(online=True, origin='stream',
+                                         num_frames=1))
     assert beat == [2048], f'online beat geometry changed: {beat}'
+    assert _beat_stage()._features.frame_sizes == beat
     assert max(beat) == FRAME_SIZE, (
         'the adapter buffers FRAME_SIZE samples before handing over a frame; it '
         'must be at least the largest window the chain reads')
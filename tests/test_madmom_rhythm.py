@@ -13,12 +13,19 @@ class FakeStage:
         self.fire_on = set()
         self.resets = 0
         self.built = 1
-
-    def __call__(self, hop):
-        self.hops.append(np.asarray(hop).copy())
-        if len(self.hops) - 1 in self.fire_on:
-            return np.array([(len(self.hops) - 1) / 100.0], dtype=float)
-        return np.zeros(0)
+        self.blocks = []
+
+    def __call__(self, hops):
+        self.blocks.append(len(hops))
+        self.activations = (len(self.hops) + np.arange(len(hops))) / 1000.0
+        fired = []
+        for hop in hops:
+            self.hops.append(np.asarray(hop).copy())
+            if len(self.hops) - 1 in self.fire_on:
+                fired.append(np.array([(len(self.hops) - 1) / 100.0], dtype=float))
+            else:
+                fired.append(np.zeros(0))
+        return fired
 
     def reset(self):
         self.resets += 1
@@ -75,6 +82,22 @@ def test_a_buffer_larger_than_a_hop_still_drains_completely():
     assert len(beats.hops) == 3
 
 
+def test_a_backlog_reaches_the_stage_as_one_block_and_keeps_per_hop_timing():
+    r, beats = _rhythm()
+    beats.fire_on = {1}
+    events = r.process(_ramp(HOP_SIZE * 3 + 7))
+    assert beats.blocks == [3]
+    assert events.beats == [pytest.approx(1 / 100.0)]
+    assert events.beat_activation == pytest.approx(1 / 1000.0)
+
+
+def test_the_decoders_tempo_is_passed_through_when_the_stage_has_one():
+    r, beats = _rhythm()
+    assert r.tempo_bpm == 0.0
+    beats.tempo_bpm = 126.0
+    assert r.tempo_bpm == 126.0
+
+
 def _feed(r, buffers, start=0):
     out = []
     for i in range(buffers):
@@ -2,6 +2,7 @@ import asyncio
 import threading
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 
 from lib.main import SoundSwitchAutoPilot
@@ -12,16 +13,21 @@ class _StopRun(Exception):
 
 
 def _app(enable_ui: bool, event_buffer):
+    from lib.analyser.drift_watchdog import DriftWatchdog
     from lib.delayed_monitor import DelayedMonitor
     from lib.main import PLAYBACK_DELAY_SEC
+    from lib.scheduling import Scheduling, SchedulingPlan
 
     app = object.__new__(SoundSwitchAutoPilot)
     app._monitor = DelayedMonitor(PLAYBACK_DELAY_SEC, lambda audio: None)
+    app._scheduling = Scheduling(SchedulingPlan())
+    app.drift_watchdog = DriftWatchdog(0.01)
     app.disable_os2l = True
     app.enable_ui = enable_ui
     app._ui_port = 8050
     app._ui = None
     app._enable_playback = False
+    app._recorder = None
     app.event_buffer = event_buffer
     app.audio_client = MagicMock()
     app.audio_client.read.side_effect = _StopRun
@@ -189,7 +195,7 @@ def test_the_monitor_delay_is_rearmed_after_a_stop():
     app._monitor = DelayedMonitor(PLAYBACK_DELAY_SEC, played.append, clock=clock)
     for _ in range(20):
         clock.advance(1.0)
-        app._monitor.feed(b'old song')
+        app._monitor.feed(np.ones(256, dtype=np.float32))
     assert app._monitor.started and played
 
     app._silence_monitor()
@@ -200,5 +206,5 @@ def test_the_monitor_delay_is_rearmed_after_a_stop():
     heard = len(played)
     for _ in range(int(PLAYBACK_DELAY_SEC) - 1):
         clock.advance(1.0)
-        app._monitor.feed(b'next song')
+        app._monitor.feed(np.zeros(256, dtype=np.float32))
     assert len(played) == heard, 'the delay collapsed after the stop'
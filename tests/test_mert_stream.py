@@ -73,6 +73,24 @@ def test_reset_restores_the_head_of_stream_padding():
         np.concatenate([second.push(audio), second.flush()]))
 
 
+def test_the_resampler_carries_only_the_filter_state_between_pushes():
+    resampler = M.StreamingResampler()
+    held = []
+    for start in range(0, 44100 * 20, 256):
+        resampler.push(_noise(256, seed=start))
+        held.append(len(resampler._history))
+    bound = resampler._context + resampler._work + resampler._taps
+    assert max(held) <= bound
+    assert max(held[len(held) // 2:]) == max(held[:len(held) // 2])
+
+
+def test_every_phase_of_the_bank_passes_dc_at_unit_gain():
+    bank, trim = M.polyphase_bank(80, 147)
+    assert bank.shape[0] == 80
+    assert trim == 11
+    assert np.allclose(bank.sum(axis=1), 1.0, atol=1e-3)
+
+
 def test_the_resampler_ratio_comes_from_the_two_rates():
     resampler = M.StreamingResampler()
     assert (resampler.up, resampler.down) == (80, 147)
@@ -115,6 +133,29 @@ def test_a_write_larger_than_the_ring_still_advances_the_index():
     assert np.array_equal(ring.snapshot(150, 250), np.arange(150, 250))
 
 
+def test_a_wrapped_span_is_one_read_only_view_into_the_ring():
+    ring = M.SampleRing(1000)
+    data = np.arange(2500, dtype=np.float32)
+    for start in range(0, len(data), 137):
+        ring.write(data[start:start + 137])
+    for start in (1500, 1600, 1999, 2000):
+        view = ring.view(start, start + 500)
+        assert np.array_equal(view, data[start:start + 500])
+        assert np.shares_memory(view, ring._buffer)
+        assert not view.flags.writeable
+
+
+def test_a_view_the_writer_lapped_fails_verification():
+    ring = M.SampleRing(1000)
+    ring.write(np.zeros(1000, dtype=np.float32))
+    view = ring.view(0, 1000)
+    ring.verify(0)
+    ring.write(np.ones(1, dtype=np.float32))
+    assert view[0] == 1.0                              # torn under the reader
+    with pytest.raises(M.RingOverrun):
+        ring.verify(0)
+
+
 def test_reset_restarts_the_sample_index():
     ring = M.SampleRing(1000)
     ring.write(np.ones(400, dtype=np.float32))
@@ -496,6 +537,27 @@ def test_reset_clears_the_ring_and_the_accumulator():
     assert np.array_equal(second[0].features, first[0].features)
 
 
+def test_a_stride_runs_fewer_passes_and_still_emits_every_cell():
+    paced, plain = FakeEncoder(), FakeEncoder()
+    stream = _stream(paced)
+    assert stream.set_stride(2) == 2
+    cells = _feed(stream, 25.0)
+    unpaced = _stream(plain)
+    _feed(unpaced, 25.0)
+    assert stream.hops == 2 * stream.passes
+    assert stream.passes == pytest.approx(unpaced.passes / 2, abs=1)
+    cells += stream.flush()
+    assert len(paced.passes) < 0.6 * len(plain.passes)
+    assert [cell.index for cell in cells] == list(range(len(cells)))
+    assert len(cells) == pytest.approx(25.0 / CELL, abs=2)
+
+
+def test_a_stride_is_capped_where_its_span_would_leave_the_buffer():
+    stream = _stream(FakeEncoder(), margin=3.0, hop=1.0, buffer=30.0)
+    assert stream.set_stride(64) == 27
+    assert stream.set_stride(0) == 1
+
+
 def test_a_pass_is_only_due_once_its_audio_has_arrived():
     stream = _stream(FakeEncoder())
     assert not stream.due()
@@ -731,7 +793,13 @@ class _StubTensor:
 class _StubEncoder:
     sampling_rate = SR
     do_normalize = False
-    config = type("config", (), {"hidden_size": 4})
+    config = type("config", (), {"hidden_size": 4, "num_hidden_layers": 3})
+
+    def __init__(self):
+        import torch
+
+        self.encoder = types.SimpleNamespace(layers=torch.nn.ModuleList(
+            [torch.nn.Identity() for _ in range(3)]))
 
     def eval(self):
         return self
@@ -772,6 +840,134 @@ def test_the_encoder_is_fetched_at_the_pinned_revision(monkeypatch):
                              fp16=False)
     assert calls == [("stub/encoder", M.DEFAULT_MODEL_REVISION, True)] * 2
     assert encoder.model_sha == sha
+    assert encoder.depth == 1
+
+
+def test_the_chain_names_the_weights_it_runs_and_how_deep(monkeypatch):
+    from lib.section_chain import encoder_identity
+
+    _stub_transformers(monkeypatch, [])
+    sha = M.state_dict_sha(_StubEncoder())
+    encoder = M.load_encoder(_pinned_geometry(encoder_sha=sha), device="cpu",
+                             fp16=False)
+    identity = encoder_identity(_stream(encoder))
+    assert identity == {"device": "cpu", "model_sha": sha,
+                        "weights_sha": encoder.weights_sha, "depth": 1}
+    assert encoder_identity(object()) is None
+
+
+def _tiny_encoder(stable: bool, norm: str | None = None):
+    transformers = pytest.importorskip("transformers")
+    import torch
+
+    torch.manual_seed(0)
+    config = transformers.HubertConfig(
+        hidden_size=16, num_hidden_layers=4, num_attention_heads=2,
+        intermediate_size=32, conv_dim=(8,) * 7, num_conv_pos_embeddings=16,
+        num_conv_pos_embedding_groups=2, do_stable_layer_norm=stable,
+        feat_extract_norm=norm or ("layer" if stable else "group"))
+    return transformers.HubertModel(config).eval()
+
+
+@pytest.mark.parametrize("stable", [False, True])
+@pytest.mark.parametrize("layers", [(0, 2), (1, 4), (3,)])
+def test_a_truncated_encoder_reproduces_the_full_stack_bit_for_bit(stable, layers):
+    import copy
+
+    import torch
+
+    full = _tiny_encoder(stable)
+    segment = _noise(_samples(1.0), seed=4)
+    with torch.no_grad():
+        hidden = full(torch.from_numpy(segment)[None],
+                      output_hidden_states=True).hidden_states
+    times, keep = M.frame_selection(len(hidden[0][0]), offset_samples=0,
+                                    lo_sec=0.2, hi_sec=0.8)
+    expected = np.stack([hidden[layer][0].numpy()[keep] for layer in layers],
+                        axis=1)
+
+    model = M.truncate_encoder(copy.deepcopy(full), layers)
+    encoder = M.MertEncoder(model, types.SimpleNamespace(sampling_rate=SR),
+                            "0" * 16, layers, device="cpu", fp16=False)
+    stacked, got_times = encoder.encode(segment, offset_samples=0, lo_sec=0.2,
+                                        hi_sec=0.8)
+
+    assert encoder.depth == max(1, max(layers))
+    np.testing.assert_array_equal(got_times, times)
+    assert np.array_equal(stacked, expected)
+
+
+def _passes(encoder, audio, *, buffer_sec=3.0, hop_sec=0.5):
+    buffer, hop = _samples(buffer_sec), _samples(hop_sec)
+    rows = []
+    for end in range(hop, len(audio) + 1, hop):
+        start = max(0, end - buffer)
+        stacked, _times = encoder.encode(audio[start:end], offset_samples=start,
+                                         lo_sec=0.0, hi_sec=math.inf)
+        rows.append(stacked)
+    return rows
+
+
+def _frames_in_passes(audio, *, buffer_sec=3.0, hop_sec=0.5) -> int:
+    buffer, hop = _samples(buffer_sec), _samples(hop_sec)
+    return sum(M.encoder_frames(end - max(0, end - buffer))
+               for end in range(hop, len(audio) + 1, hop))
+
+
+def _frame_encoders(layers=(2,)):
+    import copy
+
+    full = _tiny_encoder(True)
+    extractor = types.SimpleNamespace(sampling_rate=SR)
+    return [M.MertEncoder(M.truncate_encoder(copy.deepcopy(full), layers),
+                          extractor, "0" * 16, layers, device="cpu", fp16=False,
+                          reuse_frames=reuse) for reuse in (True, False)]
+
+
+def test_overlapping_passes_run_the_conv_stack_over_the_new_audio_only():
+    pytest.importorskip("transformers")
+    cached, fresh = _frame_encoders()
+    audio = _noise(_samples(6.0), seed=5)
+    for got, want in zip(_passes(cached, audio), _passes(fresh, audio)):
+        np.testing.assert_allclose(got, want, rtol=0, atol=1e-4)
+
+    total = _frames_in_passes(audio)
+    assert cached.reuses_frames
+    assert cached.frames_computed < total / 3
+    assert cached.frames_reused + cached.frames_computed == total
+
+
+def test_frames_over_audio_that_changed_are_computed_again():
+    pytest.importorskip("transformers")
+    cached, fresh = _frame_encoders()
+    audio = _noise(_samples(3.0), seed=6)
+    _passes(cached, audio[:_samples(2.0)])
+    reused = cached.frames_reused
+    audio[100] += 1.0                                  # another song at offset 0
+
+    got, = _passes(cached, audio, hop_sec=3.0)
+    want, = _passes(fresh, audio, hop_sec=3.0)
+    assert cached.frames_reused == reused
+    assert np.array_equal(got, want)
+
+
+def test_conv_frames_are_recomputed_unless_reuse_is_asked_for():
+    pytest.importorskip("transformers")
+    encoder = M.MertEncoder(_tiny_encoder(True), types.SimpleNamespace(
+        sampling_rate=SR), "0" * 16, (1,), device="cpu", fp16=False)
+    assert not encoder.reuses_frames
+
+
+def test_group_normed_conv_frames_are_never_reused():
+    pytest.importorskip("transformers")
+    encoder = M.MertEncoder(_tiny_encoder(False), types.SimpleNamespace(
+        sampling_rate=SR), "0" * 16, (1,), device="cpu", fp16=False)
+    assert not encoder.reuses_frames
+
+
+def test_an_encoder_cannot_be_cut_deeper_than_it_is():
+    with pytest.raises(ValueError, match="past the encoder"):
+        M.truncate_encoder(_StubEncoder(), (4,))
 
 
 def test_an_encoder_whose_weights_are_not_the_pinned_ones_never_loads(monkeypatch):
@@ -127,6 +127,16 @@ def test_bpm_is_the_median_interval_not_the_latest(analyser):
     assert analyser.get_bpm() == pytest.approx(60.0 / 0.47, rel=1e-6)
 
 
+def test_the_decoders_tempo_wins_over_the_median_interval_once_it_has_one(analyser):
+    analyser.is_playing = True
+    analyser._rhythm = _FakeRhythm()
+    # The track has just moved from 120 to 126 BPM: the median still says 120.
+    analyser._beat_stream_times.extend([0.0, 0.5, 1.0, 1.5, 2.0, 2.476, 2.952])
+    assert analyser.get_bpm() == pytest.approx(120.0)
+    analyser._rhythm.tempo_bpm = 126.0
+    assert analyser.get_bpm() == pytest.approx(126.0)
+
+
 def test_bpm_is_octave_folded_from_the_beat_stream(analyser):
     analyser.is_playing = True
     analyser._beat_stream_times.extend([0.0, 0.2, 0.4, 0.6, 0.8])
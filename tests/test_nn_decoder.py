@@ -18,6 +18,7 @@ from nn import priors as nn_priors  # noqa: E402
 from nn.decoder import (  # noqa: E402
     DEFAULT_BOUNDARY_REF,
     SHIPPING_DECODER_CONFIG,
+    Decision,
     DecodeParams,
     FixedLagViterbi,
     bar_grid,
@@ -455,13 +456,14 @@ def test_the_backtrace_ring_holds_exactly_lag_plus_one_rows(lag):
     assert decoder.backtrace_rows == lag + 1
 
 
-def test_the_ring_decodes_exactly_as_an_unbounded_backtrace_did():
+@pytest.mark.parametrize("early_commit", [False, True])
+def test_the_lineage_decodes_exactly_as_an_unbounded_backtrace_did(early_commit):
     priors = toy_priors(floor=3)
     rng = np.random.default_rng(13)
     posteriors = rng.dirichlet(np.full(5, 0.4), size=120)
     boundary = rng.random(120)
 
-    bounded = FixedLagViterbi(priors, lag_bars=2)
+    bounded = FixedLagViterbi(priors, lag_bars=2, early_commit=early_commit)
     decisions = bounded.decode(posteriors, boundary)
 
     unbounded = _UnboundedBacktrace(priors, lag_bars=2)
@@ -474,7 +476,17 @@ def test_the_ring_decodes_exactly_as_an_unbounded_backtrace_did():
     assert len(unbounded._kept) == 120, 'the reference arm bounded itself'
 
 
+def test_early_commit_is_a_decoder_config_knob(tmp_path):
+    path = tmp_path / "decoder_config.json"
+    path.write_text(json.dumps({"chosen": {"lag_bars": 3, "early_commit": True}}),
+                    encoding="utf-8")
+    assert load_decoder_config(path).early_commit is True
+    assert DecodeParams().early_commit is False
+
+
 class _UnboundedBacktrace(FixedLagViterbi):
+    """Every backpointer kept, and each commit walks them back from the end."""
+
     def reset(self):
         super().reset()
         self._kept: dict = {}
@@ -482,8 +494,50 @@ class _UnboundedBacktrace(FixedLagViterbi):
     def _remember(self, bar, back):
         self._kept[int(bar)] = back
 
-    def _recall(self, bar):
-        return self._kept[int(bar)]
+    def _commit_through(self, target):
+        ancestor = np.arange(len(self._state_class), dtype=np.int64)
+        chain = {self._bars - 1: ancestor}
+        for bar in range(self._bars - 1, self._next_commit, -1):
+            ancestor = self._kept[bar][ancestor]
+            chain[bar - 1] = ancestor
+        best_state = int(np.argmax(self._delta))
+        decisions = []
+        for bar in range(self._next_commit, target + 1):
+            index = int(self._state_class[chain[bar][best_state]])
+            decisions.append(Decision(bar, index, self.classes[index]))
+        committed = self._state_class[chain[target][best_state]]
+        self._delta = np.where(self._state_class[chain[target]] == committed,
+                               self._delta, -np.inf)
+        self._next_commit = target + 1
+        return decisions
+
+
+@pytest.mark.parametrize("lag", [0, 1, 2, 4])
+def test_an_early_commit_decides_exactly_what_the_fixed_lag_decides(lag):
+    priors = toy_priors(floor=3)
+    rng = np.random.default_rng(17)
+    posteriors = rng.dirichlet(np.full(5, 0.3), size=200)
+    boundary = rng.random(200)
+
+    fixed = FixedLagViterbi(priors, lag_bars=lag)
+    early = FixedLagViterbi(priors, lag_bars=lag, early_commit=True)
+    waited, sooner = [], []
+    fixed_at, early_at = {}, {}
+    for bar, row in enumerate(posteriors):
+        for decision in fixed.push(row, boundary[bar]):
+            fixed_at[decision.bar] = bar
+            waited.append(decision)
+        for decision in early.push(row, boundary[bar]):
+            early_at[decision.bar] = bar
+            sooner.append(decision)
+    waited.extend(fixed.flush())
+    sooner.extend(early.flush())
+
+    assert sooner == waited
+    assert all(early_at[bar] <= fixed_at[bar] for bar in fixed_at)
+    if lag:
+        assert any(early_at[bar] < fixed_at[bar] for bar in fixed_at), \
+            "no path ever converged before the lag ran out"
 
 
 def test_flush_is_idempotent_and_a_decoder_can_be_reset_and_reused():
@@ -784,6 +838,7 @@ def test_the_shipping_config_loads_and_is_the_l9_sweep_pick():
         "floor_bars": None,
         "outro_escape": 0.02,
         "temperature": 1.0,
+        "early_commit": False,
     }
 
 
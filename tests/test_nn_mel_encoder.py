@@ -0,0 +1,155 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch", reason="training extra not synced")
+
+TRAINING_DIR = Path(__file__).resolve().parents[1] / "training"
+if str(TRAINING_DIR) not in sys.path:
+    sys.path.insert(0, str(TRAINING_DIR))
+
+from lib.analyser import mel_encoder as E  # noqa: E402
+from lib.analyser import mert_stream as M  # noqa: E402
+from lib.analyser.section_model import sha256_file  # noqa: E402
+from nn.mel_encoder_model import PARAM_BUDGET, MelEncoderNet, RawCells  # noqa: E402
+from nn.mel_encoder_train import (  # noqa: E402
+    CellSource,
+    CellWindowDataset,
+    export_model,
+    pool_cells,
+)
+
+RATE = E.ENCODER_SAMPLE_RATE
+LAYERS = (3, 7)
+DIM = 4
+LABEL_FRAME_SEC = 0.25
+
+
+def _geometry(**overrides):
+    fields = dict(model_id="test/mert", layers=LAYERS, margin_sec=1.0,
+                  hop_sec=0.5, buffer_sec=3.0, label_frame_sec=LABEL_FRAME_SEC)
+    fields.update(overrides)
+    return M.StreamGeometry(**fields)
+
+
+def _tiny(seed=0):
+    torch.manual_seed(seed)
+    model = MelEncoderNet(out_dim=len(LAYERS) * DIM, conv_channels=(4, 4, 4),
+                          temporal_channels=8, temporal_layers=2).eval()
+    mean = np.linspace(-1.0, 1.0, len(LAYERS) * DIM).astype(np.float32)
+    std = np.full(len(LAYERS) * DIM, 2.0, dtype=np.float32)
+    return RawCells(model, mean, std).eval()
+
+
+def _exported(tmp_path, graph):
+    affine = tmp_path / "input_affine_F3.npz"
+    affine.write_bytes(b"affine")
+    path = tmp_path / "mel_encoder.onnx"
+    export_model(graph, path)
+    Path(f"{path}.json").write_text(json.dumps({
+        "front_end": E.front_end(), "layers": list(LAYERS), "dim": DIM,
+        "affine_sha256": sha256_file(affine), "model_sha": sha256_file(path)}))
+    return path, affine
+
+
+def test_the_front_end_frames_and_times_like_the_stream_pools_them():
+    t = np.arange(3 * RATE) / RATE
+    tone = (0.5 * np.sin(2 * np.pi * 1000.0 * t)).astype(np.float32)
+
+    mel = E.log_mel(tone)
+
+    assert mel.shape == (E.mel_frames(len(tone)), E.N_MELS) and mel.dtype == np.float32
+    assert E.mel_frames(E.N_FFT - 1) == 0 and E.log_mel(tone[:100]).shape == (0, E.N_MELS)
+    tone_bin = round(1000.0 * E.N_FFT / RATE)
+    assert set(mel.argmax(axis=1)) == {int(E.mel_filterbank()[:, tone_bin].argmax())}
+    times = E.mel_frame_times(3, offset_samples=960)
+    assert np.allclose(times, (960 + np.arange(3) * E.HOP + E.N_FFT / 2) / RATE)
+
+
+def test_the_training_pool_is_the_live_accumulator():
+    rng = np.random.default_rng(5)
+    times = np.sort(rng.uniform(0.0, 2.0, 80))
+    rows = rng.normal(size=(80, len(LAYERS), DIM)).astype(np.float32)
+    accumulator = M.CellAccumulator(len(LAYERS), DIM, LABEL_FRAME_SEC)
+    accumulator.add(rows, times, 0.0, 2.0)
+    live = dict(accumulator.drain(2.0))
+
+    cells = np.floor(times / LABEL_FRAME_SEC).astype(np.int64)
+    pooled, counts = pool_cells(torch.from_numpy(rows.reshape(1, 80, -1)),
+                                torch.from_numpy(cells[None]), 8)
+
+    for index, row in live.items():
+        assert counts[0, index] > 0
+        assert np.allclose(pooled[0, index].numpy(), row.reshape(-1), atol=1e-6)
+
+
+def test_a_crop_scores_only_the_cells_its_frames_fully_surround():
+    n_cells = 80
+    features = np.repeat(np.arange(n_cells, dtype=np.float16)[:, None],
+                         len(LAYERS) * DIM, axis=1)
+    source = CellSource("yt", Path("yt.mp3"), np.arange(n_cells), features, "f3")
+    audio = {"yt": np.zeros(int(n_cells * LABEL_FRAME_SEC * RATE), dtype=np.float32)}
+    dataset = CellWindowDataset([source], audio, mean=np.zeros(len(LAYERS) * DIM),
+                                std=np.ones(len(LAYERS) * DIM),
+                                label_frame_sec=LABEL_FRAME_SEC, crop_sec=6.0,
+                                context_sec=1.0)
+
+    for index in range(len(dataset)):
+        mel, frame_cell, targets, mask = dataset[index]
+        start = dataset.window_start(index)
+        times = E.mel_frame_times(len(mel), offset_samples=start)
+        scored = frame_cell.numpy() >= 0
+        owners = np.floor(times[scored] / LABEL_FRAME_SEC).astype(np.int64)
+        cells = targets[frame_cell[scored], 0].numpy().astype(np.int64)
+        assert np.array_equal(owners, cells)
+        assert times[scored].min() - start / RATE >= 1.0 - E.HOP / RATE
+        assert (start + 6.0 * RATE) / RATE - times[scored].max() >= 1.0
+        assert bool(mask.all())
+
+
+def test_the_body_fits_the_budget_and_the_graph_keeps_its_time_axis(tmp_path):
+    model = MelEncoderNet(out_dim=3 * 1024)
+    assert model.body_parameters() <= PARAM_BUDGET
+
+    graph = _tiny()
+    path, affine = _exported(tmp_path, graph)
+    encoder = E.load_mel_encoder(path, layers=LAYERS, affine_path=affine)
+    for seconds in (1.0, 2.5):
+        segment = np.random.default_rng(1).uniform(-0.3, 0.3, int(seconds * RATE))
+        stacked, times = encoder.encode(segment.astype(np.float32), offset_samples=0,
+                                        lo_sec=0.0, hi_sec=np.inf)
+        with torch.no_grad():
+            want = graph(torch.from_numpy(E.log_mel(segment))[None])[0].numpy()
+        assert stacked.shape == (E.mel_frames(len(segment)), len(LAYERS), DIM)
+        assert np.allclose(stacked.reshape(len(times), -1), want, atol=1e-4)
+
+
+def test_the_exported_encoder_streams_cells_through_mert_stream(tmp_path):
+    path, affine = _exported(tmp_path, _tiny())
+    encoder = E.load_mel_encoder(path, layers=LAYERS, affine_path=affine)
+    stream = M.MertStream(encoder, geometry=_geometry())
+    audio = np.random.default_rng(2).uniform(-0.3, 0.3, 6 * M.SOURCE_SAMPLE_RATE)
+
+    cells = []
+    for start in range(0, len(audio), 1024):
+        stream.push_audio(audio[start:start + 1024].astype(np.float32))
+        while stream.due():
+            cells += stream.run_pass()
+    cells += stream.flush()
+
+    assert [cell.index for cell in cells] == list(range(len(cells)))
+    assert len(cells) >= 20
+    assert all(cell.features.shape == (len(LAYERS) * DIM,) for cell in cells)
+    assert encoder.device == "cpu"
+
+
+def test_an_encoder_distilled_for_another_chain_is_refused(tmp_path):
+    path, affine = _exported(tmp_path, _tiny())
+    affine.write_bytes(b"a refitted affine")
+    with pytest.raises(RuntimeError, match="distilled against the affine"):
+        E.load_mel_encoder(path, layers=LAYERS, affine_path=affine)
+    with pytest.raises(ValueError, match="regresses layers"):
+        E.load_mel_encoder(path, layers=(3, 8), affine_path=affine)
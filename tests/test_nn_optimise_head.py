@@ -0,0 +1,74 @@
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnx", reason="training extra not synced")
+
+TRAINING_DIR = Path(__file__).resolve().parents[1] / "training"
+if str(TRAINING_DIR) not in sys.path:
+    sys.path.insert(0, str(TRAINING_DIR))
+
+from benchmarks.cases import stand_in_head  # noqa: E402
+from lib.analyser import section_model as S  # noqa: E402
+from nn.optimise_head import build_variant, posterior_deltas  # noqa: E402
+
+CLASSES = 9
+DIM = 48
+
+
+@pytest.fixture
+def graph(tmp_path):
+    return stand_in_head(tmp_path, classes=CLASSES, input_dim=DIM)
+
+
+def _cells(count, seed):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+
+def test_each_build_is_a_new_graph_that_declares_the_old_geometry(graph):
+    head = S.load_head_geometry(graph)
+    for variant in ("optimised", "int8"):
+        meta = build_variant(graph, variant)
+        path, found = S.load_head_variant(graph, variant, head, gated=False)
+        assert meta["sha256"] == S.sha256_file(path) != head.sha256
+        session = S.session(path, optimised=True)
+        S.check_graph_geometry(session, found)
+        assert S.label_class_count(session) == CLASSES
+    assert (S.head_variant_path(graph, "int8").stat().st_size
+            < graph.stat().st_size)
+
+
+def test_the_optimised_plan_streams_the_posteriors_the_graph_does(graph):
+    head = S.load_head_geometry(graph)
+    build_variant(graph, "optimised")
+    build_variant(graph, "int8")
+    mean = np.zeros(DIM, dtype=np.float32)
+    reference = S.SectionModel(graph, mean=mean)
+    tracks = [_cells(70, 1), _cells(40, 2)]
+
+    def deltas(variant):
+        path, found = S.load_head_variant(graph, variant, head, gated=False)
+        return posterior_deltas(reference,
+                                S.SectionModel(path, mean=mean, geometry=found),
+                                tracks)
+
+    optimised, int8 = deltas("optimised"), deltas("int8")
+    assert optimised["cells"] == int8["cells"] == 110
+    assert optimised["max_abs_posterior"] < 1e-6
+    assert optimised["argmax_flips"] == 0
+    assert 0.0 < int8["max_abs_posterior"] < 0.1
+
+
+def test_a_rebuild_drops_the_old_verdict(graph):
+    build_variant(graph, "int8")
+    meta_path = Path(f"{S.head_variant_path(graph, 'int8')}.json")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta_path.write_text(json.dumps({**meta, "gate": {"passed": True}}),
+                         encoding="utf-8")
+
+    assert "gate" not in build_variant(graph, "int8")
+    with pytest.raises(RuntimeError, match="decision gate"):
+        S.load_head_variant(graph, "int8", S.load_head_geometry(graph))
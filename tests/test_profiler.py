@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from lib.profiler import SamplingProfiler, mark, profiling
+
+
+def _spin_in_the_crunch(stop):
+    mark('crunch')
+    while not stop.is_set():
+        sum(range(200))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin_in_the_crunch, args=(stop,),
+                              name='busy', daemon=True)
+    thread.start()
+    time.sleep(0.02)
+    yield thread
+    stop.set()
+    thread.join()
+
+
+def test_a_sample_is_tagged_with_its_thread_and_stage(busy_thread):
+    profiler = SamplingProfiler()
+    for _ in range(5):
+        profiler.sample()
+    busy = [line for line in profiler.folded() if line.startswith('busy;')]
+    assert busy, profiler.folded()
+    stack, count = busy[0].rsplit(' ', 1)
+    assert stack.startswith('busy;[crunch];')
+    assert 'test_profiler._spin_in_the_crunch' in stack
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in busy) == 5
+
+
+def test_profiling_writes_collapsed_stacks_without_its_own_thread(tmp_path,
+                                                                  busy_thread):
+    out = tmp_path / 'out.folded'
+    with profiling(str(out), hz=500) as profiler:
+        time.sleep(0.1)
+    lines = out.read_text().splitlines()
+    assert profiler.samples > 0
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert not any(line.startswith('profiler;') for line in lines)
+
+
+def test_profiling_is_off_without_a_path():
+    with profiling(None) as profiler:
+        assert profiler is None
+
+
+def test_a_rate_of_zero_is_refused():
+    with pytest.raises(ValueError, match='no samples'):
+        SamplingProfiler(hz=0)
@@ -580,6 +580,37 @@ def test_a_whole_miniature_corpus_is_accounted_for(tmp_path):
     assert checksums == [f"{sha256_file(audio / 'aaa.mp3')}  audio/aaa.mp3"]
 
 
+def test_a_rerun_over_an_unchanged_corpus_decodes_and_hashes_nothing(
+    tmp_path, monkeypatch
+):
+    tracks = [("0001.aaa", "aaa", 6.0), ("0002.bbb", "bbb", 6.0)]
+    _write_corpus(tmp_path, tracks)
+    for _track_id, youtube_id, _duration in tracks:
+        (tmp_path / "audio" / f"{youtube_id}.mp3").write_bytes(youtube_id.encode())
+    decoded, hashed = [], []
+    monkeypatch.setattr(gate, "measure", lambda path: decoded.append(path) or ("", 6.0, 6.0, True))
+    import audio_digests
+
+    real_digest = audio_digests.audio_digest
+    monkeypatch.setattr(audio_digests, "_digests", {})
+    monkeypatch.setattr(audio_digests, "audio_digest",
+                        lambda path: hashed.append(path) or real_digest(path))
+
+    first = validate(tmp_path, workers=1, checksums=True)
+    checksums = (tmp_path / CHECKSUMS_FILE).read_text(encoding="utf-8")
+    second = validate(tmp_path, workers=1, checksums=True)
+
+    assert len(decoded) == len(hashed) == 2
+    assert first["cache"]["decode"] == {"hits": 0, "misses": 2}
+    assert second["cache"]["sha256"] == {"hits": 2, "misses": 0}
+    assert second["counts"] == first["counts"]
+    assert (tmp_path / CHECKSUMS_FILE).read_text(encoding="utf-8") == checksums
+    assert "sha256 2 reused / 0 recomputed" in render_text_report(second)
+
+    validate(tmp_path, workers=1, checksums=True, cache=False)
+    assert len(decoded) == 4
+
+
 @needs_ffmpeg
 def test_a_complete_corpus_converges_end_to_end(tmp_path):
     tracks = [("0001.aaa", "aaa", 6.0), ("0002.bbb", "bbb", 6.0)]
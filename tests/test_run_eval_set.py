@@ -23,6 +23,7 @@ from run_eval_set import (  # noqa: E402
     GATED_SPACE,
     GUARDED_METRICS,
     REPORTED_SPACES,
+    against_mert,
     audio_path,
     build_document,
     build_jobs,
@@ -30,6 +31,7 @@ from run_eval_set import (  # noqa: E402
     compare,
     corpus_audio_path,
     corpus_dir,
+    decision_agreement,
     default_data_dir,
     file_sha256,
     labels_source,
@@ -815,3 +817,62 @@ def test_the_benchmark_runs_serial_unless_a_human_asks_otherwise():
 
 def test_parallelism_is_still_reachable_for_a_machine_that_can_afford_it():
     assert build_parser().parse_args(["--workers", "4"]).workers == 4
+
+
+def test_a_mel_run_is_gated_on_its_scores_not_on_moving_the_decisions():
+    baseline = result_document({"a.1": entry(silence_interior=0)})
+    moved = result_document({"a.1": entry("beef", silence_interior=1)})
+
+    assert not against_mert(compare(baseline, moved)).failed
+
+    worse = result_document({"a.1": entry(macro_f1=0.2)})
+    assert against_mert(compare(baseline, worse)).failed
+
+
+def test_agreement_counts_the_beats_both_chains_committed_alike(monkeypatch):
+    import run_eval_set
+
+    intents = {"mel": ["drop", "drop", "build"], "mert": ["drop", "build", "build"]}
+
+    def joined(_track, _youtube, report, _sections):
+        rows = [{"t_song": 0.5 * beat + 1e-9, "intent_at_beat": intent}
+                for beat, intent in enumerate(intents[report["chain"]])]
+        return rows, {}
+
+    monkeypatch.setattr(run_eval_set, "join_track", joined)
+    block = decision_agreement("a.1", "yt", {"chain": "mel"}, {"chain": "mert"}, [])
+
+    assert block == {"agreed_beats": 2, "compared_beats": 3, "agreement": 0.666667}
+
+
+def test_a_batched_run_loads_each_replayable_track_once(monkeypatch):
+    import run_eval_set
+    import simulate.batch
+
+    opened, batches = [], []
+    jobs = [run_eval_set.Job("data", {"track_id": f"t.{n}", "youtube_id": f"{n}"}, [])
+            for n in range(5)]
+
+    def file_client(job):
+        opened.append(job.track["track_id"])
+        return ("client", job.track["track_id"])
+
+    def run_batch(group, clients):
+        batches.append(clients)
+        return [run_eval_set.TrackRun(job.track["track_id"], "", {}, {}, 0.0) for job in group]
+
+    def execute(cold, _workers, quiet=False):
+        return [run_eval_set.TrackRun(job.track["track_id"], "", {}, {}, 0.0) for job in cold]
+
+    monkeypatch.setattr(run_eval_set, "_file_client", file_client)
+    monkeypatch.setattr(run_eval_set, "run_batch", run_batch)
+    monkeypatch.setattr(run_eval_set, "execute", execute)
+    monkeypatch.setattr(simulate.batch, "replayable",
+                        lambda client: "miss_absent" if client[1] == "t.2" else None)
+
+    results = run_eval_set.execute_batched(jobs, 2, 1, lambda _index, _result: None)
+
+    assert [result.track_id for result in results] == [f"t.{n}" for n in range(5)]
+    assert sorted(opened) == [f"t.{n}" for n in range(5)]
+    assert batches == [[("client", "t.0"), ("client", "t.1")],
+                       [("client", "t.3"), ("client", "t.4")]]
@@ -0,0 +1,168 @@
+import gc
+import logging
+import threading
+
+import pytest
+
+from lib import scheduling as sched
+from lib.clock import VirtualClock
+from lib.scheduling import Scheduling, SchedulingPlan, parse_cpus
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    made = []
+    monkeypatch.setattr(sched.os, 'sched_getaffinity', lambda tid: {0, 1, 2, 3})
+    monkeypatch.setattr(sched.os, 'sched_setaffinity',
+                        lambda tid, cpus: made.append(('pin', tid, frozenset(cpus))))
+    monkeypatch.setattr(sched.os, 'sched_setscheduler',
+                        lambda tid, policy, param: made.append(
+                            ('fifo', tid, param.sched_priority)))
+    monkeypatch.setattr(sched.os, 'setpriority',
+                        lambda which, tid, nice: made.append(('nice', tid, nice)))
+    return made
+
+
+@pytest.fixture
+def threads():
+    stop = threading.Event()
+    started = [threading.Thread(target=stop.wait, name=name, daemon=True)
+               for name in (sched.GPU_THREAD, 'os2l-sender')]
+    for thread in started:
+        thread.start()
+    yield {thread.name: thread.native_id for thread in started}
+    stop.set()
+    for thread in started:
+        thread.join()
+
+
+@pytest.fixture
+def restored_gc():
+    threshold = gc.get_threshold()
+    yield
+    gc.unfreeze()
+    gc.set_threshold(*threshold)
+
+
+def test_a_core_list_reads_like_taskset():
+    assert parse_cpus('2') == {2}
+    assert parse_cpus('0-1, 4') == {0, 1, 4}
+    for bad in ('', 'a', '3-1', '-1'):
+        with pytest.raises(ValueError):
+            parse_cpus(bad)
+
+
+def test_a_plan_is_labelled_by_what_it_asks_for():
+    assert SchedulingPlan().label == 'default'
+    plan = SchedulingPlan(audio_cpus=frozenset({3, 2}), gpu_cpus=frozenset({1}),
+                          rt_priority=50, gc_freeze=True)
+    assert plan.label == 'affinity=2,3 gpu=1 fifo=50 gc=frozen'
+
+
+def test_the_loop_and_the_gpu_thread_get_their_cores_and_the_rest_move_off(
+        calls, threads):
+    plan = SchedulingPlan(audio_cpus=frozenset({2}), gpu_cpus=frozenset({3}),
+                          rt_priority=40)
+    scheduling = Scheduling(plan)
+    scheduling.apply()
+
+    loop = threading.get_native_id()
+    pins = {tid: cpus for kind, tid, cpus in calls if kind == 'pin'}
+    assert pins[loop] == {2}
+    assert pins[threads[sched.GPU_THREAD]] == {3}
+    assert pins[threads['os2l-sender']] == {0, 1, 3}
+    assert ('fifo', loop, 40) in calls
+    assert scheduling.applied == ['affinity=2', 'gpu=3', 'fifo=40']
+
+
+def test_a_portaudio_callback_thread_gets_the_loops_cores_and_priority(calls, threads):
+    plan = SchedulingPlan(audio_cpus=frozenset({2}), rt_priority=40)
+    scheduling = Scheduling(plan)
+    scheduling.adopt(4242, 'the PortAudio capture thread')
+    assert calls == [], 'an adopted thread was configured before the plan'
+    scheduling.apply()
+    scheduling.adopt(4343, 'the PortAudio playback thread')
+
+    pins = {tid: cpus for kind, tid, cpus in calls if kind == 'pin'}
+    for tid in (4242, 4343):
+        assert pins[tid] == {2}
+        assert ('fifo', tid, 40) in calls
+
+
+def test_a_refused_request_is_logged_and_the_show_runs_on(calls, monkeypatch, caplog):
+    def refuse(*args):
+        raise PermissionError(1, 'Operation not permitted')
+
+    monkeypatch.setattr(sched.os, 'sched_setscheduler', refuse)
+    scheduling = Scheduling(SchedulingPlan(rt_priority=50, nice=-5))
+    with caplog.at_level(logging.WARNING):
+        scheduling.apply()
+
+    assert scheduling.applied == ['nice=-5']
+    assert 'SCHED_FIFO 50 refused' in caplog.text
+
+
+def test_the_heap_is_frozen_once_and_only_after_warm_up(calls, restored_gc):
+    clock = VirtualClock()
+    scheduling = Scheduling(SchedulingPlan(gc_freeze=True), clock=clock,
+                            warmup_sec=30.0)
+    scheduling.apply()
+    for _ in range(29):
+        clock.advance(1.0)
+        scheduling.observe(0.0)
+    assert scheduling.frozen_objects is None
+
+    clock.advance(1.0)
+    scheduling.observe(0.0)
+    frozen = scheduling.frozen_objects
+    assert frozen and gc.get_freeze_count() >= frozen
+    assert gc.get_threshold() == sched.GC_THRESHOLD
+    clock.advance(1.0)
+    scheduling.observe(0.0)
+    assert scheduling.applied.count('gc=frozen') == 1
+
+
+def test_drift_is_summarised_against_the_configuration(calls, caplog):
+    clock = VirtualClock()
+    scheduling = Scheduling(SchedulingPlan(audio_cpus=frozenset({1})), clock=clock)
+    scheduling.observe(9.0)                     # before apply: not this config's
+    scheduling.apply()
+    for second in range(100):
+        clock.advance(1.0)
+        scheduling.observe(0.001 * second)
+
+    stats = scheduling.summary(peak_drift_sec=0.2)
+    assert stats['samples'] == 100 and stats['config'] == 'affinity=1'
+    assert stats['drift_max_sec'] == pytest.approx(0.099)
+    assert stats['drift_p50_sec'] == pytest.approx(0.0495)
+    with caplog.at_level(logging.INFO):
+        scheduling.log_summary(0.2)
+    assert 'affinity=1 | drift p50' in caplog.text and 'peak 0.2000s' in caplog.text
+
+
+def test_drift_held_for_the_percentiles_is_one_summary_interval(calls):
+    clock = VirtualClock()
+    scheduling = Scheduling(SchedulingPlan(), clock=clock)
+    scheduling.apply()
+    for second in range(3 * sched._DRIFT_WINDOW):
+        clock.advance(1.0)
+        scheduling.observe(1.0 if second == 0 else 0.0)
+
+    stats = scheduling.summary()
+    assert len(scheduling._drift) == sched._DRIFT_WINDOW
+    assert stats['samples'] == 3 * sched._DRIFT_WINDOW
+    assert stats['drift_p99_sec'] == 0.0
+    assert stats['drift_max_sec'] == 1.0, 'the whole-show peak was forgotten'
+
+
+def test_the_run_command_takes_the_scheduling_flags():
+    from lib.main import build_parser
+
+    args = build_parser().parse_args(['run', '0', '--affinity', '2-3',
+                                      '--gpu-affinity', '1', '--rt-priority', '60',
+                                      '--gc-freeze'])
+    assert sched.plan_from_args(args) == SchedulingPlan(
+        audio_cpus=frozenset({2, 3}), gpu_cpus=frozenset({1}), rt_priority=60,
+        gc_freeze=True)
+    assert sched.plan_from_args(build_parser().parse_args(['run', '0'])) \
+        == SchedulingPlan()
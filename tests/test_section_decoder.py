@@ -242,6 +242,16 @@ def test_a_decision_carries_the_bar_line_it_starts_on():
         assert decision.start_sec == pytest.approx(bar_line(decision.bar))
 
 
+def test_an_early_committing_stage_names_the_same_bars_on_the_same_lines():
+    labels = [0] * 12 + [3] * 20 + [2] * 8
+    waited = feed(decoder(lag_bars=3), bars=40, labels=labels).decisions
+    early = SectionDecoder(toy_priors(floor=4),
+                           DecodeParams(lag_bars=3, min_coverage=1,
+                                        early_commit=True))
+    assert early._decoder.early_commit
+    assert feed(early, bars=40, labels=labels).decisions == waited
+
+
 def test_the_backtrace_ring_does_not_grow_with_the_set():
     section = decoder(lag_bars=2)
     feed(section, bars=40, labels=[0] * 20 + [3] * 20)
@@ -279,6 +289,21 @@ def test_the_tempo_follows_a_change_instead_of_being_outvoted_by_history():
     assert section.bar_sec == pytest.approx(1.38, abs=0.02)
 
 
+def test_the_rolling_bar_equals_the_median_of_the_recent_lines_it_replaced():
+    section = decoder(lag_bars=2)
+    rng = np.random.default_rng(3)
+    when = 0.0
+    for step in range(400):
+        when += rng.choice([0.5, 0.52, 0.48, 0.345]) if step % 97 else 5.0
+        section.push_beat(when)
+        if step == 250:
+            section.reset(cold_start=False)
+        recent = section.bar_edges[-25:]
+        expected = (float(np.median(np.diff(np.asarray(recent))))
+                    if len(recent) > 1 else NOMINAL_BAR_SEC)
+        assert section.bar_sec == expected, step
+
+
 def test_a_beat_gap_re_anchors_the_grid_instead_of_closing_a_bar_across_it():
     section = decoder(lag_bars=2)
     for beat in beats(8, period=0.5):
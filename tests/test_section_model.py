@@ -34,8 +34,9 @@ class _Port:
 
 
 class FakeSession:
-    def __init__(self, seed: int = 0) -> None:
+    def __init__(self, seed: int = 0, batched: bool = False) -> None:
         rng = np.random.default_rng(seed)
+        self.batched = batched
         self.into = rng.normal(size=(DIM, HIDDEN)).astype(np.float32) * 0.4
         self.carry = rng.normal(size=(HIDDEN, HIDDEN)).astype(np.float32) * 0.6
         self.label = rng.normal(size=(HIDDEN, CLASSES)).astype(np.float32)
@@ -57,9 +58,17 @@ class FakeSession:
         assert names == [S.LABEL_OUTPUT, S.BOUNDARY_OUTPUT, S.STATE_OUTPUT]
         frames = feeds[S.FRAMES_INPUT]
         state = feeds[S.STATE_INPUT]
-        assert frames.shape == (1, WINDOW, DIM), frames.shape
-        assert state.shape == (1, 1, HIDDEN), state.shape
+        rows = frames.shape[0] if self.batched else 1
+        assert frames.shape == (rows, WINDOW, DIM), frames.shape
+        assert state.shape == (1, rows, HIDDEN), state.shape
         self.calls += 1
+        # Row by row, as a batch-invariant graph behaves: numpy's matmul does
+        # not promise the same bits for one row of many as for the row alone.
+        outs = [self._row(frames[row:row + 1], state[:, row:row + 1])
+                for row in range(rows)]
+        return [np.concatenate(parts, axis=-2) for parts in zip(*outs)]
+
+    def _row(self, frames, state):
         pooled = (frames * self.weights).sum(axis=1)
         hidden = np.tanh(pooled @ self.into + state[0] @ self.carry)
         return [hidden @ self.label, hidden @ self.edge,
@@ -244,6 +253,35 @@ def test_the_flushed_tail_carries_on_from_the_last_cell_pushed(tiny, mean):
         == list(range(500 + 20 - FUTURE, 520))
 
 
+def test_models_stepped_together_emit_what_each_emits_alone(tiny, mean):
+    shared = FakeSession(batched=True)
+    solos = [_model(tiny, mean) for _ in range(3)]
+    batched = [_model(tiny, mean, session_factory=lambda _path: shared)
+               for _ in range(3)]
+    tracks = [_cells(30 + 7 * n, seed=n + 1) for n in range(3)]
+
+    alone = [[p for p in map(model.push, cells) if p is not None]
+             for model, cells in zip(solos, tracks)]
+    together = [[] for _ in tracks]
+    for step in range(max(map(len, tracks))):
+        due, owners = [], []
+        for n, (model, cells) in enumerate(zip(batched, tracks)):
+            if step < len(cells):
+                index = model.admit(cells[step], None)
+                if index is not None:
+                    due.append((model, index))
+                    owners.append(n)
+        for n, posterior in zip(owners, S.step_together(shared, due)):
+            together[n].append(posterior)
+
+    assert shared.calls < sum(map(len, alone))
+    for mine, theirs in zip(together, alone):
+        assert [p.index for p in mine] == [p.index for p in theirs]
+        for a, b in zip(mine, theirs):
+            assert np.array_equal(a.posterior, b.posterior), a.index
+            assert a.boundary == b.boundary, a.index
+
+
 def test_the_head_geometry_is_read_from_the_shipped_json(geometry):
     assert geometry.window_cells == WINDOW
     assert geometry.future_cells == FUTURE
@@ -497,3 +535,70 @@ def test_the_extractor_s_cell_index_is_what_the_model_is_stamped_with():
     model = _FakeModel(['p0', 'p1'])
     PosteriorStream(stream, model).push_audio([0.0] * 8)
     assert model.indices == [7, 413]
+
+
+def _build(tiny, variant="int8", **changes):
+    path = S.head_variant_path(tiny, variant)
+    path.write_bytes(f"the {variant} build".encode())
+    meta = json.loads(Path(f"{tiny}.json").read_text(encoding="utf-8"))
+    meta.update(variant=variant, sha256=S.sha256_file(path),
+                source_sha256=meta["sha256"], onnxruntime=ort.__version__,
+                gate={"passed": True})
+    meta.update(changes)
+    Path(f"{path}.json").write_text(json.dumps(meta), encoding="utf-8")
+    return path
+
+
+def test_a_head_build_loads_beside_the_graph_it_was_built_from(tiny, geometry, mean):
+    built = _build(tiny)
+    path, found = S.load_head_variant(tiny, "int8", geometry)
+    assert path == built and path.name == "tiny_step.int8.onnx"
+    assert found.variant == "int8" and found.sha256 == S.sha256_file(built)
+    assert S.load_head_variant(tiny, "fp32", geometry) == (tiny, geometry)
+
+    opened = []
+    S.SectionModel(path, mean=mean, geometry=found,
+                   session_factory=lambda p: opened.append(p) or FakeSession())
+    assert opened == [path]
+
+
+def test_a_head_build_of_another_graph_is_refused(tiny, geometry):
+    _build(tiny, source_sha256="0" * 64)
+    with pytest.raises(RuntimeError, match="built from the graph"):
+        S.load_head_variant(tiny, "int8", geometry)
+
+
+def test_a_head_build_from_another_runtime_is_refused(tiny, geometry):
+    _build(tiny, "optimised", onnxruntime="0.0.0")
+    with pytest.raises(RuntimeError, match="rebuild it"):
+        S.load_head_variant(tiny, "optimised", geometry)
+
+
+def test_an_ungated_head_build_only_runs_where_it_is_being_gated(tiny, geometry):
+    _build(tiny, gate={"passed": False})
+    with pytest.raises(RuntimeError, match="decision gate"):
+        S.load_head_variant(tiny, "int8", geometry)
+    assert S.load_head_variant(tiny, "int8", geometry, gated=False)[1].variant == "int8"
+
+
+def test_a_prebuilt_plan_is_not_optimised_again_at_startup():
+    assert (S.session_options(optimised=True).graph_optimization_level
+            == ort.GraphOptimizationLevel.ORT_DISABLE_ALL)
+    assert (S.session_options().graph_optimization_level
+            != ort.GraphOptimizationLevel.ORT_DISABLE_ALL)
+
+
+def test_the_show_offers_the_head_builds_this_module_names():
+    import inspect
+
+    from lib import section_chain
+    from lib.main import build_parser
+
+    run = build_parser().parse_args(['run', '0'])
+    assert run.head == S.FP32_HEAD
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(['run', '0', '--head', 'fp16'])
+    for head in S.HEAD_VARIANTS:
+        assert build_parser().parse_args(['run', '0', '--head', head]).head == head
+    assert inspect.signature(section_chain.build_section_chain) \
+        .parameters['head'].default == S.FP32_HEAD
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from lib.analyser import section_model as S
+from simulate.batch import LockstepStream, check_batch_invariance, step_heads
+from tests.test_section_model import (FakeSession, _cells, _model,  # noqa: F401
+                                      mean, tiny)
+
+
+class _Cell:
+    def __init__(self, index, features):
+        self.index = index
+        self.features = features
+
+
+class _PassPerBuffer:
+    """Every pushed buffer releases the next pass of cells, uneven by design."""
+
+    def __init__(self, cells, widths):
+        self._passes, start = [], 0
+        for width in widths:
+            self._passes.append([_Cell(start + n, cells[start + n])
+                                 for n in range(min(width, len(cells) - start))])
+            start += width
+        self._ready = 0
+
+    def push_audio(self, samples):
+        self._ready += 1
+
+    def due(self):
+        return self._ready > 0 and bool(self._passes)
+
+    def run_pass(self):
+        self._ready -= 1
+        return self._passes.pop(0)
+
+
+def _tracks(count):
+    return [(_cells(40 + 9 * n, seed=n + 1), [1 + (k + n) % 4 for k in range(60)])
+            for n in range(count)]
+
+
+def test_the_lockstep_streams_drain_what_each_stream_drains_alone(tiny, mean):
+    tracks = _tracks(3)
+    solo = [S.PosteriorStream(_PassPerBuffer(cells, widths), _model(tiny, mean))
+            for cells, widths in tracks]
+    shared = FakeSession(batched=True)
+    lockstep = [LockstepStream(_PassPerBuffer(cells, widths),
+                               _model(tiny, mean,
+                                      session_factory=lambda _path: shared))
+                for cells, widths in tracks]
+
+    buffer = np.zeros(8, dtype=np.float32)
+    alone, together = [[] for _ in tracks], [[] for _ in tracks]
+    for _ in range(30):
+        for out, stream in zip(alone, solo):
+            out.extend(stream.push_audio(buffer).posteriors)
+        for stream in lockstep:
+            stream.gather(buffer)
+        step_heads(shared, lockstep)
+        for out, stream in zip(together, lockstep):
+            out.extend(stream.push_audio(buffer).posteriors)
+
+    assert sum(map(len, alone)) > shared.calls > 0
+    for mine, theirs in zip(together, alone):
+        assert [p.index for p in mine] == [p.index for p in theirs]
+        for a, b in zip(mine, theirs):
+            assert np.array_equal(a.posterior, b.posterior)
+            assert a.boundary == b.boundary
+
+
+def test_a_lockstep_stream_refuses_to_run_without_its_driver(tiny, mean):
+    cells, widths = _tracks(1)[0]
+    stream = LockstepStream(_PassPerBuffer(cells, widths), _model(tiny, mean))
+    with pytest.raises(RuntimeError, match="lockstep driver"):
+        stream.push_audio(np.zeros(8, dtype=np.float32))
+
+
+def test_a_batch_invariant_session_passes_the_probe(tiny):
+    check_batch_invariance(FakeSession(batched=True), S.load_head_geometry(tiny))
+
+
+class _RowCoupled(FakeSession):
+    def run(self, names, feeds):
+        label, boundary, state = super().run(names, feeds)
+        # A kernel whose reduction order depends on the batch it was given.
+        return [label + np.float32(1e-6) * (len(label) - 1), boundary, state]
+
+
+def test_a_session_that_changes_a_row_s_bits_when_batched_is_refused(tiny):
+    with pytest.raises(RuntimeError, match="same bits"):
+        check_batch_invariance(_RowCoupled(batched=True), S.load_head_geometry(tiny))
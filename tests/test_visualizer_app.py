@@ -380,7 +380,7 @@ def _app(source=None):
 
 
 _ANCHOR = ('..sync.data...metrics.children...stage.children...'
-           'decoder.children..')
+           'decoder.children...shown.data..')
 _VIEW = '..timeline.figure...drawn.data..'
 _GATE = '..gate.data...view-gate.data..'
 
@@ -389,8 +389,8 @@ def test_the_app_reads_its_data_through_a_snapshot_call_and_nothing_else():
     poller = _FakePoller(_snapshot(bpm=131.0, beats_detected=7))
     app = _app(poller)
 
-    anchor, metrics, stage, decoder = app.callback_map[
-        _ANCHOR]['callback'].__wrapped__(1)
+    anchor, metrics, stage, decoder, _ = app.callback_map[
+        _ANCHOR]['callback'].__wrapped__(1, None)
 
     assert poller.reads == 1
     assert '131 BPM' in ''.join(_texts(metrics))
@@ -402,8 +402,8 @@ def test_the_app_reads_its_data_through_a_snapshot_call_and_nothing_else():
 def test_one_poll_feeds_every_panel_so_they_cannot_disagree():
     poller = _FakePoller(_snapshot())
     app = _app(poller)
-    app.callback_map[_ANCHOR]['callback'].__wrapped__(1)
-    figure, _ = app.callback_map[_VIEW]['callback'].__wrapped__(1)
+    app.callback_map[_ANCHOR]['callback'].__wrapped__(1, None)
+    figure, _ = app.callback_map[_VIEW]['callback'].__wrapped__(1, None)
     assert figure is not None
     assert poller.reads == 1
 
@@ -413,11 +413,102 @@ def test_the_figure_is_not_rebuilt_from_a_snapshot_it_already_drew():
 
     poller = _FakePoller(_snapshot())
     app = _app(poller)
-    app.callback_map[_ANCHOR]['callback'].__wrapped__(1)
-    first, first_ack = app.callback_map[_VIEW]['callback'].__wrapped__(1)
-    again, again_ack = app.callback_map[_VIEW]['callback'].__wrapped__(2)
+    app.callback_map[_ANCHOR]['callback'].__wrapped__(1, None)
+    view = app.callback_map[_VIEW]['callback'].__wrapped__
+    first, first_ack = view(1, None)
+    again, again_ack = view(2, first_ack)
     assert first is not None and again is dash.no_update
-    assert (first_ack, again_ack) == (1, 2)
+    assert (first_ack['tick'], again_ack['tick']) == (1, 2)
+
+
+def _bars(first: int, count: int, at: float = 0.0) -> dict:
+    return {'bar_edges': [at + 2.0 * n for n in range(count + 1)],
+            'first_bar': first, 'bar_sec': 2.0}
+
+
+def _patched(update) -> list:
+    return update.to_plotly_json()['operations']
+
+
+def test_a_page_holding_the_last_figure_is_patched_with_only_what_moved():
+    import dash
+
+    poller = _FakePoller(_snapshot(
+        now=20.0, decoder=_bars(0, 4, at=4.0),
+        intents=[{'t': 5.0, 'end': 9.0, 'intent': 'buildup'},
+                 {'t': 9.0, 'intent': 'drop'}]))
+    app = _app(poller)
+    refresh = app.callback_map[_ANCHOR]['callback'].__wrapped__
+    view = app.callback_map[_VIEW]['callback'].__wrapped__
+    refresh(1, None)
+    full, drawn = view(1, None)
+    assert not isinstance(full, dash.Patch)
+
+    poller._snapshot = _snapshot(
+        now=20.5, decoder=_bars(1, 4, at=6.0),
+        intents=[{'t': 5.0, 'end': 9.0, 'intent': 'buildup'},
+                 {'t': 9.0, 'intent': 'drop'}])
+    refresh(2, None)
+    patch, drawn = view(2, drawn)
+
+    assert isinstance(patch, dash.Patch)
+    operations = _patched(patch)
+    kinds = {op['operation'] for op in operations}
+    assert kinds == {'Delete', 'Insert', 'Assign'}
+    # bar 0 scrolled out, bar 4 arrived, the running block grew to the pad
+    deleted = [op['location'] for op in operations if op['operation'] == 'Delete']
+    assert deleted == [['layout', 'shapes', n] for n in (3, 2, 1, 0)] \
+        + [['layout', 'annotations', 0]]
+    assert {'operation': 'Assign', 'location': ['layout', 'shapes', 17, 'x1'],
+            'params': {'value': 22.0}} in operations
+    rebuilt = V._build_timeline(poller._snapshot)
+    assert len(operations) < len(rebuilt.layout.shapes)
+
+
+def test_a_page_the_server_has_no_record_of_gets_a_whole_figure():
+    import dash
+
+    app = _app(_FakePoller(_snapshot(now=20.0, decoder=_bars(0, 4))))
+    app.callback_map[_ANCHOR]['callback'].__wrapped__(1, None)
+    figure, _ = app.callback_map[_VIEW]['callback'].__wrapped__(
+        1, {'tick': 0, 'version': 10_000})
+    assert not isinstance(figure, dash.Patch)
+
+
+def test_a_new_song_re_bases_every_x_and_is_redrawn_whole():
+    drawn = V._timeline_layers(_snapshot(
+        now=20.0, decoder=_bars(0, 4),
+        sound_events=[{'t': 1.0, 'playing': True}]))
+    later = V._timeline_layers(_snapshot(
+        now=40.0, decoder=_bars(0, 4),
+        sound_events=[{'t': 1.0, 'playing': True},
+                      {'t': 30.0, 'playing': True}]))
+    assert V._patch_timeline(drawn, later) is None
+
+
+def test_keys_that_changed_order_cannot_be_patched():
+    target = __import__('dash').Patch()['layout']['shapes']
+    assert V._patch_keyed(target, [('a', {}), ('b', {})],
+                          [('b', {}), ('a', {})]) is None
+    assert V._patch_keyed(target, [('a', {'x': 1})],
+                          [('a', {'x': 1}), ('b', {'x': 2})]) == 1
+
+
+def test_a_panel_is_only_rebuilt_when_what_it_shows_has_changed():
+    import dash
+
+    snap = _snapshot(now=10.0, decoder={'classes': ['a', 'b'],
+                                        'posterior': [0.2, 0.8]})
+    metrics, stage, decoder, shown = V._refresh_panels(snap, None)
+    assert dash.no_update not in (metrics, stage, decoder)
+
+    later = dict(snap, now=11.0, decoder=dict(snap['decoder'], bar_edges=[1.0]))
+    assert V._refresh_panels(later, shown)[:3] == (dash.no_update,) * 3
+
+    dropped = dict(later, intent='breakdown')
+    metrics, stage, decoder, _ = V._refresh_panels(dropped, shown)
+    assert decoder is dash.no_update
+    assert stage is not dash.no_update and metrics is not dash.no_update
 
 
 def test_no_tick_can_start_a_refresh_while_one_is_still_in_flight():
@@ -0,0 +1,116 @@
+"""Content digests of corpus audio, and the index that remembers them.
+
+One store for every tool that hashes the corpus: the labelling tool and the
+raveform gate both read and extend `audio_digests.json` beside it, so a file
+either of them has hashed is not hashed again by the other.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+DIGEST_INDEX_FILE = 'audio_digests.json'
+DIGEST_INDEX_SCHEMA = 1
+
+_digests: dict = {}
+
+
+def _file_key(path) -> tuple:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def audio_digest(audio_path: str) -> str:
+    """SHA-256 of the file, computed once per process for as long as its size,
+    mtime and inode say it has not been rewritten."""
+    key = (os.path.abspath(audio_path), *_file_key(audio_path))
+    known = _digests.get(key)
+    if known is not None:
+        return known
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+    _digests[key] = digest.hexdigest()
+    return _digests[key]
+
+
+class DigestIndex:
+    """Digests already paid for, kept beside the corpus.
+
+    `path -> size, mtime_ns, inode, sha256`. An entry is only believed while
+    the file still stats the same, so a rewritten or replaced file is hashed
+    again rather than misidentified; an unreadable or foreign index is simply
+    an empty one. Unlike `checksums.sha256` it is written as files are hashed,
+    so the next launch finds what this one learnt.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries = {}
+        self._dirty = False
+        try:
+            record = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(record, dict) and record.get('schema') == DIGEST_INDEX_SCHEMA:
+            self._entries = dict(record.get('files') or {})
+
+    def _fresh(self, name: str):
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        try:
+            size, mtime_ns, inode = _file_key(name)
+        except OSError:
+            return None
+        if (entry.get('size'), entry.get('mtime_ns'), entry.get('inode')) \
+                != (size, mtime_ns, inode):
+            return None
+        return entry.get('sha256')
+
+    def known(self, audio_path):
+        """The recorded digest, if the file still stats as it did; else None."""
+        return self._fresh(str(Path(audio_path).resolve()))
+
+    def digest(self, audio_path) -> str:
+        name = str(Path(audio_path).resolve())
+        known = self._fresh(name)
+        if known is not None:
+            return known
+        size, mtime_ns, inode = _file_key(name)
+        digest = audio_digest(name)
+        self._entries[name] = {'size': size, 'mtime_ns': mtime_ns,
+                               'inode': inode, 'sha256': digest}
+        self._dirty = True
+        return digest
+
+    def find(self, digest: str, within: Path):
+        """A file directly in `within` the index says holds these bytes."""
+        within = within.resolve()
+        for name, entry in self._entries.items():
+            if (entry.get('sha256') == digest and Path(name).parent == within
+                    and self._fresh(name) == digest):
+                return Path(name)
+        return None
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        live = {name: entry for name, entry in self._entries.items()
+                if os.path.exists(name)}
+        temp = self.path.with_name(self.path.name + '.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp, 'w', encoding='utf-8', newline='\n') as handle:
+                handle.write(json.dumps(
+                    {'schema': DIGEST_INDEX_SCHEMA, 'files': live},
+                    indent=1, sort_keys=True) + '\n')
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp, self.path)
+        except OSError:
+            return
+        self._dirty = False
@@ -0,0 +1,138 @@
+"""How far the reused conv frames move the cells -- live extraction against the cell cache.
+
+Consecutive MERT passes overlap by buffer - hop, and the encoder runs its conv
+stack over the new audio only, stitching the rest in from the previous pass
+(``MertEncoder.reuses_frames``).  A conv over a shorter input is the same sum
+in a different blocking, so a reused frame can differ from a recomputed one in
+the last bits.  This re-extracts each track with frame reuse on and compares
+every cell against the sidecar ``simulate/cell_cache.py`` recorded for it.
+Record the sidecars with ``--no-reuse`` first if the ones on disk were not made
+by a full-recompute encoder; the report says which extractor wrote them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _path in (str(REPO_ROOT), str(REPO_ROOT / "training")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+PARITY_FILE = REPO_ROOT / "training" / "conv_frame_parity.json"
+
+
+def recorded_cells(mp3: str) -> tuple:
+    from simulate.cell_cache import sidecar_path
+    from simulate.fake_audio_client import FileAudioClient
+
+    path = sidecar_path(mp3, FileAudioClient.decode_path)
+    if not path.exists():
+        raise FileNotFoundError(f"no cell recording at {path} -- run the "
+                                f"simulation over {mp3} once to record it")
+    with np.load(path) as archive:
+        key = json.loads(str(archive["key"]))
+        cells = dict(zip((int(index) for index in archive["cell_index"]),
+                         np.asarray(archive["cell_features"], dtype=np.float32)))
+    return cells, key
+
+
+def live_cells(mp3: str, encoder, geometry) -> dict:
+    from lib.analyser.mert_stream import MertStream
+    from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
+    from simulate.fake_audio_client import FileAudioClient
+
+    client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, mp3)
+    client.start_streams()
+    stream = MertStream(encoder, geometry=geometry)
+    cells = {}
+    while not client.exhausted:
+        stream.push_audio(client.read())
+        while stream.due():
+            cells.update((cell.index, cell.features) for cell in stream.run_pass())
+    return cells
+
+
+def compare(live: dict, recorded: dict, n_layers: int) -> dict:
+    shared = sorted(set(live) & set(recorded))
+    if not shared:
+        raise ValueError("the live run and the recording share no cell index")
+    got = np.stack([live[index] for index in shared])
+    want = np.stack([recorded[index] for index in shared])
+    delta = np.abs(got - want)
+    cosine = (got * want).sum(axis=1) / np.maximum(
+        np.linalg.norm(got, axis=1) * np.linalg.norm(want, axis=1), 1e-12)
+    per_layer = delta.reshape(len(shared), n_layers, -1).max(axis=(0, 2))
+    return {
+        "cells": len(shared),
+        "cells_only_live": len(set(live) - set(recorded)),
+        "cells_only_recorded": len(set(recorded) - set(live)),
+        "identical_cells": int(np.sum(delta.max(axis=1) == 0.0)),
+        "max_abs": float(delta.max()),
+        "p99_abs": float(np.percentile(delta, 99)),
+        "rms": float(np.sqrt(np.mean(np.square(got - want)))),
+        "min_cosine": float(cosine.min()),
+        "max_abs_per_layer": [float(value) for value in per_layer],
+    }
+
+
+def main() -> None:
+    from lib import section_chain
+    from lib.analyser import mert_stream as M
+    from simulate.cell_cache import extractor_sha
+
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("tracks", nargs="+")
+    ap.add_argument("--device", default=None)
+    ap.add_argument("--fp32", action="store_true")
+    ap.add_argument("--no-reuse", action="store_true",
+                    help="recompute every conv frame (the reference run)")
+    ap.add_argument("--write", nargs="?", const=str(PARITY_FILE), default=None)
+    args = ap.parse_args()
+
+    from pipeline_digest import fixture_key
+
+    geometry = section_chain.read_geometry().stream
+    backend = section_chain.resolve_backend(args.device, not args.fp32)
+    tracks = {}
+    for mp3 in args.tracks:
+        name = fixture_key(mp3)
+        recorded, key = recorded_cells(mp3)
+        encoder = M.load_encoder(geometry, device=backend["device"],
+                                 fp16=not args.fp32,
+                                 reuse_frames=not args.no_reuse)
+        report = compare(live_cells(mp3, encoder, geometry), recorded,
+                         encoder.n_layers)
+        seen = encoder.frames_reused + encoder.frames_computed
+        report["frames_reused_share"] = round(
+            encoder.frames_reused / seen, 4) if seen else 0.0
+        report["recorded_by_extractor"] = key.get("extractor")
+        tracks[name] = report
+        print(f"{name:36s} max |d| {report['max_abs']:.3g}  "
+              f"rms {report['rms']:.3g}  cos >= {report['min_cosine']:.6f}  "
+              f"{report['identical_cells']}/{report['cells']} identical  "
+              f"{report['frames_reused_share']:.0%} frames reused")
+
+    verdict = {
+        "extractor": extractor_sha(),
+        "backend": backend,
+        "reuse_frames": not args.no_reuse,
+        "max_abs": max(track["max_abs"] for track in tracks.values()),
+        "min_cosine": min(track["min_cosine"] for track in tracks.values()),
+        "tracks": tracks,
+    }
+    print(f"\nworst cell: max |d| {verdict['max_abs']:.3g}, "
+          f"cosine {verdict['min_cosine']:.6f}")
+    if args.write:
+        Path(args.write).write_text(json.dumps(verdict, indent=2,
+                                               sort_keys=True) + "\n",
+                                    newline="\n")
+        print(f"wrote {args.write}")
+
+
+if __name__ == "__main__":
+    main()
@@ -92,11 +92,12 @@ import datetime
 import gzip
 import hashlib
 import json
-import statistics
 import subprocess
 import sys
 from pathlib import Path
 
+import numpy as np
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 for _path in (str(REPO_ROOT), str(REPO_ROOT / "training")):
     if _path not in sys.path:
@@ -263,6 +264,19 @@ def load_tracks(table_path: Path) -> list[TrackBeats]:
 # --------------------------------------------------------------------------- #
 
 
+def _weights(times: np.ndarray) -> tuple[np.ndarray, float]:
+    """``beat_weights`` over an array; the clamped excess is summed in order."""
+    if len(times) < 2:
+        return np.zeros(len(times)), 0.0
+    gaps = np.maximum(0.0, np.diff(times))
+    median = float(np.median(gaps))
+    cap = MAX_GAP_FACTOR * median
+    over = gaps > cap if cap > 0.0 else np.zeros(len(gaps), dtype=bool)
+    excess = gaps[over] - cap
+    clamped = float(np.cumsum(excess)[-1]) if len(excess) else 0.0
+    return np.append(np.where(over, cap, gaps), median), clamped
+
+
 def beat_weights(times) -> tuple[list[float], float]:
     """Seconds of show each beat accounts for, plus the seconds discarded.
 
@@ -272,24 +286,8 @@ def beat_weights(times) -> tuple[list[float], float]:
     medians are beat dropouts, not slow music: the excess is dropped and
     returned so a run can prove the clamp is not quietly rewriting the corpus.
     """
-    count = len(times)
-    if count == 0:
-        return [], 0.0
-    if count == 1:
-        return [0.0], 0.0
-    gaps = [max(0.0, times[i + 1] - times[i]) for i in range(count - 1)]
-    median = statistics.median(gaps)
-    cap = MAX_GAP_FACTOR * median
-    weights: list[float] = []
-    clamped = 0.0
-    for gap in gaps:
-        if cap > 0.0 and gap > cap:
-            clamped += gap - cap
-            weights.append(cap)
-        else:
-            weights.append(gap)
-    weights.append(median)
-    return weights, clamped
+    weights, clamped = _weights(np.asarray(times, dtype=np.float64))
+    return weights.tolist(), clamped
 
 
 # --------------------------------------------------------------------------- #
@@ -554,96 +552,379 @@ class Score:
                    cell["n_truth"] - cell["matched"])
 
 
-def score_track(track: TrackBeats, space: str) -> Score:
-    """Score one track in one label space."""
-    spec = SPACES[space]
-    labels = track.labels[space]
-    weights, clamped = beat_weights(track.times)
+# The scorer is columnar: a batch of tracks is one concatenated beat table with
+# integer-coded intents and labels, every seconds accumulator is one weighted
+# ``np.bincount`` keyed by (track, cell), and the boundary metrics of every
+# stream x tolerance x label run as one grouped search.  ``np.bincount`` adds
+# its weights in input order, so each cell is summed in exactly the order the
+# per-beat loop summed it and the banked JSON reproduces bit for bit.  The
+# per-event helpers above stay the definitions; the tests hold the columns to
+# them.
+
+
+@dataclasses.dataclass(frozen=True)
+class _Codebook:
+    labels: dict                # label -> column
+    intents: dict               # intent -> row in INTENT_ORDER; NO_INTENT -> -1
+    hits: np.ndarray            # (intent, label): the intent is correct for it
+    claims: np.ndarray          # (intent, widest claim): label columns, -1 pad
+    widths: np.ndarray          # (intent,) how many classes the intent claims
+    claim_ids: np.ndarray       # (intent,) equal iff two intents claim alike
+
+
+def _codebook(space: str) -> _Codebook:
+    labels = {label: column for column, label in enumerate(SPACES[space].labels)}
+    claimed = [INTENT_TO_LABELS[intent][space] for intent in INTENT_ORDER]
+    widest = max(map(len, claimed))
+    hits = np.zeros((len(INTENT_ORDER), len(labels)), dtype=bool)
+    claims = np.full((len(INTENT_ORDER), widest), -1, dtype=np.int64)
+    for row, targets in enumerate(claimed):
+        for slot, label in enumerate(targets):
+            hits[row, labels[label]] = True
+            claims[row, slot] = labels[label]
+    distinct: dict = {}
+    return _Codebook(
+        labels=labels,
+        intents={NO_INTENT: -1,
+                 **{intent: row for row, intent in enumerate(INTENT_ORDER)}},
+        hits=hits,
+        claims=claims,
+        widths=np.array([len(targets) for targets in claimed], dtype=np.int64),
+        claim_ids=np.array([distinct.setdefault(targets, len(distinct))
+                            for targets in claimed], dtype=np.int64),
+    )
+
 
-    score = Score(
+def _ranks(*arrays) -> tuple[list, int]:
+    """Each value's rank among all of them: an exact integer stand-in for a float.
+
+    Folding a group id into the rank (``group * width + rank``) turns a search
+    within each group into one sorted search over all of them, without the
+    rounding ``group * offset + time`` would bring to the comparisons.
+    """
+    universe = np.unique(np.concatenate(arrays))
+    return [np.searchsorted(universe, array) for array in arrays], len(universe)
+
+
+def _nearest(at, group, to, to_group) -> np.ndarray:
+    """Distance from each instant to the nearest ``to`` in its own group.
+
+    ``inf`` where the group holds none.  The nearest is always one of the two
+    neighbours a left bisection lands between -- the candidates
+    ``flicker_instants`` checks -- and ``abs(candidate - instant)`` is taken in
+    the same order it takes it.
+    """
+    best = np.full(len(at), np.inf)
+    if not len(at) or not len(to):
+        return best
+    (rank, to_rank), width = _ranks(at, to)
+    keys = to_group * width + to_rank
+    order = np.argsort(keys, kind="stable")
+    keys, to, to_group = keys[order], to[order], to_group[order]
+    right = np.searchsorted(keys, group * width + rank, side="left")
+    for index in (right - 1, right):
+        inside = (index >= 0) & (index < len(keys))
+        index = np.clip(index, 0, len(keys) - 1)
+        inside &= to_group[index] == group
+        best = np.minimum(best, np.where(inside, np.abs(to[index] - at), np.inf))
+    return best
+
+
+def _matched(truth, truth_group, tolerance, pred, pred_group,
+             groups: int) -> np.ndarray:
+    """``match_events`` for every group at once: matched truths per group.
+
+    The greedy walk asks two things of each truth -- where the first
+    prediction not too early for it sits, and where the first one too late
+    for it sits -- and both are sorted searches, run for every truth of every
+    group together.  Only the walk's cursor is sequential, and it is carried
+    one truth-rank at a time across all groups at once, so the Python loop is
+    as long as the busiest group, not the corpus.
+    """
+    matched = np.zeros(groups, dtype=np.int64)
+    if not len(truth) or not len(pred):
+        return matched
+    early, late = truth - tolerance, truth + tolerance
+    (pred_rank, early_rank, late_rank), width = _ranks(pred, early, late)
+    keys = np.sort(pred_group * width + pred_rank)
+    first = np.searchsorted(keys, truth_group * width + early_rank, side="left")
+    beyond = np.searchsorted(keys, truth_group * width + late_rank, side="right")
+
+    order = np.lexsort((truth, truth_group))
+    sorted_groups = truth_group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - np.repeat(
+        starts, np.diff(np.r_[starts, len(order)]))
+    walk = np.argsort(rank, kind="stable")
+    steps = np.searchsorted(rank[walk], np.arange(rank.max() + 2))
+
+    cursor = np.zeros(groups, dtype=np.int64)
+    hit = np.zeros(len(truth), dtype=bool)
+    for lo, hi in zip(steps[:-1], steps[1:]):
+        step = walk[lo:hi]
+        group = truth_group[step]
+        at = np.maximum(cursor[group], first[step])
+        taken = at < beyond[step]
+        cursor[group] = at + taken
+        hit[step] = taken
+    return np.bincount(truth_group[hit], minlength=groups)
+
+
+def _typed(book: _Codebook, intent, at, owner, truth, truth_owner,
+           truth_label, n_labels: int) -> np.ndarray:
+    """``typed_predictions``: the class each change is counted against."""
+    claims = book.claims[intent]
+    distance = np.full(claims.shape, np.inf)
+    for slot in range(claims.shape[1]):
+        label = claims[:, slot]
+        real = label >= 0
+        distance[real, slot] = _nearest(at[real], owner[real] * n_labels + label[real],
+                                        truth, truth_owner * n_labels + truth_label)
+    # argmin keeps the first of equals: the claim order breaks ties, and a
+    # change whose classes have no boundary at all lands on its first claim.
+    return claims[np.arange(len(claims)), distance.argmin(axis=1)]
+
+
+@dataclasses.dataclass
+class ScoreColumns:
+    """Every ``Score`` accumulator for a batch of tracks, stacked by track."""
+    space: str
+    track_ids: list
+    rows: np.ndarray                # (T,)
+    confusion: np.ndarray           # (T, intent, label) seconds
+    counts: np.ndarray              # (T, label, [tp, fp, fn]) seconds
+    no_intent_by_label: np.ndarray  # (T, label) seconds
+    no_intent_sec: np.ndarray
+    no_intent_rows: np.ndarray
+    no_intent_leading: np.ndarray
+    no_intent_interior: np.ndarray
+    no_intent_trailing: np.ndarray
+    scored_sec: np.ndarray
+    weight_total_sec: np.ndarray
+    clamped_sec: np.ndarray
+    observed: np.ndarray            # (T, intent) bool
+    boundary: np.ndarray            # (T, stream, tolerance, [overall, *labels],
+                                    #  [n_truth, n_pred, matched])
+    flicker: np.ndarray             # (T, stream, tolerance)
+
+    def score(self, index: int) -> Score:
+        return self._score(self.track_ids[index], 1,
+                           {field.name: getattr(self, field.name)[index]
+                            for field in dataclasses.fields(self)
+                            if field.name not in ("space", "track_ids")})
+
+    def total(self) -> Score:
+        """The corpus ``Score``: what ``aggregate`` over ``score(i)`` returns."""
+        if not self.track_ids:
+            raise ValueError("nothing to aggregate")
+        summed = {}
+        for field in dataclasses.fields(self):
+            if field.name in ("space", "track_ids"):
+                continue
+            column = getattr(self, field.name)
+            # cumsum adds track after track, as aggregate() does; a plain sum
+            # pairs them up and moves the last bits of a long corpus.
+            summed[field.name] = (np.cumsum(column, axis=0)[-1]
+                                  if column.dtype == np.float64
+                                  else column.any(axis=0) if column.dtype == bool
+                                  else column.sum(axis=0))
+        return self._score("(corpus)", len(self.track_ids), summed)
+
+    def _score(self, track_id: str, tracks: int, cells: dict) -> Score:
+        labels = SPACES[self.space].labels
+        boundary = cells["boundary"].tolist()
+        return Score(
+            space=self.space,
+            track_id=track_id,
+            tracks=tracks,
+            rows=int(cells["rows"]),
+            confusion={intent: dict(zip(labels, row))
+                       for intent, row in zip(INTENT_ORDER,
+                                              cells["confusion"].tolist())},
+            counts=dict(zip(labels, cells["counts"].tolist())),
+            no_intent_by_label=dict(zip(labels,
+                                        cells["no_intent_by_label"].tolist())),
+            no_intent_sec=float(cells["no_intent_sec"]),
+            no_intent_rows=int(cells["no_intent_rows"]),
+            no_intent_leading=int(cells["no_intent_leading"]),
+            no_intent_interior=int(cells["no_intent_interior"]),
+            no_intent_trailing=int(cells["no_intent_trailing"]),
+            scored_sec=float(cells["scored_sec"]),
+            weight_total_sec=float(cells["weight_total_sec"]),
+            clamped_sec=float(cells["clamped_sec"]),
+            observed_intents={intent for intent, seen
+                              in zip(INTENT_ORDER, cells["observed"]) if seen},
+            boundary={
+                stream: {
+                    tolerance: {
+                        "overall": dict(zip(_BOUNDARY_KEYS, per_kind[0])),
+                        "by_type": {label: dict(zip(_BOUNDARY_KEYS, cell))
+                                    for label, cell in zip(labels, per_kind[1:])},
+                    }
+                    for tolerance, per_kind in zip(TOLERANCES_SEC, per_tolerance)
+                }
+                for stream, per_tolerance in zip(STREAM_ORDER, boundary)
+            },
+            flicker={stream: dict(zip(TOLERANCES_SEC, per_tolerance))
+                     for stream, per_tolerance
+                     in zip(STREAM_ORDER, cells["flicker"].tolist())},
+        )
+
+
+_BOUNDARY_KEYS = ("n_truth", "n_pred", "matched")
+
+
+def _encode(track: TrackBeats, space: str, book: _Codebook):
+    """Integer codes for one track's beats, refusing the first unknown value."""
+    label = np.array([book.labels.get(value, -1) for value in track.labels[space]],
+                     dtype=np.int64)
+    intent = np.array([book.intents.get(value, -2) for value in track.intents],
+                      dtype=np.int64)
+    unknown = (label < 0) | (intent == -2)
+    if unknown.any():
+        index = int(unknown.argmax())
+        if label[index] < 0:
+            raise ValueError(f"unknown label {track.labels[space][index]!r} "
+                             f"in space {space!r} (track {track.track_id})")
+        raise ValueError(f"unknown intent {track.intents[index]!r} "
+                         f"(track {track.track_id})")
+    return label, intent
+
+
+def score_columns(tracks: list[TrackBeats], space: str) -> ScoreColumns:
+    """Score a batch of tracks in one label space, as stacked columns."""
+    spec = SPACES[space]
+    book = _codebook(space)
+    n_tracks, n_labels, n_intents = len(tracks), len(spec.labels), len(INTENT_ORDER)
+    kinds = n_labels + 1
+
+    columns: dict = {"times": [], "label": [], "intent": [], "weight": []}
+    clamped = np.zeros(n_tracks)
+    for index, track in enumerate(tracks):
+        times = np.asarray(track.times, dtype=np.float64)
+        label, intent = _encode(track, space, book)
+        weight, clamped[index] = _weights(times)
+        for name, values in zip(columns, (times, label, intent, weight)):
+            columns[name].append(values)
+    sizes = np.array([len(track.times) for track in tracks], dtype=np.int64)
+    times, label, intent, weight = (
+        np.concatenate(column) if tracks else np.zeros(0, dtype=dtype)
+        for column, dtype in zip(columns.values(),
+                                 (np.float64, np.int64, np.int64, np.float64)))
+    owner = np.repeat(np.arange(n_tracks), sizes)
+    position = np.arange(len(owner)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+
+    def seconds(mask, cell=None, cells=1, values=None):
+        keys = owner[mask] * cells + (0 if cell is None else cell)
+        return np.bincount(keys, weight[mask] if values is None else values,
+                           minlength=n_tracks * cells).reshape(n_tracks, -1)
+
+    def rows(mask):
+        return np.bincount(owner[mask], minlength=n_tracks)
+
+    committed = intent >= 0
+    none = ~committed
+    row = np.where(committed, intent, 0)
+    hit = committed & book.hits[row, label]
+    miss = committed & ~hit
+
+    # A miss's false positive is shared among the classes its intent claims:
+    # one entry per (beat, claimed class), still in beat order within a class.
+    blamed = np.flatnonzero(miss)
+    width = book.widths[intent[blamed]]
+    shared = np.repeat(blamed, width)
+    slot = np.arange(len(shared)) - np.repeat(np.cumsum(width) - width, width)
+    target = book.claims[intent[shared], slot]
+    false_positive = np.bincount(owner[shared] * n_labels + target,
+                                 weight[shared] / np.repeat(width, width),
+                                 minlength=n_tracks * n_labels)
+    counts = np.stack([seconds(hit, label[hit], n_labels),
+                       false_positive.reshape(n_tracks, n_labels),
+                       seconds(miss, label[miss], n_labels)], axis=-1)
+
+    first = sizes.copy()
+    last = np.full(n_tracks, -1)
+    np.minimum.at(first, owner[committed], position[committed])
+    np.maximum.at(last, owner[committed], position[committed])
+
+    # --- events ---------------------------------------------------------- #
+    same_track = np.r_[False, owner[1:] == owner[:-1]]
+    edge = np.flatnonzero(same_track & np.r_[False, label[1:] != label[:-1]])
+    truth, truth_owner, truth_label = times[edge], owner[edge], label[edge]
+
+    def changes(codes):
+        held = np.flatnonzero(committed)
+        moved = ((owner[held][1:] == owner[held][:-1])
+                 & (codes[held][1:] != codes[held][:-1]))
+        return held[1:][moved]
+
+    # Both streams are read off the committed beats; the intent stream
+    # differences the intent, the class stream the claim (see STREAM_ORDER).
+    streams = [changes(intent), changes(book.claim_ids[row])]
+
+    truth_at, truth_group, truth_tolerance = [], [], []
+    pred_at, pred_group = [], []
+    flicker = np.zeros((n_tracks, len(STREAM_ORDER), len(TOLERANCES_SEC)),
+                       dtype=np.int64)
+    for stream, beats in enumerate(streams):
+        at, by = times[beats], owner[beats]
+        bucket = _typed(book, intent[beats], at, by, truth, truth_owner,
+                        truth_label, n_labels)
+        loose_by = _nearest(at, by, truth, truth_owner)
+        for tier, tolerance in enumerate(TOLERANCES_SEC):
+            base = (stream * len(TOLERANCES_SEC) + tier) * n_tracks
+            truth_at += [truth, truth]
+            truth_group += [(base + truth_owner) * kinds,
+                            (base + truth_owner) * kinds + 1 + truth_label]
+            truth_tolerance += [np.full(2 * len(truth), tolerance)]
+            pred_at += [at, at]
+            pred_group += [(base + by) * kinds, (base + by) * kinds + 1 + bucket]
+            flicker[:, stream, tier] = np.bincount(
+                by[~(loose_by <= tolerance)], minlength=n_tracks)
+
+    groups = len(STREAM_ORDER) * len(TOLERANCES_SEC) * n_tracks * kinds
+    truth_group = np.concatenate(truth_group)
+    pred_group = np.concatenate(pred_group)
+    boundary = np.stack([
+        np.bincount(truth_group, minlength=groups),
+        np.bincount(pred_group, minlength=groups),
+        _matched(np.concatenate(truth_at), truth_group,
+                 np.concatenate(truth_tolerance), np.concatenate(pred_at),
+                 pred_group, groups),
+    ], axis=-1).reshape(len(STREAM_ORDER), len(TOLERANCES_SEC), n_tracks,
+                        kinds, 3).transpose(2, 0, 1, 3, 4)
+
+    return ScoreColumns(
         space=space,
-        track_id=track.track_id,
-        rows=len(track.times),
-        confusion={intent: {label: 0.0 for label in spec.labels}
-                   for intent in INTENT_ORDER},
-        counts={label: [0.0, 0.0, 0.0] for label in spec.labels},
-        no_intent_by_label={label: 0.0 for label in spec.labels},
+        track_ids=[track.track_id for track in tracks],
+        rows=sizes,
+        confusion=seconds(committed, row[committed] * n_labels + label[committed],
+                          n_intents * n_labels).reshape(n_tracks, n_intents,
+                                                        n_labels),
+        counts=counts,
+        no_intent_by_label=seconds(none, label[none], n_labels),
+        no_intent_sec=seconds(none)[:, 0],
+        no_intent_rows=rows(none),
+        no_intent_leading=rows(none & (position < first[owner])),
+        no_intent_interior=rows(none & (position > first[owner])
+                                & (position < last[owner])),
+        no_intent_trailing=rows(none & (position > last[owner])
+                                & (position >= first[owner])),
+        scored_sec=seconds(committed)[:, 0],
+        weight_total_sec=seconds(np.ones(len(owner), dtype=bool))[:, 0],
         clamped_sec=clamped,
-        boundary=_empty_boundary(spec.labels),
-        flicker=_empty_flicker(),
+        observed=np.bincount(owner[committed] * n_intents + intent[committed],
+                             minlength=n_tracks * n_intents)
+                   .reshape(n_tracks, n_intents) > 0,
+        boundary=boundary,
+        flicker=flicker,
     )
 
-    for intent, label, weight in zip(track.intents, labels, weights):
-        if label not in score.counts:
-            raise ValueError(f"unknown label {label!r} in space {space!r} "
-                             f"(track {track.track_id})")
-        score.weight_total_sec += weight
-        if intent == NO_INTENT:
-            score.no_intent_sec += weight
-            score.no_intent_rows += 1
-            score.no_intent_by_label[label] += weight
-            continue
-        if intent not in INTENT_TO_LABELS:
-            raise ValueError(f"unknown intent {intent!r} (track {track.track_id})")
-        score.observed_intents.add(intent)
-        score.scored_sec += weight
-        score.confusion[intent][label] += weight
-        claimed = INTENT_TO_LABELS[intent][space]
-        if label in claimed:
-            score.counts[label][0] += weight                    # tp
-        else:
-            score.counts[label][2] += weight                    # fn
-            share = weight / len(claimed)
-            for target in claimed:
-                score.counts[target][1] += share                # fp, split if ambiguous
-
-    committed = [index for index, intent in enumerate(track.intents)
-                 if intent != NO_INTENT]
-    first, last = (committed[0], committed[-1]) if committed else (len(track.intents), -1)
-    for index, intent in enumerate(track.intents):
-        if intent != NO_INTENT:
-            continue
-        if index < first:
-            score.no_intent_leading += 1
-        elif index > last:
-            score.no_intent_trailing += 1
-        else:
-            score.no_intent_interior += 1
-
-    truth = label_boundaries(track.times, labels)
-    truth_times = [t for t, _ in truth]
-    truth_by_label = {label: [t for t, new in truth if new == label]
-                      for label in spec.labels}
-
-    # Both streams carry (instant, claimed labels), so the typed split below is
-    # written once.  The intent stream maps AFTER differencing, the class stream
-    # maps BEFORE it -- that difference is the whole point (see STREAM_ORDER).
-    streams = {
-        "intent": [(t, INTENT_TO_LABELS[intent][space])
-                   for t, intent in intent_changes(track.times, track.intents)],
-        "class": class_changes(track.times, track.intents, space),
-    }
 
-    for stream, changes in streams.items():
-        change_times = [t for t, _ in changes]
-        buckets = typed_predictions(changes, truth_by_label)
-        for tolerance in TOLERANCES_SEC:
-            cell = score.boundary[stream][tolerance]
-            cell["overall"] = {
-                "n_truth": len(truth_times),
-                "n_pred": len(change_times),
-                "matched": match_events(truth_times, change_times, tolerance),
-            }
-            for label in spec.labels:
-                cell["by_type"][label] = {
-                    "n_truth": len(truth_by_label[label]),
-                    "n_pred": len(buckets[label]),
-                    "matched": match_events(truth_by_label[label],
-                                            buckets[label], tolerance),
-                }
-            score.flicker[stream][tolerance] = len(
-                flicker_instants(change_times, truth_times, tolerance))
-    return score
+def score_track(track: TrackBeats, space: str) -> Score:
+    """Score one track in one label space."""
+    return score_columns([track], space).score(0)
 
 
 def aggregate(scores: list[Score]) -> Score:
@@ -878,14 +1159,14 @@ def evaluate(tracks: list[TrackBeats], worst: int = WORST_SONGS) -> dict:
     }
 
     corpus_by_space: dict[str, Score] = {}
-    beat_intervals: list[float] = []
-    for track in tracks:
-        beat_intervals.extend(
-            track.times[i + 1] - track.times[i] for i in range(len(track.times) - 1))
+    beat_intervals = np.concatenate(
+        [np.diff(np.asarray(track.times, dtype=np.float64)) for track in tracks]
+        or [np.zeros(0)])
 
     for space in SPACES:
-        songs = [score_track(track, space) for track in tracks]
-        corpus = corpus_by_space[space] = aggregate(songs)
+        columns = score_columns(tracks, space)
+        songs = [columns.score(index) for index in range(len(tracks))]
+        corpus = corpus_by_space[space] = columns.total()
         ranked = sorted(songs, key=lambda score: (score.macro_f1, score.track_id))
         per_song = [_song_entry(score) for score in songs]
         result["spaces"][space] = {
@@ -934,7 +1215,7 @@ def evaluate(tracks: list[TrackBeats], worst: int = WORST_SONGS) -> dict:
             if reference.weight_total_sec > 0 else 0.0),
         "clamped_sec": _round(reference.clamped_sec, 3),
         "median_beat_interval_sec": _round(
-            statistics.median(beat_intervals) if beat_intervals else 0.0),
+            np.median(beat_intervals) if len(beat_intervals) else 0.0),
     }
     return result
 
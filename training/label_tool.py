@@ -6,7 +6,9 @@ is a browser question rather than a server one, so it is answered in the page: a
 dropdown of the outputs the browser can see, applied with `setSinkId` and
 remembered in `localStorage`, so the owner picks his headphones once. A chip
 names the device currently in use. The track is decoded once with ffmpeg into a waveform envelope and a
-spectral-flux curve, so the beat starts a boundary should land on are visible
+spectral-flux curve -- kept under `<corpus>/label_analysis/` by the audio's
+digest, so reopening a track reads them back instead of decoding it again --
+so the beat starts a boundary should land on are visible
 rather than guessed; play the audio, click the timeline to seek, and press "mark
 boundary" to cut a section at the playhead, with the major/minor toggle saying
 how strong that transition is. Each section gets a row in the table with a label
@@ -56,7 +58,10 @@ The committed shape is the corpus's own section shape plus one key::
 **A track is identified by its bytes, not by its filename, and that decides the
 `id`.** Commit hashes the audio and looks it up in the corpus's own
 `checksums.sha256` (falling back to hashing only same-size files in `audio/`,
-since that record is written by a validation run and can lag the downloader). If
+since that record is written by a validation run and can lag the downloader).
+Whatever gets hashed is remembered in `audio_digests.json` beside the corpus,
+keyed by path and trusted while size, mtime and inode still match, so a
+relaunch hashes nothing it has seen before. If
 the corpus already holds this recording, the label is filed under the **native**
 id and nothing is copied -- `<native>.hand.json` sits beside the published entry
 for that track and takes precedence over it. Only genuinely new audio gets a
@@ -110,7 +115,9 @@ import os
 import re
 import shutil
 import subprocess
+import sys
 import time
+import zipfile
 from pathlib import Path
 
 import dash
@@ -119,6 +126,11 @@ import numpy as np
 import plotly.graph_objects as go
 from dash import ALL, Input, Output, Patch, State, callback_context, dcc, html
 
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from audio_digests import DIGEST_INDEX_FILE, DigestIndex  # noqa: E402
+
 LABELS = ['intro', 'altintro', 'buildup', 'breakdown', 'bridge', 'drop',
           'cooldown', 'outro', 'altoutro']
 STRENGTHS = ['major', 'minor']
@@ -146,6 +158,9 @@ FRAME = 1024
 HOP = 512
 FFT_CHUNK = 512
 TICK_MS = 250
+# Points per trace for the visible span; a zoom asks for the pyramid level
+# that fits, plus a view's width either side so a pan has data to land on.
+VIEW_POINTS = 2000
 NUDGES = (-0.5, -0.1, 0.1, 0.5)
 TIME_DECIMALS = 3
 
@@ -156,6 +171,8 @@ HAND_LABEL_SCHEMA = 1
 HAND_ID_PREFIX = 'hand-'
 HAND_ID_LENGTH = 12
 CHECKSUMS_FILE = 'checksums.sha256'
+ANALYSIS_DIR_NAME = 'label_analysis'
+ANALYSIS_SCHEMA = 1
 ARTIST_SEPARATOR = ' - '
 _YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
 
@@ -177,12 +194,8 @@ def labels_path(audio_path: str) -> Path:
     return tmp_labels_dir() / f'{Path(audio_path).name}.labels.csv'
 
 
-def audio_digest(audio_path: str) -> str:
-    digest = hashlib.sha256()
-    with open(audio_path, 'rb') as handle:
-        for chunk in iter(lambda: handle.read(1 << 20), b''):
-            digest.update(chunk)
-    return digest.hexdigest()
+def digest_index_path() -> Path:
+    return corpus_dir() / DIGEST_INDEX_FILE
 
 
 def read_checksums(path: Path) -> dict:
@@ -197,20 +210,27 @@ def read_checksums(path: Path) -> dict:
     return recorded
 
 
-def locate_in_corpus(digest: str, size: int) -> Path:
+def locate_in_corpus(digest: str, size: int,
+                     index: DigestIndex | None = None) -> Path:
     """The corpus file holding exactly these bytes, or None.
 
     Identity is content, never a filename: the same recording arrives here under
-    whatever the owner called it. `checksums.sha256` is the cheap path because it
-    is the corpus's own record of what it already has. It can be stale -- it is
-    written by a validation run, not by the downloader -- so a miss there still
-    falls through to the size scan, which only has to hash files that could
-    possibly match. A missed match would copy audio the corpus already holds and
-    would file the labels under a new id instead of overriding the published
-    track, which is the expensive mistake here; a redundant hash is not.
+    whatever the owner called it. The digest index is asked first, then
+    `checksums.sha256`, the corpus's own record of what it already has. Either
+    can be stale -- the checksums are written by a validation run, not by the
+    downloader -- so a miss still falls through to the size scan, which only has
+    to hash files that could possibly match and records what it hashes. A
+    missed match would copy audio the corpus already holds and would file the
+    labels under a new id instead of overriding the published track, which is
+    the expensive mistake here; a redundant hash is not.
     """
     try:
         audio = corpus_dir() / 'audio'
+        if index is None:
+            index = DigestIndex(digest_index_path())
+        found = index.find(digest, audio)
+        if found is not None:
+            return found
         checksums = corpus_dir() / CHECKSUMS_FILE
         if checksums.exists():
             name = read_checksums(checksums).get(digest)
@@ -220,10 +240,13 @@ def locate_in_corpus(digest: str, size: int) -> Path:
                     return found
         for candidate in sorted(audio.glob('*')):
             if (candidate.is_file() and candidate.stat().st_size == size
-                    and audio_digest(str(candidate)) == digest):
+                    and index.digest(candidate) == digest):
                 return candidate
     except OSError:
         return None
+    finally:
+        if index is not None:
+            index.save()
     return None
 
 
@@ -236,8 +259,9 @@ def resolve_identity(audio_path: str) -> tuple:
     splits hash the id and a rename must not move a track between train and val,
     and prefixed because new audio must never be mistakable for a downloaded row.
     """
-    digest = audio_digest(audio_path)
-    native = locate_in_corpus(digest, Path(audio_path).stat().st_size)
+    index = DigestIndex(digest_index_path())
+    digest = index.digest(audio_path)
+    native = locate_in_corpus(digest, Path(audio_path).stat().st_size, index)
     if native is not None:
         return native.stem, native
     return f'{HAND_ID_PREFIX}{digest[:HAND_ID_LENGTH]}', None
@@ -253,8 +277,6 @@ def default_title(audio_path: str) -> str:
 
 
 def corpus_dir() -> Path:
-    import sys
-
     here = str(Path(__file__).resolve().parent)
     if here not in sys.path:
         sys.path.insert(0, here)
@@ -342,8 +364,6 @@ def admit_track(identifier: str, audio: Path, labels: Path) -> tuple:
     belongs to that module, not here. Its absence is an ordinary state rather
     than an error: this tool ships before it and must keep working after.
     """
-    import sys
-
     here = str(Path(__file__).resolve().parent)
     if here not in sys.path:
         sys.path.insert(0, here)
@@ -626,16 +646,116 @@ def _spectral_flux(windows: np.ndarray) -> np.ndarray:
     return flux
 
 
+def _envelope(samples: np.ndarray, count: int) -> np.ndarray:
+    """Peak magnitude per FRAME window at every HOP, from per-hop peaks.
+
+    The windows overlap FRAME / HOP times, so taking each window's max reads
+    every sample that many times; a window's peak is the max of its hops'.
+    """
+    if FRAME % HOP:
+        windows = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+        return np.abs(windows[:count]).max(axis=1)
+    span = FRAME // HOP
+    hops = np.abs(samples[:(count + span - 1) * HOP]).reshape(-1, HOP).max(axis=1)
+    peaks = hops[:count].copy()
+    for offset in range(1, span):
+        np.maximum(peaks, hops[offset:offset + count], out=peaks)
+    return peaks
+
+
+def analyse(samples: np.ndarray) -> dict:
+    duration = len(samples) / DECODE_RATE
+    if len(samples) < FRAME:
+        samples = np.zeros(FRAME, dtype=np.float32)
+    windows = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
+    return {'duration': duration,
+            'envelope': _unit(_envelope(samples, len(windows))).astype(np.float32),
+            'flux': _unit(_spectral_flux(windows)).astype(np.float32)}
+
+
+def analysis_dir() -> Path:
+    return corpus_dir() / ANALYSIS_DIR_NAME
+
+
+def _analysis_key() -> str:
+    params = json.dumps({'schema': ANALYSIS_SCHEMA, 'rate': DECODE_RATE,
+                         'frame': FRAME, 'hop': HOP}, sort_keys=True)
+    return hashlib.sha256(params.encode('utf-8')).hexdigest()[:12]
+
+
+def analysis_path(audio_path: str) -> Path:
+    """Where this audio's envelope and flux are kept: named by its bytes and by
+    the analysis parameters, so a renamed copy finds it and a retuned
+    analysis does not."""
+    index = DigestIndex(digest_index_path())
+    digest = index.digest(audio_path)
+    index.save()
+    return analysis_dir() / f'{digest}.{_analysis_key()}.npz'
+
+
+def load_analysis(audio_path: str) -> tuple:
+    """The analysis and whether it came from the sidecar. A sidecar that cannot
+    be read is decoded over; one that cannot be written costs the next launch
+    a decode and nothing else."""
+    try:
+        path = analysis_path(audio_path)
+    except OSError:
+        return analyse(decode_mono(audio_path)), False
+    try:
+        with np.load(path) as saved:
+            return {'duration': float(saved['duration']),
+                    'envelope': saved['envelope'], 'flux': saved['flux']}, True
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        pass
+    analysis = analyse(decode_mono(audio_path))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(path.name + '.tmp')
+        with open(temp, 'wb') as handle:
+            np.savez(handle, **analysis)
+        os.replace(temp, path)
+    except OSError:
+        pass
+    return analysis, False
+
+
+def pyramid(times: np.ndarray, envelope: np.ndarray, flux: np.ndarray) -> list:
+    """`(times, envelope, flux)` at full resolution and then halved until a
+    level fits VIEW_POINTS. Peaks are kept, not averaged: a transient is the
+    thing a boundary is placed against."""
+    levels = [(times, envelope, flux)]
+    while len(levels[-1][0]) > VIEW_POINTS:
+        times, envelope, flux = levels[-1]
+        even = len(times) - len(times) % 2
+        levels.append((times[:even:2],
+                       np.maximum(envelope[:even:2], envelope[1:even:2]),
+                       np.maximum(flux[:even:2], flux[1:even:2])))
+    return levels
+
+
+def trace_points(track, x0: float | None = None, x1: float | None = None) -> tuple:
+    """The finest level with no more than VIEW_POINTS across `[x0, x1]`,
+    sliced to that span and one span's width either side."""
+    x0 = 0.0 if x0 is None else max(0.0, float(x0))
+    x1 = track.duration if x1 is None else float(x1)
+    width = max(x1 - x0, HOP / DECODE_RATE)
+    for chosen in track.levels:
+        times = chosen[0]
+        if np.searchsorted(times, x1) - np.searchsorted(times, x0) <= VIEW_POINTS:
+            break
+    start = max(0, int(np.searchsorted(times, x0 - width)) - 1)
+    stop = int(np.searchsorted(times, x1 + width)) + 1
+    return tuple(values[start:stop] for values in chosen)
+
+
 class Track:
     def __init__(self, audio_path: str):
-        samples = decode_mono(audio_path)
-        self.duration = len(samples) / DECODE_RATE
-        if len(samples) < FRAME:
-            samples = np.zeros(FRAME, dtype=np.float32)
-        windows = np.lib.stride_tricks.sliding_window_view(samples, FRAME)[::HOP]
-        self.times = np.arange(len(windows)) * HOP / DECODE_RATE
-        self.envelope = _unit(np.abs(windows).max(axis=1))
-        self.flux = _unit(_spectral_flux(windows))
+        analysis, self.cached = load_analysis(audio_path)
+        self.duration = analysis['duration']
+        self.envelope = analysis['envelope']
+        self.flux = analysis['flux']
+        self.times = np.arange(len(self.envelope)) * HOP / DECODE_RATE
+        self.levels = pyramid(self.times, self.envelope, self.flux)
 
 
 WAVE_MID, WAVE_HALF = 0.22, 0.19
@@ -693,22 +813,38 @@ def render_patch(track: Track, sections: list) -> Patch:
     return patched
 
 
+def zoom_patch(track: Track, view) -> Patch:
+    """The three signal traces at the resolution `view` (an x range, or None
+    for the whole track) can show, and nothing else."""
+    x0, x1 = view or (None, None)
+    times, envelope, flux = trace_points(track, x0, x1)
+    patched = Patch()
+    for index, values in enumerate((WAVE_MID + WAVE_HALF * envelope,
+                                    WAVE_MID - WAVE_HALF * envelope,
+                                    FLUX_BASE + FLUX_SPAN * flux)):
+        patched['data'][index]['x'] = times
+        patched['data'][index]['y'] = values
+    return patched
+
+
 def build_figure(track: Track, sections: list, beats: list = ()) -> go.Figure:
     """The whole figure, which is built on a page load and never on an edit.
 
     The waveform is two mirrored outlines rather than a filled band because
     scattergl draws no fill, and svg traces at this point count are too slow
-    to pan.
+    to pan. It opens on the whole track, so it carries the pyramid level that
+    fits; `zoom_patch` swaps in finer ones as the view narrows.
     """
     shapes, annotations = section_shapes(track, sections)
     figure = go.Figure()
+    times, envelope, flux = trace_points(track)
     for sign in (1.0, -1.0):
         figure.add_trace(go.Scattergl(
-            x=track.times, y=WAVE_MID + sign * WAVE_HALF * track.envelope,
+            x=times, y=WAVE_MID + sign * WAVE_HALF * envelope,
             mode='lines', line=dict(color='rgba(88,166,255,0.75)', width=1),
             hoverinfo='skip'))
     figure.add_trace(go.Scattergl(
-        x=track.times, y=FLUX_BASE + FLUX_SPAN * track.flux,
+        x=times, y=FLUX_BASE + FLUX_SPAN * flux,
         mode='lines', line=dict(color='rgba(63,185,80,0.9)', width=1),
         hoverinfo='skip'))
     for downbeat, height, size, alpha in ((0, 0.035, 9, 0.40),
@@ -914,6 +1050,21 @@ function (tick) {
 """.replace('SEEK_SLOP', str(SEEK_SLOP_PX))
 
 
+# The playhead is drawn with a relayout every tick, and a relayout is reported
+# as relayoutData like any other; only a change of x range goes to the server.
+VIEW_JS = """
+function (relayout) {
+    const none = window.dash_clientside.no_update;
+    if (!relayout) { return none; }
+    if (relayout['xaxis.autorange']) { return null; }
+    const range = relayout['xaxis.range']
+        || [relayout['xaxis.range[0]'], relayout['xaxis.range[1]']];
+    if (range[0] === undefined || range[1] === undefined) { return none; }
+    return [range[0], range[1]];
+}
+"""
+
+
 def audio_mimetype(audio_path: str) -> str:
     """Whatever the file is -- anything ffmpeg can decode is accepted here."""
     return mimetypes.guess_type(audio_path)[0] or 'application/octet-stream'
@@ -1008,6 +1159,7 @@ def build_app(audio_path: str, track: Track, beats: list = ()) -> dash.Dash:
             dcc.Store(id='sections', data=sections),
             dcc.Store(id='cursor', data=0.0),
             dcc.Store(id='sink-echo'),
+            dcc.Store(id='view'),
             dcc.Interval(id='tick', interval=TICK_MS),
         ], style={'background': DARK_BG, 'minHeight': '100vh',
                   'fontFamily': 'monospace'})
@@ -1076,6 +1228,21 @@ def build_app(audio_path: str, track: Track, beats: list = ()) -> dash.Dash:
     def render(sections):
         return build_rows(sections), render_patch(track, sections)
 
+    app.clientside_callback(
+        VIEW_JS,
+        Output('view', 'data'),
+        Input('timeline', 'relayoutData'),
+        prevent_initial_call=True,
+    )
+
+    @app.callback(
+        Output('timeline', 'figure', allow_duplicate=True),
+        Input('view', 'data'),
+        prevent_initial_call=True,
+    )
+    def zoom(view):
+        return zoom_patch(track, view)
+
     return app
 
 
@@ -1098,10 +1265,10 @@ def launch(audio: str, port: int = 8070) -> None:
             f'{labels_path(audio_path)} cannot be read: {error}\n'
             f'  fix or delete that line and relaunch — nothing was changed')
 
-    print(f'  decoding {Path(audio_path).name} ...')
+    print(f'  analysing {Path(audio_path).name} ...')
     track = Track(audio_path)
-    print(f'  {track.duration:.1f} s, {len(sections)} sections loaded from '
-          f'{labels_path(audio_path)}')
+    print(f'  {track.duration:.1f} s{" (cached analysis)" if track.cached else ""}, '
+          f'{len(sections)} sections loaded from {labels_path(audio_path)}')
     beats = beat_grid(audio_path)
     print(f'  beat grid: {len(beats)} beats' if beats
           else '  beat grid: none for this track')
@@ -0,0 +1,100 @@
+"""What beam pruning buys the online beat DBN, and what it costs in beats.
+
+    uv run python training/measure_beat_dbn.py TRACK [--seconds 120] [--beams 1e-6 1e-4 1e-2]
+
+Streams the track through the live beat front end and networks once, then
+decodes the same activations exactly and at each beam, one frame per call as
+``_BeatStage`` does.  For each beam it reports the time per frame, how many
+tempi stayed active, and how many of the exact decode's beats it kept.  A kept
+beat must land on the same frame.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for _path in (str(REPO_ROOT), str(REPO_ROOT / "training")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from measure_realtime import _load  # noqa: E402  (needs the path inserts above)
+
+DEFAULT_BEAMS = (1e-6, 1e-4, 1e-2)
+
+
+def activations_for(audio: np.ndarray) -> np.ndarray:
+    from lib.analyser.beat_features import HOP_SIZE, BeatFeatures
+    from lib.analyser.beat_rnn import BeatRNN
+
+    features = BeatFeatures()
+    rows = np.stack([features.push(audio[start:start + HOP_SIZE]).copy()
+                     for start in range(0, len(audio) - HOP_SIZE + 1, HOP_SIZE)])
+    return BeatRNN.from_madmom()(rows, reset=True)
+
+
+def decode(activations: np.ndarray, beam: float | None) -> dict:
+    from lib.analyser.beat_dbn import OnlineBeatDBN
+
+    dbn = OnlineBeatDBN(beam=beam)
+    beats, times_us, active = [], [], []
+    for index in range(len(activations)):
+        start = time.perf_counter()
+        beats.extend(dbn.process(activations[index:index + 1]))
+        times_us.append((time.perf_counter() - start) * 1e6)
+        active.append(dbn.active_tempi)
+    times_us = np.asarray(times_us)
+    return {
+        'beam': beam,
+        'beats': np.asarray(beats),
+        'mean_us': float(times_us.mean()),
+        'p99_us': float(np.percentile(times_us, 99)),
+        'active_tempi': float(np.mean(active)),
+        'bpm': dbn.bpm,
+    }
+
+
+def kept(exact: np.ndarray, pruned: np.ndarray) -> int:
+    return len(np.intersect1d(np.round(exact * 100).astype(np.int64),
+                              np.round(pruned * 100).astype(np.int64)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('track')
+    ap.add_argument('--seconds', type=float, default=120.0)
+    ap.add_argument('--beams', type=float, nargs='+', default=list(DEFAULT_BEAMS))
+    ap.add_argument('--out', default=None)
+    args = ap.parse_args()
+
+    audio = _load(args.track, args.seconds)
+    activations = activations_for(audio)
+    print(f'{len(activations)} frames ({len(audio) / 44100:.1f}s)\n')
+
+    exact = decode(activations, None)
+    rows = []
+    for run in [exact] + [decode(activations, beam) for beam in args.beams]:
+        run['kept'] = kept(exact['beats'], run['beats'])
+        run['extra'] = len(run['beats']) - run['kept']
+        label = 'exact' if run['beam'] is None else f'beam {run["beam"]:g}'
+        print(f'{label:12s} mean {run["mean_us"]:7.1f} us  p99 {run["p99_us"]:7.1f} us '
+              f'| {run["active_tempi"]:5.1f} tempi | kept {run["kept"]}/'
+              f'{len(exact["beats"])} beats, {run["extra"]} extra '
+              f'| {exact["mean_us"] / run["mean_us"]:4.2f}x | bpm {run["bpm"]:.1f}')
+        rows.append({key: value for key, value in run.items() if key != 'beats'})
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(
+            {'track': args.track, 'frames': len(activations), 'rows': rows},
+            indent=2) + '\n')
+        print(f'wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -169,6 +169,7 @@ async def _paced_loop(audio: np.ndarray, out_rows: list) -> dict:
         'loop': loop_row,
         'gpu_pass_ms': spread(pass_ms),
         'gpu_hop_ms': 1000.0 * section_chain.read_geometry().stream.hop_sec,
+        'gpu_encoder': section_chain.encoder_identity(stage.posteriors.stream),
         'gpu_passes': int(stage.passes),
         'gpu_faults': int(stage.faults),
         'gpu_overflows': int(stage.overflows),
@@ -189,7 +190,8 @@ def main() -> None:
     ap.add_argument('--seconds', type=float, default=120.0)
     ap.add_argument('--out', default=None)
     ap.add_argument('--front-end-only', action='store_true',
-                    help='time madmom alone and skip the paced loop (no GPU)')
+                    help='time madmom and the resampler alone and skip the paced '
+                         'loop (no GPU)')
     args = ap.parse_args()
 
     audio = _load(args.track, args.seconds)
@@ -203,6 +205,31 @@ def main() -> None:
     rhythm.process(audio[:BUFFER])
     rows.append(_stats('madmom rhythm', _time_each(audio, rhythm.process)))
 
+    # The same stage with madmom's own networks in place of the stacked port:
+    # the difference between these two rows is the port's per-buffer win.
+    from madmom.ml.nn import NeuralNetworkEnsemble, average_predictions
+    from madmom.models import BEATS_LSTM
+
+    from lib.analyser.madmom_rhythm import _BeatStage
+
+    networks = NeuralNetworkEnsemble.load(BEATS_LSTM, ensemble_fn=average_predictions)
+    unported = MadmomRhythm(SR, beat_stage=_BeatStage(rnn=networks))
+    unported.process(audio[:BUFFER])
+    rows.append(_stats('  with madmom networks', _time_each(audio, unported.process)))
+
+    from lib.analyser.mert_stream import StreamingResampler
+
+    resampler = StreamingResampler(SR)
+    rows.append(_stats('mert resampler', _time_each(audio, resampler.push)))
+
+    import tempfile
+    from lib.flight_recorder import FlightRecorder
+
+    with tempfile.TemporaryDirectory() as scratch:
+        recorder = FlightRecorder(Path(scratch) / 'flight.f32', SR, BUFFER)
+        rows.append(_stats('flight recorder write', _time_each(audio, recorder.write)))
+        recorder.close()
+
     paced = None
     if not args.front_end_only:
         print(f'\npacing {args.seconds:.0f}s of audio through the production '
@@ -50,6 +50,7 @@ class DecodeParams:
     floor_bars: tuple | None = None
     outro_escape: float = DEFAULT_OUTRO_ESCAPE
     temperature: float = DEFAULT_TEMPERATURE
+    early_commit: bool = False
 
     def __post_init__(self) -> None:
         if self.floor_bars is not None and not isinstance(self.floor_bars, tuple):
@@ -98,7 +99,8 @@ class FixedLagViterbi:
                  boundary_ref: float = DEFAULT_BOUNDARY_REF,
                  floor_scale: float = 1.0,
                  floor_bars=None,
-                 outro_escape: float = DEFAULT_OUTRO_ESCAPE) -> None:
+                 outro_escape: float = DEFAULT_OUTRO_ESCAPE,
+                 early_commit: bool = False) -> None:
         if int(lag_bars) < 0:
             raise ValueError(f"lag_bars must be >= 0, got {lag_bars}")
         if float(floor_scale) <= 0.0:
@@ -124,6 +126,7 @@ class FixedLagViterbi:
         self.boundary_ref = float(boundary_ref)
         self.floor_scale = float(floor_scale)
         self.outro_escape = float(outro_escape)
+        self.early_commit = bool(early_commit)
         self.floor_bars = tuple(floor_bars) if floor_bars is not None else None
 
         hazard = np.asarray(priors.hazard, dtype=np.float64)
@@ -192,6 +195,10 @@ class FixedLagViterbi:
         self._cold_initial = np.full(n_states, -np.inf, dtype=np.float64)
         self._cold_initial[self._entry_state] = (self.priors.log_initial
                                                  + self._entry_bonus)
+        self._identity = np.arange(n_states, dtype=np.int64)
+        self._row_offsets = np.arange(self.lag_bars, dtype=np.int64)[:, None] \
+            * n_states
+        self._gather = np.empty((self.lag_bars, n_states), dtype=np.int64)
 
     ESCAPE_TARGETS = ("breakdown", "drop")
 
@@ -229,7 +236,20 @@ class FixedLagViterbi:
 
     def reset(self) -> None:
         self._delta = None
-        self._psi: list = [None] * (self.lag_bars + 1)
+        n_states = len(self._state_class)
+        if self.early_commit:
+            # Row r holds, for every state, the state its best path was in at
+            # bar ``_bars - rows + r``: one gather per bar keeps it current,
+            # so the convergence test reads every live path's history without
+            # walking it.  Two buffers, because a gather cannot write over the
+            # rows it reads.
+            self._rows = np.empty((2, self.lag_bars + 1, n_states), dtype=np.int64)
+            self._side = 0
+        else:
+            # The fixed lag commits one bar per push and needs only that bar's
+            # row, so it keeps the backpointers and walks them at commit.
+            self._back = np.empty((self.lag_bars + 1, n_states), dtype=np.int64)
+        self._held = 0
         self._bars = 0
         self._next_commit = 0
         self._log_initial = self._cold_initial.copy()
@@ -282,20 +302,30 @@ class FixedLagViterbi:
 
     @property
     def backtrace_rows(self) -> int:
-        return sum(1 for entry in self._psi if entry is not None)
+        return self._held
 
-    def _remember(self, bar: int, back: np.ndarray) -> None:
-        self._psi[bar % len(self._psi)] = (bar, back)
+    @property
+    def _lineage(self) -> np.ndarray:
+        return self._rows[self._side, :self._held]
 
-    def _recall(self, bar: int) -> np.ndarray:
-        entry = self._psi[bar % len(self._psi)]
-        if entry is None or entry[0] != bar:
-            raise RuntimeError(
-                f"bar {bar}'s backtrace has been evicted from a ring of "
-                f"{len(self._psi)} -- the commit rule reached further back than "
-                f"the fixed lag allows, which means a decision was about to be "
-                f"read off whatever the modulo landed on")
-        return entry[1]
+    def _remember(self, bar: int, back: np.ndarray) -> None:
+        if not self.early_commit:
+            self._back[bar % len(self._back)] = back
+            self._held = min(self._held, self.lag_bars) + 1 if bar else 1
+            return
+        held = self._held if bar else 0
+        kept = min(held, self.lag_bars)
+        source = self._rows[self._side]
+        self._side = 1 - self._side
+        target = self._rows[self._side]
+        if kept:
+            # Every held row in one flat gather: a 2-D take costs more than
+            # the walk it replaces at the lags this runs at.
+            index = np.add(self._row_offsets[:kept], back,
+                           out=self._gather[:kept])
+            source[held - kept:held].reshape(-1).take(index, out=target[:kept])
+        target[kept] = self._identity
+        self._held = kept + 1
 
     def push(self, posterior, boundary=None) -> list:
         emission = self._emission(posterior)
@@ -366,20 +396,57 @@ class FixedLagViterbi:
 
     def _commit_due(self) -> list:
         target = self._bars - 1 - self.lag_bars
+        if self.early_commit:
+            target = max(target, self._converged_through())
         if target < self._next_commit:
             return []
         return self._commit_through(target)
 
+    def _converged_through(self) -> int:
+        """The newest bar every surviving path already agrees on.
+
+        No later bar can change a state all live paths pass through, so it is
+        the decision the fixed lag would reach -- only sooner.
+        """
+        alive = np.isfinite(self._delta)
+        if not alive.any():
+            return self._next_commit - 1
+        first = self._next_commit - (self._bars - self._held)
+        states = self._lineage[first:, alive]
+        agreed = (states == states[:, :1]).all(axis=1)
+        return self._next_commit - 1 + (len(agreed) if agreed.all()
+                                        else int(agreed.argmin()))
+
+    def _ancestors(self, target: int):
+        """For bars ``_next_commit..target``, the state every current path was in."""
+        first = self._next_commit - (self._bars - self._held)
+        if first < 0:
+            raise RuntimeError(
+                f"bar {self._next_commit}'s lineage is not among the "
+                f"{self._held} rows held -- the commit rule reached further "
+                f"back than the fixed lag allows, which means a decision was "
+                f"about to be read off a path that is no longer tracked")
+        if self.early_commit:
+            return self._lineage[first:first + target + 1 - self._next_commit]
+        ring = self._back
+        ancestor = self._identity
+        for bar in range(self._bars - 1, target, -1):
+            ancestor = ring[bar % len(ring)].take(ancestor)
+        chain = [ancestor]
+        for bar in range(target, self._next_commit, -1):
+            ancestor = ring[bar % len(ring)].take(ancestor)
+            chain.append(ancestor)
+        return chain[::-1]
+
     def _commit_through(self, target: int) -> list:
-        ancestors = self._ancestors(self._bars - 1, self._next_commit)
         best_state = int(np.argmax(self._delta))
+        ancestors = self._ancestors(target)
         decisions: list = []
-        for bar in range(self._next_commit, target + 1):
-            state = int(ancestors[bar - self._next_commit][best_state])
-            index = int(self._state_class[state])
+        for bar, row in enumerate(ancestors, start=self._next_commit):
+            index = int(self._state_class[row[best_state]])
             decisions.append(Decision(bar, index, self.classes[index]))
 
-        final_ancestor = ancestors[target - self._next_commit]
+        final_ancestor = ancestors[-1]
         committed_class = int(self._state_class[final_ancestor[best_state]])
         self._delta = np.where(
             self._state_class[final_ancestor] == committed_class,
@@ -387,14 +454,6 @@ class FixedLagViterbi:
         self._next_commit = target + 1
         return decisions
 
-    def _ancestors(self, frm: int, to: int) -> list:
-        ancestor = np.arange(len(self._state_class), dtype=np.int64)
-        chain = [ancestor]
-        for bar in range(frm, to, -1):
-            ancestor = self._recall(bar)[ancestor]
-            chain.append(ancestor)
-        return chain[::-1]
-
 
 def segments(decisions) -> list:
     spans: list = []
@@ -501,6 +560,7 @@ def decode_track(posterior_npz, beat_csv, params: DecodeParams | None = None, *,
         boundary_ref=params.boundary_ref,
         floor_scale=params.floor_scale,
         floor_bars=params.floor_bars,
-        outro_escape=params.outro_escape)
+        outro_escape=params.outro_escape,
+        early_commit=params.early_commit)
     decisions = decoder.decode(posteriors, boundary)
     return [(float(edges[d.bar]), d.label) for d in decisions]
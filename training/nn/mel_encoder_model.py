@@ -0,0 +1,88 @@
+"""``MelEncoderNet`` -- the CPU student that stands in for MERT's cells."""
+from __future__ import annotations
+
+import torch
+from torch import nn
+
+from .model import FREQ_POOL, freq_pool_blocks
+
+# The body's ceiling; the output projection is priced separately because it
+# scales with the layers x dim the section head reads, not with a design choice.
+PARAM_BUDGET = 600_000
+
+
+class MelEncoderNet(nn.Module):
+    def __init__(self, out_dim: int, n_mels: int = 64,
+                 conv_channels: tuple = (16, 32, 32), temporal_channels: int = 160,
+                 temporal_layers: int = 3, dropout: float = 0.0) -> None:
+        super().__init__()
+        if temporal_layers < 1:
+            raise ValueError(f"temporal_layers must be >= 1, got {temporal_layers}")
+
+        blocks, freq = freq_pool_blocks(n_mels, conv_channels)
+
+        self.out_dim = int(out_dim)
+        self.n_mels = int(n_mels)
+        self.conv_channels = tuple(int(channels) for channels in conv_channels)
+        self.temporal_channels = int(temporal_channels)
+        self.temporal_layers = int(temporal_layers)
+        self.freq_out = freq
+        self.feature_dim = int(conv_channels[-1]) * freq
+
+        self.conv = nn.Sequential(*blocks)
+        temporal = []
+        width = self.feature_dim
+        for layer in range(self.temporal_layers):
+            # Dilation doubles per layer: ~0.35 s of context either side at a
+            # 20 ms hop, well inside the stream's margin.
+            temporal += [
+                nn.Conv1d(width, temporal_channels, kernel_size=5,
+                          padding=2 * 2 ** layer, dilation=2 ** layer, bias=False),
+                nn.BatchNorm1d(temporal_channels),
+                nn.GELU(),
+            ]
+            width = temporal_channels
+        self.temporal = nn.Sequential(*temporal)
+        self.dropout = nn.Dropout(float(dropout))
+        self.head = nn.Linear(temporal_channels, self.out_dim)
+
+    def arch(self) -> dict:
+        return {
+            "out_dim": self.out_dim,
+            "n_mels": self.n_mels,
+            "conv_channels": list(self.conv_channels),
+            "temporal_channels": self.temporal_channels,
+            "temporal_layers": self.temporal_layers,
+        }
+
+    def body_parameters(self) -> int:
+        return sum(p.numel() for name, p in self.named_parameters()
+                   if p.requires_grad and not name.startswith("head."))
+
+    def forward(self, mel: torch.Tensor) -> torch.Tensor:
+        if mel.dim() != 3:
+            raise ValueError(
+                f"mel must be [batch, time, n_mels], got {tuple(mel.shape)}"
+            )
+
+        conv_features = self.conv(mel.unsqueeze(1))
+        # flatten, not reshape: reading .shape freezes the time axis under ONNX tracing.
+        stacked = conv_features.permute(0, 1, 3, 2).flatten(1, 2)
+        temporal = self.dropout(self.temporal(stacked))
+        return self.head(temporal.transpose(1, 2))
+
+
+class RawCells(nn.Module):
+    """The exported graph: standardised predictions mapped back through the affine."""
+
+    def __init__(self, model: MelEncoderNet, mean, std) -> None:
+        super().__init__()
+        self.model = model
+        self.register_buffer("mean", torch.as_tensor(mean, dtype=torch.float32).reshape(-1))
+        self.register_buffer("std", torch.as_tensor(std, dtype=torch.float32).reshape(-1))
+
+    def forward(self, mel: torch.Tensor) -> torch.Tensor:
+        return self.model(mel) * self.std + self.mean
+
+
+__all__ = ["MelEncoderNet", "RawCells", "PARAM_BUDGET", "FREQ_POOL"]
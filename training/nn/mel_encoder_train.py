@@ -0,0 +1,576 @@
+"""Distil ``MelEncoderNet`` onto the MERT cells and export it for the live chain.
+
+Targets are the pooled cells the GPU chain already wrote down: the cell cache's
+``mertcells.npz`` recordings beside the corpus audio (the live path's own
+cells) and, for tracks never simulated, the F3 stream sidecars under
+``features_stream/``.  A recording wins over a sidecar for the same track.
+Both index cells from the start of the audio, which holds for a chain that was
+reset once at the top of the song -- the simulation's, and the offline
+extractor's.
+
+The student never sees a cell boundary: it emits one row per mel frame, and
+the loss pools those rows into cells by frame time exactly as
+``CellAccumulator`` does live, then scores them in the affine's standardised
+space.  Cells within ``CONTEXT_SEC`` of a crop edge are not scored, so every
+scored frame saw the context it will see inside a live pass.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset
+
+from .mel_encoder_model import PARAM_BUDGET, MelEncoderNet, RawCells
+from .train import (
+    BEST_CHECKPOINT,
+    CONFIG_FILE,
+    MODELS_DIR,
+    REPORT_FILE,
+    build_loader,
+    config_fingerprint,
+    seed_everything,
+    weight_hash,
+)
+
+from build_training_table import default_data_dir  # noqa: E402
+from lib.analyser import mel_encoder as E  # noqa: E402
+
+MODEL_VERSION = "mel_encoder_v1"
+AUDIO_CACHE_DIR = "audio24k"
+
+CROP_SEC = 12.0
+CONTEXT_SEC = 1.0
+GAIN_DB = 6.0
+
+INPUT_NAME = E.INPUT_NAME
+OUTPUT_NAME = E.OUTPUT_NAME
+BATCH_AXIS = "batch"
+TIME_AXIS = "time"
+
+
+class CellSource(NamedTuple):
+    youtube_id: str
+    audio: Path
+    cells: np.ndarray
+    features: np.ndarray
+    origin: str
+
+
+def f3_dir(data_dir, geometry) -> Path:
+    tag = "-".join(str(int(layer)) for layer in geometry.layers)
+    return (Path(data_dir) / "features_stream"
+            / f"{geometry.model_id.split('/')[-1]}_L{tag}"
+              f"_F{geometry.margin_sec:g}_hop{geometry.hop_sec:g}")
+
+
+def cell_cache_sources(audio_dir, geometry) -> list:
+    from simulate.cell_cache import SUFFIX
+
+    sources = []
+    for path in sorted(Path(audio_dir).glob(f"*.{SUFFIX}")):
+        with np.load(path) as archive:
+            key = json.loads(str(archive["key"]))
+            if (key["encoder"]["layers"] != [int(layer) for layer in geometry.layers]
+                    or key["framing"]["label_frame_sec"] != geometry.label_frame_sec):
+                continue
+            cells = np.asarray(archive["cell_index"], dtype=np.int64)
+            features = np.asarray(archive["cell_features"], dtype=np.float16)
+        audio = path.with_name(path.name[:-len(f".{key['decode']}.{SUFFIX}")])
+        sources.append(CellSource(audio.stem, audio, cells, features, "cell_cache"))
+    return sources
+
+
+def f3_sources(data_dir, geometry) -> list:
+    sources = []
+    for path in sorted(f3_dir(data_dir, geometry).glob("*.npz")):
+        audio = Path(data_dir) / "audio" / f"{path.stem}.mp3"
+        if not audio.exists():
+            continue
+        with np.load(path) as archive:
+            if float(archive["label_frame_sec"]) != geometry.label_frame_sec:
+                continue
+            emb = np.asarray(archive["emb"])
+        features = emb.reshape(len(emb), -1).astype(np.float16)
+        sources.append(CellSource(path.stem, audio, np.arange(len(emb)),
+                                  features, "f3"))
+    return sources
+
+
+def load_sources(data_dir, geometry) -> dict:
+    found = {source.youtube_id: source for source in f3_sources(data_dir, geometry)}
+    found.update((source.youtube_id, source) for source in
+                 cell_cache_sources(Path(data_dir) / "audio", geometry))
+    return found
+
+
+def encoder_audio(source: CellSource, cache_dir) -> np.ndarray:
+    """The track at 24 kHz through the live resampler, cached beside the run."""
+    from lib.analyser.mert_stream import StreamingResampler
+    from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
+    from simulate.fake_audio_client import FileAudioClient
+
+    path = Path(cache_dir) / f"{source.youtube_id}.npy"
+    if path.exists() and path.stat().st_mtime > source.audio.stat().st_mtime:
+        return np.load(path, mmap_mode="r")
+    client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, str(source.audio))
+    client.start_streams()
+    resampler = StreamingResampler(SAMPLE_RATE, E.ENCODER_SAMPLE_RATE)
+    pieces, remaining = [], client.total_samples
+    while not client.exhausted:
+        block = client.read()[:remaining]
+        remaining -= len(block)
+        pieces.append(resampler.push(block))
+    audio = np.concatenate(pieces + [resampler.flush()])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(path, audio)
+    return audio
+
+
+def cells_per_crop(label_frame_sec: float, crop_sec: float = CROP_SEC,
+                   context_sec: float = CONTEXT_SEC) -> int:
+    return int(math.floor((crop_sec - 2.0 * context_sec) / label_frame_sec)) - 1
+
+
+class _Track(NamedTuple):
+    audio: np.ndarray
+    targets: np.ndarray
+    mask: np.ndarray
+
+
+class CellWindowDataset(Dataset):
+    """Fixed-length crops: ``(mel, frame_cell, targets, mask)``.
+
+    ``frame_cell`` maps each mel frame to the crop's scored cell it pools into,
+    or -1; ``targets`` are those cells standardised through the affine.
+    Targets stay float16, the precision the stream rounds every cell to.
+    """
+
+    def __init__(self, sources: list, audio: dict, *, mean, std,
+                 label_frame_sec: float, crop_sec: float = CROP_SEC,
+                 context_sec: float = CONTEXT_SEC, augment: bool = False,
+                 seed: int = 0) -> None:
+        self.label_frame_sec = float(label_frame_sec)
+        self.crop_samples = int(round(crop_sec * E.ENCODER_SAMPLE_RATE))
+        self.context_sec = float(context_sec)
+        self.n_cells = cells_per_crop(label_frame_sec, crop_sec, context_sec)
+        if self.n_cells < 1:
+            raise ValueError(f"a {crop_sec:g} s crop with {context_sec:g} s of "
+                             f"context either side scores no "
+                             f"{label_frame_sec:g} s cell")
+        self.stride = int(round((crop_sec - 2.0 * context_sec)
+                                * E.ENCODER_SAMPLE_RATE))
+        self.augment = bool(augment)
+        self.seed = int(seed)
+        self.epoch = 0
+        mean = np.asarray(mean, dtype=np.float32).reshape(-1)
+        std = np.asarray(std, dtype=np.float32).reshape(-1)
+        self.ids = [source.youtube_id for source in sources]
+        self._tracks = []
+        self._windows = []
+        for number, source in enumerate(sources):
+            targets = np.zeros((int(source.cells.max()) + 1, len(mean)),
+                               dtype=np.float16)
+            targets[source.cells] = (source.features.astype(np.float32) - mean) / std
+            mask = np.zeros(len(targets), dtype=bool)
+            mask[source.cells] = True
+            track = _Track(audio[source.youtube_id], targets, mask)
+            self._tracks.append(track)
+            windows = max(1, (len(track.audio) - self.crop_samples) // self.stride + 1)
+            self._windows += [(number, k * self.stride) for k in range(windows)]
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = int(epoch)
+
+    def _rng(self, index: int, salt: int) -> np.random.Generator:
+        return np.random.default_rng((self.seed, self.epoch, index, salt))
+
+    def window_start(self, index: int) -> int:
+        number, start = self._windows[index]
+        if not self.augment:
+            return start
+        room = len(self._tracks[number].audio) - self.crop_samples - start
+        return start + int(self._rng(index, 0).integers(0, max(1, min(self.stride, room))))
+
+    def __getitem__(self, index: int) -> tuple:
+        number, _ = self._windows[index]
+        track = self._tracks[number]
+        start = self.window_start(index)
+        segment = np.zeros(self.crop_samples, dtype=np.float32)
+        piece = np.asarray(track.audio[start:start + self.crop_samples], dtype=np.float32)
+        segment[:len(piece)] = piece
+        if self.augment:
+            segment *= np.float32(10.0 ** (self._rng(index, 1).uniform(-GAIN_DB, GAIN_DB)
+                                           / 20.0))
+        mel = E.log_mel(segment)
+        times = E.mel_frame_times(len(mel), offset_samples=start)
+        first = math.ceil((start / E.ENCODER_SAMPLE_RATE + self.context_sec)
+                          / self.label_frame_sec)
+        frame_cell = np.floor(times / self.label_frame_sec).astype(np.int64) - first
+        frame_cell[(frame_cell < 0) | (frame_cell >= self.n_cells)] = -1
+
+        targets = np.zeros((self.n_cells, track.targets.shape[1]), dtype=np.float32)
+        mask = np.zeros(self.n_cells, dtype=bool)
+        held = track.targets[first:first + self.n_cells]
+        targets[:len(held)] = held
+        mask[:len(held)] = track.mask[first:first + self.n_cells]
+        return (torch.from_numpy(mel), torch.from_numpy(frame_cell),
+                torch.from_numpy(targets), torch.from_numpy(mask))
+
+
+def pool_cells(frames: torch.Tensor, frame_cell: torch.Tensor, n_cells: int) -> tuple:
+    """``CellAccumulator``'s mean, batched: ``[B, T, F]`` rows -> ``[B, C, F]``."""
+    onehot = F.one_hot(frame_cell.clamp(min=0), n_cells).to(frames.dtype)
+    onehot = onehot * (frame_cell >= 0).unsqueeze(-1).to(frames.dtype)
+    counts = onehot.sum(dim=1)
+    sums = onehot.transpose(1, 2) @ frames
+    return sums / counts.clamp(min=1.0).unsqueeze(-1), counts
+
+
+def cell_loss(frames, frame_cell, targets, mask) -> tuple:
+    pooled, counts = pool_cells(frames, frame_cell, targets.shape[1])
+    scored = mask & (counts > 0)
+    if not bool(scored.any()):
+        return frames.sum() * 0.0, pooled, scored
+    return F.mse_loss(pooled[scored], targets[scored]), pooled, scored
+
+
+def evaluate(model, loader, device) -> dict:
+    model.eval()
+    squared = 0.0
+    values = 0
+    cosines = []
+    with torch.no_grad():
+        for mel, frame_cell, targets, mask in loader:
+            mel, frame_cell = mel.to(device), frame_cell.to(device)
+            targets, mask = targets.to(device), mask.to(device)
+            _, pooled, scored = cell_loss(model(mel), frame_cell, targets, mask)
+            got, want = pooled[scored], targets[scored]
+            squared += float(((got - want) ** 2).sum())
+            values += int(want.numel())
+            cosines.append(F.cosine_similarity(got, want, dim=-1).cpu().numpy())
+    cosine = np.concatenate(cosines) if cosines else np.zeros(0)
+    return {
+        "mse": squared / max(values, 1),
+        "cosine": float(cosine.mean()) if cosine.size else 0.0,
+        "cosine_p05": float(np.percentile(cosine, 5)) if cosine.size else 0.0,
+        "cells": int(cosine.size),
+    }
+
+
+def _split_sources(data_dir: Path, sources: dict, smoke_tracks: int) -> dict:
+    from .dataset import make_splits
+
+    splits = make_splits(data_dir, write=False)
+    chosen = {}
+    for name in ("train", "val"):
+        ids = sorted(youtube_id for youtube_id in splits[name] if youtube_id in sources)
+        chosen[name] = ids if smoke_tracks <= 0 else ids[:smoke_tracks]
+    return chosen
+
+
+def train(config: dict) -> dict:
+    from lib import section_chain
+    from lib.analyser.mert_stream import load_input_affine
+
+    data_dir = Path(config["data_dir"])
+    run_dir = data_dir / MODELS_DIR / MODEL_VERSION / config["run_name"]
+    run_dir.mkdir(parents=True, exist_ok=True)
+
+    seed_everything(config["seed"])
+    device = torch.device(config["device"])
+
+    geometry = section_chain.read_geometry(data_dir).stream
+    mean, std = load_input_affine(section_chain.artifacts(data_dir).affine)
+    sources = load_sources(data_dir, geometry)
+    chosen = _split_sources(data_dir, sources, config["smoke_tracks"])
+    if not chosen["train"] or not chosen["val"]:
+        raise RuntimeError(
+            f"{len(chosen['train'])} train / {len(chosen['val'])} val tracks carry "
+            f"recorded cells -- run the simulation or the F3 extractor over the "
+            f"corpus first")
+
+    cache_dir = data_dir / MODELS_DIR / MODEL_VERSION / AUDIO_CACHE_DIR
+    audio = {youtube_id: encoder_audio(sources[youtube_id], cache_dir)
+             for youtube_id in chosen["train"] + chosen["val"]}
+    common = dict(mean=mean, std=std, label_frame_sec=geometry.label_frame_sec,
+                  crop_sec=config["crop_sec"], context_sec=config["context_sec"],
+                  seed=config["seed"])
+    train_set = CellWindowDataset([sources[i] for i in chosen["train"]], audio,
+                                  augment=True, **common)
+    val_set = CellWindowDataset([sources[i] for i in chosen["val"]], audio,
+                                augment=False, **common)
+
+    model = MelEncoderNet(out_dim=len(mean), n_mels=E.N_MELS,
+                          temporal_channels=config["temporal_channels"],
+                          temporal_layers=config["temporal_layers"],
+                          dropout=config["dropout"]).to(device)
+    body = model.body_parameters()
+    if body > PARAM_BUDGET:
+        raise RuntimeError(
+            f"{body} body parameters exceeds the {PARAM_BUDGET} budget -- the "
+            f"student exists to run on a fraction of one CPU core")
+    optimizer = torch.optim.AdamW(model.parameters(), lr=config["lr"],
+                                  weight_decay=config["weight_decay"])
+    steps_per_epoch = max(1, math.ceil(len(train_set) / config["batch_size"]))
+    scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(
+        optimizer, T_max=steps_per_epoch * config["epochs"])
+
+    config = dict(config)
+    config["tracks"] = {name: {i: sources[i].origin for i in ids}
+                        for name, ids in chosen.items()}
+    config["started_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    config["arch"] = model.arch()
+    config["body_params"] = body
+    config["layers"] = [int(layer) for layer in geometry.layers]
+    config["label_frame_sec"] = geometry.label_frame_sec
+    config["front_end"] = E.front_end()
+    with open(run_dir / CONFIG_FILE, "w", encoding="utf-8") as handle:
+        json.dump(config, handle, indent=2, sort_keys=True, default=str)
+        handle.write("\n")
+
+    print(f"{config['run_name']}: {body} body params (budget {PARAM_BUDGET}) "
+          f"-> {len(mean)} features | {len(train_set)} train / {len(val_set)} val "
+          f"crops of {train_set.n_cells} cells | device {device}", flush=True)
+
+    generator = torch.Generator()
+    loaders = {
+        "train": build_loader(train_set, batch_size=config["batch_size"], shuffle=True,
+                              num_workers=config["num_workers"],
+                              pin_memory=device.type == "cuda", generator=generator),
+        "val": build_loader(val_set, batch_size=config["batch_size"], shuffle=False,
+                            num_workers=config["num_workers"],
+                            pin_memory=device.type == "cuda", generator=None),
+    }
+    history = []
+    best = {"mse": math.inf, "epoch": 0}
+    wall_start = time.perf_counter()
+    for epoch in range(1, config["epochs"] + 1):
+        train_set.set_epoch(epoch)
+        generator.manual_seed(config["seed"] * 1_000_003 + epoch)
+        model.train()
+        started = time.perf_counter()
+        running = 0.0
+        batches = 0
+        for mel, frame_cell, targets, mask in loaders["train"]:
+            loss, _, _ = cell_loss(model(mel.to(device)), frame_cell.to(device),
+                                   targets.to(device), mask.to(device))
+            value = float(loss.detach())
+            if not math.isfinite(value):
+                raise RuntimeError(f"non-finite loss in epoch {epoch}")
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            if config["grad_clip"] > 0:
+                torch.nn.utils.clip_grad_norm_(model.parameters(), config["grad_clip"])
+            optimizer.step()
+            scheduler.step()
+            running += value
+            batches += 1
+
+        metrics = evaluate(model, loaders["val"], device)
+        record = {"epoch": epoch, "train": running / max(batches, 1), "val": metrics,
+                  "seconds": time.perf_counter() - started}
+        history.append(record)
+        print(f"epoch {epoch:3d} | train {record['train']:.4f} | val mse "
+              f"{metrics['mse']:.4f} cos {metrics['cosine']:.4f} "
+              f"(p05 {metrics['cosine_p05']:.4f}) | {record['seconds']:.1f}s",
+              flush=True)
+        if metrics["mse"] < best["mse"]:
+            best = {"mse": metrics["mse"], "epoch": epoch, "metrics": metrics}
+            torch.save({"model": model.state_dict(), "arch": model.arch(),
+                        "config": config, "epoch": epoch, "metrics": metrics},
+                       run_dir / BEST_CHECKPOINT)
+        if epoch - best["epoch"] >= config["patience"]:
+            print(f"early stop: no val improvement in {config['patience']} epochs",
+                  flush=True)
+            break
+
+    report = {
+        "config": config,
+        "config_fingerprint": config_fingerprint(config),
+        "history": history,
+        "best": best,
+        "weight_hash": weight_hash(model.state_dict()),
+        "wall_seconds": time.perf_counter() - wall_start,
+    }
+    with open(run_dir / REPORT_FILE, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2, sort_keys=True, default=str)
+        handle.write("\n")
+    print(f"done: best val mse {best['mse']:.4f} @ epoch {best['epoch']}", flush=True)
+    return report
+
+
+def load_mel_checkpoint(path) -> tuple:
+    state = torch.load(Path(path), map_location="cpu", weights_only=False)
+    for field in ("model", "arch", "config"):
+        if field not in state:
+            raise RuntimeError(f"{path}: checkpoint carries no `{field}` -- it is "
+                               f"not a mel_encoder_train best.pt")
+    model = MelEncoderNet(**state["arch"])
+    if model.arch() != state["arch"]:
+        raise RuntimeError(f"built model reports {model.arch()} from arch block "
+                           f"{state['arch']}")
+    model.load_state_dict(state["model"], strict=True)
+    model.eval()
+    return model, state
+
+
+def core_share(encoder, geometry, passes: int = 20) -> float:
+    """Seconds of one core per second of audio, at the stream's pass cadence."""
+    segment = np.random.default_rng(0).uniform(
+        -0.5, 0.5, geometry.buffer_samples).astype(np.float32)
+    hi = geometry.buffer_samples / E.ENCODER_SAMPLE_RATE
+    lo = hi - geometry.hop_sec - geometry.margin_sec
+    encoder.encode(segment, offset_samples=0, lo_sec=lo, hi_sec=hi)
+    started = time.process_time()
+    for _ in range(passes):
+        encoder.encode(segment, offset_samples=0, lo_sec=lo, hi_sec=hi)
+    return (time.process_time() - started) / passes / geometry.hop_sec
+
+
+def export_model(graph: RawCells, path) -> dict:
+    """Write ``path`` and return its declared axes, the time axis verified dynamic."""
+    import onnx
+
+    from .export_onnx import OPSET, declared_axes
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model = graph.model
+    dummy = torch.zeros(1, 400, model.n_mels)
+    tmp = path.with_suffix(path.suffix + ".part")
+    try:
+        torch.onnx.export(
+            graph, (dummy,), str(tmp),
+            dynamo=False,
+            opset_version=OPSET,
+            input_names=[INPUT_NAME],
+            output_names=[OUTPUT_NAME],
+            dynamic_axes={INPUT_NAME: {0: BATCH_AXIS, 1: TIME_AXIS},
+                          OUTPUT_NAME: {0: BATCH_AXIS, 1: TIME_AXIS}},
+        )
+        onnx.checker.check_model(onnx.load(str(tmp)))
+        axes = declared_axes(tmp)
+        expected = {INPUT_NAME: [BATCH_AXIS, TIME_AXIS, model.n_mels],
+                    OUTPUT_NAME: [BATCH_AXIS, TIME_AXIS, model.out_dim]}
+        if axes != expected:
+            raise RuntimeError(
+                f"exported graph declares {axes}, expected {expected} -- a "
+                f"specialized time axis means the graph only runs at the length "
+                f"it was traced at")
+        tmp.replace(path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return axes
+
+
+def export(checkpoint_path, data_dir, out_path=None) -> dict:
+    """``best.pt`` -> ``mel_encoder.onnx`` beside the affine it was distilled on."""
+    from lib import section_chain
+    from lib.analyser.mert_stream import load_input_affine
+    from lib.analyser.section_model import sha256_file
+
+    from .export_onnx import OPSET
+
+    found = section_chain.artifacts(data_dir)
+    geometry = section_chain.read_geometry(data_dir).stream
+    out_path = Path(out_path) if out_path else section_chain.mel_encoder_path(data_dir)
+    model, state = load_mel_checkpoint(checkpoint_path)
+    if state["config"].get("front_end") != E.front_end():
+        raise RuntimeError(f"{checkpoint_path} was trained on the front end "
+                           f"{state['config'].get('front_end')}, the live path "
+                           f"computes {E.front_end()}")
+    mean, std = load_input_affine(found.affine)
+    axes = export_model(RawCells(model, mean, std).eval(), out_path)
+
+    layers = [int(layer) for layer in geometry.layers]
+    meta = {
+        "checkpoint": str(checkpoint_path),
+        "arch": model.arch(),
+        "body_params": model.body_parameters(),
+        "epoch": state.get("epoch"),
+        "metrics": state.get("metrics"),
+        "weight_hash": weight_hash(state["model"]),
+        "front_end": E.front_end(),
+        "layers": layers,
+        "dim": model.out_dim // len(layers),
+        "affine_sha256": sha256_file(found.affine),
+        "model_sha": sha256_file(out_path),
+        "bytes": out_path.stat().st_size,
+        "opset": OPSET,
+        "declared_axes": axes,
+        "torch": torch.__version__,
+    }
+    meta_path = Path(f"{out_path}.json")
+    meta_path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n",
+                         encoding="utf-8")
+    encoder = E.load_mel_encoder(out_path, layers=layers, affine_path=found.affine)
+    meta["core_share"] = round(core_share(encoder, geometry), 4)
+    meta_path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n",
+                         encoding="utf-8")
+    return meta
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=default_data_dir(),
+                        help="corpus root; checkpoints land in "
+                             f"<data-dir>/{MODELS_DIR}/{MODEL_VERSION}/<run-name> "
+                             "(default: %(default)s)")
+    parser.add_argument("--run-name", default="mel_encoder_v1")
+    parser.add_argument("--epochs", type=int, default=60)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--weight-decay", type=float, default=1e-2)
+    parser.add_argument("--dropout", type=float, default=0.0)
+    parser.add_argument("--grad-clip", type=float, default=5.0)
+    parser.add_argument("--temporal-channels", type=int, default=160)
+    parser.add_argument("--temporal-layers", type=int, default=3)
+    parser.add_argument("--crop-sec", type=float, default=CROP_SEC)
+    parser.add_argument("--context-sec", type=float, default=CONTEXT_SEC,
+                        help="unscored audio either side of a crop's cells")
+    parser.add_argument("--patience", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--num-workers", type=int, default=0)
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--smoke-tracks", type=int, default=0,
+                        help="limit train and val to their first N tracks (0 = all)")
+    parser.add_argument("--export-only", type=Path, default=None, metavar="CHECKPOINT",
+                        help="skip training and export CHECKPOINT")
+    parser.add_argument("--no-export", action="store_true",
+                        help="train without exporting the best checkpoint")
+    return parser
+
+
+def main(argv: list | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    checkpoint = args.export_only
+    if checkpoint is None:
+        config = vars(args)
+        config.pop("export_only")
+        no_export = config.pop("no_export")
+        config["data_dir"] = str(Path(config["data_dir"]).resolve())
+        train(config)
+        if no_export:
+            return 0
+        checkpoint = (Path(config["data_dir"]) / MODELS_DIR / MODEL_VERSION
+                      / config["run_name"] / BEST_CHECKPOINT)
+    meta = export(checkpoint, args.data_dir)
+    print(f"exported {meta['bytes'] / 1024:.0f} KiB  sha256 {meta['model_sha'][:16]}  "
+          f"epoch {meta['epoch']}  {meta['core_share']:.1%} of one core")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
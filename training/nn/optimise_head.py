@@ -0,0 +1,293 @@
+"""Offline builds of the online section head: optimised once, quantised once.
+
+    uv run python -m training.nn.optimise_head [--variants optimised int8] [--gate]
+
+``SectionModel`` hands ``online_step.onnx`` to onnxruntime at every start, and
+the runtime rewrites the graph again each time.  This writes that rewrite to
+disk once (``online_step.optimised.onnx``), and the same over int8 dynamically
+quantised weights (``online_step.int8.onnx``).  Each build has its own sidecar
+holding the head geometry, its own sha, the graph it was built from and the
+onnxruntime that built it.  ``SectionModel`` opens a build with the runtime's
+optimisations off.
+
+**The gate.**  ``--gate`` decides whether a build may ship.  It times session
+start and the per-cell step against the fp32 graph.  It measures the posterior
+deltas over the eval set's recorded cells.  Then it runs the eval set through
+the build for beat-level decision agreement with the shipped chain, and writes
+the verdict into the build's sidecar.  The live chain refuses a build without a
+passing verdict; a build that changes any decision does not pass.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+
+from build_training_table import default_data_dir  # noqa: E402
+from lib.analyser import section_model as S  # noqa: E402
+from select_eval_set import EVAL_SET_FILE  # noqa: E402
+
+BUILT_VARIANTS = (S.OPTIMISED_HEAD, S.INT8_HEAD)
+OPTIMIZATION_LEVEL = "extended"
+# Layout rewrites (the "all" level) are tuned to the machine doing the writing;
+# the extended level is the highest that is safe to save and copy elsewhere.
+_LEVELS = {"basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+           "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED}
+
+STARTUP_REPEATS = 5
+STEP_CELLS = 2000
+MIN_AGREEMENT = 1.0
+
+
+def optimise(source, out, level: str = OPTIMIZATION_LEVEL) -> None:
+    """Let onnxruntime rewrite ``source`` and save the rewrite to ``out``."""
+    options = S.session_options()
+    options.graph_optimization_level = _LEVELS[level]
+    options.optimized_model_filepath = str(out)
+    ort.InferenceSession(str(source), options, providers=["CPUExecutionProvider"])
+
+
+def quantise(source, out) -> None:
+    """Dynamic int8 weights; activations are quantised per call, not calibrated."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    out = Path(out)
+    prepared = out.with_name(f"{out.name}.pre.part")
+    quantised = out.with_name(f"{out.name}.int8.part")
+    try:
+        quant_pre_process(str(source), str(prepared))
+        quantize_dynamic(str(prepared), str(quantised),
+                         weight_type=QuantType.QInt8)
+        optimise(quantised, out)
+    finally:
+        prepared.unlink(missing_ok=True)
+        quantised.unlink(missing_ok=True)
+
+
+def build_variant(graph, variant: str) -> dict:
+    """``online_step.onnx`` -> ``online_step.<variant>.onnx`` + sidecar; returns it."""
+    if variant not in BUILT_VARIANTS:
+        raise ValueError(f"no {variant!r} build; this writes "
+                         f"{', '.join(BUILT_VARIANTS)}")
+    graph = Path(graph)
+    source = json.loads(Path(f"{graph}.json").read_text(encoding="utf-8"))
+    if source.get("sha256") != S.sha256_file(graph):
+        raise RuntimeError(f"{graph} does not hash to the sha its sidecar "
+                           f"records -- build from the graph that ships")
+    out = S.head_variant_path(graph, variant)
+    tmp = out.with_name(f"{out.name}.part")
+    try:
+        if variant == S.INT8_HEAD:
+            quantise(graph, tmp)
+        else:
+            optimise(graph, tmp)
+        tmp.replace(out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    meta = {key: value for key, value in source.items() if key != "gate"}
+    meta.update({
+        "variant": variant,
+        "sha256": S.sha256_file(out),
+        "source_sha256": source["sha256"],
+        "bytes": out.stat().st_size,
+        "source_bytes": graph.stat().st_size,
+        "optimization_level": OPTIMIZATION_LEVEL,
+        "onnxruntime": ort.__version__,
+    })
+    if variant == S.INT8_HEAD:
+        meta["quantization"] = {"mode": "dynamic", "weights": "int8",
+                                "activations": "uint8 per call"}
+    write_meta(out, meta)
+    return meta
+
+
+def write_meta(path, meta: dict) -> None:
+    Path(f"{path}.json").write_text(json.dumps(meta, indent=2, sort_keys=True)
+                                    + "\n", encoding="utf-8")
+
+
+# --------------------------------------------------------------------------- #
+# Gate
+# --------------------------------------------------------------------------- #
+
+
+def startup_sec(path, *, optimised: bool, repeats: int = STARTUP_REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        S.session(path, optimised=optimised)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def step_sec(model, cells: np.ndarray) -> float:
+    """Median wall time of one ``push``, cold window included."""
+    model.reset()
+    timings = []
+    for index, row in enumerate(cells):
+        started = time.perf_counter()
+        model.push(row, index)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def posterior_deltas(reference, candidate, tracks: list) -> dict:
+    """Both heads stream each track's cells; how far apart their outputs land."""
+    posterior = boundary = 0.0
+    flips = compared = 0
+    for cells in tracks:
+        ours, theirs = _posteriors(candidate, cells), _posteriors(reference, cells)
+        for mine, want in zip(ours, theirs):
+            posterior = max(posterior, float(np.abs(mine.posterior
+                                                    - want.posterior).max()))
+            boundary = max(boundary, abs(mine.boundary - want.boundary))
+            flips += int(mine.posterior.argmax() != want.posterior.argmax())
+        compared += len(theirs)
+    return {"cells": compared, "max_abs_posterior": posterior,
+            "max_abs_boundary": boundary, "argmax_flips": flips}
+
+
+def _posteriors(model, cells: np.ndarray) -> list:
+    model.reset()
+    out = [model.push(row, index) for index, row in enumerate(cells)]
+    return [item for item in out if item is not None] + model.flush()
+
+
+def recorded_tracks(data_dir, eval_set, only=None) -> list:
+    """The eval set's recorded cells, one ``[cells, dim]`` array per track."""
+    from run_eval_set import audio_path, load_eval_set, select_tracks
+    from simulate.cell_cache import sidecar_path
+    from simulate.fake_audio_client import FileAudioClient
+
+    tracks = []
+    for track in select_tracks(load_eval_set(Path(eval_set)), only):
+        path = sidecar_path(audio_path(Path(data_dir), track["youtube_id"]),
+                            FileAudioClient.decode_path)
+        if not path.exists():
+            continue
+        with np.load(path) as archive:
+            tracks.append(np.asarray(archive["cell_features"], dtype=np.float32))
+    if not tracks:
+        raise RuntimeError(f"no eval-set track has recorded cells under "
+                           f"{data_dir} -- run training/run_eval_set.py once "
+                           f"to record them")
+    return tracks
+
+
+def gate(graph, variant: str, data_dir, eval_set, only=None,
+         min_agreement: float = MIN_AGREEMENT) -> dict:
+    """Measure a build against the fp32 graph and record the verdict beside it."""
+    from lib.analyser.mert_stream import load_input_affine
+    from lib.section_chain import artifacts
+    from run_eval_set import run
+
+    mean, _std = load_input_affine(artifacts(data_dir).affine)
+    head = S.load_head_geometry(graph)
+    path, geometry = S.load_head_variant(graph, variant, head, gated=False)
+    reference = S.SectionModel(graph, mean=mean, geometry=head)
+    candidate = S.SectionModel(path, mean=mean, geometry=geometry)
+
+    tracks = recorded_tracks(data_dir, eval_set, only)
+    timing_cells = np.concatenate(tracks)[:STEP_CELLS]
+    latency = {
+        "startup_sec": startup_sec(path, optimised=True),
+        "startup_sec_fp32": startup_sec(graph, optimised=False),
+        "step_sec": step_sec(candidate, timing_cells),
+        "step_sec_fp32": step_sec(reference, timing_cells),
+    }
+    posteriors = posterior_deltas(reference, candidate, tracks)
+    document, _runs, _song, _wall = run(Path(data_dir), Path(eval_set), only,
+                                        quiet=True, head=variant)
+    agreement = document["aggregate"]["agreement"]
+    verdict = {
+        "passed": (agreement["compared_beats"] > 0
+                   and agreement["agreement"] >= min_agreement),
+        "min_agreement": min_agreement,
+        "agreement": agreement,
+        "macro_f1": document["aggregate"]["macro_f1"],
+        "eval_set_sha256": document["eval_set"]["sha256"],
+        "tracks": len(document["tracks"]),
+        "latency": {key: round(value, 9) for key, value in latency.items()},
+        "posteriors": posteriors,
+    }
+    meta = json.loads(Path(f"{path}.json").read_text(encoding="utf-8"))
+    meta["gate"] = verdict
+    write_meta(path, meta)
+    return verdict
+
+
+def render_verdict(variant: str, verdict: dict) -> str:
+    latency, posteriors = verdict["latency"], verdict["posteriors"]
+    agreement = verdict["agreement"]
+    return "\n".join([
+        f"  {variant}: {'PASS' if verdict['passed'] else 'FAIL'}",
+        f"    start       {latency['startup_sec'] * 1e3:8.1f} ms "
+        f"(fp32 {latency['startup_sec_fp32'] * 1e3:.1f} ms)",
+        f"    step        {latency['step_sec'] * 1e6:8.1f} us "
+        f"(fp32 {latency['step_sec_fp32'] * 1e6:.1f} us)",
+        f"    posterior   max |d| {posteriors['max_abs_posterior']:.3g}, "
+        f"boundary {posteriors['max_abs_boundary']:.3g}, "
+        f"{posteriors['argmax_flips']}/{posteriors['cells']} argmax flips",
+        f"    decisions   {agreement['agreed_beats']}/"
+        f"{agreement['compared_beats']} beats agree "
+        f"({agreement['agreement']:.4f}, needs {verdict['min_agreement']:g})",
+    ])
+
+
+# --------------------------------------------------------------------------- #
+# CLI
+# --------------------------------------------------------------------------- #
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=default_data_dir())
+    parser.add_argument("--variants", nargs="+", choices=BUILT_VARIANTS,
+                        default=list(BUILT_VARIANTS))
+    parser.add_argument("--gate", action="store_true",
+                        help="measure each build on the eval set and record "
+                             "whether it may ship")
+    parser.add_argument("--gate-only", action="store_true",
+                        help="gate the builds already on disk")
+    parser.add_argument("--eval-set", type=Path, default=EVAL_SET_FILE)
+    parser.add_argument("--only", default=None,
+                        help="comma-separated track_ids or youtube_ids to gate on")
+    parser.add_argument("--min-agreement", type=float, default=MIN_AGREEMENT,
+                        help="share of beats that must keep the shipped "
+                             "decision (default: %(default)s)")
+    return parser
+
+
+def main(argv: list | None = None) -> int:
+    from lib.section_chain import artifacts
+
+    args = build_parser().parse_args(argv)
+    graph = artifacts(args.data_dir).graph
+    only = [item for item in args.only.split(",") if item.strip()] \
+        if args.only else None
+    failed = False
+    for variant in args.variants:
+        if not args.gate_only:
+            meta = build_variant(graph, variant)
+            print(f"{S.head_variant_path(graph, variant)}  "
+                  f"{meta['bytes'] / 1024:.0f} KiB "
+                  f"(fp32 {meta['source_bytes'] / 1024:.0f} KiB)")
+            print(f"  sha256      {meta['sha256']}")
+        if args.gate or args.gate_only:
+            verdict = gate(graph, variant, args.data_dir, args.eval_set, only,
+                           args.min_agreement)
+            print(render_verdict(variant, verdict))
+            failed = failed or not verdict["passed"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
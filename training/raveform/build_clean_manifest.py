@@ -7,7 +7,10 @@ import argparse
 import collections
 import concurrent.futures
 import csv
+import hashlib
+import json
 import math
+import os
 import shutil
 import subprocess
 import sys
@@ -16,7 +19,9 @@ from pathlib import Path
 from typing import NamedTuple
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+from audio_digests import DIGEST_INDEX_FILE, DigestIndex  # noqa: E402
 from raveform_manifest import (  # noqa: E402
     MANIFEST_FILE,
     build_manifest_rows,
@@ -50,6 +55,11 @@ DEFAULT_WORKERS = 8
 
 FFMPEG_TIMEOUT_SEC = 300
 
+CHECK_CACHE_FILE = "check_cache.json"
+CHECK_CACHE_SCHEMA = 1
+CHECK_CACHE_SAVE_EVERY = 50
+_HASH_CHUNK = 1 << 20
+
 
 class ManifestRow(NamedTuple):
     track_id: str
@@ -137,6 +147,11 @@ def _run(command: list) -> subprocess.CompletedProcess:
 
 
 def decode(path: str) -> tuple[str, float | None]:
+    error, decoded, _ran = _decode(path)
+    return error, decoded
+
+
+def _decode(path: str) -> tuple[str, float | None, bool]:
     # An mp3 truncated on a frame boundary decodes clean and still probes at its
     # full header length, so only the decoder's own emitted duration detects it.
     # `-progress -` writes that to stdout; the human `-stats` line would land on
@@ -149,14 +164,14 @@ def decode(path: str) -> tuple[str, float | None]:
             ]
         )
     except subprocess.TimeoutExpired:
-        return f"ffmpeg timed out after {FFMPEG_TIMEOUT_SEC} s", None
+        return f"ffmpeg timed out after {FFMPEG_TIMEOUT_SEC} s", None, False
     except OSError as exc:
-        return f"ffmpeg could not run: {exc}", None
+        return f"ffmpeg could not run: {exc}", None, False
 
     complaint = proc.stderr.strip()
     if proc.returncode != 0:
-        return complaint or f"ffmpeg exited {proc.returncode}", None
-    return complaint, _decoded_seconds(proc.stdout)
+        return complaint or f"ffmpeg exited {proc.returncode}", None, True
+    return complaint, _decoded_seconds(proc.stdout), True
 
 
 def _decoded_seconds(progress_output: str) -> float | None:
@@ -172,6 +187,10 @@ def _decoded_seconds(progress_output: str) -> float | None:
 
 
 def probe_duration(path: str) -> float | None:
+    return _probe(path)[0]
+
+
+def _probe(path: str) -> tuple[float | None, bool]:
     try:
         proc = _run(
             [
@@ -182,18 +201,28 @@ def probe_duration(path: str) -> float | None:
             ]
         )
     except (subprocess.TimeoutExpired, OSError):
-        return None
+        return None, False
     if proc.returncode != 0:
-        return None
+        return None, True
     try:
-        return float(proc.stdout.strip())
+        return float(proc.stdout.strip()), True
     except ValueError:
-        return None
+        return None, True
 
 
-def check_track(job: TrackJob) -> CheckResult:
-    error, decoded = decode(job.mp3_path)
-    header = probe_duration(job.mp3_path)
+def measure(path: str) -> tuple:
+    """What ffmpeg and ffprobe say about the file: (decode error, decoded
+    seconds, header seconds, settled). The first three are everything
+    `classify` needs except the annotation, which is why they and not a
+    verdict are what gets cached. `settled` is False when a tool timed out or
+    could not start: that says something about this machine, not the file."""
+    error, decoded, decoded_ran = _decode(path)
+    header, probed_ran = _probe(path)
+    return _first_line(error), decoded, header, decoded_ran and probed_ran
+
+
+def _result(job: TrackJob, measured: tuple) -> CheckResult:
+    error, decoded, header = measured[:3]
     status, detail = classify(error, decoded, header, job.annotation_duration_sec)
     return CheckResult(
         job.track_id,
@@ -207,6 +236,120 @@ def check_track(job: TrackJob) -> CheckResult:
     )
 
 
+def check_track(job: TrackJob) -> CheckResult:
+    return _result(job, measure(job.mp3_path))
+
+
+def _measure_job(job: TrackJob) -> tuple:
+    return measure(job.mp3_path)
+
+
+def file_key(path) -> list:
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckCache:
+    """Per-file results that only a re-read of the bytes could change.
+
+    Keyed by the path under the corpus root and believed only while size,
+    mtime_ns and inode still match, so a re-downloaded or rewritten file is
+    decoded and hashed again; any change drops every result held for it. An
+    unreadable cache file is an empty cache. Digests are not kept here but in
+    the corpus's `audio_digests.json`, the index the labelling tool shares.
+    Every `CHECK_CACHE_SAVE_EVERY` new results it writes itself out, so an
+    interrupted run keeps most of what it paid for.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.digests = DigestIndex(self.path.parent / DIGEST_INDEX_FILE)
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self._unsaved = 0
+        self._entries = {}
+        try:
+            record = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(record, dict) and record.get("schema") == CHECK_CACHE_SCHEMA:
+            self._entries = dict(record.get("files") or {})
+
+    def _name(self, path) -> str:
+        path = Path(path).resolve()
+        try:
+            return path.relative_to(self.path.parent.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def get(self, path, field: str, key: list | None = None):
+        try:
+            key = file_key(path) if key is None else key
+        except OSError:
+            key = None
+        entry = self._entries.get(self._name(path))
+        if key is not None and entry and entry.get("stat") == key and field in entry:
+            self.hits[field] += 1
+            return entry[field]
+        self.misses[field] += 1
+        return None
+
+    def put(self, path, key: list, field: str, value) -> None:
+        name = self._name(path)
+        entry = self._entries.get(name)
+        if entry is None or entry.get("stat") != key:
+            entry = self._entries[name] = {"stat": key}
+        entry[field] = value
+        self._added()
+
+    def sha256(self, path) -> str:
+        digest = self.digests.known(path)
+        if digest is not None:
+            self.hits["sha256"] += 1
+            return digest
+        self.misses["sha256"] += 1
+        digest = self.digests.digest(path)
+        self._added()
+        return digest
+
+    def _added(self) -> None:
+        self._unsaved += 1
+        if self._unsaved >= CHECK_CACHE_SAVE_EVERY:
+            self.save()
+
+    def summary(self) -> dict:
+        return {
+            "file": self.path.name,
+            **{field: {"hits": self.hits[field], "misses": self.misses[field]}
+               for field in sorted(set(self.hits) | set(self.misses))},
+        }
+
+    def save(self) -> None:
+        self.digests.save()
+        live = {name: entry for name, entry in self._entries.items()
+                if (self.path.parent / name).exists()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".part")
+        try:
+            with open(tmp, "w", encoding="utf-8", newline="\n") as handle:
+                json.dump({"schema": CHECK_CACHE_SCHEMA, "files": live}, handle,
+                          indent=1, sort_keys=True)
+                handle.write("\n")
+            tmp.replace(self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        self._unsaved = 0
+
+
 def _first_line(text: str, limit: int = 200) -> str:
     line = text.strip().splitlines()[0].strip() if text.strip() else ""
     return line[:limit]
@@ -277,20 +420,46 @@ def select_candidates(
     return jobs, missing, too_recent
 
 
-def run_checks(jobs: list, workers: int = DEFAULT_WORKERS, progress_every: int = 50) -> list:
+def run_checks(
+    jobs: list,
+    workers: int = DEFAULT_WORKERS,
+    progress_every: int = 50,
+    cache: CheckCache | None = None,
+) -> list:
     if not jobs:
         return []
 
     results = []
-    if workers <= 1:
-        for index, job in enumerate(jobs, start=1):
-            results.append(check_track(job))
-            _print_progress(index, len(jobs), progress_every)
+    pending = []
+    for job in jobs:
+        try:
+            key = file_key(job.mp3_path)
+        except OSError:
+            key = None
+        measured = None if cache is None else cache.get(job.mp3_path, "decode", key)
+        if measured is None:
+            pending.append((job, key))
+        else:
+            results.append(_result(job, tuple(measured)))
+    if results:
+        print(f"  {len(results)} unchanged file(s) reused from {cache.path.name}",
+              flush=True)
+
+    def record(job: TrackJob, key, measured: tuple) -> None:
+        if cache is not None and key is not None and measured[3]:
+            cache.put(job.mp3_path, key, "decode", list(measured[:3]))
+        results.append(_result(job, measured))
+
+    if workers <= 1 or len(pending) <= 1:
+        for index, (job, key) in enumerate(pending, start=1):
+            record(job, key, _measure_job(job))
+            _print_progress(index, len(pending), progress_every)
     else:
         with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
-            for index, result in enumerate(pool.map(check_track, jobs), start=1):
-                results.append(result)
-                _print_progress(index, len(jobs), progress_every)
+            measured = pool.map(_measure_job, [job for job, _ in pending])
+            for index, ((job, key), found) in enumerate(zip(pending, measured), start=1):
+                record(job, key, found)
+                _print_progress(index, len(pending), progress_every)
 
     results.sort(key=lambda result: result.track_id)
     return results
@@ -409,6 +578,12 @@ def main(argv: list | None = None) -> int:
         default=0,
         help="check at most N tracks (smoke test; 0 = no limit)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"decode every track even if <data-dir>/{CHECK_CACHE_FILE} holds a "
+        "result for its unchanged bytes",
+    )
     args = parser.parse_args(argv)
 
     data_dir = args.data_dir.resolve()
@@ -424,8 +599,13 @@ def main(argv: list | None = None) -> int:
         print(f"NOTE: --limit {args.limit} -- checking a subset only")
 
     print(f"checking {len(jobs)} track(s) with {args.workers} worker(s)...", flush=True)
+    cache = None if args.no_cache else CheckCache(data_dir / CHECK_CACHE_FILE)
     started = time.time()
-    results = run_checks(jobs, workers=args.workers)
+    try:
+        results = run_checks(jobs, workers=args.workers, cache=cache)
+    finally:
+        if cache is not None:
+            cache.save()
     elapsed = time.time() - started
 
     path = write_clean_manifest(data_dir, results)
@@ -434,6 +614,9 @@ def main(argv: list | None = None) -> int:
     print(f"clean manifest: {path}")
     print(f"  columns : {','.join(CLEAN_MANIFEST_HEADER)}")
     print(f"  rows    : {len(results)}")
+    if cache is not None:
+        print(f"check cache: {cache.hits['decode']} reused, "
+              f"{cache.misses['decode']} decoded ({cache.path})")
     return 0
 
 
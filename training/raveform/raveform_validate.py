@@ -5,7 +5,6 @@ from __future__ import annotations
 
 import argparse
 import collections
-import hashlib
 import json
 import sys
 import time
@@ -54,7 +53,7 @@ MANIFEST_ROUNDING_SEC = 0.001
 
 _DETAIL_CHARS = 300
 
-_HASH_CHUNK = 1 << 20
+sha256_file = gate.sha256_file
 
 
 class Failure(NamedTuple):
@@ -248,14 +247,6 @@ def check_annotations(data_dir: Path, rows: list, tracks: list) -> list:
     return sorted(issues)
 
 
-def sha256_file(path: Path) -> str:
-    digest = hashlib.sha256()
-    with open(path, "rb") as handle:
-        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
-
-
 def write_checksums(data_dir: Path, verdicts: list) -> tuple:
     path = data_dir / CHECKSUMS_FILE
     entries = sorted(
@@ -301,8 +292,10 @@ def validate(
     workers: int = gate.DEFAULT_WORKERS,
     checksums: bool = True,
     progress_every: int = 100,
+    cache: bool = True,
 ) -> dict:
     data_dir = Path(data_dir)
+    check_cache = gate.CheckCache(data_dir / gate.CHECK_CACHE_FILE) if cache else None
     rows = gate.load_manifest_rows(data_dir)
     tracks = load_all_tracks(data_dir)
     durations = annotation_durations(tracks)
@@ -323,28 +316,36 @@ def validate(
         f"{len(absent)} manifest row(s) have no audio",
         flush=True,
     )
-    results = gate.run_checks(jobs, workers=workers, progress_every=progress_every)
-
-    verdicts = []
-    for result in results:
-        status, detail = classify_track(result.status, result.detail, None)
-        digest = ""
-        if checksums and status == STATUS_OK:
-            digest = sha256_file(Path(result.mp3_path))
-        verdicts.append(
-            TrackVerdict(
-                result.track_id,
-                result.youtube_id,
-                status,
-                detail,
-                result.mp3_path,
-                result.ffprobe_duration_sec,
-                result.decoded_duration_sec,
-                result.annotation_duration_sec,
-                "",
-                digest,
-            )
+    try:
+        results = gate.run_checks(
+            jobs, workers=workers, progress_every=progress_every, cache=check_cache
         )
+
+        verdicts = []
+        for result in results:
+            status, detail = classify_track(result.status, result.detail, None)
+            digest = ""
+            if checksums and status == STATUS_OK:
+                path = Path(result.mp3_path)
+                digest = sha256_file(path) if check_cache is None else check_cache.sha256(path)
+            verdicts.append(
+                TrackVerdict(
+                    result.track_id,
+                    result.youtube_id,
+                    status,
+                    detail,
+                    result.mp3_path,
+                    result.ffprobe_duration_sec,
+                    result.decoded_duration_sec,
+                    result.annotation_duration_sec,
+                    "",
+                    digest,
+                )
+            )
+    finally:
+        if check_cache is not None:
+            check_cache.save()
+
     for row, duration in absent:
         failure = failures.get(row.youtube_id)
         status, detail = classify_track(None, "", failure)
@@ -377,6 +378,7 @@ def validate(
         checksums={"file": CHECKSUMS_FILE, "algorithm": "sha256", "files": checksum_count}
         if checksums
         else {"skipped": True},
+        cache=check_cache.summary() if check_cache is not None else {"skipped": True},
     )
     _write_atomic(data_dir / VALIDATION_JSON, json.dumps(payload, indent=2, sort_keys=False) + "\n")
     _write_atomic(data_dir / VALIDATION_TXT, render_text_report(payload))
@@ -385,7 +387,9 @@ def validate(
     return payload
 
 
-def build_payload(data_dir, rows, verdicts, orphans, annotation_issues, checksums) -> dict:
+def build_payload(
+    data_dir, rows, verdicts, orphans, annotation_issues, checksums, cache=None
+) -> dict:
     counts = tally(verdicts)
     converged, statement = convergence(counts, len(rows))
     all_clear, verdict_statement = overall_verdict(converged, orphans, annotation_issues)
@@ -405,6 +409,7 @@ def build_payload(data_dir, rows, verdicts, orphans, annotation_issues, checksum
         "retryable_remainder": retryable_remainder(verdicts),
         "tolerance": {"abs_sec": gate.ABS_TOLERANCE_SEC, "rel": gate.REL_TOLERANCE},
         "checksums": checksums,
+        "cache": cache or {"skipped": True},
         "orphans": orphans,
         "annotation_issues": annotation_issues,
         "tracks": [verdict._asdict() for verdict in verdicts],
@@ -445,6 +450,19 @@ def render_text_report(payload: dict) -> str:
             f"checksums : {checksums.get('files', 0)} OK file(s) hashed into "
             f"{checksums.get('file', CHECKSUMS_FILE)} (sha256sum -c format)"
         )
+    cache = payload.get("cache") or {"skipped": True}
+    if cache.get("skipped"):
+        add("cache     : not used for this run (--no-cache)")
+    else:
+        add(
+            "cache     : "
+            + ", ".join(
+                f"{field} {counts['hits']} reused / {counts['misses']} recomputed"
+                for field, counts in cache.items()
+                if isinstance(counts, dict)
+            )
+            + f" ({cache.get('file', gate.CHECK_CACHE_FILE)})"
+        )
     add(
         f"orphans   : {len(payload['orphans'])} audio file(s) with no manifest row"
         + (f" -- {', '.join(payload['orphans'])}" if payload["orphans"] else "")
@@ -542,6 +560,12 @@ def main(argv=None) -> int:
         help="delete CORRUPT files and drop their download-archive lines so a "
         "plain raveform_download.py re-run re-fetches them",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"re-decode and re-hash every file even where {gate.CHECK_CACHE_FILE} "
+        "holds results for its unchanged bytes",
+    )
     args = parser.parse_args(argv)
 
     if hasattr(sys.stdout, "reconfigure"):
@@ -553,7 +577,12 @@ def main(argv=None) -> int:
 
     gate.require_tools()
     started = time.time()
-    payload = validate(data_dir, workers=args.workers, checksums=not args.skip_checksums)
+    payload = validate(
+        data_dir,
+        workers=args.workers,
+        checksums=not args.skip_checksums,
+        cache=not args.no_cache,
+    )
     print_summary(payload)
     print(f"\nelapsed: {time.time() - started:.1f} s")
     print(f"report  : {data_dir / VALIDATION_JSON}")
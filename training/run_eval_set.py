@@ -53,6 +53,9 @@ from evaluate_against_labels import (  # noqa: E402
 from raveform_fetch_annotations import SEGMENTS_FILE, annotations_dir  # noqa: E402
 from select_eval_set import EVAL_SET_FILE, load_eval_set, verify_inputs  # noqa: E402
 
+from lib.analyser.section_model import FP32_HEAD, HEAD_VARIANTS  # noqa: E402
+from lib.section_chain import FEATURES, MERT_FEATURES  # noqa: E402
+
 BASELINE_FILE = REPO_ROOT / "training" / "eval_set_baseline.json"
 
 # Every granularity the run measures and prints.
@@ -254,14 +257,16 @@ class TrackRun(NamedTuple):
     wall_sec: float
 
 
-def simulate_report(mp3_path: str) -> tuple:
+def simulate_report(mp3_path: str, features: str | None = None,
+                    head: str | None = None) -> tuple:
     from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
     from simulate.fake_audio_client import FileAudioClient
     from simulate.runner import run_fast_simulation
 
     started = time.monotonic()
     client = FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, str(mp3_path))
-    _client, event_buffer, command_queue = asyncio.run(run_fast_simulation(client))
+    _client, event_buffer, command_queue = asyncio.run(
+        run_fast_simulation(client, features=features, head=head))
     report = event_buffer.to_report(command_queue.get_timing_log())
     return report, client.duration_sec, time.monotonic() - started
 
@@ -343,18 +348,86 @@ class Job(NamedTuple):
     data_dir: str
     track: dict
     sections: list
+    features: str = MERT_FEATURES
+    head: str = FP32_HEAD
+
+
+def shipped(features: str, head: str) -> bool:
+    return features == MERT_FEATURES and head == FP32_HEAD
+
+
+def decision_agreement(track_id: str, youtube_id: str, report: dict,
+                       reference: dict, sections: list) -> dict:
+    """How often the run commits the intent the shipped chain commits, beat by beat."""
+    def intents(which: dict) -> dict:
+        rows, _stats = join_track(track_id, youtube_id, which, sections)
+        return {round(row["t_song"], 3): row["intent_at_beat"] for row in rows}
+
+    ours, theirs = intents(report), intents(reference)
+    shared = sorted(set(ours) & set(theirs))
+    agreed = sum(ours[beat] == theirs[beat] for beat in shared)
+    return {"agreed_beats": agreed, "compared_beats": len(shared),
+            "agreement": round(agreed / len(shared), 6) if shared else 0.0}
 
 
 def run_job(job: Job) -> TrackRun:
+    mp3 = audio_path(Path(job.data_dir), job.track["youtube_id"])
+    report, song_sec, wall_sec = simulate_report(mp3, job.features, job.head)
+    result = scored_run(job, report, song_sec, wall_sec)
+    if shipped(job.features, job.head):
+        return result
+    # The reference replays the recorded MERT cells where it can; its wall is not ours.
+    reference, _song_sec, _wall_sec = simulate_report(mp3, MERT_FEATURES, FP32_HEAD)
+    track_id, youtube_id = job.track["track_id"], job.track["youtube_id"]
+    scores, _rows, _stats = score_report(track_id, youtube_id, reference,
+                                         job.sections)
+    result.entry["agreement"] = {
+        **decision_agreement(track_id, youtube_id, report, reference, job.sections),
+        "reference_macro_f1": round(scores[GATED_SPACE].macro_f1, 6),
+    }
+    return result
+
+
+def scored_run(job: Job, report: dict, song_sec: float, wall_sec: float) -> TrackRun:
     track_id, youtube_id = job.track["track_id"], job.track["youtube_id"]
-    report, song_sec, wall_sec = simulate_report(
-        audio_path(Path(job.data_dir), youtube_id))
     scores, rows, stats = score_report(track_id, youtube_id, report, job.sections)
     return TrackRun(track_id, youtube_id,
                     track_entry(report, scores, rows, youtube_id, song_sec, stats),
                     scores, wall_sec)
 
 
+def _file_client(job: Job):
+    from lib.audio_config import BUFFER_SIZE, SAMPLE_RATE
+    from simulate.fake_audio_client import FileAudioClient
+
+    return FileAudioClient(SAMPLE_RATE, BUFFER_SIZE, str(
+        audio_path(Path(job.data_dir), job.track["youtube_id"])))
+
+
+def run_batch(jobs: list, clients: list | None = None) -> list:
+    """One lockstep group: the section head runs once per round for every track.
+
+    Each track's report is its solo run's, byte for byte; the group's elapsed
+    wall is shared out by song length, since no track has a wall of its own.
+    ``clients`` are the jobs' file clients when the caller already has them
+    loaded, so their samples are not read a second time.
+    """
+    from simulate.batch import run_fast_simulation_batch
+
+    started = time.monotonic()
+    if clients is None:
+        clients = [_file_client(job) for job in jobs]
+    outcomes = asyncio.run(run_fast_simulation_batch(clients))
+    elapsed = time.monotonic() - started
+    total_song = sum(client.duration_sec for client in clients) or 1.0
+    runs = []
+    for job, (client, event_buffer, command_queue) in zip(jobs, outcomes):
+        report = event_buffer.to_report(command_queue.get_timing_log())
+        runs.append(scored_run(job, report, client.duration_sec,
+                               elapsed * client.duration_sec / total_song))
+    return runs
+
+
 def build_document(eval_set: dict, pipeline_sha_: str, entries: dict,
                    aggregate_metrics: dict, aggregate_spaces: dict | None = None,
                    score_tolerance: float = DEFAULT_SCORE_TOLERANCE,
@@ -516,7 +589,7 @@ WIDTH = 116
 
 
 def render_table(runs: list, aggregate_entry: dict, total_song: float,
-                 total_wall: float, workers: int = 1) -> str:
+                 total_wall: float, workers: int = 1, batch: int = 1) -> str:
     lines = [
         f'  {"track_id":<20}{"song":>7}{"wall":>7}{"x-rt":>7}{"beats":>7}'
         f'{"rows":>7}{"macroF1":>9}{"acc":>7}{"bF1":>7}{"crisp":>7}'
@@ -559,6 +632,11 @@ def render_table(runs: list, aggregate_entry: dict, total_song: float,
             f'  the aggregate wall is ELAPSED across {min(workers, len(runs))} '
             f'workers, so it is less than the per-track column sums'
         )
+    if batch > 1 and len(runs) > 1:
+        lines.append(
+            f'  tracks replayed in lockstep groups of up to {batch} share one '
+            f'elapsed wall, split across a group by song length'
+        )
     lines += render_spaces(runs, aggregate_entry)
     return "\n".join(lines)
 
@@ -625,18 +703,19 @@ def render_comparison(outcome: Comparison, baseline_path: Path) -> str:
     return "\n".join(lines)
 
 
-def build_jobs(data_dir: Path, tracks: list, sections_by_track: dict) -> list:
+def build_jobs(data_dir: Path, tracks: list, sections_by_track: dict,
+               features: str = MERT_FEATURES, head: str = FP32_HEAD) -> list:
     jobs = []
     for track in tracks:
         sections = sections_by_track.get(track["track_id"])
         if sections is None:
             raise RuntimeError(
                 f"{track['track_id']} has no annotation in {SEGMENTS_FILE}")
-        jobs.append(Job(str(data_dir), track, sections))
+        jobs.append(Job(str(data_dir), track, sections, features, head))
     return jobs
 
 
-def execute(jobs: list, workers: int, quiet: bool = False) -> list:
+def execute(jobs: list, workers: int, quiet: bool = False, batch: int = 1) -> list:
     total = len(jobs)
 
     def announce(index: int, result: TrackRun) -> None:
@@ -646,6 +725,9 @@ def execute(jobs: list, workers: int, quiet: bool = False) -> list:
         print(f"  [{index}/{total}] {result.track_id} {result.wall_sec:.1f}s "
               f"({speed:.0f}x realtime)", flush=True)
 
+    if batch > 1 and total > 1:
+        return execute_batched(jobs, batch, workers, announce)
+
     if workers <= 1 or total <= 1:
         results = []
         for index, job in enumerate(jobs, start=1):
@@ -664,8 +746,43 @@ def execute(jobs: list, workers: int, quiet: bool = False) -> list:
     return results
 
 
+def execute_batched(jobs: list, batch: int, workers: int, announce) -> list:
+    from simulate.batch import replayable
+
+    # A track without recorded cells needs the GPU once; its solo run records
+    # them, so it is scored from that run rather than replayed a second time.
+    # A replayable track's client has its samples loaded by the check, and the
+    # batch plays that same client; groups run as they fill, so only one
+    # group's audio is held at a time.
+    cold, warm, done = [], [], {}
+
+    def play(group: list) -> None:
+        for result in run_batch([job for job, _client in group],
+                                [client for _job, client in group]):
+            done[result.track_id] = result
+        group.clear()
+
+    for job in jobs:
+        client = _file_client(job)
+        if replayable(client) is not None:
+            cold.append(job)
+            continue
+        warm.append((job, client))
+        if len(warm) == batch:
+            play(warm)
+    if warm:
+        play(warm)
+    for result in execute(cold, workers, quiet=True):
+        done[result.track_id] = result
+    results = [done[job.track["track_id"]] for job in jobs]
+    for index, result in enumerate(results, start=1):
+        announce(index, result)
+    return results
+
+
 def run(data_dir: Path, eval_set_path: Path, only: list | None = None,
-        workers: int = 1, quiet: bool = False) -> tuple:
+        workers: int = 1, quiet: bool = False, batch: int = 1,
+        features: str = MERT_FEATURES, head: str = FP32_HEAD) -> tuple:
     eval_document = load_eval_set(Path(eval_set_path))
     tracks = select_tracks(eval_document, only)
     if not tracks:
@@ -676,9 +793,9 @@ def run(data_dir: Path, eval_set_path: Path, only: list | None = None,
         raise RuntimeError("; ".join(problems))
     verify_ground_truth(eval_document, Path(data_dir))
 
-    jobs = build_jobs(data_dir, tracks, load_sections(data_dir))
+    jobs = build_jobs(data_dir, tracks, load_sections(data_dir), features, head)
     started = time.monotonic()
-    runs = execute(jobs, workers, quiet=quiet)
+    runs = execute(jobs, workers, quiet=quiet, batch=batch)
     total_wall = time.monotonic() - started
     total_song = sum(result.entry["song_sec"] for result in runs)
 
@@ -692,9 +809,49 @@ def run(data_dir: Path, eval_set_path: Path, only: list | None = None,
         aggregate_spaces={space: space_block(corpus[space])
                           for space in REPORTED_SPACES},
     )
+    if not shipped(features, head):
+        document["features"] = features
+        document["head"] = head
+        document["aggregate"]["agreement"] = aggregate_agreement(runs)
     return document, runs, total_song, total_wall
 
 
+def aggregate_agreement(runs: list) -> dict:
+    agreed = sum(run.entry["agreement"]["agreed_beats"] for run in runs)
+    compared = sum(run.entry["agreement"]["compared_beats"] for run in runs)
+    return {"agreed_beats": agreed, "compared_beats": compared,
+            "agreement": round(agreed / compared, 6) if compared else 0.0}
+
+
+def against_mert(outcome: Comparison) -> Comparison:
+    """Another extractor's or head build's run read against the baseline: only the scores.
+
+    Its checksums and intent-change counts are expected to move; that they did
+    is the experiment, not a desync.  Whether decisions moved is the agreement.
+    """
+    return outcome._replace(checksum_drift=[], fact_drift=[])
+
+
+def render_agreement(runs: list, aggregate_entry: dict, features: str,
+                     head: str = FP32_HEAD) -> str:
+    lines = ["", f'  {features} features, {head} head against the shipped '
+                 f'chain, beat by beat',
+             f'  {"track_id":<20}{"agree":>9}{"beats":>8}{"macroF1":>9}'
+             f'{"ship":>8}{"delta":>8}',
+             "  " + "-" * 60]
+    for run in runs:
+        block = run.entry["agreement"]
+        lines.append(
+            f'  {run.track_id:<20}{block["agreement"]:>9.3f}'
+            f'{block["compared_beats"]:>8}{run.entry["macro_f1"]:>9.3f}'
+            f'{block["reference_macro_f1"]:>8.3f}'
+            f'{run.entry["macro_f1"] - block["reference_macro_f1"]:>+8.3f}')
+    total = aggregate_entry["agreement"]
+    lines.append(f'  {"(aggregate)":<20}{total["agreement"]:>9.3f}'
+                 f'{total["compared_beats"]:>8}')
+    return "\n".join(lines)
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
     parser.add_argument("--data-dir", type=Path, default=corpus_dir(),
@@ -723,6 +880,21 @@ def build_parser() -> argparse.ArgumentParser:
                              "either way, but a cold run holds several GB of "
                              "VRAM per worker and oversubscribing one card "
                              "wedges rather than slows (default: %(default)s)")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="simulate this many tracks in lockstep from their "
+                             "recorded cells, one section-head call per round "
+                             "for all of them; the reports are the solo runs' "
+                             "(default: %(default)s, every track on its own)")
+    parser.add_argument("--features", choices=FEATURES, default=MERT_FEATURES,
+                        help="the feature extractor the chain runs on; anything "
+                             "but mert is also run against the MERT chain for "
+                             "decision agreement, and gated on scores alone "
+                             "(default: %(default)s)")
+    parser.add_argument("--head", choices=HEAD_VARIANTS, default=FP32_HEAD,
+                        help="the section-head build: the exported graph or "
+                             "one written by training/nn/optimise_head.py; "
+                             "anything but fp32 is read like --features "
+                             "(default: %(default)s)")
     parser.add_argument("--quiet", action="store_true",
                         help="only the table and the verdict")
     return parser
@@ -740,6 +912,13 @@ def main(argv: list | None = None) -> int:
         if absent:
             print(absent, file=sys.stderr)
             return 2
+        if not shipped(args.features, args.head) and (args.write_baseline
+                                                      or args.batch > 1):
+            print(f"--features {args.features} --head {args.head} is read "
+                  f"against the shipped baseline; it cannot cut one, and "
+                  f"--batch replays recorded MERT cells through the fp32 head",
+                  file=sys.stderr)
+            return 2
         if args.write_baseline:
             refusal = partial_baseline_refusal(
                 select_tracks(document, only), document, Path(args.baseline),
@@ -754,14 +933,18 @@ def main(argv: list | None = None) -> int:
     try:
         result, runs, total_song, total_wall = run(
             args.data_dir, args.eval_set, only,
-            workers=args.workers, quiet=args.quiet)
+            workers=args.workers, quiet=args.quiet, batch=args.batch,
+            features=args.features, head=args.head)
     except RuntimeError as exc:
         print(f"{exc}", file=sys.stderr)
         return 2
 
     print()
     print(render_table(runs, result["aggregate"], total_song, total_wall,
-                       args.workers))
+                       args.workers, args.batch))
+    if not shipped(args.features, args.head):
+        print(render_agreement(runs, result["aggregate"], args.features,
+                               args.head))
 
     if args.write_baseline:
         write_json(Path(args.baseline), result)
@@ -783,6 +966,8 @@ def main(argv: list | None = None) -> int:
         return 2
 
     outcome = compare(baseline, result, args.score_tolerance, args.flicker_tolerance)
+    if not shipped(args.features, args.head):
+        outcome = against_mert(outcome)
     print(render_comparison(outcome, args.baseline))
     return 1 if outcome.failed else 0
 
@@ -161,12 +161,12 @@ def _instrument(app) -> dict:
     top = [started]
     read_ended = [None]
 
-    def tapped_read():
+    async def tapped_read():
         now = time.perf_counter()
         if read_ended[0] is not None:
             record["between_reads"].append((now - read_ended[0]) * 1000.0)
         try:
-            return read()
+            return await read()
         finally:
             read_ended[0] = time.perf_counter()
 